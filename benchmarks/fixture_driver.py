@@ -0,0 +1,214 @@
+"""
+🧪 오프라인 벤치마크용 고정 HTML 드라이버 / 로컬 서버
+- FixtureDriver: lxml 로 HTML 을 파싱해 Selenium WebDriver 의 일부(find_element(s), get_attribute, text ...)를 흉내냄
+  → 브라우저 없이 driver 를 받는 파서(extract_all_product_data, collect_urls_from_page)를 그대로 실행
+- FixtureServer: fixtures/ 디렉토리를 127.0.0.1 임의 포트로 서빙 (--browser 모드에서 headless Chrome 이 접속)
+"""
+
+import os
+import threading
+import urllib.request
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urljoin
+
+import lxml.html
+from cssselect import HTMLTranslator, SelectorError
+
+try:
+    from selenium.common.exceptions import NoSuchElementException
+except ImportError:
+    class NoSuchElementException(Exception):
+        """selenium 이 없을 때 사용하는 대체 예외"""
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+_translator = HTMLTranslator()
+_xpath_cache = {}
+
+def load_fixture(platform, kind):
+    """fixtures/<플랫폼>/<종류>.html 읽기 (kind: product / list)"""
+    with open(os.path.join(FIXTURE_DIR, platform, f"{kind}.html"), 'r', encoding='utf-8') as f:
+        return f.read()
+
+def to_xpath(by, value):
+    """Selenium (By, 값) → lxml XPath (CSS 변환 결과는 캐시)"""
+    if by == "xpath":
+        return value
+    if by == "css selector":
+        css = value
+    elif by == "tag name":
+        css = value
+    elif by == "class name":
+        css = "." + value
+    elif by == "id":
+        css = "#" + value
+    elif by == "name":
+        css = f"[name='{value}']"
+    elif by == "link text":
+        return f".//a[normalize-space(.)='{value}']"
+    elif by == "partial link text":
+        return f".//a[contains(., '{value}')]"
+    else:
+        raise ValueError(f"지원하지 않는 로케이터: {by}")
+
+    if css not in _xpath_cache:
+        try:
+            _xpath_cache[css] = _translator.css_to_xpath(css)
+        except SelectorError:
+            _xpath_cache[css] = None
+    return _xpath_cache[css]
+
+def _element_text(element):
+    """Selenium element.text 와 비슷한 줄 단위 텍스트 (script/style 제외)"""
+    texts = []
+    for node in element.iter():
+        if node.tag in ("script", "style"):
+            continue
+        if isinstance(node.tag, str) and node.text and node.text.strip():
+            texts.append(node.text.strip())
+        if node is not element and node.tail and node.tail.strip():
+            texts.append(node.tail.strip())
+    return "\n".join(texts)
+
+# =============================================================================
+# WebDriver 대체
+# =============================================================================
+
+class _Searchable:
+    """find_element(s) 공통 구현 (self._node 기준 검색)"""
+
+    def find_elements(self, by="css selector", value=None):
+        xpath = to_xpath(by, value)
+        if not xpath:
+            return []
+        try:
+            nodes = self._node.xpath(xpath)
+        except Exception:
+            return []
+        return [FixtureElement(node, self._driver) for node in nodes if isinstance(getattr(node, "tag", None), str)]
+
+    def find_element(self, by="css selector", value=None):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"{by}={value}")
+        return elements[0]
+
+class FixtureElement(_Searchable):
+    """WebElement 대체 (읽기 전용)"""
+
+    def __init__(self, node, driver):
+        self._node = node
+        self._driver = driver
+
+    @property
+    def text(self):
+        return _element_text(self._node)
+
+    @property
+    def tag_name(self):
+        return self._node.tag
+
+    def get_attribute(self, name):
+        if name in ("textContent", "innerText"):
+            return self.text
+        if name == "outerHTML":
+            return lxml.html.tostring(self._node, encoding="unicode")
+        value = self._node.get(name)
+        # Selenium 은 href/src 를 절대 URL 로 반환
+        if value is not None and name in ("href", "src"):
+            return urljoin(self._driver.current_url, value)
+        return value
+
+    def is_displayed(self):
+        return True
+
+    def click(self):
+        pass
+
+class FixtureDriver(_Searchable):
+    """고정 HTML 을 파싱해 두고 WebDriver 처럼 조회만 허용하는 드라이버
+
+    pages: {URL: HTML} - get(url) 시 먼저 찾고, 없으면 HTTP 로 가져옴 (FixtureServer URL 등)
+    execute_script 는 스크립트를 실행하지 않음 (스크롤 높이 조회는 0 반환)
+    """
+
+    def __init__(self, pages=None):
+        self.pages = dict(pages or {})
+        self.current_url = "about:blank"
+        self.page_source = "<html><body></body></html>"
+        self._node = lxml.html.fromstring(self.page_source)
+        self._driver = self
+
+    def load_html(self, html, url="about:blank"):
+        self.page_source = html
+        self.current_url = url
+        self._node = lxml.html.fromstring(html)
+
+    def get(self, url):
+        html = self.pages.get(url)
+        if html is None:
+            with urllib.request.urlopen(url, timeout=10) as response:
+                html = response.read().decode('utf-8')
+        self.load_html(html, url)
+
+    @property
+    def title(self):
+        titles = self._node.xpath("//title")
+        return titles[0].text_content().strip() if titles else ""
+
+    def execute_script(self, script, *args):
+        if "scrollHeight" in script and script.strip().startswith("return"):
+            return 0
+        return None
+
+    def implicitly_wait(self, seconds):
+        pass
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def quit(self):
+        pass
+
+    close = quit
+
+# =============================================================================
+# 로컬 fixture 서버
+# =============================================================================
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+class FixtureServer:
+    """fixtures/ 를 http://127.0.0.1:<포트>/ 로 서빙 (with 문 지원)"""
+
+    def __init__(self, directory=FIXTURE_DIR, port=0):
+        self.directory = directory
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        handler = partial(_QuietHandler, directory=self.directory)
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def url(self, platform, kind):
+        return f"http://127.0.0.1:{self.port}/{platform}/{kind}.html"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,549 @@
+"""
+⏱️ 오프라인 벤치마크 (라이브 사이트 접속 없음)
+- 파서: fixtures/ 의 KLOOK / KKday / 마이리얼트립 상품·목록 HTML 을 HTML 파서에 직접 넣거나
+        FixtureDriver(lxml WebDriver 대체) 또는 --browser 시 로컬 서버 + headless Chrome 으로 실행
+- 저장: save_to_csv_klook, 순위 저장소(RankMapper 저널), KlookToUnifiedConverter.convert_klook_data, 가격 이력(product_history)
+- 규모: 1k / 10k / 100k (--scales 로 변경), 결과는 JSON 으로 저장해 커밋 간 비교 (--compare)
+
+사용법:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --scales 1000 --only parse,convert
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<이전 결과>.json
+    python benchmarks/run_benchmarks.py --browser            # headless Chrome (selenium 필요)
+    python benchmarks/run_benchmarks.py --record klook product <URL>   # fixture 갱신
+"""
+
+import os
+import sys
+import io
+import csv
+import json
+import math
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+import contextlib
+import urllib.request
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "travel_comparison_engine"))
+sys.path.insert(0, BENCH_DIR)
+
+from fixture_driver import FIXTURE_DIR, FixtureDriver, FixtureServer, load_fixture
+
+DEFAULT_SCALES = [1000, 10000, 100000]
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+REGRESSION_THRESHOLD = 1.2      # 이전 결과 대비 항목당 시간이 이 배수 이상이면 회귀
+SAMPLE_CSV = os.path.join(REPO_ROOT, "test", "data", "아시아", "일본", "구마모토", "klook_구마모토_products.csv")
+BENCH_CITY = "도쿄"
+
+# =============================================================================
+# 실행 환경
+# =============================================================================
+
+class BenchContext:
+    """벤치마크 공용 상태 (작업 디렉토리, fixture, 드라이버)"""
+
+    def __init__(self, workspace, browser=False):
+        self.workspace = workspace
+        self.browser = browser
+        self.server = None
+        self.driver = None
+        self.fixtures = {
+            (platform_name, kind): load_fixture(platform_name, kind)
+            for platform_name in ("klook", "kkday", "myrealtrip")
+            for kind in ("product", "list")
+        }
+
+    def start(self):
+        if self.browser:
+            # headless Chrome 은 로컬 서버의 fixture 에 접속
+            from klook.src.scraper.driver_manager import setup_driver
+            self.server = FixtureServer().start()
+            self.driver = setup_driver(headless=True)
+            if self.driver is None:
+                raise RuntimeError("headless Chrome 드라이버 생성 실패")
+        else:
+            self.driver = FixtureDriver()
+
+    def open_page(self, platform_name, kind):
+        """드라이버에 fixture 페이지 1개 로드"""
+        if self.browser:
+            self.driver.get(self.server.url(platform_name, kind))
+        else:
+            self.driver.load_html(self.fixtures[(platform_name, kind)], f"https://fixture.local/{platform_name}/{kind}.html")
+
+    def stop(self):
+        if self.browser and self.driver is not None:
+            self.driver.quit()
+        if self.server is not None:
+            self.server.stop()
+
+    @contextlib.contextmanager
+    def scratch_dir(self, name):
+        """벤치마크별 빈 작업 디렉토리로 이동 (상대 경로로 저장하는 모듈용)"""
+        path = os.path.join(self.workspace, name)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        previous = os.getcwd()
+        os.chdir(path)
+        try:
+            yield path
+        finally:
+            os.chdir(previous)
+            shutil.rmtree(path, ignore_errors=True)
+
+class SkipBenchmark(Exception):
+    """현재 환경에서 실행할 수 없는 벤치마크"""
+
+@contextlib.contextmanager
+def no_sleep():
+    """파서의 사람 흉내 대기(time.sleep) 제거 - 파싱 비용만 측정"""
+    original = time.sleep
+    time.sleep = lambda seconds: None
+    try:
+        yield
+    finally:
+        time.sleep = original
+
+def _quiet():
+    """측정 중 모듈 로그 출력 억제"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+def _product_url(platform_name, i):
+    if platform_name == "klook":
+        return f"https://www.klook.com/ko/activity/{100000 + i}-bench-tour-tokyo/"
+    if platform_name == "kkday":
+        return f"https://www.kkday.com/ko/product/{100000 + i}-bench-tour"
+    return f"https://www.myrealtrip.com/offers/{100000 + i}"
+
+def _sample_rows():
+    """변환/저장 벤치마크용 원본 KLOOK 행 (test/data 샘플)"""
+    with open(SAMPLE_CSV, 'r', encoding='utf-8-sig') as f:
+        rows = [row for row in csv.DictReader(f) if row.get("URL")]
+    if not rows:
+        raise SkipBenchmark(f"샘플 CSV 비어 있음: {SAMPLE_CSV}")
+    return rows
+
+# =============================================================================
+# 벤치마크 본체 - (ctx, scale) 를 받아 측정할 함수 반환 (준비 작업은 측정 밖)
+# 측정 후 정리 작업이 있으면 (측정 함수, 정리 함수) 반환
+# =============================================================================
+
+def bench_klook_parse_html(ctx, scale):
+    from klook.src.scraper.http_parsers import parse_product_html, HTTP_EXTRACTION_AVAILABLE
+    if not HTTP_EXTRACTION_AVAILABLE:
+        raise SkipBenchmark("requests/lxml 없음")
+    html = ctx.fixtures[("klook", "product")]
+
+    def run():
+        for i in range(scale):
+            parse_product_html(html, _product_url("klook", i), rank=i + 1, city_name=BENCH_CITY)
+    return run
+
+def bench_kkday_parse_html(ctx, scale):
+    from kkday.src.scraper.http_parsers import parse_product_html, HTTP_EXTRACTION_AVAILABLE
+    if not HTTP_EXTRACTION_AVAILABLE:
+        raise SkipBenchmark("requests/lxml 없음")
+    html = ctx.fixtures[("kkday", "product")]
+
+    def run():
+        for i in range(scale):
+            parse_product_html(html, _product_url("kkday", i), rank=i + 1, city_name=BENCH_CITY)
+    return run
+
+def _extract_benchmark(ctx, scale, platform_name, module):
+    if not module.SELENIUM_AVAILABLE:
+        raise SkipBenchmark("selenium 없음 (driver 기반 파서는 By 로케이터 필요)")
+    ctx.open_page(platform_name, "product")
+
+    def run():
+        with no_sleep():
+            for i in range(scale):
+                module.extract_all_product_data(ctx.driver, _product_url(platform_name, i), rank=i + 1, city_name=BENCH_CITY)
+    return run
+
+def bench_klook_extract_all_product_data(ctx, scale):
+    import klook.src.scraper.parsers as parsers
+    return _extract_benchmark(ctx, scale, "klook", parsers)
+
+def bench_kkday_extract_all_product_data(ctx, scale):
+    import kkday.src.scraper.parsers as parsers
+    return _extract_benchmark(ctx, scale, "kkday", parsers)
+
+def bench_myrealtrip_product_fields(ctx, scale):
+    import myrealtrip.src.scraper.parsers as parsers
+    if not parsers.SELENIUM_AVAILABLE:
+        raise SkipBenchmark("selenium 없음 (driver 기반 파서는 By 로케이터 필요)")
+    ctx.open_page("myrealtrip", "product")
+
+    def run():
+        for _ in range(scale):
+            parsers.clean_price(parsers.get_price(ctx.driver))
+            parsers.clean_rating(parsers.get_rating(ctx.driver))
+            parsers.get_product_name(ctx.driver)
+            parsers.get_review_count(ctx.driver)
+    return run
+
+def _collect_benchmark(ctx, scale, platform_name, collect, selenium_available):
+    """scale = 수집할 URL 수 → 목록 페이지 스캔 횟수로 환산"""
+    if not selenium_available:
+        raise SkipBenchmark("selenium 없음 (driver 기반 수집기는 By 로케이터 필요)")
+    ctx.open_page(platform_name, "list")
+    with _quiet():
+        per_page = len(collect(ctx.driver))
+    if per_page == 0:
+        raise SkipBenchmark(f"{platform_name} 목록 fixture 에서 URL 을 찾지 못함")
+    calls = math.ceil(scale / per_page)
+
+    def run():
+        for _ in range(calls):
+            collect(ctx.driver)
+    return run
+
+def bench_klook_collect_urls_from_page(ctx, scale):
+    import klook.src.scraper.url_manager as url_manager
+    return _collect_benchmark(ctx, scale, "klook", lambda driver: url_manager.collect_urls_from_page(driver, BENCH_CITY),
+                              url_manager.SELENIUM_AVAILABLE)
+
+def bench_kkday_collect_urls_from_page(ctx, scale):
+    import kkday.src.scraper.url_manager as url_manager
+    return _collect_benchmark(ctx, scale, "kkday", lambda driver: url_manager.collect_urls_from_page(driver, BENCH_CITY),
+                              url_manager.SELENIUM_AVAILABLE)
+
+def bench_myrealtrip_collect_urls(ctx, scale):
+    try:
+        import myrealtrip.src.scraper.url_manager as url_manager
+    except SyntaxError as e:
+        raise SkipBenchmark(f"url_manager 가져오기 실패: {e}")
+    return _collect_benchmark(ctx, scale, "myrealtrip", url_manager.collect_with_single_scan,
+                              url_manager.SELENIUM_AVAILABLE)
+
+def bench_save_to_csv_klook(ctx, scale):
+    import klook.src.utils.file_handler as file_handler
+    rows = _sample_rows()
+    products = []
+    for i in range(scale):
+        product = dict(rows[i % len(rows)])
+        product["URL"] = _product_url("klook", i)
+        product["번호"] = ""
+        products.append(product)
+
+    def run():
+        for product in products:
+            file_handler.save_to_csv_klook(product, BENCH_CITY)
+        file_handler.close_product_stores()
+    return run
+
+def bench_rank_mapper_add_mapping(ctx, scale):
+    """매핑 scale 개 추가 (저널 기록 + 인덱스 갱신) 후 스냅샷 압축"""
+    from klook.src.scraper.ranking import RankMapper
+    from klook.src.utils.journal_store import close_all_journal_stores
+    mapper = RankMapper()
+
+    def run():
+        for i in range(scale):
+            mapper.add_mapping(_product_url("klook", i), i + 1, BENCH_CITY, tab_name="전체")
+        mapper.save_mappings()
+    return run, close_all_journal_stores
+
+def bench_rank_mapper_load(ctx, scale):
+    """저널 scale 줄 재생 + 순위 인덱스 재구성 (압축 전 재시작 상황)"""
+    from klook.src.scraper.ranking import RankMapper
+    from klook.src.utils.journal_store import JOURNAL_SUFFIX, close_all_journal_stores
+    with open("rank_mapping.json" + JOURNAL_SUFFIX, 'w', encoding='utf-8') as f:
+        for i in range(scale):
+            f.write(json.dumps({"op": "add", "url": _product_url("klook", i), "hash": f"{i:012x}", "city": BENCH_CITY,
+                                "rank": i + 1, "tab": "전체", "added_at": "", "seq": i + 1}, ensure_ascii=False) + "\n")
+
+    def run():
+        RankMapper()
+    return run, close_all_journal_stores
+
+def bench_rank_mapper_range_queries(ctx, scale):
+    """매핑 scale 개에서 10개 폭 범위 조회 + 빈 순위 조회 scale 회"""
+    from klook.src.scraper.ranking import RankMapper
+    from klook.src.utils.journal_store import close_all_journal_stores
+    mapper = RankMapper()
+    for i in range(scale):
+        mapper.add_mapping(_product_url("klook", i), (i * 7) % scale + 1, BENCH_CITY, tab_name="전체")
+
+    def run():
+        for i in range(scale):
+            start = (i * 13) % scale + 1
+            mapper.get_ranks_in_range(BENCH_CITY, start, start + 9, tab_name="전체")
+            mapper.get_next_gap(BENCH_CITY, tab_name="전체", start_from=start)
+    return run, close_all_journal_stores
+
+def bench_journal_concurrent_append_compact(ctx, scale):
+    """4개 스레드가 scale 개 추가 + 동기 압축 반복 (save_mappings/flush_city/close 상황) → 재로드 후 유실 0 확인"""
+    import threading
+    from klook.src.utils.journal_store import JsonJournalStore
+
+    def apply_op(state, op):
+        state[op["key"]] = op["value"]
+
+    def run():
+        store = JsonJournalStore("journal_concurrency.json", apply_op, compact_min_bytes=4096)
+        writers = 4
+        done = threading.Event()
+
+        def append(worker):
+            for i in range(worker, scale, writers):
+                store.append({"key": str(i), "value": i})
+
+        def compact():
+            while not done.is_set():
+                store.compact(wait=True)
+
+        compactor = threading.Thread(target=compact)
+        threads = [threading.Thread(target=append, args=(worker,)) for worker in range(writers)]
+        compactor.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        done.set()
+        compactor.join()
+        store.close()
+
+        reloaded = JsonJournalStore("journal_concurrency.json", apply_op).state
+        if len(reloaded) != scale:
+            raise AssertionError(f"저널 유실: {len(reloaded)}/{scale}")
+    return run
+
+def bench_convert_klook_data(ctx, scale):
+    from unified_travel_database import KlookToUnifiedConverter
+    rows = _sample_rows()
+    products = []
+    for i in range(scale):
+        product = dict(rows[i % len(rows)])
+        product["URL"] = _product_url("klook", i)
+        products.append(product)
+
+    def run():
+        for product in products:
+            KlookToUnifiedConverter.convert_klook_data(product)
+    return run
+
+def bench_history_two_crawls(ctx, scale):
+    """수집일시가 다른 CSV 2개(가격 변경) + 첫 CSV 재적재 → 상품별 이력 구간 2개, 시각은 수집일시 기준인지 확인"""
+    from unified_travel_database import UnifiedTravelDatabase
+    rows = _sample_rows()
+    crawls = [("2025-01-01 09:00:00", 10000), ("2025-03-01 09:00:00", 20000)]
+    csv_paths = []
+    for collected_at, base_price in crawls:
+        os.makedirs(collected_at[:10])
+        csv_path = os.path.join(collected_at[:10], f"klook_{BENCH_CITY}_products.csv")
+        with open(csv_path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            for i in range(scale):
+                row = dict(rows[i % len(rows)])
+                row.update({"URL": _product_url("klook", i), "가격_정제": f"{base_price + i:,}원", "수집_시간": collected_at})
+                writer.writerow(row)
+        csv_paths.append(csv_path)
+    # KST 09:00 = UTC 00:00
+    expected = [int(datetime.fromisoformat(f"{collected_at[:10]}T00:00:00+00:00").timestamp()) for collected_at, _ in crawls]
+
+    def run():
+        db = UnifiedTravelDatabase("history.db")
+        try:
+            for csv_path in csv_paths + csv_paths[:1]:
+                db.bulk_load_csvs([csv_path])
+            runs = db.conn.execute(
+                "SELECT product_id, GROUP_CONCAT(first_ts || '-' || last_ts) FROM "
+                "(SELECT product_id, first_ts, last_ts FROM product_history ORDER BY product_id, first_ts) "
+                "GROUP BY product_id"
+            ).fetchall()
+        finally:
+            db.close()
+        want = f"{expected[0]}-{expected[0]},{expected[1]}-{expected[1]}"
+        wrong = [row for row in runs if row[1] != want]
+        if len(runs) != scale or wrong:
+            raise AssertionError(f"이력 구간 불일치: 상품 {len(runs)}/{scale}, 예: {[tuple(row) for row in wrong[:1]]} (기대 {want})")
+    return run
+
+# (이름, 그룹, 함수, 작업 디렉토리 필요 여부)
+BENCHMARKS = [
+    ("klook.parse_product_html", "parse", bench_klook_parse_html, True),
+    ("kkday.parse_product_html", "parse", bench_kkday_parse_html, True),
+    ("klook.extract_all_product_data", "extract", bench_klook_extract_all_product_data, True),
+    ("kkday.extract_all_product_data", "extract", bench_kkday_extract_all_product_data, True),
+    ("myrealtrip.product_fields", "extract", bench_myrealtrip_product_fields, False),
+    ("klook.collect_urls_from_page", "collect", bench_klook_collect_urls_from_page, False),
+    ("kkday.collect_urls_from_page", "collect", bench_kkday_collect_urls_from_page, False),
+    ("myrealtrip.collect_with_single_scan", "collect", bench_myrealtrip_collect_urls, False),
+    ("klook.save_to_csv_klook", "persist", bench_save_to_csv_klook, True),
+    ("klook.RankMapper.add_mapping", "rank", bench_rank_mapper_add_mapping, True),
+    ("klook.RankMapper.load", "rank", bench_rank_mapper_load, True),
+    ("klook.RankMapper.range_queries", "rank", bench_rank_mapper_range_queries, True),
+    ("klook.JsonJournalStore.concurrent_append_compact", "persist", bench_journal_concurrent_append_compact, True),
+    ("KlookToUnifiedConverter.convert_klook_data", "convert", bench_convert_klook_data, False),
+    ("UnifiedTravelDatabase.history_two_crawls", "persist", bench_history_two_crawls, True),
+]
+
+# =============================================================================
+# 실행 / 저장 / 비교
+# =============================================================================
+
+def run_one(ctx, name, factory, needs_dir, scale):
+    """벤치마크 1개 실행 → 결과 dict"""
+    result = {"name": name, "scale": scale}
+    scratch = ctx.scratch_dir(f"{name}_{scale}") if needs_dir else contextlib.nullcontext()
+    try:
+        with scratch, _quiet():
+            run = factory(ctx, scale)
+            run, teardown = run if isinstance(run, tuple) else (run, None)
+            try:
+                started = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - started
+            finally:
+                if teardown:
+                    teardown()
+    except SkipBenchmark as e:
+        result.update({"status": "skipped", "note": str(e)})
+        return result
+    except Exception as e:
+        result.update({"status": "error", "note": f"{type(e).__name__}: {e}"})
+        return result
+
+    result.update({
+        "status": "ok",
+        "seconds": round(elapsed, 6),
+        "per_item_us": round(elapsed / scale * 1e6, 3),
+        "items_per_sec": round(scale / elapsed, 1) if elapsed > 0 else None,
+    })
+    return result
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+def run_benchmarks(scales=None, only=None, browser=False):
+    """선택한 벤치마크 실행 → 결과 문서 (JSON 직렬화 가능)"""
+    scales = scales or DEFAULT_SCALES
+    selected = [
+        entry for entry in BENCHMARKS
+        if not only or any(key == entry[1] or key in entry[0] for key in only)
+    ]
+
+    workspace = tempfile.mkdtemp(prefix="travel_bench_")
+    ctx = BenchContext(workspace, browser=browser)
+    results = []
+    try:
+        ctx.start()
+        for name, group, factory, needs_dir in selected:
+            for scale in scales:
+                result = run_one(ctx, name, factory, needs_dir, scale)
+                result["group"] = group
+                results.append(result)
+                if result["status"] == "ok":
+                    print(f"   ⏱️ {name:<45} {scale:>7,}개  {result['seconds']:>9.3f}s  {result['per_item_us']:>10.1f}µs/개")
+                else:
+                    print(f"   ⏭️ {name:<45} {scale:>7,}개  {result['status']}: {result['note']}")
+                    break  # 건너뛴/실패한 벤치마크는 더 큰 규모도 같은 결과
+    finally:
+        ctx.stop()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    return {
+        "created_at": datetime.now().isoformat(),
+        "git_commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "driver": "chrome-headless" if browser else "fixture-lxml",
+        "scales": scales,
+        "results": results,
+    }
+
+def save_results(report, output=None):
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"bench_{stamp}_{report.get('git_commit') or 'nogit'}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"💾 결과 저장: {output}")
+    return output
+
+def compare_results(baseline_path, report, threshold=REGRESSION_THRESHOLD):
+    """이전 결과와 항목당 시간 비교 → 회귀 목록 [(이름, 규모, 배수), ...]"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(r["name"], r["scale"]): r for r in baseline.get("results", []) if r.get("status") == "ok"}
+
+    print(f"\n📊 비교: {baseline.get('git_commit')} → {report.get('git_commit')} (회귀 기준 {threshold:.2f}배)")
+    regressions = []
+    for result in report["results"]:
+        old = previous.get((result["name"], result["scale"]))
+        if result.get("status") != "ok" or old is None or not old.get("per_item_us"):
+            continue
+        ratio = result["per_item_us"] / old["per_item_us"]
+        mark = "🔺" if ratio >= threshold else ("🔻" if ratio <= 1 / threshold else "  ")
+        print(f"   {mark} {result['name']:<45} {result['scale']:>7,}개  "
+              f"{old['per_item_us']:>10.1f} → {result['per_item_us']:>10.1f}µs  ({ratio:.2f}배)")
+        if ratio >= threshold:
+            regressions.append((result["name"], result["scale"], round(ratio, 2)))
+
+    if regressions:
+        print(f"⚠️ 회귀 {len(regressions)}건")
+    else:
+        print("✅ 회귀 없음")
+    return regressions
+
+def record_fixture(platform_name, kind, url):
+    """라이브 페이지를 fixtures/<플랫폼>/<종류>.html 로 저장 (fixture 갱신용, 벤치마크 실행과 별개)"""
+    request = urllib.request.Request(url, headers={
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36",
+        "Accept-Language": "ko-KR,ko;q=0.9",
+    })
+    with urllib.request.urlopen(request, timeout=30) as response:
+        html = response.read().decode('utf-8', errors='replace')
+    path = os.path.join(FIXTURE_DIR, platform_name, f"{kind}.html")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    print(f"💾 fixture 저장: {path} ({len(html):,}자)")
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="오프라인 파서/저장 벤치마크")
+    parser.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES),
+                        help="쉼표로 구분한 규모 (기본 1000,10000,100000)")
+    parser.add_argument("--only", default="", help="그룹(parse/extract/collect/persist/rank/convert) 또는 이름 일부, 쉼표 구분")
+    parser.add_argument("--browser", action="store_true", help="로컬 fixture 서버 + headless Chrome 사용")
+    parser.add_argument("--output", help="결과 JSON 경로 (기본 benchmarks/results/)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="회귀 판정 배수")
+    parser.add_argument("--record", nargs=3, metavar=("PLATFORM", "KIND", "URL"), help="라이브 페이지를 fixture 로 저장")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record_fixture(*args.record)
+        return 0
+
+    scales = [int(value) for value in args.scales.split(",") if value.strip()]
+    only = [value.strip() for value in args.only.split(",") if value.strip()]
+
+    print(f"🚀 벤치마크 시작: 규모 {scales}, 드라이버 {'headless Chrome' if args.browser else 'lxml fixture'}")
+    report = run_benchmarks(scales, only, browser=args.browser)
+    save_results(report, args.output)
+
+    if args.compare:
+        regressions = compare_results(args.compare, report, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,6 +24,8 @@ import hashlib
 from datetime import datetime    
 from typing import List, Dict, Tuple, Optional
 
+from .utils.url_index import get_url_index
+
 # 호환성을 위한 조건부 import
 try:
     from PIL import Image
@@ -77,6 +79,10 @@ CONFIG = {
     "HASH_LENGTH": 12,             
     "KEEP_CSV_SYSTEM": True,       
 
+    # 위치 학습 DB write-behind 설정
+    "LOCATION_FLUSH_EVERY": 20,    # N회 학습마다 저장
+    "LOCATION_FLUSH_INTERVAL": 30, # 또는 T초마다 저장
+
     # V2 3-tier URL 시스템 설정
     "USE_V2_URL_SYSTEM": True,     
     "V2_URL_COLLECTED": "url_collected",    
@@ -97,6 +103,32 @@ CONFIG = {
     
     "MAX_PRODUCTS_PER_CITY": 1,     
     
+    # HTTP 우선 상세 추출 (필수 필드 누락 시 Selenium 폴백)
+    "HTTP_FIRST_EXTRACTION": True,
+    "HTTP_TIMEOUT": 10,
+    "HTTP_POOL_SIZE": 10,          # requests 커넥션 풀 크기
+    
+    # 단계별 소요 시간 계측 (URL당 1줄 JSON Lines + 선택적 Prometheus /metrics)
+    "METRICS_ENABLED": True,
+    "METRICS_FILE": "metrics/kkday_crawl_metrics.jsonl",
+    "METRICS_PROMETHEUS_PORT": None,   # 예: 9108 → http://127.0.0.1:9108/metrics
+    
+    # 이미지 파이프라인 (다운로드 스레드 풀 + 리사이즈 프로세스 풀)
+    "IMAGE_FETCH_WORKERS": 6,      # 동시 다운로드 수
+    "IMAGE_PROCESS_WORKERS": 2,    # 리사이즈/인코딩 프로세스 수 (0이면 다운로드 스레드에서 처리)
+    "IMAGE_MAX_PENDING": 64,       # 대기 작업 상한 (초과 시 submit 대기)
+    
+    # 콘텐츠 주소 이미지 저장소 (URL/픽셀 해시 중복은 다운로드·저장 생략)
+    "IMAGE_STORE_ENABLED": True,
+    "IMAGE_STORE_DIR": None,       # None 이면 ./image_store (KLOOK과 같은 경로를 지정하면 플랫폼 간 공유)
+    "IMAGE_STORE_LINK_MODE": "hardlink",  # "hardlink": 상품별 파일 생성 / "manifest": 매니페스트 항목만
+    "IMAGE_PHASH_DEDUP": False,    # 지각 해시로 거의 같은 이미지도 재사용
+    "IMAGE_PHASH_DISTANCE": 4,     # 최대 해밍 거리 (64비트 dHash)
+    
+    # Sitemap 스트리밍 수집 (ETag/Last-Modified 조건부 GET)
+    "SITEMAP_CONDITIONAL_GET": True,
+    "SITEMAP_STATE_PATH": "url_collections/sitemap_state.json",
+    
     # 동적 User-Agent 시스템 (최신 버전들)   
     "USER_AGENTS": [
       # Windows
@@ -425,35 +457,26 @@ def get_url_hash(url):
     return hashlib.md5(url.encode('utf-8')).hexdigest()[:hash_length]
 
 def is_url_processed_fast(url, city_name):
-    """해시 파일 존재 여부로 초고속 중복 체크"""
+    """도시별 URL 완료 인덱스(SQLite)로 초고속 중복 체크"""
     if not CONFIG.get("USE_HASH_SYSTEM", True):
         return False
         
     url_hash = get_url_hash(url)
-    hash_file = os.path.join("hash_index", city_name, f"{url_hash}.done")
-    return os.path.exists(hash_file)
+    return get_url_index(city_name, hash_length=CONFIG.get("HASH_LENGTH", 12)).contains(url_hash)
 
 def mark_url_processed_fast(url, city_name, product_number=None, rank=None, product_id=None):
-    """해시 파일 생성으로 완료 표시"""
+    """도시별 URL 완료 인덱스(SQLite)에 완료 표시"""
     if not CONFIG.get("USE_HASH_SYSTEM", True):
         return False
         
-    url_hash = get_url_hash(url)
-    hash_dir = os.path.join("hash_index", city_name)
-    os.makedirs(hash_dir, exist_ok=True)
-    
-    hash_file = os.path.join(hash_dir, f"{url_hash}.done")
-    with open(hash_file, 'w', encoding='utf-8') as f:
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        f.write(f"URL: {url}\n")
-        f.write(f"Product: {product_number}\n")
-        if product_id is not None:
-            f.write(f"ProductID: {product_id}\n")
-        if rank is not None:
-            f.write(f"Rank: {rank}\n")
-        f.write(f"City: {city_name}\n")
-        f.write(f"Completed: {timestamp}\n")
+    index = get_url_index(city_name, hash_length=CONFIG.get("HASH_LENGTH", 12))
+    return index.mark(url, product_number=product_number, rank=rank, product_id=product_id)
+
+def mark_urls_processed_fast(records, city_name):
+    """여러 URL을 한 번에 완료 표시 (records: URL 또는 dict 목록)"""
+    if not CONFIG.get("USE_HASH_SYSTEM", True):
+        return 0
     
-    return True
+    return get_url_index(city_name, hash_length=CONFIG.get("HASH_LENGTH", 12)).mark_many(records)
 
 print("✅ KKday config.py 로드 완료: 기본 설정 및 도시 정보 시스템 준비!")
\ No newline at end of file
@@ -11,10 +11,12 @@ import re
 from datetime import datetime
 
 from ..config import CONFIG, SELENIUM_AVAILABLE
-from ..utils.file_handler import create_product_data_structure, save_to_csv_kkday, get_dual_image_urls_kkday, download_and_save_image_kkday, ensure_directory_structure
+from ..utils.crawl_metrics import get_crawl_metrics
+from ..utils.file_handler import create_product_data_structure, save_to_csv_kkday, get_dual_image_urls_kkday, enqueue_dual_images_kkday, flush_image_downloads_kkday, get_smart_image_path, ensure_directory_structure
 from .driver_manager import setup_driver, go_to_main_page, find_and_fill_search, click_search_button, handle_kkday_cookie_popup, handle_popup, smart_scroll_selector
 from .url_manager import collect_urls_from_page, get_pagination_urls, is_url_already_processed, mark_url_as_processed, go_to_next_page
 from .parsers import extract_all_product_data, validate_product_data
+from .http_parsers import extract_product_http
 from .ranking import save_url_with_rank, get_next_start_rank
 from . import human_scroll_patterns
 
@@ -42,8 +44,16 @@ class KKdayCrawler:
             "error_count": 0,
             "skip_count": 0,
             "urls_collected": 0,
-            "current_rank": 0
+            "current_rank": 0,
+            "http_extracted": 0,
+            "selenium_fallback": 0
         }
+        # 단계별 소요 시간 히스토그램 + URL 추적 (JSON Lines / Prometheus)
+        self.metrics = get_crawl_metrics(
+            "kkday",
+            path=CONFIG.get("METRICS_FILE") if CONFIG.get("METRICS_ENABLED", True) else None,
+            prometheus_port=CONFIG.get("METRICS_PROMETHEUS_PORT"),
+        )
 
     def initialize(self):
         """크롤러 초기화"""
@@ -230,25 +240,52 @@ class KKdayCrawler:
             return 1
 
     def crawl_product(self, url, rank=None):
+        """개별 상품 크롤링 (단계별 소요 시간을 URL 추적 레코드로 기록)"""
+        with self.metrics.trace_url(url, self.city_name, rank=rank) as trace:
+            success = self._crawl_product(url, rank)
+            trace.finish(success)
+        return success
+
+    def _crawl_product(self, url, rank=None):
         """개별 상품 크롤링"""
         print(f"🔍 상품 크롤링 시작: 순위 {rank}")
+        stage = self.metrics.stage
         try:
-            # 상품 페이지 이동
-            self.driver.get(url)
-            time.sleep(random.uniform(3, 8))
-            
-            # [추가] 인간 행동 기반 스크롤 실행 
-            print("   - 🤖 인간 행동 기반 스크롤 시작...")
-            try:
-                human_scroll_patterns.simulate_human_scroll(self.driver)
-            except Exception as e:
-                print(f"   - ⚠️ 스크롤 패턴 실행 중 오류 발생:{e}")
-                # 스크롤에 실패해도 데이터 수집은 계속 시도
-                pass 
+            # HTTP 우선 추출 (필수 필드가 모두 있으면 브라우저 이동/스크롤 생략)
+            http_result = None
+            if CONFIG.get("HTTP_FIRST_EXTRACTION", True):
+                with stage("http_extract"):
+                    http_result = extract_product_http(url, rank, city_name=self.city_name)
+                    if http_result and validate_product_data(http_result["product_data"]):
+                        self.stats["http_extracted"] += 1
+                    else:
+                        http_result = None
+                        self.stats["selenium_fallback"] += 1
             
-            # 데이터 추출
-            product_data = extract_all_product_data(self.driver, url, rank, city_name=self.city_name)
-            time.sleep(random.uniform(4, 9))
+            if http_result:
+                product_data = http_result["product_data"]
+            else:
+                # 상품 페이지 이동
+                with stage("driver_get"):
+                    self.driver.get(url)
+                with stage("page_wait"):
+                    time.sleep(random.uniform(3, 8))
+                
+                # [추가] 인간 행동 기반 스크롤 실행 
+                print("   - 🤖 인간 행동 기반 스크롤 시작...")
+                with stage("scroll"):
+                    try:
+                        human_scroll_patterns.simulate_human_scroll(self.driver)
+                    except Exception as e:
+                        print(f"   - ⚠️ 스크롤 패턴 실행 중 오류 발생:{e}")
+                        # 스크롤에 실패해도 데이터 수집은 계속 시도
+                        pass 
+                
+                # 데이터 추출
+                with stage("extract"):
+                    product_data = extract_all_product_data(self.driver, url, rank, city_name=self.city_name)
+                with stage("cooldown_wait"):
+                    time.sleep(random.uniform(4, 9))
 
             # 데이터 검증
             if not validate_product_data(product_data):
@@ -270,68 +307,49 @@ class KKdayCrawler:
             base_data["제휴링크"] = ""
             
             # 이미지 처리
-            try:
-                main_img_url, thumb_img_url = get_dual_image_urls_kkday(self.driver)
-                # 파일명에 순차적인 rank를 사용 (없으면 0번)
-                image_identifier = rank if rank is not None else 0
-                
-                if main_img_url:
-                    if CONFIG.get("SAVE_IMAGES", False):
-                        print("    📥 메인 이미지 다운로드 중...")
-                        time.sleep(random.uniform(0.5, 1.5))  # 이미지 다운로드 전 짧은 대기
-
-                        main_img_filename = download_and_save_image_kkday(
-                            main_img_url,
-                            image_identifier,
-                            self.city_name,
-                            image_type="main"
-                        )
-                        base_data["메인이미지"] = main_img_filename if main_img_filename else "다운로드 실패"
-
-                        # 전체 경로도 함께 저장
-                        if main_img_filename:
-                            from ..utils.file_handler import get_smart_image_path
-                            main_img_path = get_smart_image_path(self.city_name, image_identifier, "main")
-                            base_data["메인이미지_경로"] = main_img_path
-
-                        time.sleep(random.uniform(1, 2))
-
+            with stage("images"):
+                try:
+                    if http_result:
+                        main_img_url, thumb_img_url = http_result["main_img"], http_result["thumb_img"]
                     else:
-                        base_data["메인이미지"] = main_img_url
-                        
-                if thumb_img_url:
+                        main_img_url, thumb_img_url = get_dual_image_urls_kkday(self.driver)
+                    # 파일명에 순차적인 rank를 사용 (없으면 0번)
+                    image_identifier = rank if rank is not None else 0
+                
+                    image_urls = {"main": main_img_url, "thumb": thumb_img_url}
+                    image_columns = {"main": "메인이미지", "thumb": "썸네일이미지"}
+                
                     if CONFIG.get("SAVE_IMAGES", False):
-                        print("    📥 썸네일 이미지 다운로드 중...")
-                        thumb_img_filename = download_and_save_image_kkday(
-                            thumb_img_url,
-                            image_identifier,
-                            self.city_name,
-                            image_type="thumb"
-                        )
-                        base_data["썸네일이미지"] = thumb_img_filename if thumb_img_filename else "다운로드 실패"
-
-                        # 전체 경로도 함께 저장
-                        if thumb_img_filename:
-                            from ..utils.file_handler import get_smart_image_path
-                            thumb_img_path = get_smart_image_path(self.city_name, image_identifier, "thumb")
-                            base_data["썸네일이미지_경로"] = thumb_img_path
-
-                        time.sleep(random.uniform(1, 2))
+                        # 다운로드/리사이즈는 파이프라인에 등록만 하고 진행 (배치 끝에서 완료 대기)
+                        print("    📥 이미지 다운로드 작업 등록...")
+                        queued = enqueue_dual_images_kkday(image_urls, image_identifier, self.city_name)
+                        for image_type, column in image_columns.items():
+                            if queued[image_type]:
+                                base_data[column] = queued[image_type][0]
+                                # 전체 경로도 함께 저장
+                                base_data[f"{column}_경로"] = get_smart_image_path(self.city_name, image_identifier, image_type)
+                            elif image_urls[image_type]:
+                                base_data[column] = "다운로드 실패"
                     else:
-                        base_data["썸네일이미지"] = thumb_img_url
+                        for image_type, column in image_columns.items():
+                            if image_urls[image_type]:
+                                base_data[column] = image_urls[image_type]
                         
-            except Exception as e:
-                import traceback
-                print(f"  ⚠️ 이미지 처리 실패: {e}")
-                traceback.print_exc()
+                except Exception as e:
+                    import traceback
+                    print(f"  ⚠️ 이미지 처리 실패: {e}")
+                    traceback.print_exc()
             
             # CSV 저장
-            if save_to_csv_kkday(base_data, self.city_name):
-                # 순위 정보 저장 (product_id 포함)
-                save_url_with_rank(url, rank, self.city_name, base_data["상품번호"])
-                
-                # URL 처리 완료 표시
-                mark_url_as_processed(url, self.city_name, base_data["상품번호"], rank)
+            with stage("csv_save"):
+                saved = save_to_csv_kkday(base_data, self.city_name)
+            if saved:
+                with stage("rank_bookkeeping"):
+                    # 순위 정보 저장 (product_id 포함)
+                    save_url_with_rank(url, rank, self.city_name, base_data["상품번호"])
+                    
+                    # URL 처리 완료 표시
+                    mark_url_as_processed(url, self.city_name, base_data["상품번호"], rank)
                 
                 self.stats["success_count"] += 1
                 self.stats["current_rank"] = rank
@@ -388,7 +406,9 @@ class KKdayCrawler:
                 print(f"진행률: {i+1}/{len(urls)} ({((i+1)/len(urls)*100):.1f}%)")
 
                 # 이미 처리된 URL인지 확인
-                if is_url_already_processed(url, self.city_name):
+                with self.metrics.stage("dedup_check", self.city_name):
+                    already_processed = is_url_already_processed(url, self.city_name)
+                if already_processed:
                     print(f"⏭️ 이미 처리된 URL, 건너뜀")
                     self.stats["skip_count"] += 1
                     continue
@@ -433,6 +453,7 @@ class KKdayCrawler:
             }
             persistence.save_status_data(self.city_name, "전체", stage2_data=stage2_data)
 
+            flush_image_downloads_kkday()
             print("\n📦 배치 크롤링 완료")
             print(f"✅ Stage 2 상태 저장: {'성공' if stage2_success else '부분 성공'}")
             return True
@@ -531,7 +552,12 @@ class KKdayCrawler:
         print(f"   • 건너뜀: {self.stats['skip_count']}개")
         print(f"   • URL 수집: {self.stats['urls_collected']}개")
         print(f"   • 마지막 순위: {self.stats['current_rank']}")
+        print(f"   • HTTP 추출: {self.stats['http_extracted']}개 / Selenium 폴백: {self.stats['selenium_fallback']}개")
 
         if self.stats["total_processed"] > 0:
             success_rate = (self.stats["success_count"] / self.stats["total_processed"]) * 100
             print(f"   • 성공률: {success_rate:.1f}%")
+
+        # 단계별 소요 시간 (p50/p95/p99) + 메트릭 파일에 요약 기록
+        self.metrics.print_summary(self.city_name)
+        self.metrics.write_summary(self.city_name)
@@ -0,0 +1,254 @@
+"""
+HTTP 우선 상품 상세 추출 시스템
+- 브라우저 없이 requests 세션(커넥션 풀) + lxml 로 상세 페이지 파싱
+- parsers.py 의 KKDAY_SELECTORS 셀렉터 테이블과 정제 함수를 그대로 재사용
+- 필수 필드(상품명/가격/평점)가 비어 있으면 None 반환 → Selenium 추출로 폴백
+"""
+
+import re
+import threading
+from datetime import datetime
+
+from ..config import CONFIG, REQUESTS_AVAILABLE, get_random_user_agent
+from ..utils.file_handler import KKDAY_MAIN_IMAGE_SELECTORS, KKDAY_THUMB_IMAGE_SELECTORS
+from .parsers import (
+    KKDAY_SELECTORS, is_valid_product_name, is_valid_price_text, is_valid_rating_text,
+    is_valid_category_text, is_valid_feature_text, extract_product_id,
+    classify_activity_attributes, get_location_tags, clean_price, clean_rating, clean_text
+)
+
+if REQUESTS_AVAILABLE:
+    import requests
+    from requests.adapters import HTTPAdapter
+
+# 조건부 import - lxml / cssselect 가 없으면 HTTP 경로 비활성화 (Selenium 만 사용)
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+try:
+    from cssselect import GenericTranslator, SelectorError
+    CSSSELECT_AVAILABLE = True
+except ImportError:
+    CSSSELECT_AVAILABLE = False
+
+HTTP_EXTRACTION_AVAILABLE = REQUESTS_AVAILABLE and LXML_AVAILABLE
+
+# 필수 필드가 이 값이면 HTTP 추출 실패로 간주
+HTTP_REQUIRED_FIELDS = {
+    "상품명": ["", "상품명 없음"],
+    "가격": ["", "가격 정보 없음"],
+    "평점": ["", "평점 정보 없음"],
+}
+
+# =============================================================================
+# 커넥션 풀 세션 (스레드별 1개)
+# =============================================================================
+
+_session_local = threading.local()
+
+def get_http_session():
+    """현재 스레드의 requests 세션 반환 (keep-alive 커넥션 풀 재사용)"""
+    session = getattr(_session_local, "session", None)
+    if session is None:
+        pool_size = CONFIG.get("HTTP_POOL_SIZE", 10)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            'User-Agent': get_random_user_agent(),
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'ko-KR,ko;q=0.9,en;q=0.8',
+        })
+        _session_local.session = session
+    return session
+
+def fetch_product_html(url):
+    """상품 상세 페이지 HTML 가져오기 (실패 시 None)"""
+    try:
+        response = get_http_session().get(url, timeout=CONFIG.get("HTTP_TIMEOUT", 10))
+        if response.status_code != 200:
+            print(f"    ⚠️ HTTP 응답 {response.status_code}: {url[:60]}...")
+            return None
+        return response.text
+    except Exception as e:
+        print(f"    ⚠️ HTTP 요청 실패: {e}")
+        return None
+
+# =============================================================================
+# 셀렉터 → XPath 변환 (캐시)
+# =============================================================================
+
+_xpath_cache = {}
+
+def selector_to_xpath(selector):
+    """KKDAY_SELECTORS 항목을 lxml XPath로 변환 ("//"는 그대로, CSS는 cssselect 변환)"""
+    if selector.startswith("//"):
+        return selector
+
+    if selector not in _xpath_cache:
+        xpath = None
+        if CSSSELECT_AVAILABLE:
+            try:
+                xpath = GenericTranslator().css_to_xpath(selector)
+            except SelectorError:
+                xpath = None
+        _xpath_cache[selector] = xpath
+    return _xpath_cache[selector]
+
+def select_elements(tree, selector):
+    """셀렉터에 해당하는 요소 목록 (변환 불가/오류 시 빈 목록)"""
+    xpath = selector_to_xpath(selector)
+    if not xpath:
+        return []
+    try:
+        return tree.xpath(xpath)
+    except Exception:
+        return []
+
+def element_text(element):
+    """Selenium element.text 와 비슷하게 줄 단위 텍스트 반환 (script/style 제외)"""
+    texts = []
+    for node in element.iter():
+        if node.tag in ("script", "style"):
+            continue
+        if node.text and node.text.strip():
+            texts.append(node.text.strip())
+        if node is not element and node.tail and node.tail.strip():
+            texts.append(node.tail.strip())
+    return "\n".join(texts)
+
+# =============================================================================
+# 필드별 추출 (parsers.py get_* 함수와 동일한 규칙)
+# =============================================================================
+
+def _first_text(tree, field, validator=None, cleaner=None, empty_value=""):
+    """필드 셀렉터를 순서대로 시도해 첫 유효 값 반환"""
+    for selector in KKDAY_SELECTORS[field]:
+        for element in select_elements(tree, selector):
+            text = element_text(element).strip()
+            if not text or (validator and not validator(text)):
+                continue
+            value = cleaner(text) if cleaner else text
+            if value != empty_value:
+                return value
+    return empty_value
+
+def _all_texts(tree, field, validator):
+    """필드 셀렉터 전체에서 유효 텍스트 수집"""
+    texts = []
+    for selector in KKDAY_SELECTORS[field]:
+        for element in select_elements(tree, selector):
+            text = element_text(element).strip()
+            if validator(text):
+                texts.append(text)
+    return texts
+
+def _first_image_url(tree, selectors):
+    for selector in selectors:
+        for element in select_elements(tree, selector):
+            img_url = element.get("src")
+            if img_url and img_url.startswith("http"):
+                return img_url
+    return None
+
+def parse_product_html(html, url, rank=None, city_name=None):
+    """HTML 문자열에서 상품 데이터 파싱 (extract_all_product_data 와 같은 키 구성)"""
+    tree = lxml.html.fromstring(html)
+
+    product_name = clean_text(_first_text(tree, "상품명", is_valid_product_name, empty_value="상품명 없음"))
+
+    review_text = _first_text(tree, "리뷰수", validator=lambda text: re.search(r'\d+', text))
+    review_count = re.findall(r'\d+', review_text)[0] if review_text else "0"
+
+    # 카테고리는 순서 유지 중복 제거 (get_categories 와 동일)
+    categories = []
+    for category_text in _all_texts(tree, "카테고리", is_valid_category_text):
+        if category_text not in categories:
+            categories.append(category_text)
+
+    features = _all_texts(tree, "특징", is_valid_feature_text)
+
+    # 하이라이트는 첫 번째로 내용이 있는 셀렉터의 요소들을 최대 5개 합침 (get_highlights 와 동일)
+    highlights = "정보 없음"
+    for selector in KKDAY_SELECTORS["하이라이트"]:
+        highlights_list = [text for text in (element_text(el).strip() for el in select_elements(tree, selector)) if len(text) > 10]
+        if highlights_list:
+            highlights = '\n'.join(list(set(highlights_list))[:5])
+            break
+
+    attribute_texts = []
+    for selector in KKDAY_SELECTORS["활동속성"]:
+        attribute_texts.extend(element_text(element) for element in select_elements(tree, selector))
+    activity_attrs = classify_activity_attributes(attribute_texts)
+
+    product_data = {
+        "상품번호": extract_product_id(url) or "ID 없음",
+        "상품명": product_name,
+        "가격": _first_text(tree, "가격", is_valid_price_text, clean_price, "가격 정보 없음"),
+        "평점": _first_text(tree, "평점", is_valid_rating_text, clean_rating, "평점 정보 없음"),
+        "리뷰수": review_count,
+        "카테고리": clean_text(" > ".join(categories[:3])) if categories else "기타",
+        "하이라이트": highlights,
+        "위치태그": "",
+        "특징": clean_text(" | ".join(list(set(features))[:5])) if features else "특징 정보 없음",
+        "언어": activity_attrs["언어"],
+        "투어형태": activity_attrs["투어형태"],
+        "미팅방식": activity_attrs["미팅방식"],
+        "소요시간": activity_attrs["소요시간"],
+        "URL": url,
+        "순위": rank,
+        "수집일시": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+    main_img = _first_image_url(tree, KKDAY_MAIN_IMAGE_SELECTORS)
+    thumb_img = _first_image_url(tree, KKDAY_THUMB_IMAGE_SELECTORS) or main_img
+
+    return product_data, main_img, thumb_img
+
+def has_required_fields(product_data):
+    """HTTP 추출 결과에 필수 필드가 모두 채워졌는지 확인"""
+    for field, empty_values in HTTP_REQUIRED_FIELDS.items():
+        if product_data.get(field, "") in empty_values:
+            return False
+    return True
+
+# =============================================================================
+# HTTP 우선 추출 진입점
+# =============================================================================
+
+def extract_product_http(url, rank=None, city_name=None):
+    """브라우저 없이 상품 추출 시도
+
+    반환: {"url", "rank", "product_data", "main_img", "thumb_img"} 또는
+          필수 필드가 비었거나 HTTP 경로를 쓸 수 없으면 None (Selenium 폴백 신호)
+    """
+    if not HTTP_EXTRACTION_AVAILABLE:
+        return None
+
+    html = fetch_product_html(url)
+    if not html:
+        return None
+
+    try:
+        product_data, main_img, thumb_img = parse_product_html(html, url, rank, city_name)
+    except Exception as e:
+        print(f"    ⚠️ HTML 파싱 실패: {e}")
+        return None
+
+    if not has_required_fields(product_data):
+        missing = [field for field, empty in HTTP_REQUIRED_FIELDS.items() if product_data.get(field, "") in empty]
+        print(f"    ↪️ HTTP 추출 필수 필드 누락 ({', '.join(missing)}) → Selenium 폴백")
+        return None
+
+    # 위치 태그는 필수 필드 확인 후에만 학습 (폴백 시 중복 학습 방지)
+    product_data["위치태그"] = get_location_tags(city_name, product_data["상품명"], product_data["하이라이트"])
+
+    print(f"    ⚡ HTTP 추출 성공: {product_data['상품명'][:40]}...")
+    return {"url": url, "rank": rank, "product_data": product_data, "main_img": main_img, "thumb_img": thumb_img}
+
+print("✅ http_parsers.py 로드 완료: HTTP 우선 추출 준비!")
@@ -11,9 +11,9 @@ import random
 from datetime import datetime
 
 from ..config import CONFIG, SELENIUM_AVAILABLE
-from ..utils.location_learning import LocationLearningSystem
+from ..utils.location_learning import get_location_learner
 
-# 학습 시스템 인스턴스는 함수 내에서 동적으로 생성
+# 학습 시스템 인스턴스는 도시별로 캐시하여 재사용 (get_location_learner)
 
 if SELENIUM_AVAILABLE:
     from selenium.webdriver.common.by import By
@@ -52,9 +52,128 @@ KKDAY_SELECTORS = {
         ".product-score__count",                      # 대안 셀렉터
         "[class*='rating']",                          # 평점 관련 클래스
         "[class*='score']"                            # 점수 관련 클래스
+    ],
+
+    "리뷰수": [
+        ".product-card__info-number",                 # KKday 최우선 (200) 형태
+        ".product-score__count",                      # KKday 백업
+        "#productDetailApp .product-score__count",    # 상세페이지용
+        "[class*='review'][class*='count']",          # 리뷰 카운트
+        ".review-count",                              # 범용
+        ".reviews-count",                             # 복수형
+        "[class*='rating'] .count",                   # 평점 내 카운트
+        ".comment-count"                              # 댓글 수
+    ],
+
+    "카테고리": [
+        ".product-location__text",                    # KKday 위치태그 최우선
+        ".breadcrumb li a",                           # KKday breadcrumb
+        "[class*='breadcrumb'] span",                 # breadcrumb 백업
+        ".breadcrumb a",                              # breadcrumb 링크
+        ".category-tag",                              # 카테고리 태그
+        ".tags span",                                 # 일반 태그
+        "[class*='category'] span",                   # 카테고리 클래스
+        "[data-testid*='category']",                  # 테스트ID
+        ".labels span"                                # 라벨
+    ],
+
+    "하이라이트": [
+        "#product-info-sec div p",                    # KKday 메인 설명문
+        "#product-info-sec ul li",                    # KKday 하이라이트 리스트
+        ".info-sec-collapsable div",                  # KKday 접힌 섹션
+        ".package-desc ul li",                        # 옵션별 특징
+        ".critical-info-text",                        # 주요 특징
+        "#product-info-sec",                          # 전체 섹션
+    ],
+
+    "특징": [
+        ".package-desc ul li",                        # KKday 옵션별 특징 (최우선)
+        ".critical-info-text",                        # KKday 주요 특징
+        ".kk-icon-with-text__text",                   # KKday 아이콘 특징
+        ".product-features li",                       # 상품 특징
+        ".key-points li",                             # 핵심 포인트
+        ".benefits li",                               # 혜택
+        ".inclusions li",                             # 포함사항
+        ".tags span",                                 # 태그
+        "[data-testid*='feature']",                   # 특징 테스트ID
+        ".feature-list li",                           # 특징 리스트
+        ".amenities li"                               # 편의시설
+    ],
+
+    "활동속성": [
+        ".kk-icon-with-text__text",                   # 아이콘 포함 특징
+        ".info-table td",                             # 정보 테이블
+        ".critical-info span",                        # 주요 정보
+        "#productDetailApp .kk-icon-with-text__text", # 컨테이너 포함
     ]
 }
 
+# 필드별 텍스트 검증 함수 (Selenium / HTTP 추출 공용)
+def is_valid_product_name(text):
+    return bool(text) and 3 < len(text.strip()) < 200
+
+def is_valid_price_text(text):
+    return bool(text) and ('₩' in text or 'KRW' in text or '원' in text or
+                           text.replace(',', '').replace('.', '').isdigit())
+
+def is_valid_rating_text(text):
+    return bool(text) and (text.replace('.', '').isdigit() or '/' in text)
+
+def is_valid_category_text(text):
+    return bool(text) and len(text) < 50  # 너무 긴 텍스트는 제외
+
+def is_valid_feature_text(text):
+    return bool(text) and 10 < len(text) < 100  # 적절한 길이의 특징만
+
+def extract_product_id(url):
+    """URL에서 KKday 상품번호 추출 (/product/<숫자>)"""
+    product_id_match = re.search(r"/product/(\d+)", url or "")
+    return product_id_match.group(1) if product_id_match else None
+
+def classify_activity_attributes(texts):
+    """활동 속성 텍스트를 언어/투어형태/미팅방식/소요시간으로 분류"""
+    attributes = {
+        "언어": "",
+        "투어형태": "",
+        "미팅방식": "",
+        "소요시간": ""
+    }
+    
+    language_keywords = [
+        '한국어', '영어', '중국어', '일본어', '태국어', '스페인어',
+        '러시아어', '독일어', '프랑스어', '폴란드어', '네덜란드어',
+        '이탈리아어', '포르투갈리어', '베트남어', '인도네시아어'
+    ]
+    tour_type_keywords = ['조인', '그룹', '프라이빗', '개별', '셔틀', '투어']              # KKday용 키워드 추가
+    meeting_keywords = ['미팅', '픽업', '집합', '만남', '바우처', '현장', '전자']          # KKday용 키워드 추가
+    
+    for text in texts:
+        text = (text or "").strip()
+        if not text:
+            continue
+        # 언어 분류
+        if any(keyword in text for keyword in language_keywords):
+            attributes["언어"] = text
+            print(f"    투어 언어: {text}")
+            continue
+        # 소요시간 분류
+        if (('소요' in text or '일정' in text or '총' in text) and '시간' in text) or ('일' in text and any(c.isdigit() for c in text)):
+            attributes["소요시간"] = text
+            print(f"    소요시간: {text}")
+            continue
+        # 투어형태 분류
+        if any(keyword in text for keyword in tour_type_keywords):
+            attributes["투어형태"] = text
+            print(f"    투어형태: {text}")
+            continue
+        # 미팅방식 분류
+        if any(keyword in text for keyword in meeting_keywords):
+            attributes["미팅방식"] = text
+            print(f"    미팅방식: {text}")
+            continue
+    
+    return attributes
+
 def try_selectors_with_fallback(driver, selector_key, validation_func=None):
     """
     중앙화된 셀렉터 매핑을 사용하여 fallback 전략으로 요소 찾기
@@ -154,12 +273,8 @@ def get_product_name(driver):
     if not SELENIUM_AVAILABLE:
         return "상품명 추출 불가"
     
-    # 상품명 검증 함수
-    def validate_product_name(text):
-        return text and len(text.strip()) > 3 and len(text.strip()) < 200
-    
     # 중앙화된 셀렉터 시스템 사용
-    product_name = try_selectors_with_fallback(driver, "상품명", validate_product_name)
+    product_name = try_selectors_with_fallback(driver, "상품명", is_valid_product_name)
     
     if product_name:
         print(f"    ✅ 상품명: {product_name[:50]}...")
@@ -174,13 +289,8 @@ def get_price(driver):
     if not SELENIUM_AVAILABLE:
         return "가격 추출 불가"
     
-    # 가격 검증 함수
-    def validate_price(text):
-        return text and ('₩' in text or 'KRW' in text or '원' in text or 
-                        text.replace(',', '').replace('.', '').isdigit())
-    
     # 중앙화된 셀렉터 시스템 사용
-    price_text = try_selectors_with_fallback(driver, "가격", validate_price)
+    price_text = try_selectors_with_fallback(driver, "가격", is_valid_price_text)
     
     if price_text:
         cleaned_price = clean_price(price_text)
@@ -197,12 +307,8 @@ def get_rating(driver):
     if not SELENIUM_AVAILABLE:
         return "평점 추출 불가"
     
-    # 평점 검증 함수
-    def validate_rating(text):
-        return text and (text.replace('.', '').isdigit() or '/' in text)
-    
     # 중앙화된 셀렉터 시스템 사용
-    rating_text = try_selectors_with_fallback(driver, "평점", validate_rating)
+    rating_text = try_selectors_with_fallback(driver, "평점", is_valid_rating_text)
     
     if rating_text:
         cleaned_rating = clean_rating(rating_text)
@@ -220,24 +326,10 @@ def get_review_count(driver):
     if not SELENIUM_AVAILABLE:
         return "리뷰 수 추출 불가"
     
-    # KKday 전용 리뷰 수 셀렉터들
-    review_selectors = [
-        ("css", ".product-card__info-number"),               # KKday 최우선 (200) 형태
-        ("css", ".product-score__count"),                    # KKday 백업
-        ("css", "#productDetailApp .product-score__count"), # 상세페이지용
-        ("css", "[class*='review'][class*='count']"),        # 리뷰 카운트
-        ("css", ".review-count"),                            # 범용
-        ("css", ".reviews-count"),                           # 복수형
-        ("css", "[class*='rating'] .count"),                 # 평점 내 카운트
-        ("css", ".comment-count")                            # 댓글 수
-    ]
-    
-    for selector_type, selector_value in review_selectors:
+    # KKday 전용 리뷰 수 셀렉터들 (KKDAY_SELECTORS["리뷰수"])
+    for selector in KKDAY_SELECTORS["리뷰수"]:
         try:
-            if selector_type == "css":
-                elements = driver.find_elements(By.CSS_SELECTOR, selector_value)
-            else:  # xpath
-                elements = driver.find_elements(By.XPATH, selector_value)
+            elements = driver.find_elements(By.CSS_SELECTOR, selector)
             
             for element in elements:
                 try:
@@ -263,27 +355,15 @@ def get_categories(driver):
     if not SELENIUM_AVAILABLE:
         return "카테고리 추출 불가"
     
-    # KKday 전용 카테고리 셀렉터들
-    category_selectors = [
-        ".product-location__text",                    # KKday 위치태그 최우선
-        ".breadcrumb li a",                           # KKday breadcrumb
-        "[class*='breadcrumb'] span",                 # breadcrumb 백업
-        ".breadcrumb a",                              # breadcrumb 링크
-        ".category-tag",                              # 카테고리 태그
-        ".tags span",                                 # 일반 태그
-        "[class*='category'] span",                   # 카테고리 클래스
-        "[data-testid*='category']",                  # 테스트ID
-        ".labels span"                                # 라벨
-    ]
-    
+    # KKday 전용 카테고리 셀렉터들 (KKDAY_SELECTORS["카테고리"])
     categories = []
-    for selector in category_selectors:
+    for selector in KKDAY_SELECTORS["카테고리"]:
         try:
             elements = driver.find_elements(By.CSS_SELECTOR, selector)
             for element in elements:
                 try:
                     category_text = element.text.strip()
-                    if category_text and len(category_text) < 50:  # 너무 긴 텍스트는 제외
+                    if is_valid_category_text(category_text):
                         if category_text not in categories:  # 중복 제거
                             categories.append(category_text)
                 except:
@@ -306,16 +386,8 @@ def get_highlights(driver):
     if not SELENIUM_AVAILABLE:
         return "정보 없음"
     try:
-        # KKday 하이라이트 섹션 확인
-        highlight_selectors = [
-            "#product-info-sec div p",              # KKday 메인 설명문
-            "#product-info-sec ul li",              # KKday 하이라이트 리스트
-            ".info-sec-collapsable div",            # KKday 접힌 섹션
-            ".package-desc ul li",                  # 옵션별 특징
-            ".critical-info-text",                  # 주요 특징
-            "#product-info-sec",                    # 전체 섹션
-        ]
-        for selector in highlight_selectors:
+        # KKday 하이라이트 섹션 확인 (KKDAY_SELECTORS["하이라이트"])
+        for selector in KKDAY_SELECTORS["하이라이트"]:
             try:
                 elements = driver.find_elements(By.CSS_SELECTOR, selector)
                 if elements:
@@ -346,30 +418,16 @@ def get_features(driver):
     if not SELENIUM_AVAILABLE:
         return "특징 추출 불가"
     
-    feature_selectors = [
-        ".package-desc ul li",                   # KKday 옵션별 특징 (최우선)
-        ".critical-info-text",                   # KKday 주요 특징
-        ".kk-icon-with-text__text",              # KKday 아이콘 특징
-        ".product-features li",                  # 상품 특징
-        ".key-points li",                        # 핵심 포인트
-        ".benefits li",                          # 혜택
-        ".inclusions li",                        # 포함사항
-        ".tags span",                            # 태그
-        "[data-testid*='feature']",              # 특징 테스트ID
-        ".feature-list li",                      # 특징 리스트
-        ".amenities li"                          # 편의시설
-    ]
-    
     features = []
     
-    for selector in feature_selectors:
+    for selector in KKDAY_SELECTORS["특징"]:
         try:
             elements = driver.find_elements(By.CSS_SELECTOR, selector)
             
             for element in elements:
                 try:
                     feature_text = element.text.strip()
-                    if feature_text and 10 < len(feature_text) < 100:  # 적절한 길이의 특징만
+                    if is_valid_feature_text(feature_text):
                         features.append(feature_text)
                 except:
                     continue
@@ -391,65 +449,26 @@ def get_activity_attributes(driver):
     print("  활동 속성 정보 수집 중...")
     if not SELENIUM_AVAILABLE:
         return {"언어": "", "투어형태": "", "미팅방식": "", "소요시간": ""}
-    attributes = {
-        "언어": "",
-        "투어형태": "",
-        "미팅방식": "",
-        "소요시간": ""
-    }
     try:
-        # KKday 다중 셀렉터 전략
-        selectors_to_try = [
-            ".kk-icon-with-text__text",                    # 아이콘 포함 특징
-            ".info-table td",                              # 정보 테이블
-            ".critical-info span",                         # 주요 정보
-            "#productDetailApp .kk-icon-with-text__text",  # 컨테이너 포함
-        ]
+        # KKday 다중 셀렉터 전략 (KKDAY_SELECTORS["활동속성"])
         all_elements = []
-        for selector in selectors_to_try:
+        for selector in KKDAY_SELECTORS["활동속성"]:
             try:
                 elements = driver.find_elements(By.CSS_SELECTOR, selector)
                 all_elements.extend(elements)
             except Exception:
                 continue
+        
+        texts = []
         for element in all_elements:
             try:
-                text = element.text.strip()
-                if not text:
-                    continue
-                # 언어 분류 (기존 로직 유지)
-                language_keywords = [
-                    '한국어', '영어', '중국어', '일본어', '태국어', '스페인어',
-                    '러시아어', '독일어', '프랑스어', '폴란드어', '네덜란드어',
-                    '이탈리아어', '포르투갈리어', '베트남어', '인도네시아어'
-                ]
-                if any(keyword in text for keyword in language_keywords):
-                    attributes["언어"] = text
-                    print(f"    투어 언어: {text}")
-                    continue
-                # 소요시간 분류 (기존 로직 유지)
-                if (('소요' in text or '일정' in text or '총' in text) and '시간' in text) or ('일' in text and any(c.isdigit() for c in text)):
-                    attributes["소요시간"] = text
-                    print(f"    소요시간: {text}")
-                    continue
-                # 투어형태 분류 (KKday용 키워드 추가)
-                tour_type_keywords = ['조인', '그룹', '프라이빗', '개별', '셔틀', '투어']
-                if any(keyword in text for keyword in tour_type_keywords):
-                    attributes["투어형태"] = text
-                    print(f"    투어형태: {text}")
-                    continue
-                # 미팅방식 분류 (KKday용 키워드 추가)
-                meeting_keywords = ['미팅', '픽업', '집합', '만남', '바우처', '현장', '전자']
-                if any(keyword in text for keyword in meeting_keywords):
-                    attributes["미팅방식"] = text
-                    print(f"    미팅방식: {text}")
-                    continue
+                texts.append(element.text)
             except Exception:
                 continue
-        return attributes
+        return classify_activity_attributes(texts)
     except Exception as e:
         print(f"    활동 속성 수집 실패: {e}")
-        return attributes
+        return {"언어": "", "투어형태": "", "미팅방식": "", "소요시간": ""}
 
 def get_location_tags(city_name, product_name, highlights):
     """자동 학습 시스템을 통해 위치 태그 추출"""
@@ -462,8 +481,8 @@ def get_location_tags(city_name, product_name, highlights):
     text_to_learn = f"{product_name} {highlights}"
 
     try:
-        # 도시별 학습 시스템 인스턴스 생성
-        learning_system = LocationLearningSystem(city_name=city_name)
+        # 도시별 학습 시스템 (프로세스 내 캐시 재사용)
+        learning_system = get_location_learner(city_name)
         
         # 학습 시스템을 통해 태그 가져오기
         tags = learning_system.get_location_tags(city_name, text_to_learn)
@@ -577,9 +596,8 @@ def extract_all_product_data(driver, url, rank=None, city_name=None):
     # --- 상품번호 추출 로직 (조건부 로그 적용) ---
     product_id = "ID 없음"
     try:
-        product_id_match = re.search(r"/product/(\d+)", url)
-        if product_id_match:
-            product_id = product_id_match.group(1)
+        if extract_product_id(url):
+            product_id = extract_product_id(url)
             print(f"  🆔 상품번호 추출 성공: {product_id}")
         else:
             print(f"  ⚠️ 상품번호 추출 실패: URL에서 패턴을 찾을 수 없습니다.")
@@ -9,17 +9,43 @@ import hashlib
 from datetime import datetime
 
 from ..config import get_city_code, mark_url_processed_fast
+from ..utils.journal_store import get_journal_store
+from ..utils.rank_index import RankIndex
 
 # =============================================================================
 # 도시별 순위 매핑 시스템
 # =============================================================================
 
+def apply_rank_mapping_op(mappings, op):
+    """저널 작업 1개를 도시 매핑에 반영 (같은 탭 순위는 갱신, 없으면 추가)"""
+    if op.get("op") != "add":
+        return
+
+    entry = mappings.setdefault(op["url"], {
+        "hash": op["hash"],
+        "city": op["city"],
+        "product_id": op["product_id"],
+        "rankings": []
+    })
+
+    existing_rank_info = next((r for r in entry["rankings"] if r["tab"] == op["tab"]), None)
+    if existing_rank_info:
+        existing_rank_info["rank"] = op["rank"]
+        existing_rank_info["added_at"] = op["added_at"]
+    else:
+        entry["rankings"].append({
+            "rank": op["rank"],
+            "tab": op["tab"],
+            "added_at": op["added_at"]
+        })
+
 class RankMapper:
-    """도시별 순위 매핑 관리"""
+    """도시별 순위 매핑 관리 (도시별 JSON 스냅샷 + 추가 전용 저널 + 탭별 순위 인덱스)"""
 
     def __init__(self, mapping_dir="ranking_data"):
         self.mapping_dir = mapping_dir
-        self.city_mappings = {}  # 도시별 매핑 캐시
+        self.city_stores = {}  # 도시별 저널 저장소
+        self.city_indexes = {}  # 도시별 RankIndex (키: 탭 이름, None=전체 탭)
         os.makedirs(self.mapping_dir, exist_ok=True)
 
     def _get_city_filepath(self, city_name):
@@ -27,84 +53,89 @@ class RankMapper:
         city_code = get_city_code(city_name)
         return os.path.join(self.mapping_dir, f"{city_code}_rank_mapping.json")
 
-    def load_city_mappings(self, city_name):
-        """도시별 순위 매핑 로드"""
-        if city_name in self.city_mappings:
-            return self.city_mappings[city_name]
+    def _get_city_store(self, city_name):
+        if city_name not in self.city_stores:
+            self.city_stores[city_name] = get_journal_store(self._get_city_filepath(city_name), apply_rank_mapping_op)
+        return self.city_stores[city_name]
+
+    def get_city_index(self, city_name):
+        """도시별 순위 인덱스 (처음 1회만 매핑 전체로 구성, 이후 add_mapping에서 갱신)"""
+        if city_name not in self.city_indexes:
+            index = RankIndex()
+            for url, url_data in self.load_city_mappings(city_name).items():
+                for ranking_info in url_data.get("rankings", []):
+                    index.add(ranking_info["tab"], ranking_info.get("rank", 0), url)
+                    index.add(None, ranking_info.get("rank", 0), url)
+            self.city_indexes[city_name] = index
+        return self.city_indexes[city_name]
 
-        mapping_file = self._get_city_filepath(city_name)
+    def load_city_mappings(self, city_name):
+        """도시별 순위 매핑 로드 (스냅샷 + 저널 재생, 이후 메모리 상태 재사용)"""
         try:
-            if os.path.exists(mapping_file):
-                with open(mapping_file, 'r', encoding='utf-8') as f:
-                    mappings = json.load(f)
-            else:
-                mappings = {}
-
-            self.city_mappings[city_name] = mappings
-            return mappings
-
+            return self._get_city_store(city_name).state
         except Exception as e:
             print(f"⚠️ {city_name} 매핑 로드 실패: {e}")
-            self.city_mappings[city_name] = {}
             return {}
 
     def save_city_mappings(self, city_name):
-        """도시별 순위 매핑 저장"""
-        mapping_file = self._get_city_filepath(city_name)
+        """도시별 순위 매핑 저장 (저널을 스냅샷으로 압축)"""
         try:
-            mappings = self.city_mappings.get(city_name, {})
-            with open(mapping_file, 'w', encoding='utf-8') as f:
-                json.dump(mappings, f, ensure_ascii=False, indent=2)
-            return True
+            return self._get_city_store(city_name).compact(wait=True)
         except Exception as e:
             print(f"❌ {city_name} 매핑 저장 실패: {e}")
             return False
 
     def add_mapping(self, url, rank, city_name, product_id, tab_name="default"):
-        """순위 매핑 추가"""
-        url_hash = hashlib.md5(url.encode()).hexdigest()[:12]
-        mappings = self.load_city_mappings(city_name)
-
-        # 기존에 같은 URL이 있으면 업데이트, 없으면 새로 추가
-        entry = mappings.get(url, {
-            "hash": url_hash,
-            "city": city_name,
-            "product_id": product_id,
-            "rankings": []
-        })
-
-        # 순위 정보 업데이트 또는 추가
-        existing_rank_info = next((r for r in entry["rankings"] if r["tab"] == tab_name), None)
-        if existing_rank_info:
-            existing_rank_info["rank"] = rank
-            existing_rank_info["added_at"] = datetime.now().isoformat()
-        else:
-            entry["rankings"].append({
+        """순위 매핑 추가 (저널 1줄 추가, 전체 파일 재작성 없음)"""
+        try:
+            index = self.get_city_index(city_name)
+            store = self._get_city_store(city_name)
+
+            # 같은 탭의 기존 순위는 갱신되므로 인덱스에서 먼저 제거
+            entry = store.state.get(url)
+            previous = next((r for r in entry["rankings"] if r["tab"] == tab_name), None) if entry else None
+            if previous:
+                index.remove(tab_name, previous.get("rank", 0), url)
+                index.remove(None, previous.get("rank", 0), url)
+
+            success = store.append({
+                "op": "add",
+                "url": url,
+                "hash": hashlib.md5(url.encode()).hexdigest()[:12],
+                "city": city_name,
+                "product_id": product_id,
                 "rank": rank,
                 "tab": tab_name,
                 "added_at": datetime.now().isoformat()
             })
-
-        mappings[url] = entry
-        self.city_mappings[city_name] = mappings
-        return self.save_city_mappings(city_name)
+            index.add(tab_name, rank, url)
+            index.add(None, rank, url)
+            return success
+        except Exception as e:
+            print(f"❌ {city_name} 매핑 저장 실패: {e}")
+            return False
 
     def get_next_rank(self, city_name):
-        """도시의 마지막 순위를 찾아 다음 순위를 반환"""
-        mappings = self.load_city_mappings(city_name)
-        if not mappings:
+        """도시의 마지막 순위를 찾아 다음 순위를 반환 (수집 구간 인덱스의 최댓값)"""
+        collected = self.get_city_index(city_name).collected(None)
+        if not collected:
             return 1  # 해당 도시에 데이터가 없으면 1부터 시작
 
-        max_rank = 0
-        for url_data in mappings.values():
-            for ranking_info in url_data.get("rankings", []):
-                if ranking_info.get("rank", 0) > max_rank:
-                    max_rank = ranking_info["rank"]
-
-        next_rank = max_rank + 1
+        next_rank = max(collected.max(), 0) + 1
         print(f"ℹ️ {city_name} 다음 시작 순위 계산됨: {next_rank}")
         return next_rank
 
+    def get_next_gap(self, city_name, tab_name=None, start_from=1):
+        """start_from 이상에서 매핑되지 않은 첫 순위 (중간에 빠진 순위 재수집용)"""
+        return self.get_city_index(city_name).collected(tab_name).next_gap(start_from)
+
+    def get_ranks_in_range(self, city_name, start_rank, end_rank, tab_name=None):
+        """특정 범위의 순위에 해당하는 URL들 조회 (정렬 인덱스 이분 탐색)"""
+        return [
+            {"url": url, "rank": rank}
+            for rank, url, _ in self.get_city_index(city_name).range(tab_name, start_rank, end_rank)
+        ]
+
 # =============================================================================
 # 통합 순위 시스템 인터페이스
 # =============================================================================
@@ -13,6 +13,9 @@ from datetime import datetime
 from urllib.parse import urlparse
 
 from ..config import CONFIG, get_city_info, get_city_code, get_city_location, SELENIUM_AVAILABLE
+from .image_pipeline import PIL_AVAILABLE, get_image_pipeline
+from .image_store import STORE_BASE_DIR, DEFAULT_PHASH_DISTANCE, get_image_store
+from .csv_consolidator import CountryCsvConsolidator
 
 if SELENIUM_AVAILABLE:
     from selenium.webdriver.common.by import By
@@ -232,6 +235,24 @@ def get_csv_stats(city_name):
 # 이미지 처리 시스템
 # =============================================================================
 
+# KKday 실제 작동하는 메인 이미지 셀렉터들 (디버깅 결과 반영)
+KKDAY_MAIN_IMAGE_SELECTORS = [
+    "img[src*='product'][src*='c_fill%2Ch_600']",               # 메인 이미지 (600px 높이)
+    "img[src*='kkday'][src*='product'][src*='h_600']",          # KKday 메인 상품 이미지
+    "img[class*='image'][src*='product']:first-of-type",       # 첫 번째 상품 이미지
+    "img[src*='product']:first-of-type",                       # 첫 번째 product 이미지
+    "img[src*='kkday'][src*='product']:first-of-type"          # 첫 번째 KKday 상품 이미지
+]
+
+# KKday 실제 작동하는 썸네일 이미지 셀렉터들 (디버깅 결과 반영)
+KKDAY_THUMB_IMAGE_SELECTORS = [
+    "img[src*='product'][src*='c_fill%2Ch_300']",               # 썸네일 이미지 (300px 높이)
+    "img[src*='kkday'][src*='product'][src*='h_300']",          # KKday 썸네일 상품 이미지
+    "img[class*='image'][src*='product']:nth-of-type(2)",      # 두 번째 상품 이미지
+    "img[src*='product']:nth-of-type(2)",                      # 두 번째 product 이미지
+    "img[src*='kkday'][src*='product']:nth-of-type(2)"         # 두 번째 KKday 상품 이미지
+]
+
 def get_dual_image_urls_kkday(driver, url_type="Product"):
     """KKday에서 메인 이미지와 썸네일 이미지 URL 추출 (원본 정교한 셀렉터 사용)"""
     if not SELENIUM_AVAILABLE:
@@ -240,24 +261,6 @@ def get_dual_image_urls_kkday(driver, url_type="Product"):
     main_img_url = None
     thumb_img_url = None
     
-    # KKday 실제 작동하는 메인 이미지 셀렉터들 (디버깅 결과 반영)
-    main_selectors = [
-        "img[src*='product'][src*='c_fill%2Ch_600']",               # 메인 이미지 (600px 높이)
-        "img[src*='kkday'][src*='product'][src*='h_600']",          # KKday 메인 상품 이미지
-        "img[class*='image'][src*='product']:first-of-type",       # 첫 번째 상품 이미지
-        "img[src*='product']:first-of-type",                       # 첫 번째 product 이미지
-        "img[src*='kkday'][src*='product']:first-of-type"          # 첫 번째 KKday 상품 이미지
-    ]
-    
-    # KKday 실제 작동하는 썸네일 이미지 셀렉터들 (디버깅 결과 반영)
-    thumb_selectors = [
-        "img[src*='product'][src*='c_fill%2Ch_300']",               # 썸네일 이미지 (300px 높이)
-        "img[src*='kkday'][src*='product'][src*='h_300']",          # KKday 썸네일 상품 이미지
-        "img[class*='image'][src*='product']:nth-of-type(2)",      # 두 번째 상품 이미지
-        "img[src*='product']:nth-of-type(2)",                      # 두 번째 product 이미지
-        "img[src*='kkday'][src*='product']:nth-of-type(2)"         # 두 번째 KKday 상품 이미지
-    ]
-    
     def try_get_image_url(selectors):
         for selector in selectors:
             try:
@@ -271,10 +274,10 @@ def get_dual_image_urls_kkday(driver, url_type="Product"):
     
     try:
         # 메인 이미지 추출
-        main_img_url = try_get_image_url(main_selectors)
+        main_img_url = try_get_image_url(KKDAY_MAIN_IMAGE_SELECTORS)
         
         # 썸네일 이미지 추출
-        thumb_img_url = try_get_image_url(thumb_selectors)
+        thumb_img_url = try_get_image_url(KKDAY_THUMB_IMAGE_SELECTORS)
         
         # 썸네일이 없으면 메인 이미지 사용
         if not thumb_img_url and main_img_url:
@@ -285,130 +288,116 @@ def get_dual_image_urls_kkday(driver, url_type="Product"):
     
     return main_img_url, thumb_img_url
 
+def get_image_save_path(city_name, product_number, image_type="main"):
+    """이미지 저장 경로 (폴더, 파일명, 전체 경로) - 원본 코드와 동일한 규칙"""
+    # 파일명 생성
+    city_code = get_city_code(city_name)
+    if image_type == "main":
+        img_filename = f"{city_code}_{product_number:04d}.jpg"  # KMJ_0001.jpg
+    else:
+        img_filename = f"{city_code}_{product_number:04d}_thumb.jpg"  # KMJ_0001_thumb.jpg
+
+    # 폴더 구조 (범용적으로 수정)
+    img_base_folder = os.path.join(os.getcwd(), "kkday_img")
+    continent, country = get_city_location(city_name)
+    if city_name == country:
+        # 도시국가: 대륙/국가 구조 (도시 폴더 생략)
+        img_folder = os.path.join(img_base_folder, continent, country)
+    else:
+        # 일반 도시: 대륙/국가/도시 구조
+        img_folder = os.path.join(img_base_folder, continent, country, city_name)
+
+    return img_folder, img_filename, os.path.join(img_folder, img_filename)
+
+def get_kkday_image_store():
+    """콘텐츠 주소 이미지 저장소 (IMAGE_STORE_ENABLED 가 꺼져 있으면 None)"""
+    if not CONFIG.get("IMAGE_STORE_ENABLED", False):
+        return None
+    return get_image_store(
+        CONFIG.get("IMAGE_STORE_DIR") or STORE_BASE_DIR,
+        link_mode=CONFIG.get("IMAGE_STORE_LINK_MODE", "hardlink"),
+        phash_distance=CONFIG.get("IMAGE_PHASH_DISTANCE", DEFAULT_PHASH_DISTANCE) if CONFIG.get("IMAGE_PHASH_DEDUP") else None,
+    )
+
+def get_kkday_image_pipeline():
+    """KKDAY 이미지 파이프라인 (keep-alive 세션 + 다운로드 스레드 풀 + 리사이즈 프로세스 풀)"""
+    return get_image_pipeline(
+        "kkday",
+        referer='https://www.kkday.com/ko',
+        verify_ssl=False,  # 기존 다운로드와 동일하게 SSL 인증서 검증 생략
+        user_agent=CONFIG.get("USER_AGENT"),
+        fetch_workers=CONFIG.get("IMAGE_FETCH_WORKERS", 6),
+        process_workers=CONFIG.get("IMAGE_PROCESS_WORKERS", 2),
+        max_pending=CONFIG.get("IMAGE_MAX_PENDING", 64),
+        timeout=CONFIG.get("HTTP_TIMEOUT", 10),
+        store=get_kkday_image_store(),
+    )
+
 def download_single_image_kkday(img_src, product_number, city_name, image_type="main", max_size_kb=300):
-    """단일 이미지 다운로드 (메인/썸네일 구분) - 원본 코드 기반"""
+    """단일 이미지 다운로드 (메인/썸네일 구분) - 완료될 때까지 대기"""
     if not CONFIG["SAVE_IMAGES"]:
         return None
     
-    try:
-        import requests
-        from PIL import Image
-    except ImportError:
+    if not PIL_AVAILABLE:
         print("      ⚠️ 필요한 라이브러리가 설치되지 않아 이미지 다운로드를 건너뜁니다.")
         return None
     
     try:
-        # 파일명 생성 - 원본 코드와 동일
-        city_code = get_city_code(city_name)
-        if image_type == "main":
-            img_filename = f"{city_code}_{product_number:04d}.jpg"  # KMJ_0001.jpg
-        else:
-            img_filename = f"{city_code}_{product_number:04d}_thumb.jpg"  # KMJ_0001_thumb.jpg
-        
-        # 이미지 폴더 경로 - 원본 코드와 동일
-        continent, country = get_city_location(city_name)
-        img_base_folder = os.path.join(os.getcwd(), "kkday_img")
-
-        # 폴더 구조 (범용적으로 수정)
-        continent, country = get_city_location(city_name)
-        if city_name == country:
-            # 도시국가: 대륙/국가 구조 (도시 폴더 생략)
-            img_folder = os.path.join(img_base_folder, continent, country)
-        else:
-            # 일반 도시: 대륙/국가/도시 구조
-            img_folder = os.path.join(img_base_folder, continent, country, city_name)
-
-        os.makedirs(img_folder, exist_ok=True)
-        img_path = os.path.join(img_folder, img_filename)
-
-        # 이미지 다운로드
-        headers = {
-            'User-Agent': CONFIG.get("USER_AGENT", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"),
-            'Referer': 'https://www.kkday.com/ko',
-            'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8'
-        }
-
-        # verify=False를 추가하여 SSL 인증서 검증을 건너뜁니다.       
-        response = requests.get(img_src, headers=headers, timeout=10, verify=False)
-        response.raise_for_status()
-        
-        # 임시 파일에 저장
-        temp_path = img_path + ".temp"
-        with open(temp_path, 'wb') as f:
-            f.write(response.content)
-        
-        # 이미지 리사이즈 및 최적화
-        with Image.open(temp_path) as img:
-            # RGB로 변환 (JPEG 호환성)
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-            
-            # 타입별 크기 조정
-            width, height = img.size
-            if image_type == "main":
-                target_width = 400  # 메인 이미지
-            else:
-                target_width = 200  # 썸네일 이미지
-            
-            if width > target_width:
-                ratio = target_width / width
-                new_height = int(height * ratio)
-                img = img.resize((target_width, new_height), Image.Resampling.LANCZOS)
-            
-            # 품질 조정하여 저장
-            quality = 85
-            while quality > 30:
-                img.save(img_path, "JPEG", quality=quality, optimize=True)
-                
-                # 파일 크기 확인
-                if os.path.getsize(img_path) <= max_size_kb * 1024:
-                    break
-                quality -= 10
-        
-        # 임시 파일 삭제
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-        
-        file_size_kb = os.path.getsize(img_path) / 1024
-        print(f"      ✅ {image_type} 이미지 저장: {img_filename} ({file_size_kb:.1f}KB)")
+        _, img_filename, img_path = get_image_save_path(city_name, product_number, image_type)
+        get_kkday_image_pipeline().process(img_src, img_path, image_type, max_size_kb, meta={"platform": "kkday", "city": city_name})
         return img_filename
         
     except Exception as e:
         print(f"      ❌ {image_type} 이미지 저장 실패: {e}")
-        if 'temp_path' in locals() and os.path.exists(temp_path):
-            os.remove(temp_path)
         return None
 
+def enqueue_dual_images_kkday(image_urls, product_number, city_name, max_size_kb=300):
+    """듀얼 이미지 작업 등록만 하고 바로 반환 (배치 끝에서 flush_image_downloads_kkday 호출)
+
+    반환: {"main": (파일명, future) 또는 None, "thumb": ...}
+    """
+    results = {"main": None, "thumb": None}
+    if not CONFIG["SAVE_IMAGES"] or not PIL_AVAILABLE:
+        return results
+    
+    pipeline = get_kkday_image_pipeline()
+    for image_type, size_kb in (("main", max_size_kb), ("thumb", max_size_kb // 2)):  # 썸네일은 더 작게
+        if not image_urls.get(image_type):
+            continue
+        try:
+            _, img_filename, img_path = get_image_save_path(city_name, product_number, image_type)
+            future = pipeline.submit(image_urls[image_type], img_path, image_type, size_kb, meta={"platform": "kkday", "city": city_name})
+            results[image_type] = (img_filename, future)
+        except Exception as e:
+            print(f"      ❌ {image_type} 이미지 작업 등록 실패: {e}")
+    
+    return results
+
+def flush_image_downloads_kkday(timeout=None):
+    """등록된 이미지 작업 완료 대기 (배치 종료 시점)"""
+    if not CONFIG["SAVE_IMAGES"] or not PIL_AVAILABLE:
+        return {}
+    stats = get_kkday_image_pipeline().flush(timeout=timeout)
+    print(f"    🖼️ 이미지 작업: 완료 {stats['completed']}개 (재사용 {stats['deduped']}개), 실패 {stats['failed']}개, 대기 {stats['pending']}개")
+    return stats
+
 def download_dual_images_kkday(image_urls, product_number, city_name, max_size_kb=300):
-    """듀얼 이미지 다운로드 (메인 + 썸네일) - 원본 코드 기반"""
+    """듀얼 이미지 다운로드 (메인 + 썸네일 동시 처리) - 원본 코드 기반"""
     if not CONFIG["SAVE_IMAGES"]:
         return {"main": None, "thumb": None}
     
+    print(f"    📥 이미지 다운로드 중...")
     results = {"main": None, "thumb": None}
-    
-    # 메인 이미지 다운로드
-    if image_urls.get("main"):
-        print(f"    📥 메인 이미지 다운로드 중...")
-        main_filename = download_single_image_kkday(
-            image_urls["main"], 
-            product_number, 
-            city_name, 
-            image_type="main",
-            max_size_kb=max_size_kb
-        )
-        results["main"] = main_filename
-    
-    # 썸네일 이미지 다운로드 (선택사항)
-    if image_urls.get("thumb"):
-        print(f"    📥 썸네일 이미지 다운로드 중...")
-        thumb_filename = download_single_image_kkday(
-            image_urls["thumb"], 
-            product_number, 
-            city_name, 
-            image_type="thumb",
-            max_size_kb=max_size_kb//2  # 썸네일은 더 작게
-        )
-        results["thumb"] = thumb_filename
+    for image_type, queued in enqueue_dual_images_kkday(image_urls, product_number, city_name, max_size_kb).items():
+        if queued is None:
+            continue
+        img_filename, future = queued
+        try:
+            future.result()
+            results[image_type] = img_filename
+        except Exception:
+            # 실패 로그는 파이프라인에서 출력
+            pass
     
     # 결과 로그
     if results["main"] and results["thumb"]:
@@ -513,8 +502,12 @@ def download_and_save_image_kkday(image_url, product_number, city_name, image_ty
     return download_single_image_kkday(image_url, product_number, city_name, image_type, max_size_kb)
 
 def get_image_stats(city_name):
-    """이미지 저장 통계"""
+    """이미지 저장 통계 (저장소 사용 시 매니페스트 조회, 아니면 폴더 순회)"""
     try:
+        store = get_kkday_image_store()
+        if store is not None:
+            return store.get_stats(platform="kkday", city=city_name)
+        
         img_dir = os.path.join("kkday_img", city_name)
         
         if not os.path.exists(img_dir):
@@ -667,7 +660,7 @@ def ensure_csv_number_continuity(city_name):
 # =============================================================================
 
 def create_country_consolidated_csv(country_name, force_recreate=False):
-    """국가별 통합 CSV 파일 생성 - 전체 대륙 지원 범용 버전"""
+    """국가별 통합 CSV 파일 생성 - 전체 대륙 지원 범용 버전 (변경된 도시만 증분 반영)"""
     print(f"\n🌏 '{country_name}' 국가별 통합 CSV 생성 중...")
     
     try:
@@ -738,55 +731,14 @@ def create_country_consolidated_csv(country_name, force_recreate=False):
             os.makedirs(other_dir, exist_ok=True)
             consolidated_path = os.path.join(other_dir, f"{country_name}_통합_kkday_products.csv")
         
-        # 기존 파일 확인
-        if os.path.exists(consolidated_path) and not force_recreate:
-            print(f"   ✅ 통합 파일이 이미 존재합니다: {consolidated_path}")
-            return True
-        
-        # CSV 병합 (pandas 없이 구현)
-        import csv as csv_module
-        
-        all_rows = []
-        header = None
-        total_products = 0
-        
-        for city, csv_file in country_cities:
-            try:
-                with open(csv_file, 'r', encoding='utf-8-sig') as f:
-                    reader = csv_module.reader(f)
-                    city_rows = list(reader)
-                    
-                    if city_rows:
-                        if header is None:
-                            header = city_rows[0]  # 첫 번째 파일의 헤더 사용
-                        
-                        # 데이터 행만 추가 (헤더 제외)
-                        data_rows = city_rows[1:] if len(city_rows) > 1 else []
-                        all_rows.extend(data_rows)
-                        print(f"      📄 {city}: {len(data_rows)}개 상품")
-                        total_products += len(data_rows)
-                    
-            except Exception as e:
-                print(f"      ❌ {city} CSV 읽기 실패: {e}")
-        
-        if not all_rows:
+        # 스트리밍 통합: 매니페스트 기준으로 바뀐 도시의 추가 행만 이어 쓰기 (force_recreate면 전체 재구성)
+        result = CountryCsvConsolidator(consolidated_path).consolidate(country_cities, force=force_recreate)
+        if result is None:
             print(f"   ❌ 읽을 수 있는 CSV 데이터가 없습니다.")
             return False
         
-        # 번호 재정렬
-        for i, row in enumerate(all_rows, 1):
-            if len(row) > 0:
-                row[0] = str(i)  # 첫 번째 컬럼이 번호라고 가정
-        
-        # 통합 CSV 저장
-        with open(consolidated_path, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv_module.writer(f)
-            if header:
-                writer.writerow(header)
-            writer.writerows(all_rows)
-        
         print(f"   ✅ 통합 CSV 생성 완료!")
-        print(f"      📊 총 상품: {total_products}개")
+        print(f"      📊 총 상품: {result['total_rows']}개 (이번 실행 추가: {result['new_rows']}개)")
         print(f"      📁 저장 위치: {consolidated_path}")
         
         return True
@@ -807,7 +759,7 @@ def auto_create_country_csv_after_crawling(city_name):
             
         if country:
             print(f"\n'{city_name}' 크롤링 완료 후 '{country}' 국가별 통합 CSV 자동 생성...")
-            success = create_country_consolidated_csv(country, force_recreate=True)
+            success = create_country_consolidated_csv(country)
             if success:
                 print(f"   '{country}' 국가별 통합 CSV 자동 생성 완료!")
             else:
@@ -0,0 +1,356 @@
+"""
+이미지 다운로드/리사이즈 파이프라인
+- keep-alive 커넥션 풀 세션 + 제한된 다운로드 스레드 풀
+- 디코드/리사이즈/JPEG 인코딩은 프로세스 풀에서 메모리 버퍼로 처리 (임시 파일 없음)
+- 용량 목표는 품질 이분 탐색 + 크기 구간별 품질 캐시로 맞춤 (인코딩 횟수 최소화)
+- store(콘텐츠 주소 저장소)를 넘기면 URL/픽셀 해시 중복은 다운로드·저장 생략
+- 크롤러는 submit()으로 작업만 넣고 바로 진행, 배치 끝에서 flush()로 완료 대기
+"""
+
+import io
+import os
+import hashlib
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# 이미지 타입별 목표 가로 폭
+IMAGE_TARGET_WIDTHS = {"main": 400, "thumb": 200}
+
+# JPEG 품질 탐색 범위 (기존 85→35 단계 저장과 같은 범위, 5 단위)
+JPEG_MAX_QUALITY = 85
+JPEG_MIN_QUALITY = 35
+JPEG_QUALITY_STEP = 5
+JPEG_QUALITY_LEVELS = list(range(JPEG_MIN_QUALITY, JPEG_MAX_QUALITY + 1, JPEG_QUALITY_STEP))
+
+# 원본 크기 구간 폭 (px) - 같은 구간 이미지는 비슷한 품질에서 목표 용량에 들어옴
+QUALITY_BUCKET_PX = 256
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+# 프로세스 풀 시작 방식: Selenium/HTTP 풀/저장 스레드가 도는 프로세스를 fork 하면
+# 자식이 다른 스레드가 잡고 있던 잠금을 그대로 물려받아 멈출 수 있으므로 spawn 사용
+PROCESS_START_METHOD = "spawn"
+
+# =============================================================================
+# 디코드/리사이즈/인코딩 (프로세스 풀 워커에서 실행되므로 모듈 최상위 함수)
+# =============================================================================
+
+# 크기 구간별 마지막으로 선택된 품질 (프로세스마다 1개)
+_quality_cache = {}
+
+def get_quality_bucket(source_size, image_type, max_size_kb):
+    """품질 캐시 키: (타입, 원본 가로/세로 구간, 목표 용량)"""
+    width, height = source_size
+    return (image_type, width // QUALITY_BUCKET_PX, height // QUALITY_BUCKET_PX, max_size_kb)
+
+def encode_jpeg(img, quality):
+    """JPEG 메모리 인코딩"""
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+def encode_jpeg_to_size(img, max_size_kb, bucket=None):
+    """목표 용량 이하가 되는 가장 높은 품질로 인코딩 (품질 이분 탐색)
+
+    - 캐시된 구간 품질이 있으면 그 품질과 바로 옆 단계를 먼저 확인 (보통 2회 인코딩)
+    - 캐시가 없으면 최고 품질부터 시도 (대부분 1회로 끝남)
+    - 최저 품질로도 초과하면 최저 품질 결과 반환 (기존 동작과 동일)
+    반환: (JPEG 바이트, 선택된 품질)
+    """
+    limit = max_size_kb * 1024
+    levels = JPEG_QUALITY_LEVELS
+    lo, hi = 0, len(levels) - 1
+
+    cached = _quality_cache.get(bucket) if bucket is not None else None
+    probe = levels.index(cached) if cached in levels else hi
+
+    best = None
+    smallest = None
+    neighbor_first = cached in levels
+    while lo <= hi:
+        data = encode_jpeg(img, levels[probe])
+        fits = len(data) <= limit
+        if fits:
+            best = (data, levels[probe])
+            lo = probe + 1
+        else:
+            smallest = (data, levels[probe])
+            hi = probe - 1
+
+        if neighbor_first:
+            # 캐시 품질 바로 위/아래 단계 확인 후 이분 탐색
+            probe = lo if fits else hi
+            neighbor_first = False
+        else:
+            probe = (lo + hi + 1) // 2
+
+    result = best or smallest
+    if bucket is not None:
+        _quality_cache[bucket] = result[1]
+    return result
+
+def pixel_hash(img):
+    """디코드된 픽셀 기준 해시 (같은 이미지의 다른 URL/압축 컨테이너도 동일)"""
+    digest = hashlib.sha1(f"{img.mode}:{img.size[0]}x{img.size[1]}:".encode())
+    digest.update(img.tobytes())
+    return digest.hexdigest()
+
+def perceptual_hash(img, hash_size=8):
+    """차이 해시(dHash) 64비트 → 16자리 hex (리사이즈/재압축된 거의 같은 이미지 탐지용)"""
+    small = img.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return f"{value:0{hash_size * hash_size // 4}x}"
+
+def _prepare_and_encode(img, image_type, max_size_kb):
+    source_size = img.size
+
+    # RGB로 변환 (JPEG 호환성)
+    if img.mode in ("RGBA", "P", "LA"):
+        img = img.convert("RGB")
+
+    # 타입별 크기 조정
+    target_width = IMAGE_TARGET_WIDTHS.get(image_type, IMAGE_TARGET_WIDTHS["main"])
+    width, height = img.size
+    if width > target_width:
+        ratio = target_width / width
+        img = img.resize((target_width, int(height * ratio)), Image.Resampling.LANCZOS)
+
+    encoded, _ = encode_jpeg_to_size(img, max_size_kb, get_quality_bucket(source_size, image_type, max_size_kb))
+    return encoded, img.size
+
+def resize_and_encode(data, image_type="main", max_size_kb=300):
+    """원본 이미지 바이트 → 리사이즈된 JPEG 바이트 (목표 용량 이하)"""
+    with Image.open(io.BytesIO(data)) as img:
+        encoded, _ = _prepare_and_encode(img, image_type, max_size_kb)
+        return encoded
+
+def fingerprint_and_encode(data, image_type="main", max_size_kb=300):
+    """디코드 1회로 픽셀 해시 + 지각 해시 + 인코딩 결과를 함께 계산 (저장소 사용 시)"""
+    with Image.open(io.BytesIO(data)) as img:
+        img.load()
+        fingerprint = {"pixel_hash": pixel_hash(img), "phash": perceptual_hash(img)}
+        encoded, (width, height) = _prepare_and_encode(img, image_type, max_size_kb)
+    return dict(fingerprint, data=encoded, width=width, height=height)
+
+# =============================================================================
+# 파이프라인
+# =============================================================================
+
+class ImagePipeline:
+    """다운로드(스레드 풀) → 리사이즈/인코딩(프로세스 풀) → 1회 저장
+
+    store: find_by_url / put / link 를 제공하는 콘텐츠 주소 저장소 (없으면 경로에 직접 저장)
+    """
+
+    def __init__(self, referer, user_agent=None, verify_ssl=True, fetch_workers=6,
+                 process_workers=2, max_pending=64, timeout=10, store=None):
+        self.referer = referer
+        self.store = store
+        self.user_agent = user_agent or DEFAULT_USER_AGENT
+        self.verify_ssl = verify_ssl
+        self.fetch_workers = max(1, fetch_workers)
+        self.process_workers = process_workers
+        self.timeout = timeout
+
+        self._fetch_pool = ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix="img-fetch")
+        self._process_pool = None
+        self._process_pool_failed = False
+        self._session_local = threading.local()
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))  # 대기 작업 수 제한 (메모리 보호)
+        self._lock = threading.Lock()
+        self._pending = set()
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "deduped": 0}
+
+    def _get_session(self):
+        """다운로드 스레드별 keep-alive 세션"""
+        session = getattr(self._session_local, "session", None)
+        if session is None:
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=1)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                'User-Agent': self.user_agent,
+                'Referer': self.referer,
+                'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8'
+            })
+            self._session_local.session = session
+        return session
+
+    def _get_process_pool(self):
+        """리사이즈용 프로세스 풀 (생성 실패/비활성 시 None → 다운로드 스레드에서 처리)"""
+        if not self.process_workers or self._process_pool_failed:
+            return None
+        with self._lock:
+            if self._process_pool is None:
+                try:
+                    self._process_pool = ProcessPoolExecutor(
+                        max_workers=self.process_workers,
+                        mp_context=multiprocessing.get_context(PROCESS_START_METHOD),
+                    )
+                except Exception as e:
+                    print(f"      ⚠️ 이미지 프로세스 풀 생성 실패, 스레드에서 처리: {e}")
+                    self._process_pool_failed = True
+                    return None
+            return self._process_pool
+
+    def fetch(self, url):
+        """이미지 원본 바이트 다운로드"""
+        response = self._get_session().get(url, timeout=self.timeout, verify=self.verify_ssl)
+        response.raise_for_status()
+        return response.content
+
+    def _run_encoder(self, func, data, image_type, max_size_kb):
+        """인코딩 함수 실행 (프로세스 풀 우선)"""
+        pool = self._get_process_pool()
+        if pool is not None:
+            try:
+                return pool.submit(func, data, image_type, max_size_kb).result()
+            except Exception as e:
+                if "BrokenProcessPool" not in type(e).__name__:
+                    raise
+                print(f"      ⚠️ 이미지 프로세스 풀 중단, 스레드에서 처리: {e}")
+                self._process_pool_failed = True
+        return func(data, image_type, max_size_kb)
+
+    def encode(self, data, image_type="main", max_size_kb=300):
+        """리사이즈/인코딩 (프로세스 풀 우선)"""
+        return self._run_encoder(resize_and_encode, data, image_type, max_size_kb)
+
+    def _count_dedup(self):
+        with self._lock:
+            self.stats["deduped"] += 1
+
+    def process(self, url, img_path, image_type="main", max_size_kb=300, meta=None):
+        """작업 1건 동기 처리: 다운로드 → 인코딩 → 저장 (파일 쓰기 1회)
+
+        meta: 저장소 매니페스트에 함께 기록할 정보 ({"platform", "city"})
+        """
+        filename = os.path.basename(img_path)
+
+        if self.store is not None:
+            # 같은 URL을 이미 처리했으면 다운로드 없이 연결만
+            stored = self.store.find_by_url(url, image_type, max_size_kb)
+            if stored is not None:
+                self.store.link(stored, img_path, url, meta)
+                self._count_dedup()
+                print(f"      ♻️ {image_type} 이미지 재사용: {filename} (URL 일치)")
+                return {"path": img_path, "filename": filename, "size_kb": round(stored["size_bytes"] / 1024, 1), "deduped": True}
+
+            result = self._run_encoder(fingerprint_and_encode, self.fetch(url), image_type, max_size_kb)
+            stored, created = self.store.put(url, result, image_type, max_size_kb)
+            self.store.link(stored, img_path, url, meta)
+            size_kb = stored["size_bytes"] / 1024
+            if created:
+                print(f"      ✅ {image_type} 이미지 저장: {filename} ({size_kb:.1f}KB)")
+            else:
+                self._count_dedup()
+                print(f"      ♻️ {image_type} 이미지 재사용: {filename} (동일 이미지)")
+            return {"path": img_path, "filename": filename, "size_kb": round(size_kb, 1), "deduped": not created}
+
+        encoded = self.encode(self.fetch(url), image_type, max_size_kb)
+
+        os.makedirs(os.path.dirname(img_path) or ".", exist_ok=True)
+        with open(img_path, 'wb') as f:
+            f.write(encoded)
+
+        size_kb = len(encoded) / 1024
+        print(f"      ✅ {image_type} 이미지 저장: {filename} ({size_kb:.1f}KB)")
+        return {"path": img_path, "filename": filename, "size_kb": round(size_kb, 1)}
+
+    def submit(self, url, img_path, image_type="main", max_size_kb=300, meta=None):
+        """비동기 작업 등록 (대기 작업이 max_pending 이면 빈 자리가 날 때까지 대기)"""
+        self._slots.acquire()
+        try:
+            future = self._fetch_pool.submit(self.process, url, img_path, image_type, max_size_kb, meta)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._pending.add(future)
+            self.stats["submitted"] += 1
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+            if future.exception() is None:
+                self.stats["completed"] += 1
+            else:
+                self.stats["failed"] += 1
+                print(f"      ❌ 이미지 저장 실패: {future.exception()}")
+        self._slots.release()
+
+    def flush(self, timeout=None):
+        """등록된 작업이 모두 끝날 때까지 대기 후 누적 통계 반환"""
+        with self._lock:
+            pending = list(self._pending)
+        if pending:
+            print(f"    ⏳ 이미지 작업 {len(pending)}개 완료 대기 중...")
+            wait(pending, timeout=timeout)
+        with self._lock:
+            return dict(self.stats, pending=len(self._pending))
+
+    def close(self):
+        """작업 완료 대기 후 풀 종료"""
+        self.flush()
+        self._fetch_pool.shutdown(wait=True)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True)
+            self._process_pool = None
+
+# =============================================================================
+# 프로세스 내 파이프라인 캐시
+# =============================================================================
+
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+def get_image_pipeline(name, **kwargs):
+    """이름별 이미지 파이프라인 반환 (처음 호출 시 kwargs로 생성, 종료 시 자동 flush)"""
+    with _pipelines_lock:
+        pipeline = _pipelines.get(name)
+        if pipeline is None:
+            pipeline = ImagePipeline(**kwargs)
+            _pipelines[name] = pipeline
+        return pipeline
+
+def flush_image_pipelines(timeout=None):
+    """생성된 모든 파이프라인의 대기 작업 완료"""
+    with _pipelines_lock:
+        pipelines = dict(_pipelines)
+    return {name: pipeline.flush(timeout=timeout) for name, pipeline in pipelines.items()}
+
+@atexit.register
+def _close_image_pipelines():
+    with _pipelines_lock:
+        pipelines = list(_pipelines.values())
+        _pipelines.clear()
+    for pipeline in pipelines:
+        try:
+            pipeline.close()
+        except Exception:
+            pass
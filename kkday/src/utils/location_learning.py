@@ -1,21 +1,115 @@
 import json
 import os
 import re
+import time
+import atexit
+import threading
 from collections import defaultdict
 
+# =============================================================================
+# 공유 품사 분석기 (JVM 기반 Okt는 프로세스당 1번만 초기화)
+# =============================================================================
+
+_shared_okt = None
+_shared_okt_ready = False
+_shared_okt_lock = threading.Lock()
+
+def get_shared_tagger():
+    """프로세스 공용 Okt 인스턴스 반환 (KoNLPy 없으면 None)"""
+    global _shared_okt, _shared_okt_ready
+    with _shared_okt_lock:
+        if not _shared_okt_ready:
+            from ..config import KONLPY_AVAILABLE
+            if KONLPY_AVAILABLE:
+                from konlpy.tag import Okt
+                _shared_okt = Okt()
+                print("🔧 공용 품사 분석기 초기화 완료")
+            else:
+                print("⚠️ 패턴 기반 키워드 추출 사용")
+            _shared_okt_ready = True
+        return _shared_okt
+
+# =============================================================================
+# 확정 키워드 다중 패턴 매칭 (Aho–Corasick 오토마톤)
+# =============================================================================
+
+class KeywordMatcher:
+    """확정 키워드 목록을 오토마톤으로 컴파일하여 텍스트 1회 스캔으로 모두 찾기
+
+    - 겹치거나 포함 관계인 키워드도 모두 검출 (기존 `kw in text`와 동일한 결과)
+    - 결과 순서는 키워드 목록 순서를 유지
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(kw for kw in keywords if kw))
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self._build()
+
+    def _build(self):
+        """트라이 구성 후 BFS로 실패 링크 연결"""
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(index)
+
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text):
+        """텍스트에 포함된 키워드 목록 반환"""
+        if not text or not self.keywords:
+            return []
+
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+
+        return [self.keywords[index] for index in sorted(found)]
+
 class LocationLearningSystem:
-    def __init__(self, db_path=None, city_name=None):
+    def __init__(self, db_path=None, city_name=None, flush_every=None, flush_interval=None):
         self.current_city = city_name
 
-        # KoNLPy 초기화 (조건부)
-        from ..config import KONLPY_AVAILABLE
-        if KONLPY_AVAILABLE:
-            from konlpy.tag import Okt
-            self.okt = Okt()
-            print(f"🔧 {city_name or '기본'} 도시용 품사 분석기 초기화 완료")
-        else:
-            self.okt = None
-            print(f"⚠️ {city_name or '기본'} 도시: 패턴 기반 키워드 추출 사용")
+        # KoNLPy 초기화 (조건부, 공용 인스턴스 재사용)
+        from ..config import CONFIG
+        self.okt = get_shared_tagger()
+
+        # write-behind 설정: N회 갱신 또는 T초 경과 시 저장
+        # (갱신 시 확인 + 유휴 상태는 _flush_timer 스레드가 T초 주기로 확인)
+        self.flush_every = flush_every or CONFIG.get("LOCATION_FLUSH_EVERY", 20)
+        self.flush_interval = flush_interval or CONFIG.get("LOCATION_FLUSH_INTERVAL", 30)
+        self._dirty_count = 0
+        self._last_flush = time.time()
+        self._lock = threading.RLock()
+
+        # 도시별 컴파일된 매처 캐시: city -> ((확정 목록 id, 길이), KeywordMatcher)
+        self._matchers = {}
 
         if db_path is None:
             current_file = os.path.abspath(__file__)
@@ -77,12 +171,14 @@ class LocationLearningSystem:
         """JSON 데이터베이스 파일에 저장합니다."""
         try:
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-            with open(self.db_path, 'w', encoding='utf-8') as f:
+            temp_path = self.db_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
                 output_db = {city: {
                     "confirmed": values["confirmed"],
                     "candidates": dict(values["candidates"])
                 } for city, values in self.keyword_db.items()}
                 json.dump(output_db, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.db_path)
         except Exception as e:
             print(f"    ❌ 위치 학습 데이터 저장 실패: {e}")
 
@@ -141,25 +237,117 @@ class LocationLearningSystem:
         if not potential_keywords:
             return
 
-        for keyword in potential_keywords:
-            if keyword in self.keyword_db[city_name]["confirmed"]:
-                continue
-            self.keyword_db[city_name]["candidates"][keyword]["freq"] += 1
+        with self._lock:
+            for keyword in potential_keywords:
+                if keyword in self.keyword_db[city_name]["confirmed"]:
+                    continue
+                self.keyword_db[city_name]["candidates"][keyword]["freq"] += 1
 
-            if self.keyword_db[city_name]["candidates"][keyword]["freq"] >= self.confidence_threshold:
-                self.keyword_db[city_name]["confirmed"].append(keyword)
-                del self.keyword_db[city_name]["candidates"][keyword]
+                if self.keyword_db[city_name]["candidates"][keyword]["freq"] >= self.confidence_threshold:
+                    self.keyword_db[city_name]["confirmed"].append(keyword)
+                    del self.keyword_db[city_name]["candidates"][keyword]
 
-        self._save_db()
+            self._dirty_count += 1
+            self._maybe_flush()
+
+    def _maybe_flush(self):
+        """갱신 횟수 또는 경과 시간이 임계값을 넘으면 저장"""
+        if self._dirty_count >= self.flush_every or time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush_if_due(self):
+        """미저장 변경이 있고 flush_interval 이 지났으면 저장 (타이머 스레드용)"""
+        with self._lock:
+            if self._dirty_count and time.time() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def flush(self):
+        """변경 사항이 있으면 JSON 파일에 저장"""
+        with self._lock:
+            if self._dirty_count:
+                self._save_db()
+            self._dirty_count = 0
+            self._last_flush = time.time()
 
     def get_location_tags(self, city_name, text):
         """텍스트를 분석하여 확정된 위치 태그 목록을 반환하고, 학습을 트리거합니다."""
         if not city_name or not text:
             return []
 
-        confirmed_keywords = self.keyword_db[city_name]["confirmed"]
-        found_tags = [kw for kw in confirmed_keywords if kw in text]
+        found_tags = self.get_matcher(city_name).find(text)
 
         self.learn_from_text(city_name, text)
 
-        return found_tags
\ No newline at end of file
+        return found_tags
+
+    def get_matcher(self, city_name):
+        """확정 키워드 매처 반환 (확정 목록이 바뀐 경우에만 재컴파일)"""
+        with self._lock:
+            confirmed_keywords = self.keyword_db[city_name]["confirmed"]
+            signature = (id(confirmed_keywords), len(confirmed_keywords))
+
+            cached = self._matchers.get(city_name)
+            if cached is None or cached[0] != signature:
+                cached = (signature, KeywordMatcher(confirmed_keywords))
+                self._matchers[city_name] = cached
+            return cached[1]
+
+    def tag_many(self, city_name, texts):
+        """여러 텍스트를 한 번에 태깅 (학습 없이 확정 키워드만 매칭)
+
+        기존 도시 CSV 재태깅 시 행 전체를 한 번의 패스로 처리하는 용도
+        """
+        if not city_name:
+            return [[] for _ in texts]
+
+        matcher = self.get_matcher(city_name)
+        return [matcher.find(text) for text in texts]
+
+# =============================================================================
+# 도시별 학습 시스템 캐시 (프로세스 공용)
+# =============================================================================
+
+_learners = {}
+_learners_lock = threading.Lock()
+_flush_timer = None
+_flush_timer_stop = threading.Event()
+
+def _flush_timer_loop(interval):
+    """갱신이 멈춘(유휴) 학습기도 flush_interval 이 지나면 저장"""
+    while not _flush_timer_stop.wait(interval):
+        with _learners_lock:
+            learners = list(_learners.values())
+        for learner in learners:
+            try:
+                learner.flush_if_due()
+            except Exception as e:
+                print(f"⚠️ 위치 학습 데이터 주기 저장 실패: {e}")
+
+def _start_flush_timer(interval):
+    """주기 저장 스레드 시작 (프로세스당 1개, 호출자가 _learners_lock 보유)"""
+    global _flush_timer
+    if _flush_timer is None or not _flush_timer.is_alive():
+        _flush_timer = threading.Thread(
+            target=_flush_timer_loop, args=(max(1, interval),), name="location-flush", daemon=True
+        )
+        _flush_timer.start()
+
+def get_location_learner(city_name=None):
+    """도시별 LocationLearningSystem 반환 (최초 1회만 생성 및 JSON 로드)"""
+    with _learners_lock:
+        learner = _learners.get(city_name)
+        if learner is None:
+            learner = LocationLearningSystem(city_name=city_name)
+            _learners[city_name] = learner
+            _start_flush_timer(learner.flush_interval)
+        return learner
+
+def flush_all_learners():
+    """모든 도시 학습 데이터 저장 (프로세스 종료 시 자동 호출)"""
+    with _learners_lock:
+        learners = list(_learners.values())
+    for learner in learners:
+        learner.flush()
+
+atexit.register(flush_all_learners)
+atexit.register(_flush_timer_stop.set)  # atexit 는 역순 실행 → 타이머 정지 후 마지막 저장
@@ -0,0 +1,204 @@
+"""
+순위 인덱스 (정렬 배열 + 수집 구간 집합)
+- (도시, 탭)별로 (순위, 순번, URL, 부가정보) 정렬 배열 유지 → 범위 조회 O(log n + k)
+- 수집된 순위를 연속 구간 [시작, 끝] 목록으로 유지 → 다음 빈 순위 O(log n)
+- 매핑 추가/삭제 시 점진 갱신 (전체 재스캔 없음)
+"""
+
+from bisect import bisect_left, bisect_right, insort
+
+class RankIntervalSet:
+    """정수 순위 집합을 겹치지 않는 정렬 구간으로 저장 (1,2,3,7 → [1,3], [7,7])"""
+
+    def __init__(self, ranks=()):
+        self.starts = []
+        self.ends = []
+        for rank in sorted(set(ranks)):
+            if self.ends and rank == self.ends[-1] + 1:
+                self.ends[-1] = rank
+            else:
+                self.starts.append(rank)
+                self.ends.append(rank)
+
+    def _find(self, rank):
+        """rank를 포함할 수 있는 구간 위치 (시작 <= rank 인 마지막 구간, 없으면 -1)"""
+        return bisect_right(self.starts, rank) - 1
+
+    def __contains__(self, rank):
+        i = self._find(rank)
+        return i >= 0 and rank <= self.ends[i]
+
+    def __len__(self):
+        return sum(end - start + 1 for start, end in zip(self.starts, self.ends))
+
+    def __bool__(self):
+        return bool(self.starts)
+
+    def __iter__(self):
+        for start, end in zip(self.starts, self.ends):
+            yield from range(start, end + 1)
+
+    def intervals(self):
+        return list(zip(self.starts, self.ends))
+
+    def min(self):
+        return self.starts[0] if self.starts else None
+
+    def max(self):
+        return self.ends[-1] if self.ends else None
+
+    def add(self, rank):
+        """순위 추가 (새로 추가되면 True) - 앞뒤 구간과 병합"""
+        i = self._find(rank)
+        if i >= 0 and rank <= self.ends[i]:
+            return False
+
+        joins_left = i >= 0 and self.ends[i] == rank - 1
+        joins_right = i + 1 < len(self.starts) and self.starts[i + 1] == rank + 1
+
+        if joins_left and joins_right:
+            self.ends[i] = self.ends[i + 1]
+            del self.starts[i + 1]
+            del self.ends[i + 1]
+        elif joins_left:
+            self.ends[i] = rank
+        elif joins_right:
+            self.starts[i + 1] = rank
+        else:
+            self.starts.insert(i + 1, rank)
+            self.ends.insert(i + 1, rank)
+        return True
+
+    def discard(self, rank):
+        """순위 제거 (있었으면 True) - 구간 분할"""
+        i = self._find(rank)
+        if i < 0 or rank > self.ends[i]:
+            return False
+
+        start, end = self.starts[i], self.ends[i]
+        if start == end:
+            del self.starts[i]
+            del self.ends[i]
+        elif rank == start:
+            self.starts[i] = rank + 1
+        elif rank == end:
+            self.ends[i] = rank - 1
+        else:
+            self.ends[i] = rank - 1
+            self.starts.insert(i + 1, rank + 1)
+            self.ends.insert(i + 1, end)
+        return True
+
+    def next_gap(self, start_from=1):
+        """start_from 이상에서 수집되지 않은 첫 순위"""
+        i = self._find(start_from)
+        if i >= 0 and start_from <= self.ends[i]:
+            return self.ends[i] + 1
+        return start_from
+
+    def iter_gaps(self, start_from=1, stop=None):
+        """start_from~stop 사이 빈 구간 (시작, 끝) 순회 - stop이 없으면 마지막 구간의 끝은 None"""
+        rank = self.next_gap(start_from)
+        i = bisect_right(self.starts, rank)
+        while stop is None or rank <= stop:
+            if i >= len(self.starts):
+                yield rank, stop
+                return
+            gap_end = self.starts[i] - 1
+            if stop is not None:
+                gap_end = min(gap_end, stop)
+            yield rank, gap_end
+            rank = self.ends[i] + 1
+            i += 1
+
+    def first_gaps(self, count, start_from=1):
+        """start_from부터 빈 순위 count개 (오름차순)"""
+        ranks = []
+        for gap_start, gap_end in self.iter_gaps(start_from):
+            take = count - len(ranks)
+            if gap_end is not None:
+                take = min(take, gap_end - gap_start + 1)
+            ranks.extend(range(gap_start, gap_start + take))
+            if len(ranks) >= count:
+                break
+        return ranks
+
+class RankBucket:
+    """(도시, 탭) 1개의 정렬 순위 배열 + 수집 구간"""
+
+    def __init__(self):
+        self.entries = []       # (순위, 순번, URL, 부가정보) 정렬 배열 - 순번이 유일하므로 뒤 필드는 비교되지 않음
+        self.counts = {}        # 순위별 항목 수 (같은 순위의 URL이 여러 개일 수 있음)
+        self.collected = RankIntervalSet()
+
+    def add(self, rank, seq, url, data=None):
+        insort(self.entries, (rank, seq, url, data))
+        self.counts[rank] = self.counts.get(rank, 0) + 1
+        if self.counts[rank] == 1:
+            self.collected.add(rank)
+
+    def remove(self, rank, url):
+        """순위·URL이 같은 항목 1개 제거"""
+        i = bisect_left(self.entries, (rank,))
+        while i < len(self.entries) and self.entries[i][0] == rank:
+            if self.entries[i][2] == url:
+                del self.entries[i]
+                self.counts[rank] -= 1
+                if not self.counts[rank]:
+                    del self.counts[rank]
+                    self.collected.discard(rank)
+                return True
+            i += 1
+        return False
+
+    def range(self, start_rank, end_rank):
+        """start_rank <= 순위 <= end_rank 항목 (순위순)"""
+        lo = bisect_left(self.entries, (start_rank,))
+        hi = bisect_left(self.entries, (end_rank + 1,))
+        return self.entries[lo:hi]
+
+    def __len__(self):
+        return len(self.entries)
+
+class RankIndex:
+    """키((도시, 탭) 등)별 RankBucket 모음
+
+    순번(seq)은 추가 순서 - 같은 URL의 여러 순위 중 먼저 추가된 것을 고를 때 사용
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.first_seen = {}    # URL → 처음 추가된 순번 (기존 매핑 순서 재현용)
+        self._seq = 0
+
+    def bucket(self, key):
+        bucket = self.buckets.get(key)
+        return bucket if bucket is not None else RankBucket()
+
+    def add(self, key, rank, url, data=None):
+        self._seq += 1
+        self.first_seen.setdefault(url, self._seq)
+        self.buckets.setdefault(key, RankBucket()).add(rank, self._seq, url, data)
+
+    def remove(self, key, rank, url):
+        bucket = self.buckets.get(key)
+        return bucket.remove(rank, url) if bucket is not None else False
+
+    def range(self, key, start_rank, end_rank):
+        """범위 안의 URL별 첫 순위 [(순위, URL, 부가정보), ...] - URL당 1개, 순위·최초 추가 순서로 정렬"""
+        first = {}
+        for rank, seq, url, data in self.bucket(key).range(start_rank, end_rank):
+            if url not in first or seq < first[url][1]:
+                first[url] = (rank, seq, data)
+        return sorted(
+            ((rank, url, data) for url, (rank, seq, data) in first.items()),
+            key=lambda item: (item[0], self.first_seen.get(item[1], 0))
+        )
+
+    def collected(self, key):
+        return self.bucket(key).collected
+
+    def clear(self):
+        self.buckets.clear()
+        self.first_seen.clear()
+        self._seq = 0
@@ -0,0 +1,307 @@
+"""
+URL 완료 인덱스 (도시별 단일 SQLite 파일)
+- hash_index/<도시>/<해시>.done 파일 대신 hash_index/<도시>.sqlite3 하나에 기록
+- url_hash PRIMARY KEY 조회로 O(log n) 멤버십 체크 (mmap 읽기)
+- mark_many()로 배치 기록, 기존 .done 파일 1회 마이그레이션
+- 기록된 순위는 구간 집합으로 캐시 → 마지막/누락 순위 조회 시 테이블 재스캔 없음
+"""
+
+import os
+import glob
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+
+from .rank_index import RankBucket
+
+INDEX_BASE_DIR = "hash_index"
+INDEX_MMAP_SIZE = 64 * 1024 * 1024  # 읽기 경로 메모리 매핑 (64MB)
+
+# .done 파일 필드 → 인덱스 컬럼
+_DONE_FIELD_MAP = {
+    "URL": "url",
+    "Product": "product_number",
+    "ProductID": "product_id",
+    "Rank": "rank",
+    "Completed": "completed_at",
+}
+
+def _to_rank(value):
+    """저장된 순위 문자열 → int (변환 불가면 None)"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+class UrlCompletionIndex:
+    """도시별 URL 처리 완료 인덱스"""
+
+    def __init__(self, city_name, base_dir=INDEX_BASE_DIR, hash_length=12, auto_migrate=True):
+        self.city_name = city_name
+        self.base_dir = base_dir
+        self.hash_length = hash_length
+        self.db_path = os.path.join(base_dir, f"{city_name}.sqlite3")
+        self.legacy_dir = os.path.join(base_dir, city_name)
+        self._lock = threading.RLock()
+        self._rank_bucket = None  # get_rank_set() 첫 호출 시 구성, 이후 mark_many()에서 갱신
+        self._rank_seq = 0
+
+        os.makedirs(base_dir, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._init_schema()
+
+        if auto_migrate and os.path.isdir(self.legacy_dir) and not self._get_meta("legacy_migrated"):
+            self.migrate_done_files()
+
+    def _init_schema(self):
+        """테이블 및 PRAGMA 설정"""
+        with self._lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(f"PRAGMA mmap_size={INDEX_MMAP_SIZE}")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS completed_urls (
+                    url_hash TEXT PRIMARY KEY,
+                    url TEXT,
+                    product_number TEXT,
+                    product_id TEXT,
+                    rank TEXT,
+                    completed_at TEXT
+                ) WITHOUT ROWID
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS index_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+            self.conn.commit()
+
+    def _get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM index_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def get_url_hash(self, url):
+        """URL을 고유한 짧은 해시로 변환 (config.get_url_hash와 동일)"""
+        return hashlib.md5(url.encode('utf-8')).hexdigest()[:self.hash_length]
+
+    # -------------------------------------------------------------------------
+    # 조회
+    # -------------------------------------------------------------------------
+
+    def contains(self, url_hash):
+        """해시 멤버십 체크 (PRIMARY KEY 조회)"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM completed_urls WHERE url_hash = ?", (url_hash,)
+            ).fetchone()
+        return row is not None
+
+    def is_processed(self, url):
+        """URL 처리 완료 여부"""
+        return self.contains(self.get_url_hash(url))
+
+    def filter_unprocessed(self, urls):
+        """미처리 URL만 반환 (한 번의 스캔으로 일괄 체크)"""
+        hashes = {url: self.get_url_hash(url) for url in urls}
+        done = self.get_all_hashes()
+        return [url for url in urls if hashes[url] not in done]
+
+    def get_all_hashes(self):
+        """완료된 모든 해시 집합"""
+        with self._lock:
+            return {row[0] for row in self.conn.execute("SELECT url_hash FROM completed_urls")}
+
+    def get_ranks(self):
+        """기록된 순위 목록 (정수로 변환 가능한 값만)"""
+        with self._lock:
+            rows = self.conn.execute("SELECT rank FROM completed_urls WHERE rank IS NOT NULL").fetchall()
+        return [rank for rank in (_to_rank(value) for (value,) in rows) if rank is not None]
+
+    def get_rank_set(self):
+        """기록된 순위의 구간 집합 (RankIntervalSet) - max()/next_gap()/iter_gaps() O(log n)"""
+        with self._lock:
+            if self._rank_bucket is None:
+                bucket = RankBucket()
+                rows = self.conn.execute(
+                    "SELECT url_hash, rank FROM completed_urls WHERE rank IS NOT NULL"
+                ).fetchall()
+                for url_hash, rank in rows:
+                    rank = _to_rank(rank)
+                    if rank is not None:
+                        self._rank_seq += 1
+                        bucket.add(rank, self._rank_seq, url_hash)
+                self._rank_bucket = bucket
+            return self._rank_bucket.collected
+
+    def _update_rank_bucket(self, rows):
+        """INSERT OR REPLACE 전에 호출 - 덮어쓰는 행의 이전 순위를 빼고 새 순위 추가 (호출자가 _lock 보유)"""
+        if self._rank_bucket is None:
+            return
+        for row in rows:
+            url_hash, new_rank = row[0], _to_rank(row[4])
+            previous = self.conn.execute(
+                "SELECT rank FROM completed_urls WHERE url_hash = ?", (url_hash,)
+            ).fetchone()
+            old_rank = _to_rank(previous[0]) if previous else None
+            if old_rank is not None:
+                self._rank_bucket.remove(old_rank, url_hash)
+            if new_rank is not None:
+                self._rank_seq += 1
+                self._rank_bucket.add(new_rank, self._rank_seq, url_hash)
+
+    def count(self):
+        """완료된 URL 수"""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM completed_urls").fetchone()[0]
+
+    def latest_hash(self):
+        """가장 최근 완료된 URL 해시"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT url_hash FROM completed_urls ORDER BY completed_at DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+
+    # -------------------------------------------------------------------------
+    # 기록
+    # -------------------------------------------------------------------------
+
+    def _make_row(self, url, product_number=None, rank=None, product_id=None, completed_at=None, url_hash=None):
+        return (
+            url_hash or self.get_url_hash(url),
+            url,
+            None if product_number is None else str(product_number),
+            None if product_id is None else str(product_id),
+            None if rank is None else str(rank),
+            completed_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        )
+
+    def mark(self, url, product_number=None, rank=None, product_id=None):
+        """URL 1개 완료 표시"""
+        return self.mark_many([{
+            "url": url,
+            "product_number": product_number,
+            "rank": rank,
+            "product_id": product_id,
+        }]) == 1
+
+    def mark_many(self, records):
+        """여러 URL을 한 트랜잭션으로 완료 표시
+
+        records: URL 문자열 또는 {"url", "product_number", "rank", "product_id"} dict 목록
+        """
+        rows = []
+        for record in records:
+            if isinstance(record, str):
+                record = {"url": record}
+            rows.append(self._make_row(
+                record.get("url"),
+                product_number=record.get("product_number"),
+                rank=record.get("rank"),
+                product_id=record.get("product_id"),
+                completed_at=record.get("completed_at"),
+                url_hash=record.get("url_hash"),
+            ))
+
+        if not rows:
+            return 0
+
+        with self._lock:
+            self._update_rank_bucket(rows)
+            with self.conn:
+                self.conn.executemany("""
+                    INSERT OR REPLACE INTO completed_urls
+                        (url_hash, url, product_number, product_id, rank, completed_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, rows)
+        return len(rows)
+
+    # -------------------------------------------------------------------------
+    # 기존 .done 파일 마이그레이션
+    # -------------------------------------------------------------------------
+
+    def migrate_done_files(self, remove_legacy=False):
+        """hash_index/<도시>/*.done 파일을 인덱스로 1회 가져오기"""
+        done_files = glob.glob(os.path.join(self.legacy_dir, "*.done"))
+        records = []
+
+        for done_file in done_files:
+            record = {"url_hash": os.path.basename(done_file)[:-len(".done")]}
+            try:
+                with open(done_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        key, sep, value = line.partition(": ")
+                        if sep and key in _DONE_FIELD_MAP:
+                            record[_DONE_FIELD_MAP[key]] = value.strip()
+            except (IOError, UnicodeDecodeError):
+                continue
+
+            if record.get("product_number") == "None":
+                record["product_number"] = None
+            records.append(record)
+
+        with self._lock:
+            migrated = self.mark_many(records)
+            with self.conn:
+                self._set_meta("legacy_migrated", datetime.now().isoformat())
+                self._set_meta("legacy_migrated_count", migrated)
+
+        if remove_legacy:
+            for done_file in done_files:
+                try:
+                    os.remove(done_file)
+                except OSError:
+                    pass
+            try:
+                os.rmdir(self.legacy_dir)
+            except OSError:
+                pass
+
+        if migrated:
+            print(f"🔄 '{self.city_name}' .done 파일 {migrated}개 → {self.db_path} 마이그레이션 완료")
+        return migrated
+
+    def close(self):
+        """연결 종료"""
+        with self._lock:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+
+# =============================================================================
+# 도시별 인덱스 캐시
+# =============================================================================
+
+_url_indexes = {}
+_url_indexes_lock = threading.Lock()
+
+def get_url_index(city_name, base_dir=INDEX_BASE_DIR, hash_length=12):
+    """도시별 URL 완료 인덱스 반환 (프로세스 내 1개씩 캐시)"""
+    key = (os.path.abspath(base_dir), city_name)
+    with _url_indexes_lock:
+        index = _url_indexes.get(key)
+        if index is None:
+            index = UrlCompletionIndex(city_name, base_dir=base_dir, hash_length=hash_length)
+            _url_indexes[key] = index
+        return index
+
+def migrate_all_done_files(base_dir=INDEX_BASE_DIR, remove_legacy=False):
+    """hash_index 아래 모든 도시의 .done 파일을 일괄 마이그레이션"""
+    if not os.path.isdir(base_dir):
+        return {}
+
+    results = {}
+    for city_name in sorted(os.listdir(base_dir)):
+        if os.path.isdir(os.path.join(base_dir, city_name)):
+            # 인덱스를 처음 열 때 자동 마이그레이션이 수행됨
+            index = get_url_index(city_name, base_dir=base_dir)
+            if remove_legacy:
+                index.migrate_done_files(remove_legacy=True)
+            results[city_name] = int(index._get_meta("legacy_migrated_count") or 0)
+    return results
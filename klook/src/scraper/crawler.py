@@ -6,14 +6,20 @@
 """
 
 import time
+import queue
 import random
+import threading
 from datetime import datetime
+from urllib.parse import urlparse
 
 from ..config import CONFIG, SELENIUM_AVAILABLE
-from ..utils.file_handler import create_product_data_structure, save_to_csv_klook, get_dual_image_urls_klook, download_and_save_image_klook, ensure_directory_structure
+from ..utils.file_handler import create_product_data_structure, save_to_csv_klook, update_csv_klook, get_dual_image_urls_klook, enqueue_dual_images_klook, flush_image_downloads_klook, extract_row_number, ensure_directory_structure, is_duplicate_hash, make_product_hash
+from ..utils.freshness import get_freshness_store
 from .driver_manager import setup_driver, go_to_main_page, find_and_fill_search, click_search_button, handle_popup, smart_scroll_selector
 from .url_manager import collect_urls_from_page, get_pagination_urls, is_url_already_processed, mark_url_as_processed
 from .parsers import extract_all_product_data, validate_product_data
+from .http_parsers import extract_product_http_with_fingerprint, refresh_product_http
+from .page_waits import wait_for_product_ready, get_page_ready_tracker
 from .ranking import save_url_with_rank, ranking_manager, get_collected_ranks_summary
 
 if SELENIUM_AVAILABLE:
@@ -22,6 +28,38 @@ if SELENIUM_AVAILABLE:
     from selenium.webdriver.support import expected_conditions as EC
     from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
+# =============================================================================
+# 워커별 도메인 요청 간격 관리
+# =============================================================================
+
+class DomainRateLimiter:
+    """도메인별 요청 간격 관리 (워커마다 1개씩 보유)"""
+    
+    def __init__(self, min_delay=None, max_delay=None):
+        self.min_delay = CONFIG.get("MEDIUM_MIN_DELAY", 3) if min_delay is None else min_delay
+        self.max_delay = CONFIG.get("MEDIUM_MAX_DELAY", 8) if max_delay is None else max_delay
+        self.next_allowed = {}
+        self.request_count = 0
+    
+    def wait(self, url):
+        """해당 도메인의 다음 요청 가능 시각까지 대기"""
+        domain = urlparse(url).netloc
+        remaining = self.next_allowed.get(domain, 0) - time.time()
+        if remaining > 0:
+            time.sleep(remaining)
+        
+        self.request_count += 1
+        delay = random.uniform(self.min_delay, self.max_delay)
+        
+        # 중간 휴식 (10개마다)
+        if self.request_count % 10 == 0:
+            delay += random.uniform(
+                CONFIG.get("LONG_MIN_DELAY", 15),
+                CONFIG.get("LONG_MAX_DELAY", 30)
+            )
+        self.next_allowed[domain] = time.time() + delay
+        return delay
+
 # =============================================================================
 # 메인 크롤링 클래스
 # =============================================================================
@@ -40,8 +78,21 @@ class KlookCrawler:
             "error_count": 0,
             "skip_count": 0,
             "urls_collected": 0,
-            "current_rank": 0
+            "current_rank": 0,
+            "http_extracted": 0,
+            "selenium_fallback": 0,
+            "unchanged_count": 0
         }
+        self._stats_lock = threading.Lock()
+        # 상품별 페이지 지문 + 재확인 일정 (변경 없는 상품은 재추출 생략)
+        self.freshness = None
+        if CONFIG.get("FRESHNESS_ENABLED", True):
+            self.freshness = get_freshness_store(
+                CONFIG.get("FRESHNESS_DB_FILE", "freshness.sqlite3"),
+                base_interval_hours=CONFIG.get("FRESHNESS_BASE_INTERVAL_HOURS", 24),
+                rank_scale=CONFIG.get("FRESHNESS_RANK_SCALE", 50),
+                volatility_factor=CONFIG.get("FRESHNESS_VOLATILITY_FACTOR", 3.0),
+            )
         
     def initialize(self):
         """크롤러 초기화"""
@@ -106,65 +157,204 @@ class KlookCrawler:
         print(f"🔍 상품 크롤링 시작: 순위 {rank}")
         
         try:
-            # 상품 페이지 이동
-            self.driver.get(url)
-            time.sleep(random.uniform(2, 4))
+            result = self._extract_product(self.driver, url, rank)
+            if not result:
+                self._count("error_count")
+                return False
             
-            # 데이터 추출
-            product_data = extract_all_product_data(self.driver, url, rank, city_name=self.city_name)
+            return self._save_product(result)
+                
+        except Exception as e:
+            print(f"❌ 상품 크롤링 실패 (순위 {rank}): {e}")
+            self._count("error_count")
+            return False
+        finally:
+            self._count("total_processed")
+    
+    def _count(self, key, value=1):
+        """통계 갱신 (워커/writer 스레드 공용)"""
+        with self._stats_lock:
+            self.stats[key] += value
+    
+    def _extract_product(self, driver, url, rank=None, http_first=True, fingerprint=None):
+        """상품 페이지 이동 및 데이터 추출 (드라이버별로 독립 실행 가능)
+        
+        fingerprint: 브라우저 추출 결과에 기록할 지문 (HTTP 추출이 실패한 페이지는 None → 다음 재확인 때 재추출)
+        """
+        # HTTP 우선 추출 (필수 필드가 모두 있으면 브라우저 이동 생략)
+        if http_first and CONFIG.get("HTTP_FIRST_EXTRACTION", True):
+            result, fingerprint = extract_product_http_with_fingerprint(url, rank, city_name=self.city_name)
+            if result and validate_product_data(result["product_data"]):
+                self._count("http_extracted")
+                return result
+            self._count("selenium_fallback")
+        
+        # 상품 페이지 이동 → 상품명/가격 렌더링 대기 (floor ~ ceiling)
+        started = time.perf_counter()
+        driver.get(url)
+        wait_for_product_ready(driver, url, started=started)
+        
+        # 데이터 추출
+        product_data = extract_all_product_data(driver, url, rank, city_name=self.city_name, wait_ready=False)
+        
+        # 데이터 검증
+        if not validate_product_data(product_data):
+            print(f"⚠️ 데이터 검증 실패: 순위 {rank}")
+            return None
+        
+        # 이미지 URL은 드라이버가 필요하므로 추출 단계에서 수집
+        main_img, thumb_img = None, None
+        try:
+            main_img, thumb_img = get_dual_image_urls_klook(driver)
+        except Exception as e:
+            print(f"  ⚠️ 이미지 처리 실패: {e}")
+        
+        # 변경 감지 지문은 필수 필드가 있는 원본 HTTP HTML 기준만 기록 (렌더링된 DOM 해시는 비교 불가)
+        return {"url": url, "rank": rank, "product_data": product_data, "main_img": main_img, "thumb_img": thumb_img,
+                "fingerprint": fingerprint}
+    
+    def _save_product(self, result):
+        """추출 결과 저장 (CSV 번호/중복 일관성을 위해 단일 스레드에서 호출)"""
+        url, rank = result["url"], result["rank"]
+        
+        # 기본 구조에 맞춰 데이터 병합 (번호는 저장소에서 할당)
+        base_data = create_product_data_structure(self.city_name, "", rank)
+        base_data.update(result["product_data"])
+        
+        # 이미지 URL 기록
+        main_img, thumb_img = result["main_img"], result["thumb_img"]
+        if main_img:
+            base_data["메인이미지"] = main_img
+        if thumb_img:
+            base_data["썸네일이미지"] = thumb_img
+        
+        # CSV 저장
+        if save_to_csv_klook(base_data, self.city_name):
+            # 이미지 다운로드 작업 등록 (번호는 저장 시 할당, 완료 대기는 배치 끝에서)
+            if CONFIG.get("SAVE_IMAGES", False) and main_img:
+                try:
+                    enqueue_dual_images_klook(
+                        {"main": main_img, "thumb": thumb_img},
+                        extract_row_number(base_data),
+                        self.city_name
+                    )
+                except Exception as e:
+                    print(f"  ⚠️ 이미지 처리 실패: {e}")
             
-            # 데이터 검증
-            if not validate_product_data(product_data):
-                print(f"⚠️ 데이터 검증 실패: 순위 {rank}")
-                self.stats["error_count"] += 1
-                return False
+            # 순위 정보 저장
+            save_url_with_rank(url, rank, self.city_name)
             
-            # 기본 구조에 맞춰 데이터 병합
-            base_data = create_product_data_structure(self.city_name, self.stats["total_processed"] + 1, rank)
-            base_data.update(product_data)
+            # URL 처리 완료 표시
+            mark_url_as_processed(url, self.city_name, base_data["번호"], rank)
+            self._record_freshness(result)
+            
+            self._count("success_count")
+            with self._stats_lock:
+                self.stats["current_rank"] = max(self.stats["current_rank"], rank or 0)
+            print(f"✅ 상품 크롤링 완료: 순위 {rank}")
+            return True
+        else:
+            self._count("error_count")
+            return False
+    
+    def _update_product(self, result):
+        """재확인으로 바뀐 상품을 기존 CSV 행에 반영 (번호 유지, 이미지/순위/처리 완료 기록은 건드리지 않음)"""
+        url, rank = result["url"], result["rank"]
+        updated = update_csv_klook(dict(result["product_data"]), self.city_name)
+        
+        # CSV 에 해당 URL 행이 없으면 (신선도 기록만 남은 상품) 새 상품으로 저장
+        if updated is None:
+            return self._save_product(result)
+        
+        if not updated:
+            self._count("error_count")
+            return False
+        
+        self._record_freshness(result)
+        self._count("success_count")
+        print(f"✅ 상품 갱신 완료: 순위 {rank} ({url[:60]})")
+        return True
+    
+    def _record_freshness(self, result):
+        """추출 결과의 지문/가격 기록 (다음 재확인 일정 계산용)"""
+        if not self.freshness:
+            return
+        try:
+            self.freshness.record_extraction(
+                result["url"], self.city_name, result["rank"],
+                result.get("fingerprint"), result["product_data"].get("가격")
+            )
+        except Exception as e:
+            print(f"  ⚠️ 신선도 기록 실패: {e}")
+    
+    def refresh_products(self, limit=None, include_not_due=False):
+        """변경 감지 재크롤링 (순위/가격 변동성 기반 우선순위, 지문이 같으면 추출 생략)
+        
+        - 조건부 요청(ETag/Last-Modified) → 304 면 생략
+        - 200 이면 핵심 영역 해시 비교 → 같으면 생략, 다르면 HTTP 파싱 결과로 기존 CSV 행 갱신 (번호 유지)
+        - HTTP 경로를 쓸 수 없을 때만 브라우저 추출 (드라이버는 필요할 때 생성)
+        """
+        if not self.freshness:
+            print("⚠️ 신선도 저장소 비활성화 (FRESHNESS_ENABLED)")
+            return False
+        
+        plan = self.freshness.plan_refresh(self.city_name, limit=limit, include_not_due=include_not_due)
+        print(f"🔄 {self.city_name} 변경 감지 재확인: {len(plan)}개 상품")
+        if not plan:
+            return True
+        
+        self.stats["start_time"] = self.stats["start_time"] or datetime.now()
+        limiter = DomainRateLimiter(CONFIG.get("REFRESH_MIN_DELAY", 1), CONFIG.get("REFRESH_MAX_DELAY", 3))
+        
+        for i, item in enumerate(plan, 1):
+            url, rank = item["url"], item["rank"]
+            print(f"\n[{i}/{len(plan)}] 순위 {rank} (우선순위 {item['priority']}, 변동성 {item['volatility']})")
+            limiter.wait(url)
+            self._count("total_processed")
             
-            # 이미지 처리
             try:
-                main_img, thumb_img = get_dual_image_urls_klook(self.driver)
-                if main_img:
-                    base_data["메인이미지"] = main_img
-                    
-                    # 이미지 다운로드 (선택적)
-                    if CONFIG.get("SAVE_IMAGES", False):
-                        img_path = f"images/{self.city_name}/rank_{rank}_main.jpg"
-                        download_and_save_image_klook(main_img, img_path)
+                outcome, result = refresh_product_http(url, rank, self.city_name, self.freshness)
+                if outcome == "unchanged":
+                    self._count("unchanged_count")
+                    continue
                 
-                if thumb_img:
-                    base_data["썸네일이미지"] = thumb_img
-                    
-            except Exception as e:
-                print(f"  ⚠️ 이미지 처리 실패: {e}")
-            
-            # CSV 저장
-            if save_to_csv_klook(base_data, self.city_name):
-                # 순위 정보 저장
-                save_url_with_rank(url, rank, self.city_name)
+                if outcome == "fallback":
+                    if not self.driver:
+                        self.driver = setup_driver(headless=CONFIG.get("PARALLEL_HEADLESS", True))
+                    self._count("selenium_fallback")
+                    result = self._extract_product(self.driver, url, rank, http_first=False)
+                    if not result:
+                        self._count("error_count")
+                        continue
+                else:
+                    self._count("http_extracted")
                 
-                # URL 처리 완료 표시
-                mark_url_as_processed(url, self.city_name, base_data["상품번호"], rank)
+                # 상품명+가격이 같으면 CSV 행은 그대로 두고 지문만 갱신
+                base_data = create_product_data_structure(self.city_name, "", rank)
+                base_data.update(result["product_data"])
+                if is_duplicate_hash(self.city_name, make_product_hash(base_data)):
+                    print(f"    💤 저장 데이터 변경 없음 (지문만 갱신)")
+                    self._record_freshness(result)
+                    self._count("unchanged_count")
+                    continue
                 
-                self.stats["success_count"] += 1
-                self.stats["current_rank"] = rank
-                print(f"✅ 상품 크롤링 완료: 순위 {rank}")
-                return True
-            else:
-                self.stats["error_count"] += 1
-                return False
+                self._update_product(result)
                 
-        except Exception as e:
-            print(f"❌ 상품 크롤링 실패 (순위 {rank}): {e}")
-            self.stats["error_count"] += 1
-            return False
-        finally:
-            self.stats["total_processed"] += 1
+            except Exception as e:
+                print(f"❌ 재확인 실패 (순위 {rank}): {e}")
+                self._count("error_count")
+        
+        flush_image_downloads_klook()
+        self.stats["end_time"] = datetime.now()
+        self.print_final_stats()
+        return True
     
-    def crawl_products_batch(self, urls, start_rank=1):
-        """배치 상품 크롤링"""
+    def crawl_products_batch(self, urls, start_rank=1, workers=None):
+        """배치 상품 크롤링 (workers > 1 이면 드라이버 풀 병렬 모드)"""
+        workers = workers or CONFIG.get("CRAWL_WORKERS", 1)
+        if workers > 1:
+            return self.crawl_products_parallel(urls, start_rank, workers)
+        
         print(f"📦 배치 크롤링 시작: {len(urls)}개 상품")
         
         current_rank = start_rank
@@ -206,9 +396,104 @@ class KlookCrawler:
                 print(f"😴 긴 휴식: {long_delay:.1f}초...")
                 time.sleep(long_delay)
         
+        flush_image_downloads_klook()
         print("\n📦 배치 크롤링 완료")
         return True
     
+    def crawl_products_parallel(self, urls, start_rank=1, workers=2):
+        """드라이버 풀 병렬 크롤링
+        
+        - 워커마다 헤드리스 드라이버 1개 + 도메인별 요청 간격(DomainRateLimiter) 보유
+        - 공유 작업 큐에서 (URL, 순위)를 가져와 추출만 수행
+        - CSV 저장/순위/완료 표시는 writer 스레드 1개가 순서대로 처리
+        - 순위는 URL 목록 위치 기준 (start_rank + index)
+        - 드라이버를 시작한 워커가 하나도 없으면 False
+        """
+        print(f"📦 병렬 배치 크롤링 시작: {len(urls)}개 상품, 워커 {workers}개")
+        
+        work_queue = queue.Queue()
+        for i, url in enumerate(urls):
+            work_queue.put((url, start_rank + i))
+        
+        result_queue = queue.Queue()
+        done_marker = object()
+        started_workers = []  # 드라이버 초기화에 성공한 워커 id
+        
+        def writer():
+            while True:
+                result = result_queue.get()
+                if result is done_marker:
+                    break
+                try:
+                    self._save_product(result)
+                except Exception as e:
+                    print(f"❌ 상품 저장 실패 (순위 {result['rank']}): {e}")
+                    self._count("error_count")
+                self.print_progress()
+        
+        def worker(worker_id):
+            try:
+                driver = setup_driver(headless=CONFIG.get("PARALLEL_HEADLESS", True))
+            except Exception as e:
+                print(f"❌ 워커 {worker_id} 드라이버 초기화 실패: {e}")
+                return
+            started_workers.append(worker_id)
+            
+            limiter = DomainRateLimiter()
+            try:
+                while True:
+                    try:
+                        url, rank = work_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    
+                    if is_url_already_processed(url, self.city_name):
+                        print(f"⏭️ [W{worker_id}] 이미 처리된 URL, 건너뜀: 순위 {rank}")
+                        self._count("skip_count")
+                        continue
+                    
+                    limiter.wait(url)
+                    print(f"🔍 [W{worker_id}] 상품 크롤링 시작: 순위 {rank}")
+                    try:
+                        result = self._extract_product(driver, url, rank)
+                        if result:
+                            result_queue.put(result)
+                        else:
+                            self._count("error_count")
+                    except Exception as e:
+                        print(f"❌ [W{worker_id}] 상품 크롤링 실패 (순위 {rank}): {e}")
+                        self._count("error_count")
+                    finally:
+                        self._count("total_processed")
+            finally:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+        
+        writer_thread = threading.Thread(target=writer, name="klook-writer", daemon=True)
+        writer_thread.start()
+        
+        worker_threads = [
+            threading.Thread(target=worker, args=(i + 1,), name=f"klook-worker-{i + 1}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in worker_threads:
+            thread.start()
+        for thread in worker_threads:
+            thread.join()
+        
+        result_queue.put(done_marker)
+        writer_thread.join()
+        
+        flush_image_downloads_klook()
+        
+        if not started_workers:
+            print(f"❌ 병렬 배치 크롤링 실패: 드라이버를 시작한 워커가 없습니다 ({len(urls)}개 상품 미처리)")
+            return False
+        print(f"\n📦 병렬 배치 크롤링 완료 (워커 {len(started_workers)}/{workers}개 실행)")
+        return True
+    
     def run_full_crawling(self, max_pages=3, max_products=None):
         """전체 크롤링 실행"""
         print(f"🎯 {self.city_name} 전체 크롤링 시작")
@@ -278,10 +563,18 @@ class KlookCrawler:
         print(f"   • 건너뜀: {self.stats['skip_count']}개")
         print(f"   • URL 수집: {self.stats['urls_collected']}개")
         print(f"   • 마지막 순위: {self.stats['current_rank']}")
+        print(f"   • HTTP 추출: {self.stats['http_extracted']}개 / Selenium 폴백: {self.stats['selenium_fallback']}개")
+        if self.stats["unchanged_count"]:
+            print(f"   • 변경 없음 (추출/저장 생략): {self.stats['unchanged_count']}개")
         
         if self.stats["total_processed"] > 0:
             success_rate = (self.stats["success_count"] / self.stats["total_processed"]) * 100
             print(f"   • 성공률: {success_rate:.1f}%")
+        
+        # 도메인별 페이지 준비 시간 (PAGE_READY_FLOOR / CEILING 조정 근거)
+        tracker = get_page_ready_tracker()
+        tracker.print_summary()
+        tracker.save()
 
 # =============================================================================
 # 편의 함수들 (기존 코드 호환성)
@@ -299,6 +592,11 @@ def quick_crawl_test(city_name="서울", max_products=3):
     crawler = KlookCrawler(city_name)
     return crawler.run_full_crawling(max_pages=1, max_products=max_products)
 
+def refresh_city_products(city_name="서울", limit=None, include_not_due=False):
+    """변경 감지 재크롤링 (야간 상위 상품 갱신용)"""
+    crawler = KlookCrawler(city_name)
+    return crawler.refresh_products(limit=limit, include_not_due=include_not_due)
+
 def get_crawling_status(city_name):
     """크롤링 상태 조회"""
     try:
@@ -64,8 +64,8 @@ def make_user_agent(ua, is_mobile):
         "sec-ch-ua-full-version": f'"{ua_full_version}"'
     }
 
-def setup_driver():
-    """드라이버 설정 및 시작"""
+def setup_driver(headless=False):
+    """드라이버 설정 및 시작 (headless=True: 병렬 워커용 헤드리스 모드)"""
     if not WEBDRIVER_AVAILABLE:
         raise Exception("웹드라이버 라이브러리가 설치되지 않았습니다.")
     
@@ -84,6 +84,8 @@ def setup_driver():
         options.add_argument("--disable-extensions")
         options.add_argument("--disable-plugins")
         options.add_argument("--window-size=1920,1080")
+        if headless:
+            options.add_argument("--headless=new")
         
         # 동적 User-Agent 설정
         from ..config import get_random_user_agent
@@ -0,0 +1,301 @@
+"""
+HTTP 우선 상품 상세 추출 시스템
+- 브라우저 없이 requests 세션(커넥션 풀) + lxml 로 상세 페이지 파싱
+- parsers.py 의 KLOOK_SELECTORS 셀렉터 테이블과 build_product_data 정제 규칙을 그대로 재사용
+- 필수 필드(상품명/가격/평점)가 비어 있으면 None 반환 → Selenium 추출로 폴백
+"""
+
+import hashlib
+import threading
+
+from ..config import CONFIG, REQUESTS_AVAILABLE, get_random_user_agent
+from ..utils.file_handler import KLOOK_MAIN_IMAGE_SELECTORS, KLOOK_THUMB_IMAGE_SELECTORS
+from .parsers import (
+    KLOOK_SELECTORS, SNAPSHOT_FIRST_ONLY_FIELDS, SNAPSHOT_MAX_TEXTS, build_product_data, get_location_tags
+)
+
+if REQUESTS_AVAILABLE:
+    import requests
+    from requests.adapters import HTTPAdapter
+
+# 조건부 import - lxml / cssselect 가 없으면 HTTP 경로 비활성화 (Selenium 만 사용)
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+try:
+    from cssselect import GenericTranslator, SelectorError
+    CSSSELECT_AVAILABLE = True
+except ImportError:
+    CSSSELECT_AVAILABLE = False
+
+HTTP_EXTRACTION_AVAILABLE = REQUESTS_AVAILABLE and LXML_AVAILABLE
+
+# 변경 감지 지문에 쓰는 핵심 영역 (이 필드 텍스트가 같으면 재추출 생략)
+FINGERPRINT_FIELDS = ("상품명", "가격", "평점", "리뷰수")
+
+# 필수 필드가 이 값이면 HTTP 추출 실패로 간주
+HTTP_REQUIRED_FIELDS = {
+    "상품명": ["", "상품명 없음"],
+    "가격": ["", "가격 정보 없음"],
+    "평점": ["", "평점 정보 없음"],
+}
+
+# =============================================================================
+# 커넥션 풀 세션 (스레드별 1개)
+# =============================================================================
+
+_session_local = threading.local()
+
+def get_http_session():
+    """현재 스레드의 requests 세션 반환 (keep-alive 커넥션 풀 재사용)"""
+    session = getattr(_session_local, "session", None)
+    if session is None:
+        pool_size = CONFIG.get("HTTP_POOL_SIZE", 10)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            'User-Agent': get_random_user_agent(),
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'ko-KR,ko;q=0.9,en;q=0.8',
+        })
+        _session_local.session = session
+    return session
+
+def fetch_product_page(url, headers=None):
+    """상품 상세 페이지 요청 → (상태 코드, HTML, 응답 헤더), 요청 실패 시 (None, None, {})
+
+    headers: 조건부 요청 헤더 (If-None-Match / If-Modified-Since) → 변경 없으면 304
+    """
+    try:
+        response = get_http_session().get(url, headers=headers, timeout=CONFIG.get("HTTP_TIMEOUT", 10))
+        return response.status_code, response.text, response.headers
+    except Exception as e:
+        print(f"    ⚠️ HTTP 요청 실패: {e}")
+        return None, None, {}
+
+def fetch_product_html(url):
+    """상품 상세 페이지 HTML 가져오기 (실패 시 None)"""
+    status, html, _ = fetch_product_page(url)
+    if status is None:
+        return None
+    if status != 200:
+        print(f"    ⚠️ HTTP 응답 {status}: {url[:60]}...")
+        return None
+    return html
+
+# =============================================================================
+# 셀렉터 → XPath 변환 (캐시)
+# =============================================================================
+
+_xpath_cache = {}
+
+def selector_to_xpath(selector):
+    """KLOOK_SELECTORS 항목을 lxml XPath로 변환 ("//"는 그대로, CSS는 cssselect 변환)"""
+    if selector.startswith("//"):
+        return selector
+
+    if selector not in _xpath_cache:
+        xpath = None
+        if CSSSELECT_AVAILABLE:
+            try:
+                xpath = GenericTranslator().css_to_xpath(selector)
+            except SelectorError:
+                xpath = None
+        _xpath_cache[selector] = xpath
+    return _xpath_cache[selector]
+
+def select_elements(tree, selector):
+    """셀렉터에 해당하는 요소 목록 (변환 불가/오류 시 빈 목록)"""
+    xpath = selector_to_xpath(selector)
+    if not xpath:
+        return []
+    try:
+        return tree.xpath(xpath)
+    except Exception:
+        return []
+
+def element_text(element):
+    """Selenium element.text 와 비슷하게 줄 단위 텍스트 반환 (script/style 제외)"""
+    texts = []
+    for node in element.iter():
+        if node.tag in ("script", "style"):
+            continue
+        if node.text and node.text.strip():
+            texts.append(node.text.strip())
+        if node is not element and node.tail and node.tail.strip():
+            texts.append(node.tail.strip())
+    return "\n".join(texts)
+
+# =============================================================================
+# HTML 파싱 (parsers.build_product_data 와 같은 정제 규칙)
+# =============================================================================
+
+def collect_field_texts(tree, fields=None):
+    """KLOOK_SELECTORS 필드별 텍스트 목록 (DOM 스냅샷 스크립트와 같은 수집 규칙)"""
+    field_texts = {}
+    for field in fields or KLOOK_SELECTORS:
+        limit = 1 if field in SNAPSHOT_FIRST_ONLY_FIELDS else SNAPSHOT_MAX_TEXTS
+        texts = []
+        for selector in KLOOK_SELECTORS[field]:
+            for element in select_elements(tree, selector)[:limit]:
+                text = element_text(element).strip()
+                if text:
+                    texts.append(text)
+        field_texts[field] = texts
+    return field_texts
+
+def _first_image_url(tree, selectors):
+    for selector in selectors:
+        for element in select_elements(tree, selector):
+            img_url = element.get("src")
+            if img_url and img_url.startswith("http"):
+                return img_url
+    return None
+
+def fingerprint_field_texts(field_texts):
+    """핵심 영역(FINGERPRINT_FIELDS) 텍스트를 공백 정규화해 md5 (광고/추천 등 주변 변화는 무시)"""
+    normalized = "\x1e".join(
+        "\x1f".join(" ".join(text.split()) for text in field_texts[field]) for field in FINGERPRINT_FIELDS
+    )
+    return hashlib.md5(normalized.encode('utf-8')).hexdigest()
+
+def parse_product_html(html, url, rank=None, city_name=None):
+    """HTML 문자열에서 상품 데이터 파싱 (extract_all_product_data 와 같은 키 구성)"""
+    tree = lxml.html.fromstring(html) if isinstance(html, str) else html
+
+    # 위치 태그는 필수 필드 확인 후 extract_product_http 에서 채움
+    product_data = build_product_data(collect_field_texts(tree), url, rank, city_name, with_location_tags=False)
+
+    main_img = _first_image_url(tree, KLOOK_MAIN_IMAGE_SELECTORS)
+    thumb_img = _first_image_url(tree, KLOOK_THUMB_IMAGE_SELECTORS) or main_img
+
+    return product_data, main_img, thumb_img
+
+def has_required_fields(product_data):
+    """HTTP 추출 결과에 필수 필드가 모두 채워졌는지 확인"""
+    for field, empty_values in HTTP_REQUIRED_FIELDS.items():
+        if product_data.get(field, "") in empty_values:
+            return False
+    return True
+
+# =============================================================================
+# HTTP 우선 추출 진입점
+# =============================================================================
+
+def _page_fingerprint(tree, headers):
+    """응답 헤더 + 핵심 영역 해시 → 지문 dict
+
+    필수 필드(상품명/가격/평점)가 비어 있는 HTML 이면 None - 가격 변화를 볼 수 없는 해시라
+    비교에 쓰면 "변경 없음"이 영구히 이어짐 (None 을 기록해 매번 재추출)
+    """
+    field_texts = collect_field_texts(tree, FINGERPRINT_FIELDS)
+    if not has_required_fields(build_product_data(field_texts, None, with_location_tags=False)):
+        return None
+    return {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "content_hash": fingerprint_field_texts(field_texts),
+    }
+
+def _extract_from_tree(tree, url, rank, city_name, fingerprint):
+    """파싱된 페이지 → 추출 결과 dict (필수 필드 누락 시 None)"""
+    try:
+        product_data, main_img, thumb_img = parse_product_html(tree, url, rank, city_name)
+    except Exception as e:
+        print(f"    ⚠️ HTML 파싱 실패: {e}")
+        return None
+
+    if not has_required_fields(product_data):
+        missing = [field for field, empty in HTTP_REQUIRED_FIELDS.items() if product_data.get(field, "") in empty]
+        print(f"    ↪️ HTTP 추출 필수 필드 누락 ({', '.join(missing)}) → Selenium 폴백")
+        return None
+
+    # 위치 태그는 필수 필드 확인 후에만 학습 (폴백 시 중복 학습 방지)
+    product_data["위치태그"] = get_location_tags(city_name, product_data["상품명"], product_data["하이라이트"])
+
+    print(f"    ⚡ HTTP 추출 성공: {product_data['상품명'][:40]}...")
+    return {"url": url, "rank": rank, "product_data": product_data, "main_img": main_img, "thumb_img": thumb_img,
+            "fingerprint": fingerprint}
+
+def extract_product_http_with_fingerprint(url, rank=None, city_name=None):
+    """브라우저 없이 상품 추출 시도 + 원본 HTML 지문
+
+    반환: (추출 결과 또는 None, 지문 또는 None)
+          지문은 필수 필드가 모두 있는 HTML 에서만 생성 (폴백이 필요한 페이지는 None → 다음 재확인 때 재추출)
+    """
+    if not HTTP_EXTRACTION_AVAILABLE:
+        return None, None
+
+    status, html, headers = fetch_product_page(url)
+    if status != 200:
+        if status is not None:
+            print(f"    ⚠️ HTTP 응답 {status}: {url[:60]}...")
+        return None, None
+
+    try:
+        tree = lxml.html.fromstring(html)
+    except Exception as e:
+        print(f"    ⚠️ HTML 파싱 실패: {e}")
+        return None, None
+    fingerprint = _page_fingerprint(tree, headers)
+    result = _extract_from_tree(tree, url, rank, city_name, fingerprint)
+    return result, (fingerprint if result else None)
+
+def extract_product_http(url, rank=None, city_name=None):
+    """브라우저 없이 상품 추출 시도
+
+    반환: {"url", "rank", "product_data", "main_img", "thumb_img", "fingerprint"} 또는
+          필수 필드가 비었거나 HTTP 경로를 쓸 수 없으면 None (Selenium 폴백 신호)
+    """
+    return extract_product_http_with_fingerprint(url, rank, city_name)[0]
+
+# =============================================================================
+# 변경 감지 재확인
+# =============================================================================
+
+def refresh_product_http(url, rank, city_name, freshness_store):
+    """저장된 지문과 비교해 변경된 상품만 추출
+
+    반환: ("unchanged", None) - 304 또는 핵심 영역 해시 일치 (추출 생략, 확인 시각만 갱신)
+          ("changed", 추출 결과) - 지문이 달라 전체 추출 수행
+          ("fallback", None) - HTTP 경로 사용 불가/필수 필드 누락 → Selenium 추출 필요
+                               (지문 비교는 필수 필드가 있는 HTML 에서만 수행)
+    """
+    if not HTTP_EXTRACTION_AVAILABLE:
+        return "fallback", None
+
+    status, html, headers = fetch_product_page(url, freshness_store.conditional_headers(url))
+    if status == 304:
+        print(f"    💤 변경 없음 (304): 순위 {rank}")
+        freshness_store.record_unchanged(url)
+        return "unchanged", None
+    if status != 200:
+        if status is not None:
+            print(f"    ⚠️ HTTP 응답 {status}: {url[:60]}...")
+        return "fallback", None
+
+    try:
+        tree = lxml.html.fromstring(html)
+    except Exception as e:
+        print(f"    ⚠️ HTML 파싱 실패: {e}")
+        return "fallback", None
+
+    fingerprint = _page_fingerprint(tree, headers)
+    if fingerprint is None:
+        print(f"    ↪️ HTTP 응답에 필수 필드 없음 → 지문 비교 생략, Selenium 재추출")
+        return "fallback", None
+    if freshness_store.matches(url, fingerprint["content_hash"]):
+        print(f"    💤 변경 없음 (지문 일치): 순위 {rank}")
+        freshness_store.record_unchanged(url, fingerprint)
+        return "unchanged", None
+
+    result = _extract_from_tree(tree, url, rank, city_name, fingerprint)
+    return ("changed", result) if result else ("fallback", None)
+
+print("✅ http_parsers.py 로드 완료: HTTP 우선 추출 준비!")
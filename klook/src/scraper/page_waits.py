@@ -0,0 +1,184 @@
+"""
+페이지 준비 대기 전략
+- 고정 sleep 대신 상품명/가격 컨테이너가 나타나는 즉시 진행 (KLOOK_SELECTORS 재사용)
+- 최소 대기(floor) / 최대 대기(ceiling) 설정
+- 도메인별 준비 시간(time-to-ready) 기록 → 대기 상수를 데이터로 조정
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from collections import deque
+from urllib.parse import urlparse
+
+from ..config import CONFIG, SELENIUM_AVAILABLE
+from .parsers import KLOOK_SELECTORS, selector_locator
+
+if SELENIUM_AVAILABLE:
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+
+# 준비 판정 필드 (필드마다 셀렉터 1개 이상이 텍스트와 함께 존재해야 함)
+READY_FIELDS = ("상품명", "가격")
+MAX_SAMPLES_PER_DOMAIN = 500   # 도메인별 최근 관측값 보관 수
+
+# =============================================================================
+# 도메인별 준비 시간 기록
+# =============================================================================
+
+class PageReadyTracker:
+    """도메인별 time-to-ready 관측값 (최근 N개) + 타임아웃 횟수, JSON 파일로 누적"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.domains = {}       # 도메인 → {"samples": deque, "timeouts": int}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def _domain(self, domain):
+        entry = self.domains.get(domain)
+        if entry is None:
+            entry = self.domains[domain] = {"samples": deque(maxlen=MAX_SAMPLES_PER_DOMAIN), "timeouts": 0}
+        return entry
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for domain, entry in data.get("domains", {}).items():
+                record = self._domain(domain)
+                record["samples"].extend(entry.get("samples", []))
+                record["timeouts"] = entry.get("timeouts", 0)
+        except Exception as e:
+            print(f"⚠️ 준비 시간 기록 로드 실패: {e}")
+
+    def record(self, url, seconds, timed_out=False):
+        """준비 시간 1건 기록 (타임아웃이면 ceiling 값이 들어옴)"""
+        domain = urlparse(url).netloc or "unknown"
+        with self._lock:
+            entry = self._domain(domain)
+            entry["samples"].append(round(seconds, 3))
+            if timed_out:
+                entry["timeouts"] += 1
+            self._dirty = True
+
+    def summary(self, domain=None):
+        """{도메인: {count, timeouts, p50, p95, p99, max}}"""
+        result = {}
+        with self._lock:
+            items = [(d, sorted(e["samples"]), e["timeouts"]) for d, e in self.domains.items()
+                     if domain is None or d == domain]
+        for name, samples, timeouts in items:
+            if not samples:
+                continue
+            def pick(q):
+                return samples[min(len(samples) - 1, int(q * len(samples)))]
+            result[name] = {
+                "count": len(samples),
+                "timeouts": timeouts,
+                "p50": pick(0.5),
+                "p95": pick(0.95),
+                "p99": pick(0.99),
+                "max": samples[-1],
+            }
+        return result
+
+    def print_summary(self):
+        """도메인별 준비 시간 표 (PAGE_READY_FLOOR / CEILING 조정용)"""
+        for domain, s in self.summary().items():
+            print(f"⏱️ 페이지 준비 시간 [{domain}] {s['count']}건 / 타임아웃 {s['timeouts']}건 "
+                  f"- p50 {s['p50']:.2f}s, p95 {s['p95']:.2f}s, p99 {s['p99']:.2f}s, 최대 {s['max']:.2f}s")
+
+    def save(self):
+        """변경분이 있으면 임시 파일 → 교체 방식으로 저장"""
+        if not self.path:
+            return False
+        with self._lock:
+            if not self._dirty:
+                return True
+            data = {"domains": {d: {"samples": list(e["samples"]), "timeouts": e["timeouts"]}
+                                for d, e in self.domains.items()}}
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            print(f"⚠️ 준비 시간 기록 저장 실패: {e}")
+            return False
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+def get_page_ready_tracker():
+    """프로세스 공용 PageReadyTracker (CONFIG PAGE_READY_STATS_FILE)"""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = PageReadyTracker(CONFIG.get("PAGE_READY_STATS_FILE"))
+        return _tracker
+
+@atexit.register
+def save_page_ready_stats():
+    if _tracker is not None:
+        _tracker.save()
+
+# =============================================================================
+# 준비 대기
+# =============================================================================
+
+def _field_ready(driver, selectors):
+    """셀렉터 중 하나라도 텍스트가 있는 요소를 찾으면 True"""
+    for selector in selectors:
+        try:
+            for element in driver.find_elements(*selector_locator(selector)):
+                if element.text.strip():
+                    return True
+        except Exception:
+            continue
+    return False
+
+def product_page_ready(driver):
+    """WebDriverWait 조건: 상품명과 가격 컨테이너가 모두 렌더링됨"""
+    return all(_field_ready(driver, KLOOK_SELECTORS[field]) for field in READY_FIELDS)
+
+def wait_for_product_ready(driver, url=None, floor=None, ceiling=None, started=None):
+    """상품 페이지 준비 대기 (준비되는 즉시 반환, 단 floor 초는 보장)
+
+    started: 페이지 이동 시작 시각 (time.perf_counter) - floor 기준, 없으면 호출 시각
+    반환: 준비 완료 여부 (ceiling 초과 시 False, 추출은 그대로 시도)
+    """
+    floor = CONFIG.get("PAGE_READY_FLOOR", 0.5) if floor is None else floor
+    ceiling = CONFIG.get("PAGE_READY_CEILING", 10) if ceiling is None else ceiling
+    started = time.perf_counter() if started is None else started
+
+    if not SELENIUM_AVAILABLE:
+        time.sleep(max(0.0, floor - (time.perf_counter() - started)))
+        return True
+
+    ready = True
+    remaining = max(0.0, ceiling - (time.perf_counter() - started))
+    try:
+        WebDriverWait(driver, remaining, poll_frequency=CONFIG.get("PAGE_READY_POLL", 0.25)).until(product_page_ready)
+    except TimeoutException:
+        ready = False
+        print(f"    ⚠️ 페이지 준비 대기 초과 ({ceiling}초) - 현재 상태로 추출 진행")
+    except WebDriverException as e:
+        ready = False
+        print(f"    ⚠️ 페이지 준비 확인 실패: {e}")
+
+    elapsed = time.perf_counter() - started
+    get_page_ready_tracker().record(url or getattr(driver, "current_url", ""), elapsed, timed_out=not ready)
+    if elapsed < floor:
+        time.sleep(floor - elapsed)
+    return ready
+
+print("✅ page_waits.py 로드 완료: 페이지 준비 대기 시스템 준비!")
@@ -11,9 +11,9 @@ import random
 from datetime import datetime
 
 from ..config import CONFIG, SELENIUM_AVAILABLE
-from ..utils.location_learning import LocationLearningSystem
+from ..utils.location_learning import get_location_learner
 
-# 학습 시스템 인스턴스는 함수 내에서 동적으로 생성
+# 학습 시스템 인스턴스는 도시별로 캐시하여 재사용 (get_location_learner)
 
 if SELENIUM_AVAILABLE:
     from selenium.webdriver.common.by import By
@@ -21,6 +21,160 @@ if SELENIUM_AVAILABLE:
     from selenium.webdriver.support import expected_conditions as EC
     from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 
+# =============================================================================
+# KLOOK 셀렉터 테이블 (Selenium / HTTP 추출 공용, "//"로 시작하면 XPath)
+# =============================================================================
+
+KLOOK_SELECTORS = {
+    "상품명": [
+        "#activity_title > h1 > span",                 # KLOOK 최우선 (100% 확인됨)
+        "#activity_title .vam",                        # KLOOK 백업
+        "#activity_title h1",                          # KLOOK 백업2
+        "h1",                                          # 범용 백업
+        "[data-testid='activity-title']",              # 새로운 KLOOK 구조
+        ".activity-title",                             # 클래스 기반
+        "//h1[contains(@class, 'title')]",             # 일반적인 제목
+    ],
+
+    "가격": [
+        "#banner_atlas .salling-price span",           # 판매가 (최우선)
+        "#banner_atlas .market-price b",               # 정가
+        "#banner_atlas .price-box span",               # 범용 백업
+        "span[data-v-7d296880]",                       # data-v 속성
+        ".price",
+        "[class*='price']",
+        "[data-testid*='price']",                      # 새로운 구조
+        "//span[contains(text(), '₩') and string-length(text()) < 30]",
+        "//span[contains(text(), '원') and contains(text(), ',') and string-length(text()) < 30]",
+        "//div[contains(@class, 'price')]//span",      # 가격 컨테이너 내 span
+    ],
+
+    "평점": [
+        ".rating-score",                               # KLOOK 최우선
+        "[data-testid='rating-score']",                # 새로운 구조
+        ".review-score",                               # 리뷰 점수
+        "[class*='rating']",                           # 평점 관련 클래스
+        "[class*='score']",                            # 점수 관련 클래스
+        "//span[contains(text(), '.') and string-length(text()) < 10]",  # 점수 형태
+        "//div[contains(@class, 'rating')]//span",     # 평점 컨테이너 내
+    ],
+
+    "리뷰수": [
+        "[class*='review'][class*='count']",
+        ".review-count",
+        "[data-testid*='review-count']",
+        ".reviews-count",
+        "[class*='rating'] .count",
+        ".comment-count",
+    ],
+
+    "카테고리": [
+        "[class*='breadcrumb'] span",
+        "[class*='category'] span",
+        ".breadcrumb a",
+        ".category-tag",
+        "[data-testid*='category']",
+        ".tags span",
+        ".labels span",
+    ],
+
+    "특징": [
+        ".product-features li",                        # 상품 특징
+        ".key-points li",                              # 핵심 포인트
+        ".benefits li",                                # 혜택
+        ".inclusions li",                              # 포함사항
+        ".tags span",                                  # 태그
+        "[data-testid*='feature']",                    # 특징 테스트ID
+        ".feature-list li",                            # 특징 리스트
+        ".amenities li",                               # 편의시설
+    ],
+
+    "하이라이트": [
+        "#highlight .exp-highlights-content",          # 최우선: 전체 하이라이트 내용
+        "#highlight .exp-highlights-content-wrap",     # 백업 1: 래핑된 내용
+        "#highlight .klk-markdown",                    # 백업 2: 마크다운 내용
+        "#highlight .activity-klk-markdown",           # 백업 3: 액티비티 마크다운
+        "#highlight",                                  # 최종: 전체 영역
+    ],
+
+    "활동속성": [
+        "#activity_attribute_tags .js-tag-content-node",
+    ],
+}
+
+def selector_locator(selector):
+    """셀렉터 문자열을 Selenium (By, value) 튜플로 변환"""
+    if selector.startswith("//"):
+        return By.XPATH, selector
+    return By.CSS_SELECTOR, selector
+
+# 셀렉터별 텍스트 검증 함수
+def is_valid_price_text(text):
+    return bool(text) and ('₩' in text or 'KRW' in text or '원' in text or text.replace(',', '').replace('.', '').isdigit())
+
+def is_valid_rating_text(text):
+    return bool(text) and (text.replace('.', '').isdigit() or '/' in text)
+
+def is_valid_category_text(text):
+    return bool(text) and len(text) < 50  # 너무 긴 텍스트는 제외
+
+def is_valid_feature_text(text):
+    return bool(text) and 10 < len(text) < 100  # 적절한 길이의 특징만
+
+def clean_highlight_text(content_text):
+    """짧은 하이라이트 텍스트 정리 (펼치기 문구 제거, 줄 단위 공백 정리)"""
+    content_text = content_text.replace("펼치기", "").strip()
+    lines = [line.strip() for line in content_text.split('\n') if line.strip()]
+    return '\n'.join(lines)
+
+def classify_activity_attributes(texts):
+    """활동 속성 태그 텍스트를 언어/투어형태/미팅방식/소요시간으로 분류"""
+    attributes = {
+        "언어": "",
+        "투어형태": "",
+        "미팅방식": "",
+        "소요시간": ""
+    }
+    
+    language_keywords = [
+        '한국어', '영어', '중국어', '일본어', '태국어', '스페인어',
+        '러시아어', '독일어', '프랑스어', '폴란드어', '네덜란드어',
+        '이탈리아어', '포르투갈리어', '베트남어', '인도네시아어'
+    ]
+    tour_type_keywords = ['조인', '그룹', '프라이빗', '개별']
+    meeting_keywords = ['미팅', '픽업', '집합', '만남']
+    
+    for text in texts:
+        text = (text or "").strip()
+        if not text:
+            continue
+        
+        # 언어 분류
+        if any(keyword in text for keyword in language_keywords):
+            attributes["언어"] = text
+            print(f"    투어 언어: {text}")
+            continue
+        
+        # 소요시간 분류
+        if (('소요' in text or '일정' in text) and '시간' in text):
+            attributes["소요시간"] = text
+            print(f"    소요시간: {text}")
+            continue
+        
+        # 투어형태 분류
+        if any(keyword in text for keyword in tour_type_keywords):
+            attributes["투어형태"] = text
+            print(f"    투어형태: {text}")
+            continue
+        
+        # 미팅방식 분류
+        if any(keyword in text for keyword in meeting_keywords):
+            attributes["미팅방식"] = text
+            print(f"    미팅방식: {text}")
+            continue
+    
+    return attributes
+
 # =============================================================================
 # 기본 데이터 추출 시스템
 # =============================================================================
@@ -32,20 +186,10 @@ def get_product_name(driver):
     if not SELENIUM_AVAILABLE:
         return "상품명 추출 불가"
     
-    # 원본에서 실제 작동하는 정교한 셀렉터들
-    title_selectors = [
-        (By.CSS_SELECTOR, "#activity_title > h1 > span"),    # KLOOK 최우선 (100% 확인됨)
-        (By.CSS_SELECTOR, "#activity_title .vam"),           # KLOOK 백업
-        (By.CSS_SELECTOR, "#activity_title h1"),             # KLOOK 백업2
-        (By.CSS_SELECTOR, "h1"),                             # 범용 백업
-        (By.CSS_SELECTOR, "[data-testid='activity-title']"), # 새로운 KLOOK 구조
-        (By.CSS_SELECTOR, ".activity-title"),                # 클래스 기반
-        (By.XPATH, "//h1[contains(@class, 'title')]"),       # 일반적인 제목
-    ]
-    
-    for selector_type, selector_value in title_selectors:
+    # 원본에서 실제 작동하는 정교한 셀렉터들 (KLOOK_SELECTORS["상품명"])
+    for selector in KLOOK_SELECTORS["상품명"]:
         try:
-            element = driver.find_element(selector_type, selector_value)
+            element = driver.find_element(*selector_locator(selector))
             
             if element and element.text.strip():
                 name = element.text.strip()
@@ -65,28 +209,15 @@ def get_price(driver):
     if not SELENIUM_AVAILABLE:
         return "가격 추출 불가"
     
-    # 원본에서 실제 작동하는 정교한 가격 셀렉터들
-    price_selectors = [
-        (By.CSS_SELECTOR, "#banner_atlas .salling-price span"),     # 판매가 (최우선)
-        (By.CSS_SELECTOR, "#banner_atlas .market-price b"),         # 정가
-        (By.CSS_SELECTOR, "#banner_atlas .price-box span"),         # 범용 백업
-        (By.CSS_SELECTOR, "span[data-v-7d296880]"),                 # data-v 속성
-        (By.CSS_SELECTOR, ".price"),
-        (By.CSS_SELECTOR, "[class*='price']"),
-        (By.CSS_SELECTOR, "[data-testid*='price']"),                # 새로운 구조
-        (By.XPATH, "//span[contains(text(), '₩') and string-length(text()) < 30]"),
-        (By.XPATH, "//span[contains(text(), '원') and contains(text(), ',') and string-length(text()) < 30]"),
-        (By.XPATH, "//div[contains(@class, 'price')]//span"),       # 가격 컨테이너 내 span
-    ]
-    
-    for selector_type, selector_value in price_selectors:
+    # 원본에서 실제 작동하는 정교한 가격 셀렉터들 (KLOOK_SELECTORS["가격"])
+    for selector in KLOOK_SELECTORS["가격"]:
         try:
-            elements = driver.find_elements(selector_type, selector_value)
+            elements = driver.find_elements(*selector_locator(selector))
             
             for element in elements:
                 try:
                     price_text = element.text.strip()
-                    if price_text and ('₩' in price_text or 'KRW' in price_text or '원' in price_text or price_text.replace(',', '').replace('.', '').isdigit()):
+                    if is_valid_price_text(price_text):
                         cleaned_price = clean_price(price_text)
                         if cleaned_price != "가격 정보 없음":
                             print(f"    ✅ 가격: {cleaned_price}")
@@ -107,25 +238,15 @@ def get_rating(driver):
     if not SELENIUM_AVAILABLE:
         return "평점 추출 불가"
     
-    # 원본에서 실제 작동하는 정교한 평점 셀렉터들
-    rating_selectors = [
-        (By.CSS_SELECTOR, ".rating-score"),                    # KLOOK 최우선
-        (By.CSS_SELECTOR, "[data-testid='rating-score']"),     # 새로운 구조
-        (By.CSS_SELECTOR, ".review-score"),                    # 리뷰 점수
-        (By.CSS_SELECTOR, "[class*='rating']"),                # 평점 관련 클래스
-        (By.CSS_SELECTOR, "[class*='score']"),                 # 점수 관련 클래스
-        (By.XPATH, "//span[contains(text(), '.') and string-length(text()) < 10]"),  # 점수 형태
-        (By.XPATH, "//div[contains(@class, 'rating')]//span"), # 평점 컨테이너 내
-    ]
-    
-    for selector_type, selector_value in rating_selectors:
+    # 원본에서 실제 작동하는 정교한 평점 셀렉터들 (KLOOK_SELECTORS["평점"])
+    for selector in KLOOK_SELECTORS["평점"]:
         try:
-            elements = driver.find_elements(selector_type, selector_value)
+            elements = driver.find_elements(*selector_locator(selector))
             
             for element in elements:
                 try:
                     rating_text = element.text.strip()
-                    if rating_text and (rating_text.replace('.', '').isdigit() or '/' in rating_text):
+                    if is_valid_rating_text(rating_text):
                         cleaned_rating = clean_rating(rating_text)
                         if cleaned_rating != "평점 정보 없음":
                             print(f"    ✅ 평점: {cleaned_rating}")
@@ -146,21 +267,9 @@ def get_review_count(driver):
     if not SELENIUM_AVAILABLE:
         return "리뷰 수 추출 불가"
     
-    review_selectors = [
-        ("css", "[class*='review'][class*='count']"),
-        ("css", ".review-count"),
-        ("css", "[data-testid*='review-count']"),
-        ("css", ".reviews-count"),
-        ("css", "[class*='rating'] .count"),
-        ("css", ".comment-count")
-    ]
-    
-    for selector_type, selector_value in review_selectors:
+    for selector in KLOOK_SELECTORS["리뷰수"]:
         try:
-            if selector_type == "css":
-                elements = driver.find_elements(By.CSS_SELECTOR, selector_value)
-            else:  # xpath
-                elements = driver.find_elements(By.XPATH, selector_value)
+            elements = driver.find_elements(*selector_locator(selector))
             
             for element in elements:
                 try:
@@ -188,26 +297,16 @@ def get_categories(driver):
     if not SELENIUM_AVAILABLE:
         return "카테고리 추출 불가"
     
-    category_selectors = [
-        "[class*='breadcrumb'] span",
-        "[class*='category'] span",
-        ".breadcrumb a",
-        ".category-tag",
-        "[data-testid*='category']",
-        ".tags span",
-        ".labels span"
-    ]
-    
     categories = []
     
-    for selector in category_selectors:
+    for selector in KLOOK_SELECTORS["카테고리"]:
         try:
-            elements = driver.find_elements(By.CSS_SELECTOR, selector)
+            elements = driver.find_elements(*selector_locator(selector))
             
             for element in elements:
                 try:
                     category_text = element.text.strip()
-                    if category_text and len(category_text) < 50:  # 너무 긴 텍스트는 제외
+                    if is_valid_category_text(category_text):
                         categories.append(category_text)
                 except:
                     continue
@@ -346,30 +445,15 @@ def get_short_highlight_content(driver):
     print("    📄 짧은 내용 - 직접 수집")
     
     try:
-        # 원본 소스 기반 - 우선순위별 셀렉터 시도
-        content_selectors = [
-            "#highlight .exp-highlights-content",           # 최우선: 전체 하이라이트 내용
-            "#highlight .exp-highlights-content-wrap",      # 백업 1: 래핑된 내용 
-            "#highlight .klk-markdown",                     # 백업 2: 마크다운 내용
-            "#highlight .activity-klk-markdown",            # 백업 3: 액티비티 마크다운
-            "#highlight"                                    # 최종: 전체 영역
-        ]
-        
-        for selector in content_selectors:
+        # 원본 소스 기반 - 우선순위별 셀렉터 시도 (KLOOK_SELECTORS["하이라이트"])
+        for selector in KLOOK_SELECTORS["하이라이트"]:
             try:
                 content_element = driver.find_element(By.CSS_SELECTOR, selector)
                 content_text = content_element.text.strip()
 
                 if content_text and len(content_text) > 10:
-                    # --- 이 부분이 수정되었습니다 ---
-                    # 불필요한 "펼치기" 텍스트 제거
-                    content_text = content_text.replace("펼치기", "").strip()
-
-                    # 각 줄을 분리하고, 앞뒤 공백을 제거한 후, 다시 줄 바꿈 문자로 합칩니다.
-                    # 이렇게 하면 원래의 줄 바꿈은 유지되면서도 가독성이 향상됩니다.
-                    lines = [line.strip() for line in content_text.split('\n') if line.strip()]
-                    cleaned_content = '\n'.join(lines)
-                    # --- 여기까지 수정 ---
+                    # 불필요한 "펼치기" 텍스트 제거 + 줄 단위 공백 정리 (원래 줄 바꿈 유지)
+                    cleaned_content = clean_highlight_text(content_text)
 
                     print(f"    ✅ 짧은 내용 수집 완료 (길이: {len(cleaned_content)}자)")
                     return cleaned_content
@@ -391,27 +475,16 @@ def get_features(driver):
     if not SELENIUM_AVAILABLE:
         return "특징 추출 불가"
     
-    feature_selectors = [
-        ".product-features li",                  # 상품 특징
-        ".key-points li",                        # 핵심 포인트
-        ".benefits li",                          # 혜택
-        ".inclusions li",                        # 포함사항
-        ".tags span",                            # 태그
-        "[data-testid*='feature']",             # 특징 테스트ID
-        ".feature-list li",                      # 특징 리스트
-        ".amenities li"                          # 편의시설
-    ]
-    
     features = []
     
-    for selector in feature_selectors:
+    for selector in KLOOK_SELECTORS["특징"]:
         try:
-            elements = driver.find_elements(By.CSS_SELECTOR, selector)
+            elements = driver.find_elements(*selector_locator(selector))
             
             for element in elements:
                 try:
                     feature_text = element.text.strip()
-                    if feature_text and 10 < len(feature_text) < 100:  # 적절한 길이의 특징만
+                    if is_valid_feature_text(feature_text):
                         features.append(feature_text)
                 except:
                     continue
@@ -434,58 +507,14 @@ def get_activity_attributes(driver):
     if not SELENIUM_AVAILABLE:
         return {"언어": "", "투어형태": "", "미팅방식": "", "소요시간": ""}
     
-    attributes = {
-        "언어": "",
-        "투어형태": "",
-        "미팅방식": "",
-        "소요시간": ""
-    }
-    
     try:
         # 모든 활동 속성 태그 한번에 수집
-        elements = driver.find_elements(By.CSS_SELECTOR, "#activity_attribute_tags .js-tag-content-node")
-        
-        for element in elements:
-            text = element.text.strip()
-            if not text:
-                continue
-            
-            # 언어 분류
-            language_keywords = [
-                '한국어', '영어', '중국어', '일본어', '태국어', '스페인어',
-                '러시아어', '독일어', '프랑스어', '폴란드어', '네덜란드어',
-                '이탈리아어', '포르투갈리어', '베트남어', '인도네시아어'
-            ]
-            if any(keyword in text for keyword in language_keywords):
-                attributes["언어"] = text
-                print(f"    투어 언어: {text}")
-                continue
-            
-            # 소요시간 분류
-            if (('소요' in text or '일정' in text) and '시간' in text):
-                attributes["소요시간"] = text
-                print(f"    소요시간: {text}")
-                continue
-            
-            # 투어형태 분류
-            tour_type_keywords = ['조인', '그룹', '프라이빗', '개별']
-            if any(keyword in text for keyword in tour_type_keywords):
-                attributes["투어형태"] = text
-                print(f"    투어형태: {text}")
-                continue
-            
-            # 미팅방식 분류
-            meeting_keywords = ['미팅', '픽업', '집합', '만남']
-            if any(keyword in text for keyword in meeting_keywords):
-                attributes["미팅방식"] = text
-                print(f"    미팅방식: {text}")
-                continue
-        
-        return attributes
+        elements = driver.find_elements(By.CSS_SELECTOR, KLOOK_SELECTORS["활동속성"][0])
+        return classify_activity_attributes(element.text for element in elements)
         
     except Exception as e:
         print(f"    활동 속성 수집 실패: {e}")
-        return attributes
+        return {"언어": "", "투어형태": "", "미팅방식": "", "소요시간": ""}
 
 def get_location_tags(city_name, product_name, highlights):
     """자동 학습 시스템을 통해 위치 태그 추출"""
@@ -498,8 +527,8 @@ def get_location_tags(city_name, product_name, highlights):
     text_to_learn = f"{product_name} {highlights}"
 
     try:
-        # 도시별 학습 시스템 인스턴스 생성
-        learning_system = LocationLearningSystem(city_name=city_name)
+        # 도시별 학습 시스템 (프로세스 내 캐시 재사용)
+        learning_system = get_location_learner(city_name)
         
         # 학습 시스템을 통해 태그 가져오기
         tags = learning_system.get_location_tags(city_name, text_to_learn)
@@ -602,16 +631,180 @@ def clean_text(text):
     except Exception:
         return text
 
+# =============================================================================
+# DOM 스냅샷 일괄 추출 (execute_script 1회로 전체 필드 수집)
+# =============================================================================
+
+SNAPSHOT_MAX_TEXTS = 50  # 셀렉터별 최대 수집 요소 수 (앞선 범용 셀렉터가 뒤 셀렉터를 밀어내지 않도록 필드 단위가 아닌 셀렉터 단위)
+
+# 기존 추출 함수가 find_element(첫 요소 1개)로 읽던 필드 → 셀렉터별 첫 요소만 수집
+SNAPSHOT_FIRST_ONLY_FIELDS = ("상품명", "하이라이트")
+
+# KLOOK_SELECTORS 전체를 브라우저 안에서 평가 → {필드: [텍스트, ...]} 반환
+# (셀렉터 순서 → 요소 순서대로, Selenium element.text 처럼 렌더링된 텍스트만 수집)
+DOM_SNAPSHOT_SCRIPT = """
+var selectors = arguments[0];
+var maxTexts = arguments[1];
+var firstOnlyFields = arguments[2];
+
+function findAll(selector) {
+    try {
+        if (selector.indexOf('//') === 0) {
+            var result = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            var nodes = [];
+            for (var i = 0; i < result.snapshotLength; i++) {
+                nodes.push(result.snapshotItem(i));
+            }
+            return nodes;
+        }
+        return Array.prototype.slice.call(document.querySelectorAll(selector));
+    } catch (e) {
+        return [];
+    }
+}
+
+function visibleText(el) {
+    // 렌더링되지 않은 요소는 Selenium 과 같이 "" (textContent 폴백 없음)
+    if (!el || el.nodeType !== 1 || !el.getClientRects().length) return '';
+    if (window.getComputedStyle(el).visibility === 'hidden') return '';
+    return (el.innerText || '').trim();
+}
+
+function isVisible(el) {
+    if (!el || !el.offsetParent) return false;
+    var targets = [el, el.parentElement];
+    for (var i = 0; i < targets.length; i++) {
+        if (!targets[i]) continue;
+        var style = window.getComputedStyle(targets[i]);
+        if (style.visibility === 'hidden' || style.display === 'none') return false;
+    }
+    return true;
+}
+
+var snapshot = {fields: {}};
+Object.keys(selectors).forEach(function (field) {
+    var limit = firstOnlyFields.indexOf(field) >= 0 ? 1 : maxTexts;
+    var texts = [];
+    selectors[field].forEach(function (selector) {
+        findAll(selector).slice(0, limit).forEach(function (el) {
+            var text = visibleText(el);
+            if (text) texts.push(text);
+        });
+    });
+    snapshot.fields[field] = texts;
+});
+
+snapshot.has_highlight = !!document.querySelector('#highlight');
+snapshot.has_expand_button = isVisible(document.querySelector('#highlight .experience-view-more_text'));
+return snapshot;
+"""
+
+def get_dom_snapshot(driver):
+    """모든 필드 셀렉터를 한 번의 execute_script 호출로 평가 (실패 시 None)"""
+    if not SELENIUM_AVAILABLE:
+        return None
+    
+    try:
+        snapshot = driver.execute_script(
+            DOM_SNAPSHOT_SCRIPT, KLOOK_SELECTORS, SNAPSHOT_MAX_TEXTS, list(SNAPSHOT_FIRST_ONLY_FIELDS)
+        )
+        if isinstance(snapshot, dict) and isinstance(snapshot.get("fields"), dict):
+            return snapshot
+    except Exception as e:
+        print(f"    ⚠️ DOM 스냅샷 실패: {e}")
+    return None
+
+def first_valid_text(texts, validator=None, cleaner=None, empty_value=""):
+    """텍스트 목록에서 검증/정제를 통과한 첫 값 반환"""
+    for text in texts or []:
+        text = (text or "").strip()
+        if not text or (validator and not validator(text)):
+            continue
+        value = cleaner(text) if cleaner else text
+        if value != empty_value:
+            return value
+    return empty_value
+
+def build_product_data(field_texts, url, rank=None, city_name=None, highlights=None, with_location_tags=True):
+    """{필드: [텍스트]} 에서 extract_all_product_data 와 같은 상품 데이터 구성
+    
+    DOM 스냅샷(Selenium)과 HTTP 추출(lxml) 경로가 같은 규칙으로 정제하도록 공유
+    """
+    product_name = clean_text(first_valid_text(field_texts.get("상품명"), empty_value="상품명 없음"))
+    
+    review_text = first_valid_text(field_texts.get("리뷰수"), validator=lambda text: re.search(r'\d+', text))
+    review_count = re.findall(r'\d+', review_text)[0] if review_text else "0"
+    
+    categories = [text.strip() for text in field_texts.get("카테고리", []) if is_valid_category_text(text.strip())]
+    features = [text.strip() for text in field_texts.get("특징", []) if is_valid_feature_text(text.strip())]
+    
+    if highlights is None:
+        highlights = first_valid_text(
+            field_texts.get("하이라이트"),
+            validator=lambda text: len(text) > 10,
+            cleaner=clean_highlight_text,
+            empty_value="정보 없음"
+        )
+    
+    activity_attrs = classify_activity_attributes(field_texts.get("활동속성", []))
+    
+    return {
+        "상품명": product_name,
+        "가격": first_valid_text(field_texts.get("가격"), is_valid_price_text, clean_price, "가격 정보 없음"),
+        "평점": first_valid_text(field_texts.get("평점"), is_valid_rating_text, clean_rating, "평점 정보 없음"),
+        "리뷰수": review_count,
+        "카테고리": clean_text(" > ".join(list(set(categories))[:3])) if categories else "기타",
+        "하이라이트": highlights,
+        "위치태그": get_location_tags(city_name, product_name, highlights) if with_location_tags else "",
+        "특징": clean_text(" | ".join(list(set(features))[:5])) if features else "특징 정보 없음",
+        "언어": activity_attrs["언어"],
+        "투어형태": activity_attrs["투어형태"],
+        "미팅방식": activity_attrs["미팅방식"],
+        "소요시간": activity_attrs["소요시간"],
+        "URL": url,
+        "순위": rank,
+        "수집일시": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+def extract_product_data_snapshot(driver, url, rank=None, city_name=None):
+    """DOM 스냅샷 1회로 상품 데이터 추출 (스냅샷 실패 시 None)"""
+    snapshot = get_dom_snapshot(driver)
+    if snapshot is None:
+        return None
+    
+    # 긴 하이라이트(펼치기 버튼)만 모달 클릭이 필요하므로 별도 처리
+    highlights = None
+    if not snapshot.get("has_highlight"):
+        highlights = "정보 없음"
+    elif snapshot.get("has_expand_button"):
+        highlights = get_long_highlight_content(driver)
+    
+    product_data = build_product_data(snapshot["fields"], url, rank, city_name, highlights=highlights)
+    print(f"    ⚡ DOM 스냅샷 추출: {product_data['상품명'][:40]}... / {product_data['가격']} / {product_data['평점']}")
+    return product_data
+
 # =============================================================================
 # 통합 데이터 추출 시스템
 # =============================================================================
 
-def extract_all_product_data(driver, url, rank=None, city_name=None):
-    """상품 페이지에서 모든 데이터 추출 (통합 속성 추출 방식)"""
+def extract_all_product_data(driver, url, rank=None, city_name=None, wait_ready=True):
+    """상품 페이지에서 모든 데이터 추출 (통합 속성 추출 방식)
+
+    wait_ready: 상품명/가격 렌더링 대기 여부 (호출 측에서 이미 대기했으면 False)
+    """
     print(f"상품 데이터 추출 시작 (순위: {rank})")
     try:
-        # 페이지 로드 대기
-        time.sleep(random.uniform(2, 4))
+        # 페이지 준비 대기 (상품명/가격이 보이는 즉시 진행)
+        if wait_ready:
+            from .page_waits import wait_for_product_ready
+            wait_for_product_ready(driver, url)
+        
+        # DOM 스냅샷 일괄 추출 (필드별 WebDriver 왕복 대신 execute_script 1회)
+        if CONFIG.get("DOM_SNAPSHOT_EXTRACTION", True):
+            product_data = extract_product_data_snapshot(driver, url, rank, city_name)
+            if product_data:
+                print("상품 데이터 추출 완료")
+                return product_data
         
         # 각 데이터 추출 (원본 정교한 기능들 포함)
         product_name = clean_text(get_product_name(driver))
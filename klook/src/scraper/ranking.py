@@ -3,6 +3,7 @@
 - 상품 순위 정보 수집 및 저장
 - URL별 순위 매핑 관리
 - 순위 데이터 분석 및 조회
+- (도시, 탭)별 정렬 순위 인덱스로 범위/빈 순위 조회
 """
 
 import os
@@ -12,6 +13,8 @@ from datetime import datetime
 from collections import defaultdict
 
 from ..config import get_city_code, is_url_processed_fast, mark_url_processed_fast
+from ..utils.journal_store import get_journal_store
+from ..utils.rank_index import RankIndex
 
 # =============================================================================
 # 순위 데이터 구조 관리
@@ -23,6 +26,7 @@ class RankingManager:
     def __init__(self):
         self.ranking_dir = "ranking_data"
         self.ranking_cache = {}
+        self.rank_indexes = {}  # 도시 코드 → {"files": 반영한 순위 파일, "index": RankIndex}
         
     def save_tab_ranking(self, urls_with_ranking, city_name, tab_name, strategy="default"):
         """탭에서 수집한 URL들과 순위 정보 저장"""
@@ -109,33 +113,61 @@ class RankingManager:
             print(f"⚠️ 순위 조회 실패: {e}")
             return {}
     
+    def get_rank_index(self, city_name):
+        """도시의 순위 인덱스 (새로 생긴 순위 파일만 읽어 점진 갱신)
+
+        키: 탭 이름, None(전체 탭)
+        """
+        city_code = get_city_code(city_name)
+        cached = self.rank_indexes.get(city_code)
+        
+        current_files = set()
+        if os.path.exists(self.ranking_dir):
+            current_files = {
+                file for file in os.listdir(self.ranking_dir)
+                if file.startswith(city_code) and file.endswith('.json')
+            }
+        
+        if cached is None or not cached["files"] <= current_files:
+            # 처음이거나 순위 파일이 삭제된 경우 재구성
+            cached = {"files": set(), "index": RankIndex()}
+            self.rank_indexes[city_code] = cached
+        
+        index = cached["index"]
+        for file in sorted(current_files - cached["files"]):
+            cached["files"].add(file)
+            try:
+                with open(os.path.join(self.ranking_dir, file), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                items = [(item['url'], item['rank'], item['tab']) for item in data.get('url_rankings', [])]
+            except Exception:
+                continue
+            
+            for item_url, rank, tab in items:
+                index.add(tab, rank, item_url)
+                index.add(None, rank, item_url)
+        
+        return index
+    
     def get_next_available_range(self, city_name, count=3, tab_name=None, fill_gaps=True):
-        """다음 수집할 순위 범위 계산"""
+        """다음 수집할 순위 범위 계산 (수집 구간 인덱스로 O(log n))"""
         try:
-            # 기존 순위 데이터 조회
-            url_rankings = self.get_url_rankings(city_name)
+            collected = self.get_rank_index(city_name).collected(tab_name)
             
-            collected_ranks = set()
-            for url, rankings in url_rankings.items():
-                for ranking_info in rankings:
-                    # 특정 탭이 지정된 경우 필터링
-                    if tab_name and ranking_info['tab'] != tab_name:
-                        continue
-                    collected_ranks.add(ranking_info['rank'])
-            
-            if not collected_ranks:
+            if not collected:
                 return 1, count
             
+            max_rank = collected.max()
+            
             # 갭 채우기 모드
             if fill_gaps:
-                max_rank = max(collected_ranks)
-                for i in range(1, max_rank + 1):
-                    if i not in collected_ranks:
-                        # 갭 발견
-                        return i, min(i + count - 1, max_rank + count)
+                gap = collected.next_gap(1)
+                if gap <= max_rank:
+                    # 갭 발견
+                    return gap, min(gap + count - 1, max_rank + count)
             
             # 연속 모드: 다음 순위부터 시작
-            next_start = max(collected_ranks) + 1
+            next_start = max_rank + 1
             return next_start, next_start + count - 1
             
         except Exception as e:
@@ -146,53 +178,87 @@ class RankingManager:
 # 순위 매핑 시스템
 # =============================================================================
 
+def apply_rank_mapping_op(mappings, op):
+    """저널 작업 1개를 순위 매핑에 반영"""
+    if op.get("op") == "add":
+        entry = mappings.setdefault(op["url"], {
+            "hash": op["hash"],
+            "city": op["city"],
+            "rankings": []
+        })
+        entry["rankings"].append({
+            "rank": op["rank"],
+            "tab": op["tab"],
+            "added_at": op["added_at"]
+        })
+
 class RankMapper:
-    """순위 매핑 관리"""
+    """순위 매핑 관리 (rank_mapping.json 스냅샷 + 추가 전용 저널 + (도시, 탭)별 순위 인덱스)"""
     
     def __init__(self):
         self.mapping_file = "rank_mapping.json"
+        self.rank_index = RankIndex()
         self.load_mappings()
     
+    @property
+    def mappings(self):
+        return self.store.state if self.store is not None else self._fallback_mappings
+    
     def load_mappings(self):
-        """순위 매핑 로드"""
+        """순위 매핑 로드 (스냅샷 + 저널 재생)"""
+        self._fallback_mappings = {}
         try:
-            if os.path.exists(self.mapping_file):
-                with open(self.mapping_file, 'r', encoding='utf-8') as f:
-                    self.mappings = json.load(f)
-            else:
-                self.mappings = {}
-        except Exception:
-            self.mappings = {}
+            self.store = get_journal_store(self.mapping_file, apply_rank_mapping_op)
+            self.store.reload()
+        except Exception as e:
+            print(f"⚠️ 순위 매핑 로드 실패: {e}")
+            self.store = None
+        self._rebuild_index()
+    
+    def _index_ranking(self, url, city_name, ranking):
+        """순위 1개를 (도시, 탭)과 (도시, 전체) 인덱스에 추가"""
+        self.rank_index.add((city_name, ranking["tab"]), ranking["rank"], url, ranking["tab"])
+        self.rank_index.add((city_name, None), ranking["rank"], url, ranking["tab"])
+    
+    def _rebuild_index(self):
+        self.rank_index.clear()
+        for url, mapping_info in self.mappings.items():
+            for ranking in mapping_info["rankings"]:
+                self._index_ranking(url, mapping_info["city"], ranking)
     
     def save_mappings(self):
-        """순위 매핑 저장"""
+        """순위 매핑 저장 (저널을 rank_mapping.json 으로 압축)"""
         try:
-            with open(self.mapping_file, 'w', encoding='utf-8') as f:
-                json.dump(self.mappings, f, ensure_ascii=False, indent=2)
-            return True
+            if self.store is None:
+                return False
+            return self.store.compact(wait=True)
         except Exception:
             return False
     
     def add_mapping(self, url, rank, city_name, tab_name="default"):
-        """순위 매핑 추가"""
-        url_hash = hashlib.md5(url.encode()).hexdigest()[:12]
-        
-        if url not in self.mappings:
-            self.mappings[url] = {
-                "hash": url_hash,
-                "city": city_name,
-                "rankings": []
-            }
-        
-        # 새 순위 정보 추가
-        new_ranking = {
+        """순위 매핑 추가 (저널 1줄 추가, 전체 파일 재작성 없음)"""
+        op = {
+            "op": "add",
+            "url": url,
+            "hash": hashlib.md5(url.encode()).hexdigest()[:12],
+            "city": city_name,
             "rank": rank,
             "tab": tab_name,
             "added_at": datetime.now().isoformat()
         }
         
-        self.mappings[url]["rankings"].append(new_ranking)
-        return self.save_mappings()
+        if self.store is None:
+            apply_rank_mapping_op(self._fallback_mappings, op)
+            self._index_ranking(url, self.mappings[url]["city"], op)
+            return False
+        
+        try:
+            success = self.store.append(op)
+            self._index_ranking(url, self.mappings[url]["city"], op)
+            return success
+        except Exception as e:
+            print(f"⚠️ 순위 매핑 저널 기록 실패: {e}")
+            return False
     
     def get_url_rank(self, url, tab_name=None):
         """URL의 순위 조회"""
@@ -214,27 +280,15 @@ class RankMapper:
             return None
     
     def get_ranks_in_range(self, city_name, start_rank, end_rank, tab_name=None):
-        """특정 범위의 순위에 해당하는 URL들 조회"""
-        urls_in_range = []
-        
-        for url, mapping_info in self.mappings.items():
-            if mapping_info["city"] != city_name:
-                continue
-            
-            for ranking in mapping_info["rankings"]:
-                if tab_name and ranking["tab"] != tab_name:
-                    continue
-                
-                rank = ranking["rank"]
-                if start_rank <= rank <= end_rank:
-                    urls_in_range.append({
-                        "url": url,
-                        "rank": rank,
-                        "tab": ranking["tab"]
-                    })
-                    break  # 하나의 매핑만 추가
-        
-        return sorted(urls_in_range, key=lambda x: x["rank"])
+        """특정 범위의 순위에 해당하는 URL들 조회 (정렬 인덱스 이분 탐색, URL당 하나의 매핑)"""
+        return [
+            {"url": url, "rank": rank, "tab": tab}
+            for rank, url, tab in self.rank_index.range((city_name, tab_name), start_rank, end_rank)
+        ]
+    
+    def get_next_gap(self, city_name, tab_name=None, start_from=1):
+        """start_from 이상에서 매핑되지 않은 첫 순위"""
+        return self.rank_index.collected((city_name, tab_name)).next_gap(start_from)
 
 # =============================================================================
 # 통합 순위 시스템
@@ -271,24 +325,10 @@ def save_url_with_rank(url, rank, city_name, tab_name="default"):
 def get_collected_ranks_summary(city_name, tab_name=None):
     """수집된 순위 요약 정보"""
     try:
-        url_rankings = ranking_manager.get_url_rankings(city_name)
+        index = ranking_manager.get_rank_index(city_name)
+        collected = index.collected(tab_name)
         
-        if not url_rankings:
-            return {
-                "total_urls": 0,
-                "collected_ranks": [],
-                "rank_range": "없음",
-                "missing_ranks": []
-            }
-        
-        collected_ranks = set()
-        for url, rankings in url_rankings.items():
-            for ranking_info in rankings:
-                if tab_name and ranking_info['tab'] != tab_name:
-                    continue
-                collected_ranks.add(ranking_info['rank'])
-        
-        if not collected_ranks:
+        if not collected:
             return {
                 "total_urls": 0,
                 "collected_ranks": [],
@@ -296,17 +336,19 @@ def get_collected_ranks_summary(city_name, tab_name=None):
                 "missing_ranks": []
             }
         
-        sorted_ranks = sorted(collected_ranks)
-        min_rank = min(sorted_ranks)
-        max_rank = max(sorted_ranks)
+        min_rank = collected.min()
+        max_rank = collected.max()
         
-        # 누락된 순위 찾기
-        expected_ranks = set(range(min_rank, max_rank + 1))
-        missing_ranks = sorted(expected_ranks - collected_ranks)
+        # 누락된 순위 찾기 (수집 구간 사이의 빈 구간)
+        missing_ranks = [
+            rank
+            for gap_start, gap_end in collected.iter_gaps(min_rank, max_rank)
+            for rank in range(gap_start, gap_end + 1)
+        ]
         
         return {
-            "total_urls": len(url_rankings),
-            "collected_ranks": sorted_ranks,
+            "total_urls": len(index.first_seen),
+            "collected_ranks": list(collected),
             "rank_range": f"{min_rank}-{max_rank}",
             "missing_ranks": missing_ranks
         }
@@ -17,13 +17,9 @@ from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 from ..config import CONFIG, get_city_code, is_url_processed_fast, mark_url_processed_fast, SELENIUM_AVAILABLE
 
 # 조건부 import (sitemap 기능용)
-try:
-    import requests
-    from bs4 import BeautifulSoup
-    REQUESTS_AVAILABLE = True
-except ImportError:
-    print("⚠️ requests/beautifulsoup4가 설치되지 않았습니다. Sitemap 기능이 제한됩니다.")
-    REQUESTS_AVAILABLE = False
+from ..utils.sitemap_stream import REQUESTS_AVAILABLE, SITEMAP_STATE_PATH, SitemapStreamer
+if not REQUESTS_AVAILABLE:
+    print("⚠️ requests가 설치되지 않았습니다. Sitemap 기능이 제한됩니다.")
 
 if SELENIUM_AVAILABLE:
     from selenium.webdriver.common.by import By
@@ -369,10 +365,14 @@ def execute_comprehensive_url_collection(driver, city_name, max_pages=3):
 # 🗺️ Sitemap 기반 URL 수집 (페이지네이션 보완용)
 # =============================================================================
 
-def collect_urls_from_sitemap(city_name, exclude_urls=None, limit=1000):
-    """Sitemap에서 KLOOK URL 수집 (중복 제외)"""
+def collect_urls_from_sitemap(city_name, exclude_urls=None, limit=1000, force=False):
+    """Sitemap에서 KLOOK URL 수집 (중복 제외)
+
+    - sitemap index / .xml.gz 하위 sitemap 스트리밍 처리
+    - 이 도시의 이전 실행 이후 변경 없는 sitemap(304)은 건너뜀 (force=True 면 모두 다시 읽기)
+    """
     if not REQUESTS_AVAILABLE:
-        print("❌ requests/beautifulsoup4가 설치되지 않았습니다.")
+        print("❌ requests가 설치되지 않았습니다.")
         return []
     
     print(f"🗺️ '{city_name}' Sitemap URL 수집 시작...")
@@ -388,54 +388,45 @@ def collect_urls_from_sitemap(city_name, exclude_urls=None, limit=1000):
         f"https://www.klook.com/sitemap-{city_name.lower()}.xml"
     ]
     
+    streamer = SitemapStreamer(
+        state_path=CONFIG.get("SITEMAP_STATE_PATH", SITEMAP_STATE_PATH),
+        headers={'User-Agent': CONFIG.get("USER_AGENT", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")},
+        conditional=CONFIG.get("SITEMAP_CONDITIONAL_GET", True),
+        consumer=city_name,  # 공용 sitemap의 304 건너뛰기는 이 도시가 이미 읽은 경우에만
+    )
+    
     collected_urls = []
+    seen_urls = set()
     
     for sitemap_url in sitemap_urls:
-        try:
-            print(f"  📋 Sitemap 처리 중: {sitemap_url}")
+        if len(collected_urls) >= limit:
+            break
+        
+        print(f"  📋 Sitemap 처리 중: {sitemap_url}")
+        before = len(collected_urls)
+        
+        for url in streamer.iter_urls(sitemap_url, force=force):
+            # KLOOK activity URL 필터링
+            if not is_valid_klook_url(url):
+                continue
             
-            response = requests.get(sitemap_url, timeout=30, headers={
-                'User-Agent': CONFIG.get("USER_AGENT", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-            })
+            normalized_url = normalize_klook_url(url)
             
-            if response.status_code == 200:
-                # XML 파싱
-                soup = BeautifulSoup(response.content, 'xml')
-                
-                # URL 추출
-                urls = soup.find_all('url')
-                for url_element in urls:
-                    loc = url_element.find('loc')
-                    if loc and loc.text:
-                        url = loc.text.strip()
-                        
-                        # KLOOK activity URL 필터링
-                        if is_valid_klook_url(url):
-                            normalized_url = normalize_klook_url(url)
-                            
-                            # 중복 체크 (이미 수집한 URL 제외)
-                            if normalized_url not in exclude_set and normalized_url not in collected_urls:
-                                # 도시명과 관련된 URL 우선 (선택적)
-                                if city_name.lower() in url.lower() or len(collected_urls) < limit:
-                                    collected_urls.append(normalized_url)
-                                    
-                                    if len(collected_urls) >= limit:
-                                        break
-                
-                print(f"    ✅ 새로운 URL {len([u for u in collected_urls if u not in exclude_set])}개 발견")
-                
-            else:
-                print(f"    ⚠️ Sitemap 접근 실패: HTTP {response.status_code}")
-                
-        except Exception as e:
-            print(f"    ❌ Sitemap 처리 실패: {e}")
-            continue
-    
-    # 최종 중복 제거 (안전장치)
-    final_urls = [url for url in collected_urls if url not in exclude_set]
+            # 중복 체크 (제외 목록 + 이미 수집한 URL, 집합 조회)
+            if normalized_url in exclude_set or normalized_url in seen_urls:
+                continue
+            
+            seen_urls.add(normalized_url)
+            collected_urls.append(normalized_url)
+            if len(collected_urls) >= limit:
+                break
+        
+        print(f"    ✅ 새로운 URL {len(collected_urls) - before}개 발견")
     
-    print(f"🎉 Sitemap 수집 완료: {len(final_urls)}개 새로운 URL")
-    return final_urls[:limit]
+    stats = streamer.stats
+    print(f"   📊 Sitemap 다운로드 {stats['fetched']}개, 변경 없음 {stats['not_modified']}개, 실패 {stats['failed']}개")
+    print(f"🎉 Sitemap 수집 완료: {len(collected_urls)}개 새로운 URL")
+    return collected_urls
 
 def save_urls_to_collection(urls, city_name, collection_type="sitemap"):
     """URL 컬렉션을 파일로 저장"""
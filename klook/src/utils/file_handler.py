@@ -6,13 +6,19 @@
 """
 
 import os
+import re
 import csv
+import atexit
 import requests
 import hashlib
+import threading
 from datetime import datetime
 from urllib.parse import urlparse
 
 from ..config import CONFIG, get_city_info, get_city_code, SELENIUM_AVAILABLE
+from .image_pipeline import PIL_AVAILABLE, get_image_pipeline
+from .image_store import STORE_BASE_DIR, DEFAULT_PHASH_DISTANCE, get_image_store
+from .csv_consolidator import CountryCsvConsolidator
 
 if SELENIUM_AVAILABLE:
     from selenium.webdriver.common.by import By
@@ -95,30 +101,306 @@ def ensure_directory_structure(city_name):
         print(f"⚠️ 디렉토리 생성 실패: {e}")
         return False
 
-def is_duplicate_hash(city_name, new_hash):
-    """기존 CSV에서 해시 중복 체크 (csv 모듈만 사용)"""
-    try:
-        continent, country = get_city_info(city_name)
-        
-        # CSV 파일 경로 결정 (도시국가는 통합 파일명 사용)
-        if city_name in ["홍콩", "싱가포르", "마카오", "괌"]:
-            # 도시국가: 대륙 직하에 통합 파일명으로 저장
-            csv_path = os.path.join("data", continent, f"{city_name}_통합_klook_products.csv")
+CITY_STATE_NAMES = ["홍콩", "싱가포르", "마카오", "괌"]
+
+def get_city_csv_path(city_name):
+    """도시별 상품 CSV 경로 반환 (도시국가는 대륙 직하 통합 파일명 사용)"""
+    continent, country = get_city_info(city_name)
+    
+    if city_name in CITY_STATE_NAMES:
+        # 도시국가: 대륙 직하에 통합 파일명으로 저장
+        return os.path.join("data", continent, f"{city_name}_통합_klook_products.csv")
+    
+    # 일반 도시: 대륙/국가/도시 구조
+    return os.path.join("data", continent, country, city_name, f"klook_{city_name}_products.csv")
+
+def make_product_hash(product_data):
+    """상품명 + 가격 + URL 기반 중복 체크용 해시 생성"""
+    hash_string = f"{product_data.get('상품명', '')}{product_data.get('가격', '')}{product_data.get('URL', '')}"
+    return hashlib.md5(hash_string.encode()).hexdigest()[:12]
+
+def extract_row_number(row):
+    """CSV 한 행에서 상품 번호 추출 (없으면 None)"""
+    number_value = None
+    
+    # 1. '번호' 컬럼에서 숫자 추출
+    if '번호' in row and row['번호']:
+        if row['번호'].isdigit():
+            number_value = int(row['번호'])
         else:
-            # 일반 도시: 대륙/국가/도시 구조
-            csv_path = os.path.join("data", continent, country, city_name, f"klook_{city_name}_products.csv")
-        
-        if not os.path.exists(csv_path):
+            # "page1_1", "KMJ_0001" 등에서 숫자 추출
+            numbers = re.findall(r'(\d+)', str(row['번호']))
+            if numbers:
+                number_value = int(numbers[-1])
+    
+    # 2. 다른 번호 관련 컬럼 확인
+    for col in ['product_number', '상품번호', 'number']:
+        if col in row and row[col] and str(row[col]).isdigit():
+            number_value = int(row[col])
+            break
+    
+    # 3. 이미지 파일명에서 번호 추출 (KMJ_0001.jpg → 1)
+    if not number_value:
+        for img_col in ['메인이미지_파일명', '썸네일이미지_파일명']:
+            if img_col in row and row[img_col]:
+                img_numbers = re.findall(r'_(\d+)\.', row[img_col])
+                if img_numbers:
+                    number_value = int(img_numbers[0])
+                    break
+    
+    return number_value
+
+# =============================================================================
+# 도시별 상품 저장소 (CSV 1회 로드 + 메모리 해시 인덱스)
+# =============================================================================
+
+class KlookProductStore:
+    """도시별 상품 CSV 저장소
+    
+    - 최초 1회만 CSV를 읽어 해시 → 행 번호 인덱스와 최대 상품 번호를 메모리에 보관
+    - 이후 저장은 열어둔 파일 핸들 하나로 append (매 저장마다 CSV 재스캔 없음)
+    - 디스크 레이아웃(경로, utf-8-sig, 헤더)은 기존 save_to_csv_klook와 동일
+    - 기존 헤더에 없는 필드가 들어오면 헤더를 확장해 파일 재작성 (새 필드 유실 방지)
+    - 재확인으로 바뀐 상품은 URL 로 기존 행을 찾아 교체 (번호 유지, 중복 행 없음)
+    """
+    
+    def __init__(self, city_name, flush_every=None):
+        self.city_name = city_name
+        self.csv_path = get_city_csv_path(city_name)
+        self.flush_every = flush_every or CONFIG.get("CSV_FLUSH_EVERY", 1)
+        self.hash_index = {}
+        self.url_index = {}
+        self.max_number = 0
+        self.row_count = 0
+        self.fieldnames = None
+        self._field_set = set()
+        self._ignored_fields = set()  # 헤더 확장에 실패해 제외하는 필드 (매 행 재시도 방지)
+        self._file = None
+        self._writer = None
+        self._pending = 0
+        self._lock = threading.RLock()
+        self.load()
+    
+    def load(self):
+        """CSV를 한 번 스캔하여 인덱스 구축"""
+        with self._lock:
+            self.close()
+            self.hash_index = {}
+            self.url_index = {}
+            self.max_number = 0
+            self.row_count = 0
+            self.fieldnames = None
+            self._ignored_fields = set()
+            
+            if not os.path.exists(self.csv_path):
+                return
+            
+            try:
+                with open(self.csv_path, 'r', encoding='utf-8-sig') as f:
+                    reader = csv.DictReader(f)
+                    self.fieldnames = reader.fieldnames
+                    for row in reader:
+                        self.row_count += 1
+                        hash_value = row.get('해시값')
+                        if hash_value and hash_value not in self.hash_index:
+                            self.hash_index[hash_value] = self.row_count
+                        self._index_url(row.get('URL'))
+                        number_value = extract_row_number(row)
+                        if number_value:
+                            self.max_number = max(self.max_number, number_value)
+            except Exception as e:
+                print(f"⚠️ 상품 저장소 로드 실패 ({self.city_name}): {e}")
+    
+    def contains(self, product_hash):
+        """해시 중복 여부 (O(1))"""
+        return product_hash in self.hash_index
+    
+    def get_row_number(self, product_hash):
+        """해시에 해당하는 데이터 행 번호 (1부터 시작, 없으면 None)"""
+        return self.hash_index.get(product_hash)
+    
+    def _index_url(self, url):
+        """URL → 행 번호 (같은 URL 이 여러 행이면 처음 저장된 행 = 원래 번호 기준)"""
+        if url and url not in self.url_index:
+            self.url_index[url] = self.row_count
+    
+    def next_number(self):
+        """다음 상품 번호"""
+        return self.max_number + 1
+    
+    def _open_writer(self, fieldnames):
+        """append 모드 파일 핸들 및 DictWriter 준비 (최초 1회)"""
+        os.makedirs(os.path.dirname(self.csv_path), exist_ok=True)
+        file_exists = os.path.exists(self.csv_path) and os.path.getsize(self.csv_path) > 0
+        
+        self._file = open(self.csv_path, 'a', newline='', encoding='utf-8-sig')
+        if not file_exists or not self.fieldnames:
+            self.fieldnames = list(fieldnames)
+        self._field_set = set(self.fieldnames)
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, restval='', extrasaction='ignore')
+        
+        # 헤더 쓰기 (파일이 새로 생성된 경우)
+        if not file_exists:
+            self._writer.writeheader()
+    
+    def _rewrite(self, fieldnames, replace_row=None):
+        """CSV 전체를 임시 파일에 다시 쓴 뒤 교체 → 재작성한 행 수 (실패 시 예외, 원본 유지)
+        
+        replace_row(행 번호, 행) → 기록할 행 (행 번호는 1부터 시작)
+        """
+        self.close()
+        temp_path = self.csv_path + ".tmp"
+        try:
+            rows = 0
+            with open(self.csv_path, 'r', encoding='utf-8-sig', newline='') as src, \
+                    open(temp_path, 'w', encoding='utf-8-sig', newline='') as dst:
+                writer = csv.DictWriter(dst, fieldnames=fieldnames, restval='')
+                writer.writeheader()
+                for row in csv.DictReader(src):
+                    rows += 1
+                    writer.writerow(replace_row(rows, row) if replace_row else row)
+            os.replace(temp_path, self.csv_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.fieldnames = list(fieldnames)
+        self._field_set = set(self.fieldnames)
+        return rows
+    
+    def _extend_header(self, new_fields):
+        """헤더에 새 필드를 뒤에 추가하고 기존 행을 빈 값으로 채워 재작성"""
+        try:
+            rows = self._rewrite(list(self.fieldnames) + list(new_fields))
+            print(f"  🧩 CSV 헤더 확장: {', '.join(new_fields)} 추가 (기존 {rows}행 재작성)")
+            return True
+        except Exception as e:
+            print(f"  ⚠️ CSV 헤더 확장 실패, 새 필드 제외하고 저장 ({', '.join(new_fields)}): {e}")
             return False
-        
-        # CSV 파일에서 해시값 체크
-        with open(csv_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get('해시값') == new_hash:
-                    return True
-        return False
-        
+    
+    def append(self, product_data):
+        """상품 저장 (중복이면 False)"""
+        with self._lock:
+            new_hash = make_product_hash(product_data)
+            if self.contains(new_hash):
+                print(f"   ⏭️ 중복 상품 스킵 (해시: {new_hash})")
+                return False
+            
+            # 중복이 아닌 경우에만 번호 할당
+            if '번호' not in product_data or not product_data.get('번호'):
+                next_number = self.next_number()
+                product_data['번호'] = str(next_number)
+                print(f"  🔢 번호 할당: {next_number}")
+            
+            product_data['해시값'] = new_hash
+            
+            if self._writer is None:
+                self._open_writer(product_data.keys())
+            
+            new_fields = [key for key in product_data if key not in self._field_set and key not in self._ignored_fields]
+            if new_fields:
+                if not self._extend_header(new_fields):
+                    self._ignored_fields.update(new_fields)
+                self._open_writer(self.fieldnames)
+            
+            self._writer.writerow(product_data)
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self.flush()
+            
+            # 인덱스 갱신
+            self.row_count += 1
+            self.hash_index[new_hash] = self.row_count
+            self._index_url(product_data.get('URL'))
+            number_value = extract_row_number(product_data)
+            if number_value:
+                self.max_number = max(self.max_number, number_value)
+            return True
+    
+    def update(self, product_data):
+        """URL 이 같은 기존 행을 새 데이터로 교체 (CSV 재작성, 번호와 넘기지 않은 컬럼은 유지)
+        
+        반환: True - 교체, False - 실패, None - 해당 URL 행 없음 (새 상품으로 저장 필요)
+        """
+        with self._lock:
+            row_number = self.url_index.get(product_data.get('URL'))
+            if row_number is None:
+                return None
+            
+            updates = {key: value for key, value in product_data.items() if key not in ('번호', '해시값')}
+            known_fields = set(self.fieldnames or [])
+            fieldnames = list(self.fieldnames or []) + [key for key in updates if key not in known_fields]
+            replaced = {}
+            
+            def replace_row(index, row):
+                if index != row_number:
+                    return row
+                replaced["old"] = dict(row)
+                row.update(updates)
+                row['해시값'] = make_product_hash(row)
+                replaced["new"] = row
+                return row
+            
+            try:
+                self._rewrite(fieldnames, replace_row)
+            except Exception as e:
+                print(f"⚠️ 상품 행 갱신 실패 ({self.city_name}): {e}")
+                return False
+            
+            if "new" not in replaced:
+                print(f"⚠️ 상품 행 갱신 실패 ({self.city_name}): {row_number}번째 행 없음")
+                return False
+            
+            # 해시 인덱스 갱신 (행 위치는 그대로)
+            old_hash = replaced["old"].get('해시값')
+            if old_hash and self.hash_index.get(old_hash) == row_number:
+                del self.hash_index[old_hash]
+            self.hash_index.setdefault(replaced["new"]['해시값'], row_number)
+            print(f"  ✏️ 상품 행 갱신: 번호 {replaced['new'].get('번호')} ({replaced['old'].get('가격')} → {replaced['new'].get('가격')})")
+            return True
+    
+    def flush(self):
+        """버퍼에 쌓인 행을 디스크로 기록"""
+        with self._lock:
+            if self._file and not self._file.closed:
+                self._file.flush()
+            self._pending = 0
+    
+    def close(self):
+        """파일 핸들 닫기 (인덱스는 유지)"""
+        with self._lock:
+            if self._file and not self._file.closed:
+                self._file.flush()
+                self._file.close()
+            self._file = None
+            self._writer = None
+            self._pending = 0
+
+_product_stores = {}
+_product_stores_lock = threading.Lock()
+
+def get_product_store(city_name):
+    """도시별 상품 저장소 반환 (프로세스 내 1개씩 캐시)"""
+    with _product_stores_lock:
+        store = _product_stores.get(city_name)
+        if store is None:
+            store = KlookProductStore(city_name)
+            _product_stores[city_name] = store
+        return store
+
+def close_product_stores():
+    """모든 상품 저장소 닫기 (프로세스 종료 시 자동 호출)"""
+    with _product_stores_lock:
+        for store in _product_stores.values():
+            store.close()
+        _product_stores.clear()
+
+atexit.register(close_product_stores)
+
+def is_duplicate_hash(city_name, new_hash):
+    """해시 중복 체크 (메모리 인덱스 사용)"""
+    try:
+        return get_product_store(city_name).contains(new_hash)
     except Exception as e:
         print(f"⚠️ 해시 중복 체크 실패: {e}")
         return False
@@ -126,67 +408,33 @@ def is_duplicate_hash(city_name, new_hash):
 def save_to_csv_klook(product_data, city_name):
     """KLOOK 상품 데이터를 CSV로 저장 (범용 대륙 지원)"""
     try:
-        continent, country = get_city_info(city_name)
-        
-        # CSV 파일 경로 결정 (도시국가는 통합 파일명 사용)
-        if city_name in ["홍콩", "싱가포르", "마카오", "괌"]:
-            # 도시국가: 대륙 직하에 통합 파일명으로 저장
-            csv_path = os.path.join("data", continent, f"{city_name}_통합_klook_products.csv")
-        else:
-            # 일반 도시: 대륙/국가/도시 구조
-            csv_path = os.path.join("data", continent, country, city_name, f"klook_{city_name}_products.csv")
-       
-        # 디렉토리 생성
-        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
-        
-        # 🚀 해시값 생성 및 중복 체크 (번호 할당 전에 수행)
-        hash_string = f"{product_data.get('상품명', '')}{product_data.get('가격', '')}{product_data.get('URL', '')}"
-        new_hash = hashlib.md5(hash_string.encode()).hexdigest()[:12]
-        
-        if is_duplicate_hash(city_name, new_hash):
-            print(f"   ⏭️ 중복 상품 스킵 (해시: {new_hash})")
-            return False
-        
-        # 중복이 아닌 경우에만 번호 할당
-        if '번호' not in product_data or not product_data.get('번호'):
-            next_number = get_next_product_number(city_name)
-            product_data['번호'] = str(next_number)
-            print(f"  🔢 번호 할당: {next_number}")
-        
-        product_data['해시값'] = new_hash
-        
-        # CSV 파일 존재 여부 확인
-        file_exists = os.path.exists(csv_path)
-        
-        # CSV 저장
-        with open(csv_path, 'a', newline='', encoding='utf-8-sig') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=product_data.keys())
-            
-            # 헤더 쓰기 (파일이 새로 생성된 경우)
-            if not file_exists:
-                writer.writeheader()
-            
-            # 데이터 쓰기
-            writer.writerow(product_data)
-        
-        return True
+        # 🚀 해시 중복 체크 → 번호 할당 → append 를 저장소에서 한 번에 처리
+        return get_product_store(city_name).append(product_data)
         
     except Exception as e:
         print(f"⚠️ CSV 저장 실패: {e}")
         return False
 
+def update_csv_klook(product_data, city_name):
+    """재확인으로 바뀐 상품을 URL 이 같은 기존 CSV 행에 덮어쓰기 (번호 유지)
+    
+    반환: True - 갱신, False - 실패, None - 해당 URL 행 없음
+    """
+    try:
+        return get_product_store(city_name).update(product_data)
+        
+    except Exception as e:
+        print(f"⚠️ CSV 갱신 실패: {e}")
+        return False
+
 def get_csv_stats(city_name):
     """CSV 파일 통계 정보 반환 (범용 대륙 지원)"""
     try:
-        continent, country = get_city_info(city_name)
+        csv_path = get_city_csv_path(city_name)
         
-        # CSV 파일 경로 결정 (도시국가는 통합 파일명 사용)
-        if city_name in ["홍콩", "싱가포르", "마카오", "괌"]:
-            # 도시국가: 대륙 직하에 통합 파일명으로 저장
-            csv_path = os.path.join("data", continent, f"{city_name}_통합_klook_products.csv")
-        else:
-            # 일반 도시: 대륙/국가/도시 구조
-            csv_path = os.path.join("data", continent, country, city_name, f"klook_{city_name}_products.csv")
+        # 열려 있는 저장소가 있으면 버퍼를 먼저 기록
+        if city_name in _product_stores:
+            _product_stores[city_name].flush()
               
         if not os.path.exists(csv_path):
             return {"error": "CSV 파일을 찾을 수 없습니다"}
@@ -220,6 +468,34 @@ def get_csv_stats(city_name):
 # 이미지 처리 시스템
 # =============================================================================
 
+# 원본에서 실제 작동하는 정교한 메인 이미지 셀렉터들
+KLOOK_MAIN_IMAGE_SELECTORS = [
+    "#banner_atlas .activity-banner-image-container_left img",   # KLOOK 메인 이미지 (실제 작동)
+    ".activity-banner-image-container_left img",                 # 백업 1
+    ".main-image img",                                           # 일반 백업
+    ".hero-image img",                                           # 일반 백업
+    ".product-image img",                                        # 일반 백업
+    ".ActivityCardImage--image",                                 # 기존 셀렉터 (백업)
+    ".product-hero-image img",                                   # 상세 페이지 메인 (백업)
+]
+
+# 원본에서 실제 작동하는 정교한 썸네일 이미지 셀렉터들
+KLOOK_THUMB_IMAGE_SELECTORS = [
+    "#banner_atlas .activity-banner-image-container_right img",  # KLOOK 썸네일 이미지
+    ".activity-banner-image-container_right img",                # 백업 1
+    ".product-gallery img:nth-child(2)",                        # 일반 백업
+    ".gallery img:nth-child(2)",                                # 일반 백업
+    ".slider img:nth-child(2)",                                 # 일반 백업
+    ".Gallery-module--thumbnails img",                          # 갤러리 썸네일 (새 구조)
+    ".gallery-thumbnails img",                                  # 갤러리 썸네일
+    "[data-testid='gallery-thumbnail'] img",                   # 테스트ID 기반
+    ".thumbnail img",                                           # 일반 썸네일
+    ".swiper-slide img",                                        # 스와이퍼 슬라이드 내 이미지
+    ".image-gallery-thumbnails img",                            # 이미지 갤러리 썸네일
+    ".product-gallery-thumb img",                               # 상품 갤러리 썸네일
+    ".slider-thumb img",                                        # 슬라이더 썸네일
+]
+
 def get_dual_image_urls_klook(driver, url_type="Product"):
     """KLOOK에서 메인 이미지와 썸네일 이미지 URL 추출 (원본 정교한 셀렉터 사용)"""
     if not SELENIUM_AVAILABLE:
@@ -228,34 +504,6 @@ def get_dual_image_urls_klook(driver, url_type="Product"):
     main_img_url = None
     thumb_img_url = None
     
-    # 원본에서 실제 작동하는 정교한 메인 이미지 셀렉터들
-    main_selectors = [
-        "#banner_atlas .activity-banner-image-container_left img",   # KLOOK 메인 이미지 (실제 작동)
-        ".activity-banner-image-container_left img",                 # 백업 1
-        ".main-image img",                                           # 일반 백업
-        ".hero-image img",                                           # 일반 백업
-        ".product-image img",                                        # 일반 백업
-        ".ActivityCardImage--image",                                 # 기존 셀렉터 (백업)
-        ".product-hero-image img",                                   # 상세 페이지 메인 (백업)
-    ]
-    
-    # 원본에서 실제 작동하는 정교한 썸네일 이미지 셀렉터들
-    thumb_selectors = [
-        "#banner_atlas .activity-banner-image-container_right img",  # KLOOK 썸네일 이미지
-        ".activity-banner-image-container_right img",                # 백업 1
-        ".product-gallery img:nth-child(2)",                        # 일반 백업
-        ".gallery img:nth-child(2)",                                # 일반 백업
-        ".slider img:nth-child(2)",                                 # 일반 백업
-        ".Gallery-module--thumbnails img",                          # 갤러리 썸네일 (새 구조)
-        ".gallery-thumbnails img",                                  # 갤러리 썸네일
-        "[data-testid='gallery-thumbnail'] img",                   # 테스트ID 기반
-        ".thumbnail img",                                           # 일반 썸네일
-        ".swiper-slide img",                                        # 스와이퍼 슬라이드 내 이미지
-        ".image-gallery-thumbnails img",                            # 이미지 갤러리 썸네일
-        ".product-gallery-thumb img",                               # 상품 갤러리 썸네일
-        ".slider-thumb img",                                        # 슬라이더 썸네일
-    ]
-    
     def try_get_image_url(selectors):
         for selector in selectors:
             try:
@@ -269,10 +517,10 @@ def get_dual_image_urls_klook(driver, url_type="Product"):
     
     try:
         # 메인 이미지 추출
-        main_img_url = try_get_image_url(main_selectors)
+        main_img_url = try_get_image_url(KLOOK_MAIN_IMAGE_SELECTORS)
         
         # 썸네일 이미지 추출
-        thumb_img_url = try_get_image_url(thumb_selectors)
+        thumb_img_url = try_get_image_url(KLOOK_THUMB_IMAGE_SELECTORS)
         
         # 썸네일이 없으면 메인 이미지 사용
         if not thumb_img_url and main_img_url:
@@ -283,129 +531,115 @@ def get_dual_image_urls_klook(driver, url_type="Product"):
     
     return main_img_url, thumb_img_url
 
+def get_image_save_path(city_name, product_number, image_type="main"):
+    """이미지 저장 경로 (폴더, 파일명, 전체 경로) - 원본 코드와 동일한 규칙"""
+    # 파일명 생성
+    city_code = get_city_code(city_name)
+    if image_type == "main":
+        img_filename = f"{city_code}_{product_number:04d}.jpg"  # KMJ_0001.jpg
+    else:
+        img_filename = f"{city_code}_{product_number:04d}_thumb.jpg"  # KMJ_0001_thumb.jpg
+
+    # 폴더 구조 (범용적으로 수정)
+    img_base_folder = os.path.join(os.getcwd(), "klook_img")
+    continent, country = get_city_info(city_name)
+    if city_name == country:
+        # 도시국가: 대륙/국가 구조 (도시 폴더 생략)
+        img_folder = os.path.join(img_base_folder, continent, country)
+    else:
+        # 일반 도시: 대륙/국가/도시 구조
+        img_folder = os.path.join(img_base_folder, continent, country, city_name)
+
+    return img_folder, img_filename, os.path.join(img_folder, img_filename)
+
+def get_klook_image_store():
+    """콘텐츠 주소 이미지 저장소 (IMAGE_STORE_ENABLED 가 꺼져 있으면 None)"""
+    if not CONFIG.get("IMAGE_STORE_ENABLED", False):
+        return None
+    return get_image_store(
+        CONFIG.get("IMAGE_STORE_DIR") or STORE_BASE_DIR,
+        link_mode=CONFIG.get("IMAGE_STORE_LINK_MODE", "hardlink"),
+        phash_distance=CONFIG.get("IMAGE_PHASH_DISTANCE", DEFAULT_PHASH_DISTANCE) if CONFIG.get("IMAGE_PHASH_DEDUP") else None,
+    )
+
+def get_klook_image_pipeline():
+    """KLOOK 이미지 파이프라인 (keep-alive 세션 + 다운로드 스레드 풀 + 리사이즈 프로세스 풀)"""
+    return get_image_pipeline(
+        "klook",
+        referer='https://www.klook.com/',
+        user_agent=CONFIG.get("USER_AGENT"),
+        fetch_workers=CONFIG.get("IMAGE_FETCH_WORKERS", 6),
+        process_workers=CONFIG.get("IMAGE_PROCESS_WORKERS", 2),
+        max_pending=CONFIG.get("IMAGE_MAX_PENDING", 64),
+        timeout=CONFIG.get("HTTP_TIMEOUT", 10),
+        store=get_klook_image_store(),
+    )
+
 def download_single_image_klook(img_src, product_number, city_name, image_type="main", max_size_kb=300):
-    """단일 이미지 다운로드 (메인/썸네일 구분) - 원본 코드 기반"""
+    """단일 이미지 다운로드 (메인/썸네일 구분) - 완료될 때까지 대기"""
     if not CONFIG["SAVE_IMAGES"]:
         return None
     
-    try:
-        import requests
-        from PIL import Image
-    except ImportError:
+    if not PIL_AVAILABLE:
         print("      ⚠️ 필요한 라이브러리가 설치되지 않아 이미지 다운로드를 건너뜁니다.")
         return None
     
     try:
-        # 파일명 생성 - 원본 코드와 동일
-        city_code = get_city_code(city_name)
-        if image_type == "main":
-            img_filename = f"{city_code}_{product_number:04d}.jpg"  # KMJ_0001.jpg
-        else:
-            img_filename = f"{city_code}_{product_number:04d}_thumb.jpg"  # KMJ_0001_thumb.jpg
-        
-        # 이미지 폴더 경로 - 원본 코드와 동일
-        continent, country = get_city_info(city_name)
-        img_base_folder = os.path.join(os.getcwd(), "klook_img")
-
-        # 폴더 구조 (범용적으로 수정)
-        continent, country = get_city_info(city_name)
-        if city_name == country:
-            # 도시국가: 대륙/국가 구조 (도시 폴더 생략)
-            img_folder = os.path.join(img_base_folder, continent, country)
-        else:
-            # 일반 도시: 대륙/국가/도시 구조
-            img_folder = os.path.join(img_base_folder, continent, country, city_name)
-
-        os.makedirs(img_folder, exist_ok=True)
-        img_path = os.path.join(img_folder, img_filename)
-
-        # 이미지 다운로드
-        headers = {
-            'User-Agent': CONFIG.get("USER_AGENT", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"),
-            'Referer': 'https://www.klook.com/',
-            'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8'
-        }
-               
-        response = requests.get(img_src, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        # 임시 파일에 저장
-        temp_path = img_path + ".temp"
-        with open(temp_path, 'wb') as f:
-            f.write(response.content)
-        
-        # 이미지 리사이즈 및 최적화
-        with Image.open(temp_path) as img:
-            # RGB로 변환 (JPEG 호환성)
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-            
-            # 타입별 크기 조정
-            width, height = img.size
-            if image_type == "main":
-                target_width = 400  # 메인 이미지
-            else:
-                target_width = 200  # 썸네일 이미지
-            
-            if width > target_width:
-                ratio = target_width / width
-                new_height = int(height * ratio)
-                img = img.resize((target_width, new_height), Image.Resampling.LANCZOS)
-            
-            # 품질 조정하여 저장
-            quality = 85
-            while quality > 30:
-                img.save(img_path, "JPEG", quality=quality, optimize=True)
-                
-                # 파일 크기 확인
-                if os.path.getsize(img_path) <= max_size_kb * 1024:
-                    break
-                quality -= 10
-        
-        # 임시 파일 삭제
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-        
-        file_size_kb = os.path.getsize(img_path) / 1024
-        print(f"      ✅ {image_type} 이미지 저장: {img_filename} ({file_size_kb:.1f}KB)")
+        _, img_filename, img_path = get_image_save_path(city_name, product_number, image_type)
+        get_klook_image_pipeline().process(img_src, img_path, image_type, max_size_kb, meta={"platform": "klook", "city": city_name})
         return img_filename
         
     except Exception as e:
         print(f"      ❌ {image_type} 이미지 저장 실패: {e}")
-        if 'temp_path' in locals() and os.path.exists(temp_path):
-            os.remove(temp_path)
         return None
 
+def enqueue_dual_images_klook(image_urls, product_number, city_name, max_size_kb=300):
+    """듀얼 이미지 작업 등록만 하고 바로 반환 (배치 끝에서 flush_image_downloads_klook 호출)
+
+    반환: {"main": (파일명, future) 또는 None, "thumb": ...}
+    """
+    results = {"main": None, "thumb": None}
+    if not CONFIG["SAVE_IMAGES"] or not PIL_AVAILABLE:
+        return results
+    
+    pipeline = get_klook_image_pipeline()
+    for image_type, size_kb in (("main", max_size_kb), ("thumb", max_size_kb // 2)):  # 썸네일은 더 작게
+        if not image_urls.get(image_type):
+            continue
+        try:
+            _, img_filename, img_path = get_image_save_path(city_name, product_number, image_type)
+            future = pipeline.submit(image_urls[image_type], img_path, image_type, size_kb, meta={"platform": "klook", "city": city_name})
+            results[image_type] = (img_filename, future)
+        except Exception as e:
+            print(f"      ❌ {image_type} 이미지 작업 등록 실패: {e}")
+    
+    return results
+
+def flush_image_downloads_klook(timeout=None):
+    """등록된 이미지 작업 완료 대기 (배치 종료 시점)"""
+    if not CONFIG["SAVE_IMAGES"] or not PIL_AVAILABLE:
+        return {}
+    stats = get_klook_image_pipeline().flush(timeout=timeout)
+    print(f"    🖼️ 이미지 작업: 완료 {stats['completed']}개 (재사용 {stats['deduped']}개), 실패 {stats['failed']}개, 대기 {stats['pending']}개")
+    return stats
+
 def download_dual_images_klook(image_urls, product_number, city_name, max_size_kb=300):
-    """듀얼 이미지 다운로드 (메인 + 썸네일) - 원본 코드 기반"""
+    """듀얼 이미지 다운로드 (메인 + 썸네일 동시 처리) - 원본 코드 기반"""
     if not CONFIG["SAVE_IMAGES"]:
         return {"main": None, "thumb": None}
     
+    print(f"    📥 이미지 다운로드 중...")
     results = {"main": None, "thumb": None}
-    
-    # 메인 이미지 다운로드
-    if image_urls.get("main"):
-        print(f"    📥 메인 이미지 다운로드 중...")
-        main_filename = download_single_image_klook(
-            image_urls["main"], 
-            product_number, 
-            city_name, 
-            image_type="main",
-            max_size_kb=max_size_kb
-        )
-        results["main"] = main_filename
-    
-    # 썸네일 이미지 다운로드 (선택사항)
-    if image_urls.get("thumb"):
-        print(f"    📥 썸네일 이미지 다운로드 중...")
-        thumb_filename = download_single_image_klook(
-            image_urls["thumb"], 
-            product_number, 
-            city_name, 
-            image_type="thumb",
-            max_size_kb=max_size_kb//2  # 썸네일은 더 작게
-        )
-        results["thumb"] = thumb_filename
+    for image_type, queued in enqueue_dual_images_klook(image_urls, product_number, city_name, max_size_kb).items():
+        if queued is None:
+            continue
+        img_filename, future = queued
+        try:
+            future.result()
+            results[image_type] = img_filename
+        except Exception:
+            # 실패 로그는 파이프라인에서 출력
+            pass
     
     # 결과 로그
     if results["main"] and results["thumb"]:
@@ -510,8 +744,12 @@ def download_and_save_image_klook(image_url, product_number, city_name, image_ty
     return download_single_image_klook(image_url, product_number, city_name, image_type, max_size_kb)
 
 def get_image_stats(city_name):
-    """이미지 저장 통계"""
+    """이미지 저장 통계 (저장소 사용 시 매니페스트 조회, 아니면 폴더 순회)"""
     try:
+        store = get_klook_image_store()
+        if store is not None:
+            return store.get_stats(platform="klook", city=city_name)
+        
         img_dir = os.path.join("klook_img", city_name)
         
         if not os.path.exists(img_dir):
@@ -583,58 +821,7 @@ def format_price_data(price_text):
 def get_last_product_number(city_name):
     """기존 CSV에서 마지막 상품 번호 확인 (범용 대륙 지원)"""
     try:
-        continent, country = get_city_info(city_name)
-        
-        # CSV 파일 경로 결정 (도시국가는 통합 파일명 사용)
-        if city_name in ["홍콩", "싱가포르", "마카오", "괌"]:
-            # 도시국가: 대륙 직하에 통합 파일명으로 저장
-            csv_path = os.path.join("data", continent, f"{city_name}_통합_klook_products.csv")
-        else:
-            # 일반 도시: 대륙/국가/도시 구조
-            csv_path = os.path.join("data", continent, country, city_name, f"klook_{city_name}_products.csv")
-        
-        if not os.path.exists(csv_path):
-            return 0
-        
-        max_number = 0
-        import csv
-        import re
-        
-        with open(csv_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            
-            for row in reader:
-                number_value = None
-                
-                # 1. '번호' 컬럼에서 숫자 추출
-                if '번호' in row and row['번호']:
-                    if row['번호'].isdigit():
-                        number_value = int(row['번호'])
-                    else:
-                        # "page1_1", "KMJ_0001" 등에서 숫자 추출
-                        numbers = re.findall(r'(\d+)', str(row['번호']))
-                        if numbers:
-                            number_value = int(numbers[-1])
-                
-                # 2. 다른 번호 관련 컬럼 확인
-                for col in ['product_number', '상품번호', 'number']:
-                    if col in row and row[col] and str(row[col]).isdigit():
-                        number_value = int(row[col])
-                        break
-                
-                # 3. 이미지 파일명에서 번호 추출 (KMJ_0001.jpg → 1)
-                if not number_value:
-                    for img_col in ['메인이미지_파일명', '썸네일이미지_파일명']:
-                        if img_col in row and row[img_col]:
-                            img_numbers = re.findall(r'_(\d+)\.', row[img_col])
-                            if img_numbers:
-                                number_value = int(img_numbers[0])
-                                break
-                
-                if number_value:
-                    max_number = max(max_number, number_value)
-        
-        return max_number
+        return get_product_store(city_name).max_number
         
     except Exception as e:
         print(f"⚠️ 번호 확인 실패: {e}")
@@ -664,7 +851,7 @@ def ensure_csv_number_continuity(city_name):
 # =============================================================================
 
 def create_country_consolidated_csv(country_name, force_recreate=False):
-    """국가별 통합 CSV 파일 생성 - 전체 대륙 지원 범용 버전"""
+    """국가별 통합 CSV 파일 생성 - 전체 대륙 지원 범용 버전 (변경된 도시만 증분 반영)"""
     print(f"\n🌏 '{country_name}' 국가별 통합 CSV 생성 중...")
     
     try:
@@ -735,55 +922,18 @@ def create_country_consolidated_csv(country_name, force_recreate=False):
             os.makedirs(other_dir, exist_ok=True)
             consolidated_path = os.path.join(other_dir, f"{country_name}_통합_klook_products.csv")
         
-        # 기존 파일 확인
-        if os.path.exists(consolidated_path) and not force_recreate:
-            print(f"   ✅ 통합 파일이 이미 존재합니다: {consolidated_path}")
-            return True
-        
-        # CSV 병합 (pandas 없이 구현)
-        import csv as csv_module
+        # 열려 있는 도시 저장소의 버퍼를 먼저 기록
+        for store in list(_product_stores.values()):
+            store.flush()
         
-        all_rows = []
-        header = None
-        total_products = 0
-        
-        for city, csv_file in country_cities:
-            try:
-                with open(csv_file, 'r', encoding='utf-8-sig') as f:
-                    reader = csv_module.reader(f)
-                    city_rows = list(reader)
-                    
-                    if city_rows:
-                        if header is None:
-                            header = city_rows[0]  # 첫 번째 파일의 헤더 사용
-                        
-                        # 데이터 행만 추가 (헤더 제외)
-                        data_rows = city_rows[1:] if len(city_rows) > 1 else []
-                        all_rows.extend(data_rows)
-                        print(f"      📄 {city}: {len(data_rows)}개 상품")
-                        total_products += len(data_rows)
-                    
-            except Exception as e:
-                print(f"      ❌ {city} CSV 읽기 실패: {e}")
-        
-        if not all_rows:
+        # 스트리밍 통합: 매니페스트 기준으로 바뀐 도시의 추가 행만 이어 쓰기 (force_recreate면 전체 재구성)
+        result = CountryCsvConsolidator(consolidated_path).consolidate(country_cities, force=force_recreate)
+        if result is None:
             print(f"   ❌ 읽을 수 있는 CSV 데이터가 없습니다.")
             return False
         
-        # 번호 재정렬
-        for i, row in enumerate(all_rows, 1):
-            if len(row) > 0:
-                row[0] = str(i)  # 첫 번째 컬럼이 번호라고 가정
-        
-        # 통합 CSV 저장
-        with open(consolidated_path, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv_module.writer(f)
-            if header:
-                writer.writerow(header)
-            writer.writerows(all_rows)
-        
         print(f"   ✅ 통합 CSV 생성 완료!")
-        print(f"      📊 총 상품: {total_products}개")
+        print(f"      📊 총 상품: {result['total_rows']}개 (이번 실행 추가: {result['new_rows']}개)")
         print(f"      📁 저장 위치: {consolidated_path}")
         
         return True
@@ -804,7 +954,7 @@ def auto_create_country_csv_after_crawling(city_name):
             
         if country:
             print(f"\n'{city_name}' 크롤링 완료 후 '{country}' 국가별 통합 CSV 자동 생성...")
-            success = create_country_consolidated_csv(country, force_recreate=True)
+            success = create_country_consolidated_csv(country)
             if success:
                 print(f"   '{country}' 국가별 통합 CSV 자동 생성 완료!")
             else:
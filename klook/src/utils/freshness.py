@@ -0,0 +1,205 @@
+"""
+상품 신선도(변경 감지) 저장소
+- 상품 URL별 페이지 지문: ETag / Last-Modified + 핵심 영역(상품명/가격/평점/리뷰수) 정규화 해시
+- 마지막 확인/추출/변경 시각, 가격 변동성(EWMA) 기록
+- 재크롤링 우선순위 = 경과 시간 / 재확인 주기 (순위가 높을수록, 가격이 자주 바뀔수록 주기 단축)
+- 지문이 같으면 전체 추출 생략 → 상위 상품 야간 갱신 비용 절감
+"""
+
+import os
+import time
+import sqlite3
+import threading
+
+FRESHNESS_DB_FILE = "freshness.sqlite3"
+VOLATILITY_ALPHA = 0.3          # 가격 변동성 EWMA 가중치 (최근 확인 결과 반영 비율)
+UNRANKED_RANK = 1000            # 순위 없는 상품은 이 순위로 취급
+
+class ProductFreshnessStore:
+    """URL별 지문 + 재확인 일정"""
+
+    def __init__(self, path=FRESHNESS_DB_FILE, base_interval_hours=24, rank_scale=50, volatility_factor=3.0):
+        self.path = path
+        self.base_interval = base_interval_hours * 3600
+        self.rank_scale = rank_scale
+        self.volatility_factor = volatility_factor
+        self._lock = threading.RLock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._init_schema()
+
+    def _init_schema(self):
+        with self._lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS product_freshness (
+                    url TEXT PRIMARY KEY,
+                    city TEXT,
+                    rank INTEGER,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT,
+                    price TEXT,
+                    volatility REAL NOT NULL DEFAULT 0,
+                    price_changes INTEGER NOT NULL DEFAULT 0,
+                    checks INTEGER NOT NULL DEFAULT 0,
+                    skipped INTEGER NOT NULL DEFAULT 0,
+                    last_checked REAL,
+                    last_extracted REAL,
+                    last_changed REAL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_freshness_city ON product_freshness (city)")
+            self.conn.commit()
+
+    # -------------------------------------------------------------------------
+    # 조회
+    # -------------------------------------------------------------------------
+
+    def get(self, url):
+        """URL 기록 dict (없으면 None)"""
+        with self._lock:
+            cursor = self.conn.execute("SELECT * FROM product_freshness WHERE url = ?", (url,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip([column[0] for column in cursor.description], row))
+
+    def conditional_headers(self, url):
+        """조건부 요청 헤더 (If-None-Match / If-Modified-Since)"""
+        record = self.get(url)
+        headers = {}
+        if record and record["content_hash"]:
+            if record["etag"]:
+                headers["If-None-Match"] = record["etag"]
+            if record["last_modified"]:
+                headers["If-Modified-Since"] = record["last_modified"]
+        return headers
+
+    def matches(self, url, content_hash):
+        """저장된 핵심 영역 해시와 같은지"""
+        record = self.get(url)
+        return bool(record and content_hash and record["content_hash"] == content_hash)
+
+    # -------------------------------------------------------------------------
+    # 일정
+    # -------------------------------------------------------------------------
+
+    def refresh_interval(self, rank, volatility):
+        """재확인 주기(초): 기본 주기 × 순위 가중 ÷ 변동성 가중"""
+        rank = rank if rank and rank > 0 else UNRANKED_RANK
+        return self.base_interval * (1 + (rank - 1) / self.rank_scale) / (1 + self.volatility_factor * volatility)
+
+    def plan_refresh(self, city_name, limit=None, include_not_due=False, now=None):
+        """재확인 대상 목록 (우선순위 높은 순)
+
+        우선순위 = 마지막 확인 후 경과 시간 / 재확인 주기 (1 이상이면 확인 시점 도래)
+        반환: [{"url", "rank", "priority", "volatility", "last_checked"}]
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT url, rank, volatility, last_checked FROM product_freshness WHERE city = ?", (city_name,)
+            ).fetchall()
+
+        plan = []
+        for url, rank, volatility, last_checked in rows:
+            age = now - (last_checked or 0)
+            priority = age / self.refresh_interval(rank, volatility)
+            if priority >= 1 or include_not_due:
+                plan.append({
+                    "url": url,
+                    "rank": rank,
+                    "priority": round(priority, 3),
+                    "volatility": round(volatility, 3),
+                    "last_checked": last_checked,
+                })
+        plan.sort(key=lambda item: (-item["priority"], item["rank"] or UNRANKED_RANK))
+        return plan[:limit] if limit else plan
+
+    # -------------------------------------------------------------------------
+    # 기록
+    # -------------------------------------------------------------------------
+
+    def record_unchanged(self, url, fingerprint=None):
+        """지문 일치(또는 304)로 추출 생략 - 확인 시각 갱신, 변동성 감쇠"""
+        fingerprint = fingerprint or {}
+        with self._lock:
+            self.conn.execute(
+                "UPDATE product_freshness SET checks = checks + 1, skipped = skipped + 1, last_checked = ?, "
+                "volatility = volatility * ?, etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) "
+                "WHERE url = ?",
+                (time.time(), 1 - VOLATILITY_ALPHA, fingerprint.get("etag"), fingerprint.get("last_modified"), url)
+            )
+            self.conn.commit()
+
+    def record_extraction(self, url, city_name, rank, fingerprint=None, price=None):
+        """전체 추출 결과 기록 - 이전 가격과 다르면 변동 횟수/변동성 증가
+
+        fingerprint 가 None 이면 저장된 해시도 비움 (비교할 수 없는 상품은 다음 확인 때 재추출)
+        """
+        fingerprint = fingerprint or {}
+        now = time.time()
+        with self._lock:
+            previous = self.conn.execute(
+                "SELECT price, volatility, price_changes FROM product_freshness WHERE url = ?", (url,)
+            ).fetchone()
+            volatility, price_changes, last_changed = 0.0, 0, now
+            if previous is not None:
+                old_price, volatility, price_changes = previous
+                changed = old_price is not None and price is not None and old_price != price
+                volatility = volatility * (1 - VOLATILITY_ALPHA) + (VOLATILITY_ALPHA if changed else 0)
+                if changed:
+                    price_changes += 1
+                else:
+                    last_changed = None
+            self.conn.execute("""
+                INSERT INTO product_freshness
+                    (url, city, rank, etag, last_modified, content_hash, price, volatility, price_changes,
+                     checks, last_checked, last_extracted, last_changed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    city = excluded.city,
+                    rank = COALESCE(excluded.rank, rank),
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    content_hash = excluded.content_hash,
+                    price = COALESCE(excluded.price, price),
+                    volatility = excluded.volatility,
+                    price_changes = excluded.price_changes,
+                    checks = checks + 1,
+                    last_checked = excluded.last_checked,
+                    last_extracted = excluded.last_extracted,
+                    last_changed = COALESCE(excluded.last_changed, last_changed)
+            """, (url, city_name, rank, fingerprint.get("etag"), fingerprint.get("last_modified"),
+                  fingerprint.get("content_hash"), price, volatility, price_changes, now, now, last_changed))
+            self.conn.commit()
+
+    def stats(self, city_name=None):
+        """{"products", "checks", "skipped", "price_changes"}"""
+        with self._lock:
+            query = "SELECT COUNT(*), SUM(checks), SUM(skipped), SUM(price_changes) FROM product_freshness"
+            if city_name is None:
+                row = self.conn.execute(query).fetchone()
+            else:
+                row = self.conn.execute(query + " WHERE city = ?", (city_name,)).fetchone()
+        return {"products": row[0], "checks": row[1] or 0, "skipped": row[2] or 0, "price_changes": row[3] or 0}
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_freshness_store(path=FRESHNESS_DB_FILE, **options):
+    """저장소 반환 (경로별 프로세스 내 1개씩 캐시)"""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = ProductFreshnessStore(path, **options)
+            _stores[key] = store
+        return store
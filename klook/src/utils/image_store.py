@@ -0,0 +1,312 @@
+"""
+콘텐츠 주소 이미지 저장소 (플랫폼 공용)
+- 디코드된 픽셀 해시 + 이미지 타입/용량 기준으로 객체 파일 1개만 저장 (objects/ab/<키>.jpg)
+- 원본 URL → 객체 매핑으로 재크롤링 시 다운로드 생략
+- 선택적 지각 해시(dHash) 대역 인덱스로 거의 같은 이미지도 재사용
+- 상품별 파일명(KMJ_0001.jpg)은 객체의 하드링크 또는 매니페스트 항목
+- manifest.sqlite3 로 이미지 통계 조회 (디렉토리 순회 불필요)
+"""
+
+import os
+import shutil
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+
+STORE_BASE_DIR = "image_store"
+PHASH_BAND_COUNT = 4            # 64비트 dHash → 16비트 대역 4개
+DEFAULT_PHASH_DISTANCE = 4      # 거의 같은 이미지로 볼 최대 해밍 거리
+LINK_MODES = ("hardlink", "manifest")
+
+def hamming_distance(hash_a, hash_b):
+    """hex 해시 간 해밍 거리"""
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count("1")
+
+def phash_bands(phash):
+    """지각 해시를 대역 키 목록으로 분할 (같은 대역을 공유하는 후보만 비교)"""
+    width = len(phash) // PHASH_BAND_COUNT
+    return [f"{i}:{phash[i * width:(i + 1) * width]}" for i in range(PHASH_BAND_COUNT)]
+
+class ContentImageStore:
+    """픽셀 해시 기반 이미지 객체 저장소 + 매니페스트"""
+
+    def __init__(self, base_dir=STORE_BASE_DIR, link_mode="hardlink", phash_distance=None):
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"지원하지 않는 link_mode: {link_mode} (가능: {', '.join(LINK_MODES)})")
+
+        self.base_dir = base_dir
+        self.objects_dir = os.path.join(base_dir, "objects")
+        self.db_path = os.path.join(base_dir, "manifest.sqlite3")
+        self.link_mode = link_mode
+        self.phash_distance = phash_distance  # None 이면 지각 해시 재사용 안 함
+        self._lock = threading.RLock()
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._init_schema()
+
+    def _init_schema(self):
+        """테이블 및 PRAGMA 설정"""
+        with self._lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS objects (
+                    object_key TEXT PRIMARY KEY,
+                    pixel_hash TEXT NOT NULL,
+                    phash TEXT,
+                    image_type TEXT NOT NULL,
+                    max_size_kb INTEGER NOT NULL,
+                    path TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    width INTEGER,
+                    height INTEGER,
+                    created_at TEXT
+                );
+                CREATE TABLE IF NOT EXISTS url_objects (
+                    url_hash TEXT NOT NULL,
+                    image_type TEXT NOT NULL,
+                    max_size_kb INTEGER NOT NULL,
+                    url TEXT,
+                    object_key TEXT NOT NULL,
+                    fetched_at TEXT,
+                    PRIMARY KEY (url_hash, image_type, max_size_kb)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS phash_bands (
+                    band_key TEXT NOT NULL,
+                    object_key TEXT NOT NULL,
+                    PRIMARY KEY (band_key, object_key)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS entries (
+                    path TEXT PRIMARY KEY,
+                    platform TEXT,
+                    city TEXT,
+                    image_type TEXT,
+                    object_key TEXT NOT NULL,
+                    url TEXT,
+                    linked_at TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_entries_platform_city ON entries(platform, city);
+                CREATE INDEX IF NOT EXISTS idx_entries_object ON entries(object_key);
+            """)
+            self.conn.commit()
+
+    @staticmethod
+    def get_url_hash(url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def make_object_key(pixel_hash, image_type, max_size_kb):
+        return f"{pixel_hash}_{image_type}_{max_size_kb}"
+
+    def _object_path(self, object_key):
+        return os.path.join(self.objects_dir, object_key[:2], f"{object_key}.jpg")
+
+    def _get_object(self, object_key):
+        row = self.conn.execute("SELECT * FROM objects WHERE object_key = ?", (object_key,)).fetchone()
+        return dict(row) if row else None
+
+    # -------------------------------------------------------------------------
+    # 조회
+    # -------------------------------------------------------------------------
+
+    def find_by_url(self, url, image_type="main", max_size_kb=300):
+        """이미 처리한 URL이면 객체 정보 반환 (객체 파일이 사라졌으면 None)"""
+        with self._lock:
+            row = self.conn.execute("""
+                SELECT o.* FROM url_objects u
+                JOIN objects o ON o.object_key = u.object_key
+                WHERE u.url_hash = ? AND u.image_type = ? AND u.max_size_kb = ?
+            """, (self.get_url_hash(url), image_type, max_size_kb)).fetchone()
+        if row is None or not os.path.exists(row["path"]):
+            return None
+        return dict(row)
+
+    def find_similar(self, phash, image_type="main", max_size_kb=300):
+        """지각 해시가 phash_distance 이내인 같은 타입/용량 객체 (없으면 None)"""
+        if self.phash_distance is None or not phash:
+            return None
+
+        bands = phash_bands(phash)
+        with self._lock:
+            rows = self.conn.execute(f"""
+                SELECT DISTINCT o.* FROM phash_bands b
+                JOIN objects o ON o.object_key = b.object_key
+                WHERE b.band_key IN ({','.join('?' * len(bands))})
+                  AND o.image_type = ? AND o.max_size_kb = ?
+            """, (*bands, image_type, max_size_kb)).fetchall()
+
+        best = None
+        for row in rows:
+            distance = hamming_distance(phash, row["phash"])
+            if distance <= self.phash_distance and (best is None or distance < best[0]):
+                best = (distance, dict(row))
+        return best[1] if best else None
+
+    def resolve(self, img_path):
+        """상품별 파일 경로 → 실제 객체 파일 경로 (매니페스트 모드용)"""
+        if os.path.exists(img_path):
+            return img_path
+        with self._lock:
+            row = self.conn.execute("""
+                SELECT o.path FROM entries e JOIN objects o ON o.object_key = e.object_key
+                WHERE e.path = ?
+            """, (os.path.abspath(img_path),)).fetchone()
+        return row[0] if row else None
+
+    # -------------------------------------------------------------------------
+    # 기록
+    # -------------------------------------------------------------------------
+
+    def put(self, url, result, image_type="main", max_size_kb=300):
+        """인코딩 결과 저장 (같은/비슷한 객체가 있으면 재사용)
+
+        result: image_pipeline.fingerprint_and_encode 반환값
+        반환: (객체 정보, 새로 저장했는지 여부)
+        """
+        object_key = self.make_object_key(result["pixel_hash"], image_type, max_size_kb)
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        with self._lock:
+            stored = self._get_object(object_key)
+            if stored is not None and not os.path.exists(stored["path"]):
+                stored = None  # 객체 파일이 지워졌으면 다시 저장
+            if stored is None:
+                stored = self.find_similar(result.get("phash"), image_type, max_size_kb)
+
+            created = stored is None
+            if created:
+                path = self._object_path(object_key)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temp_path = path + ".tmp"
+                with open(temp_path, 'wb') as f:
+                    f.write(result["data"])
+                os.replace(temp_path, path)
+
+                stored = {
+                    "object_key": object_key,
+                    "pixel_hash": result["pixel_hash"],
+                    "phash": result.get("phash"),
+                    "image_type": image_type,
+                    "max_size_kb": max_size_kb,
+                    "path": path,
+                    "size_bytes": len(result["data"]),
+                    "width": result.get("width"),
+                    "height": result.get("height"),
+                    "created_at": now,
+                }
+
+            with self.conn:
+                if created:
+                    self.conn.execute("""
+                        INSERT OR REPLACE INTO objects
+                            (object_key, pixel_hash, phash, image_type, max_size_kb, path, size_bytes, width, height, created_at)
+                        VALUES (:object_key, :pixel_hash, :phash, :image_type, :max_size_kb, :path, :size_bytes, :width, :height, :created_at)
+                    """, stored)
+                    if stored["phash"]:
+                        self.conn.executemany(
+                            "INSERT OR IGNORE INTO phash_bands (band_key, object_key) VALUES (?, ?)",
+                            [(band, object_key) for band in phash_bands(stored["phash"])]
+                        )
+                self.conn.execute("""
+                    INSERT OR REPLACE INTO url_objects (url_hash, image_type, max_size_kb, url, object_key, fetched_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (self.get_url_hash(url), image_type, max_size_kb, url, stored["object_key"], now))
+
+        return stored, created
+
+    def link(self, stored, img_path, url=None, meta=None):
+        """상품별 파일명을 객체에 연결 (하드링크, 실패 시 복사) + 매니페스트 기록"""
+        img_path = os.path.abspath(img_path)
+        meta = meta or {}
+
+        if self.link_mode == "hardlink":
+            os.makedirs(os.path.dirname(img_path), exist_ok=True)
+            if not (os.path.exists(img_path) and os.path.samefile(img_path, stored["path"])):
+                if os.path.lexists(img_path):
+                    os.remove(img_path)
+                try:
+                    os.link(stored["path"], img_path)
+                except OSError:
+                    # 다른 파일 시스템 등 하드링크 불가 시 복사
+                    shutil.copyfile(stored["path"], img_path)
+
+        with self._lock:
+            with self.conn:
+                self.conn.execute("""
+                    INSERT OR REPLACE INTO entries (path, platform, city, image_type, object_key, url, linked_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    img_path,
+                    meta.get("platform"),
+                    meta.get("city"),
+                    stored["image_type"],
+                    stored["object_key"],
+                    url,
+                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                ))
+        return img_path
+
+    # -------------------------------------------------------------------------
+    # 통계
+    # -------------------------------------------------------------------------
+
+    def get_stats(self, platform=None, city=None):
+        """매니페스트 기준 이미지 통계 (상품별 파일 수/용량 + 실제 저장 객체 수/용량)"""
+        conditions, params = [], []
+        if platform:
+            conditions.append("e.platform = ?")
+            params.append(platform)
+        if city:
+            conditions.append("e.city = ?")
+            params.append(city)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._lock:
+            row = self.conn.execute(f"""
+                SELECT COUNT(*) AS total_images,
+                       COALESCE(SUM(o.size_bytes), 0) AS total_size,
+                       COUNT(DISTINCT e.object_key) AS unique_images
+                FROM entries e JOIN objects o ON o.object_key = e.object_key
+                {where}
+            """, params).fetchone()
+            stored_size = self.conn.execute(f"""
+                SELECT COALESCE(SUM(size_bytes), 0) FROM objects
+                WHERE object_key IN (SELECT e.object_key FROM entries e {where})
+            """, params).fetchone()[0]
+
+        return {
+            "total_images": row["total_images"],
+            "total_size": row["total_size"],
+            "unique_images": row["unique_images"],
+            "stored_size": stored_size,
+            "saved_size": row["total_size"] - stored_size,
+            "directory": self.base_dir,
+        }
+
+    def close(self):
+        """연결 종료"""
+        with self._lock:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+
+# =============================================================================
+# 저장소 캐시
+# =============================================================================
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_image_store(base_dir=STORE_BASE_DIR, link_mode="hardlink", phash_distance=None):
+    """저장소 반환 (경로별 프로세스 내 1개씩 캐시)"""
+    key = os.path.abspath(base_dir)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = ContentImageStore(base_dir, link_mode=link_mode, phash_distance=phash_distance)
+            _stores[key] = store
+        return store
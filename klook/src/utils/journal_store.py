@@ -0,0 +1,310 @@
+"""
+추가 전용 저널 + 주기적 압축 JSON 저장소
+- 변경은 <파일>.journal 에 JSON 한 줄씩 추가 (추가 비용이 누적 이력과 무관하게 일정)
+- 현재 상태는 메모리에 유지, 저널이 스냅샷보다 커지면 백그라운드에서 스냅샷으로 압축
+- 스냅샷은 기존 JSON 파일 그대로 (indent=2) → 다른 코드에서 계속 읽을 수 있음
+- 작업마다 순번(seq)을 붙이고 스냅샷에 마지막 순번을 기록 → 압축 도중 중단돼도 중복 적용 없음
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+
+JOURNAL_SUFFIX = ".journal"
+SEGMENT_SUFFIX = ".journal.compacting"
+SEQ_KEY = "_journal_seq"               # 스냅샷에 기록하는 마지막 적용 순번
+COMPACT_MIN_BYTES = 1024 * 1024        # 저널이 이 크기와 스냅샷 크기를 모두 넘으면 압축
+
+def read_journal(path):
+    """저널 파일의 작업 목록 (마지막 줄이 잘려 있으면 무시)"""
+    ops = []
+    if not os.path.exists(path):
+        return ops
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                ops.append(json.loads(line))
+            except ValueError:
+                continue
+    return ops
+
+class JsonJournalStore:
+    """스냅샷(JSON) + 저널(JSONL) 기반 상태 저장소
+
+    apply_op(state, op): 작업 1개를 상태에 반영하는 함수 (op 안의 값만 사용해야 함)
+    initial_state(): 스냅샷이 없을 때의 초기 상태 (dict)
+    """
+
+    def __init__(self, snapshot_path, apply_op, initial_state=dict, background=True,
+                 compact_min_bytes=COMPACT_MIN_BYTES):
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + JOURNAL_SUFFIX
+        self.segment_path = snapshot_path + SEGMENT_SUFFIX
+        self.apply_op = apply_op
+        self.initial_state = initial_state
+        self.background = background
+        self.compact_min_bytes = compact_min_bytes
+
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._compact_thread = None
+        self._journal = None
+        self._closed = False
+
+        os.makedirs(os.path.dirname(snapshot_path) or ".", exist_ok=True)
+        self.reload()
+
+    # -------------------------------------------------------------------------
+    # 로드
+    # -------------------------------------------------------------------------
+
+    def _read_snapshot(self):
+        """스냅샷 파일 → (상태, 마지막 적용 순번)"""
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        else:
+            state = self.initial_state()
+        return state, state.pop(SEQ_KEY, 0)
+
+    def _replay(self, state, seq, path):
+        for op in read_journal(path):
+            op_seq = op.get("seq", 0)
+            if op_seq <= seq:
+                continue
+            self.apply_op(state, op)
+            seq = op_seq
+        return seq
+
+    def _snapshot_signature(self):
+        try:
+            stat = os.stat(self.snapshot_path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def reload(self):
+        """스냅샷 + (압축 중 세그먼트) + 저널을 다시 읽어 메모리 상태 재구성"""
+        with self._lock:
+            state, seq = self._read_snapshot()
+            seq = self._replay(state, seq, self.segment_path)
+            seq = self._replay(state, seq, self.journal_path)
+            self.state = state
+            self.seq = seq
+            self._snapshot_sig = self._snapshot_signature()
+            self._journal_bytes = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+            self._snapshot_bytes = (self._snapshot_sig or (0, 0))[1]
+            return self.state
+
+    def refresh_if_changed(self):
+        """다른 코드가 스냅샷 파일을 직접 수정했으면 다시 읽기 (stat 1회)"""
+        with self._lock:
+            if self._compact_thread is None and self._snapshot_signature() != self._snapshot_sig:
+                self.reload()
+            return self.state
+
+    # -------------------------------------------------------------------------
+    # 기록
+    # -------------------------------------------------------------------------
+
+    def _open_journal(self):
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        return self._journal
+
+    def append(self, op):
+        """작업 1개를 메모리 상태에 반영하고 저널에 1줄 추가"""
+        with self._lock:
+            if not os.path.exists(self.snapshot_path):
+                # 기존 코드의 파일 존재 확인이 계속 동작하도록 빈 스냅샷 생성
+                self._write_snapshot(self.initial_state(), self.seq)
+                self._snapshot_sig = self._snapshot_signature()
+
+            op = dict(op, seq=self.seq + 1)
+            self.apply_op(self.state, op)
+            self.seq = op["seq"]
+
+            line = json.dumps(op, ensure_ascii=False) + "\n"
+            journal = self._open_journal()
+            journal.write(line)
+            journal.flush()
+            self._journal_bytes += len(line.encode('utf-8'))
+            needs_compact = self._journal_bytes > max(self.compact_min_bytes, self._snapshot_bytes)
+
+        # 잠금 순서 (_compact_lock → _lock) 를 지키도록 _lock 밖에서 압축
+        if needs_compact:
+            self.compact(wait=not self.background)
+        return True
+
+    # -------------------------------------------------------------------------
+    # 압축
+    # -------------------------------------------------------------------------
+
+    def _write_snapshot(self, state, seq):
+        """스냅샷 원자적 교체 (기존 파일과 같은 indent=2 형식 + 순번 키)"""
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(state, **{SEQ_KEY: seq}), f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.snapshot_path)
+
+    def _rotate_journal(self):
+        """현재 저널을 압축 대상 세그먼트로 넘기고 새 저널 시작 (호출자가 _compact_lock, _lock 보유)"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if os.path.exists(self.journal_path):
+            if os.path.exists(self.segment_path):
+                # 이전 압축이 끝나지 않은 세그먼트가 있으면 뒤에 이어 붙임
+                with open(self.journal_path, 'r', encoding='utf-8') as src, \
+                        open(self.segment_path, 'a', encoding='utf-8') as dst:
+                    dst.write(src.read())
+                os.remove(self.journal_path)
+            else:
+                os.replace(self.journal_path, self.segment_path)
+        self._journal_bytes = 0
+
+    def _compact_segment(self):
+        """저널 교체 후 디스크의 스냅샷 + 세그먼트로 새 스냅샷 생성 (메모리 상태는 건드리지 않음)
+
+        교체와 압축을 모두 _compact_lock 안에서 수행 → 다른 압축이 읽고 있는 세그먼트에
+        새 저널이 이어 붙었다가 함께 삭제되는 일이 없음
+        """
+        with self._compact_lock:
+            try:
+                with self._lock:
+                    self._rotate_journal()
+                if not os.path.exists(self.segment_path):
+                    return
+                state, seq = self._read_snapshot()
+                seq = self._replay(state, seq, self.segment_path)
+                self._write_snapshot(state, seq)
+                with self._lock:
+                    os.remove(self.segment_path)
+                    self._snapshot_sig = self._snapshot_signature()
+                    self._snapshot_bytes = (self._snapshot_sig or (0, 0))[1]
+            except Exception as e:
+                print(f"⚠️ 저널 압축 실패 ({self.snapshot_path}): {e}")
+            finally:
+                with self._lock:
+                    if self._compact_thread is threading.current_thread():
+                        self._compact_thread = None
+
+    def compact(self, wait=True):
+        """저널을 스냅샷으로 압축 (wait=False 면 백그라운드 스레드)
+
+        wait=True 는 진행 중인 백그라운드 압축이 끝나길 기다린 뒤 남은 저널까지 압축
+        """
+        if not wait:
+            with self._lock:
+                if self._compact_thread is not None:
+                    return False  # 이미 압축 중
+                self._compact_thread = threading.Thread(
+                    target=self._compact_segment, name="journal-compact", daemon=True
+                )
+                self._compact_thread.start()
+                return True
+
+        self._compact_segment()
+        return True
+
+    def close(self):
+        """남은 저널을 압축하고 파일 닫기"""
+        if self._closed:
+            return
+        self.compact(wait=True)
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            self._closed = True
+
+    def remove_files(self):
+        """스냅샷/저널 파일 삭제 (초기화용)"""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            for path in (self.snapshot_path, self.journal_path, self.segment_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.state = self.initial_state()
+            self.seq = 0
+            self._journal_bytes = 0
+            self._snapshot_bytes = 0
+            self._snapshot_sig = None
+
+# =============================================================================
+# 경로별 저장소 캐시 (종료 시 자동 압축)
+# =============================================================================
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_journal_store(snapshot_path, apply_op, initial_state=dict, background=True):
+    """스냅샷 경로별 저장소 반환 (프로세스 내 1개씩 캐시)"""
+    key = os.path.abspath(snapshot_path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None or store._closed:
+            store = JsonJournalStore(snapshot_path, apply_op, initial_state=initial_state, background=background)
+            _stores[key] = store
+        return store
+
+def close_journal_store(snapshot_path):
+    """저장소 1개 압축 후 캐시에서 제거"""
+    with _stores_lock:
+        store = _stores.pop(os.path.abspath(snapshot_path), None)
+    if store is not None:
+        store.close()
+    return store
+
+@atexit.register
+def close_all_journal_stores():
+    with _stores_lock:
+        stores = list(_stores.values())
+        _stores.clear()
+    for store in stores:
+        try:
+            store.close()
+        except Exception as e:
+            print(f"⚠️ 저널 저장소 종료 실패 ({store.snapshot_path}): {e}")
+
+# =============================================================================
+# 추가 비용 벤치마크
+# =============================================================================
+
+def benchmark_append_cost(total=100000, window=10000, work_dir="journal_benchmark"):
+    """URL total개를 추가하며 window 단위 평균 추가 시간(µs) 측정
+
+    반환: [(누적 개수, 평균 µs), ...] - 누적 개수와 무관하게 일정해야 함
+    """
+    def apply_add(state, op):
+        entry = state.setdefault(op["url"], {"hash": op["hash"], "rankings": []})
+        entry["rankings"].append({"rank": op["rank"], "tab": op["tab"]})
+
+    os.makedirs(work_dir, exist_ok=True)
+    snapshot_path = os.path.join(work_dir, "benchmark_rank_mapping.json")
+    store = JsonJournalStore(snapshot_path, apply_add)
+    store.remove_files()
+
+    results = []
+    started = time.perf_counter()
+    for i in range(1, total + 1):
+        store.append({"url": f"https://www.klook.com/ko/activity/{i}/", "hash": f"{i:012x}", "rank": i, "tab": "전체"})
+        if i % window == 0:
+            now = time.perf_counter()
+            results.append((i, (now - started) / window * 1e6))
+            print(f"   {i:>7}개: 평균 {results[-1][1]:.1f}µs/추가")
+            started = time.perf_counter()
+
+    store.close()
+    store.remove_files()
+    return results
+
+if __name__ == "__main__":
+    benchmark_append_cost()
@@ -0,0 +1,200 @@
+"""
+스트리밍 Sitemap 수집기
+- sitemap index → 하위 sitemap 재귀 처리, .xml.gz 자동 해제
+- iterparse 로 <url>/<sitemap> 단위 처리 후 즉시 해제 (sitemap 크기와 무관하게 메모리 일정)
+- (소비자, sitemap)별 ETag/Last-Modified 저장 → 다음 실행에서 조건부 GET (304면 건너뜀)
+  공용 sitemap(sitemap.xml 등)은 도시마다 걸러 가는 URL이 다르므로 도시별로 따로 기록
+"""
+
+import io
+import os
+import json
+import gzip
+import threading
+from datetime import datetime
+import xml.etree.ElementTree as ET
+
+try:
+    import requests
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+SITEMAP_STATE_PATH = os.path.join("url_collections", "sitemap_state.json")
+MAX_INDEX_DEPTH = 3  # sitemap index 중첩 한도 (순환 참조 방지)
+GZIP_MAGIC = b"\x1f\x8b"
+
+def _local_name(tag):
+    """'{namespace}loc' → 'loc'"""
+    return tag.rsplit("}", 1)[-1]
+
+def _child_text(element, name):
+    for child in element:
+        if _local_name(child.tag) == name:
+            return (child.text or "").strip()
+    return ""
+
+class SitemapStateStore:
+    """상태 키(소비자 + sitemap URL)별 ETag/Last-Modified 기록 (JSON 파일 1개)"""
+
+    def __init__(self, path=SITEMAP_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.state = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.state = json.load(f)
+            except (IOError, ValueError) as e:
+                print(f"⚠️ Sitemap 상태 파일 로드 실패, 새로 시작: {e}")
+                self.state = {}
+
+    def get(self, sitemap_url):
+        return self.state.get(sitemap_url, {})
+
+    def update(self, sitemap_url, **values):
+        with self._lock:
+            entry = self.state.setdefault(sitemap_url, {})
+            entry.update(values)
+            entry["checked_at"] = datetime.now().isoformat()
+
+    def save(self):
+        """임시 파일에 쓰고 교체 (중단돼도 기존 상태 유지)"""
+        if not self.path:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+
+    def clear(self, sitemap_url=None):
+        with self._lock:
+            if sitemap_url is None:
+                self.state = {}
+            else:
+                self.state.pop(sitemap_url, None)
+
+class SitemapStreamer:
+    """조건부 GET + 스트리밍 파싱 sitemap 순회기"""
+
+    def __init__(self, state_path=SITEMAP_STATE_PATH, session=None, headers=None, timeout=30,
+                 conditional=True, verify_ssl=True, consumer=None):
+        """consumer: 상태 구분 키 (도시명 등) - 한 소비자가 끝까지 읽은 sitemap만 그 소비자에게 304로 건너뜀"""
+        self.consumer = consumer
+        self.session = session or requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        self.timeout = timeout
+        self.conditional = conditional
+        self.verify_ssl = verify_ssl
+        self.state = SitemapStateStore(state_path)
+        self.stats = {"fetched": 0, "not_modified": 0, "failed": 0, "urls": 0}
+
+    def _state_key(self, sitemap_url):
+        return f"{self.consumer}::{sitemap_url}" if self.consumer else sitemap_url
+
+    def _open(self, sitemap_url, force=False):
+        """조건부 GET (304 → None, 그 외 실패는 예외)"""
+        headers = {}
+        if self.conditional and not force:
+            saved = self.state.get(self._state_key(sitemap_url))
+            if saved.get("etag"):
+                headers["If-None-Match"] = saved["etag"]
+            if saved.get("last_modified"):
+                headers["If-Modified-Since"] = saved["last_modified"]
+
+        response = self.session.get(sitemap_url, headers=headers, timeout=self.timeout,
+                                    stream=True, verify=self.verify_ssl)
+        if response.status_code == 304:
+            response.close()
+            return None
+        if response.status_code != 200:
+            response.close()
+            raise IOError(f"HTTP {response.status_code}")
+        return response
+
+    @staticmethod
+    def _body_stream(response):
+        """응답 본문 스트림 (전송 압축 해제 + .gz 본문이면 gzip 해제)"""
+        response.raw.decode_content = True
+        response.raw.auto_close = False  # 끝까지 읽어도 닫지 않음 (BufferedReader EOF 처리용)
+        stream = io.BufferedReader(response.raw)
+        if stream.peek(2)[:2] == GZIP_MAGIC:
+            return gzip.GzipFile(fileobj=stream)
+        return stream
+
+    def _parse(self, stream):
+        """(종류, loc) 스트림 - 종류: "url" (상품 페이지) 또는 "sitemap" (하위 sitemap)"""
+        root = None
+        for event, element in ET.iterparse(stream, events=("start", "end")):
+            if root is None:
+                root = element
+                continue
+            if event != "end":
+                continue
+
+            name = _local_name(element.tag)
+            if name in ("url", "sitemap"):
+                loc = _child_text(element, "loc")
+                if loc:
+                    yield name, loc
+                # 처리한 항목 해제 → 메모리 일정
+                root.clear()
+
+    def iter_urls(self, sitemap_url, force=False, _depth=0):
+        """sitemap(또는 index)의 페이지 URL 순회
+
+        - 변경 없는 sitemap(304)은 건너뜀 (index는 기억해 둔 하위 sitemap을 각각 확인)
+        - 끝까지 읽은 sitemap만 ETag/Last-Modified 기록 (중간에 멈추면 다음 실행에서 다시 읽음)
+        """
+        if _depth > MAX_INDEX_DEPTH:
+            print(f"    ⚠️ Sitemap index 중첩 한도 초과: {sitemap_url}")
+            return
+
+        try:
+            response = self._open(sitemap_url, force)
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"    ❌ Sitemap 접근 실패: {sitemap_url} ({e})")
+            return
+
+        if response is None:
+            self.stats["not_modified"] += 1
+            children = self.state.get(self._state_key(sitemap_url)).get("children", [])
+            print(f"    ⏭️ 변경 없음 (304): {sitemap_url}" + (f" → 하위 {len(children)}개 확인" if children else ""))
+            for child_url in children:
+                yield from self.iter_urls(child_url, force, _depth + 1)
+            return
+
+        self.stats["fetched"] += 1
+        children = []
+        url_count = 0
+        try:
+            for kind, loc in self._parse(self._body_stream(response)):
+                if kind == "sitemap":
+                    children.append(loc)
+                else:
+                    url_count += 1
+                    self.stats["urls"] += 1
+                    yield loc
+        except ET.ParseError as e:
+            self.stats["failed"] += 1
+            print(f"    ❌ Sitemap XML 파싱 실패: {sitemap_url} ({e})")
+            return
+        finally:
+            response.close()
+
+        # index 본문은 다 읽은 뒤 하위 sitemap 처리 (동시에 열린 응답은 항상 1개)
+        for child_url in children:
+            yield from self.iter_urls(child_url, force, _depth + 1)
+
+        self.state.update(
+            self._state_key(sitemap_url),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            url_count=url_count,
+            children=children,
+        )
+        self.state.save()
@@ -12,6 +12,8 @@ import time
 import random
 from datetime import datetime
 
+from ..utils.url_index import get_url_index
+
 # Selenium은 URL 수집에만 필요하므로 조건부로 import
 try:
     from selenium.webdriver.common.by import By
@@ -39,24 +41,24 @@ def get_url_hash(url):
     return hashlib.md5(url.encode('utf-8')).hexdigest()[:hash_length]
 
 def is_url_processed_fast(url, city_name):
-    """해시 파일 존재 여부로 URL 처리 여부를 빠르게 확인합니다."""
+    """도시별 URL 완료 인덱스(SQLite)로 URL 처리 여부를 빠르게 확인합니다."""
     if not CONFIG.get("USE_HASH_SYSTEM", True):
         return False
     url_hash = get_url_hash(url)
-    hash_file = os.path.join("hash_index", city_name, f"{url_hash}.done")
-    return os.path.exists(hash_file)
+    return get_url_index(city_name, hash_length=CONFIG.get("HASH_LENGTH", 12)).contains(url_hash)
 
 def mark_url_processed_fast(url, city_name, product_number=None):
-    """URL 처리가 완료되었음을 해시 파일 생성으로 표시합니다."""
+    """URL 처리가 완료되었음을 도시별 URL 완료 인덱스에 기록합니다."""
     if not CONFIG.get("USE_HASH_SYSTEM", True):
         return False
-    url_hash = get_url_hash(url)
-    hash_dir = os.path.join("hash_index", city_name)
-    os.makedirs(hash_dir, exist_ok=True)
-    hash_file = os.path.join(hash_dir, f"{url_hash}.done")
-    with open(hash_file, 'w', encoding='utf-8') as f:
-        f.write(f"URL: {url}\nProduct: {product_number}\nCompleted: {datetime.now().isoformat()}")
-    return True
+    index = get_url_index(city_name, hash_length=CONFIG.get("HASH_LENGTH", 12))
+    return index.mark(url, product_number=product_number)
+
+def mark_urls_processed_fast(records, city_name):
+    """여러 URL의 처리 완료를 한 번에 기록합니다. (records: URL 또는 dict 목록)"""
+    if not CONFIG.get("USE_HASH_SYSTEM", True):
+        return 0
+    return get_url_index(city_name, hash_length=CONFIG.get("HASH_LENGTH", 12)).mark_many(records)
 
 # =============================================================================
 # URL 수집 시스템
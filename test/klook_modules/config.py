@@ -24,6 +24,8 @@ from datetime import datetime    # 타임스탬프용
 # PIL import moved to conditional section below
 from typing import List, Dict, Tuple, Optional
 
+from .url_index import get_url_index
+
 # 호환성을 위한 조건부 import
 try:
     from PIL import Image
@@ -81,6 +83,20 @@ CONFIG = {
     "NEW_TAB_ENABLED": False,      # 새 탭 크롤링 활성화
     "PAGE_LOAD_TIMEOUT": 6,       # 페이지 로드 타임아웃
 
+    # 🆕 단계별 계측 (driver.get / 대기 / 추출 / 이미지 / 저장 / 순위 기록)
+    "METRICS_ENABLED": True,                            # URL별 추적 레코드를 파일에 기록
+    "METRICS_FILE": "metrics/klook_crawl_metrics.jsonl",  # JSON Lines (url / summary 레코드)
+    "METRICS_PROMETHEUS_PORT": None,                    # 예: 9108 → http://127.0.0.1:9108/metrics
+
+    # 🆕 도시 간 작업 큐 (SQLite lease/ack - 중단 후 재시작 시 이어서 진행)
+    "USE_JOB_QUEUE": True,
+    "JOB_QUEUE_FILE": "crawl_jobs.sqlite3",  # 여러 워커/호스트가 같은 파일 공유
+    "JOB_QUEUE_JOURNAL_MODE": "WAL",          # 네트워크 공유 디스크면 "DELETE"
+    "JOB_LEASE_SECONDS": 600,                 # 임대 만료 → 다른 워커가 회수
+    "JOB_MAX_ATTEMPTS": 3,                    # 초과 시 failed
+    "JOB_RETRY_DELAY": 30,                    # 재시도 대기 (초 × 시도 횟수)
+    "JOB_IDLE_POLL": 15,                      # 남은 작업이 다른 워커 임대/재시도 대기뿐일 때 재확인 간격 (초)
+
     "SHORT_MIN_DELAY": 0.2,    # 타이핑 간격 (0.2초 ~ 0.5초)
     "SHORT_MAX_DELAY": 0.5,
 
@@ -404,58 +420,36 @@ def get_url_hash(url):
     return hashlib.md5(url.encode('utf-8')).hexdigest()[:hash_length]
 
 def is_url_processed_fast(url, city_name):
-    """해시 파일 존재 여부로 초고속 중복 체크 (0.001초)"""
+    """도시별 URL 완료 인덱스(SQLite)로 초고속 중복 체크"""
     if not CONFIG.get("USE_HASH_SYSTEM", True):
         return False
         
     url_hash = get_url_hash(url)
-    hash_file = os.path.join("hash_index", city_name, f"{url_hash}.done")
-    return os.path.exists(hash_file)
+    return get_url_index(city_name, hash_length=CONFIG.get("HASH_LENGTH", 12)).contains(url_hash)
 
 def mark_url_processed_fast(url, city_name, product_number=None, rank=None):
-    """해시 파일 생성으로 완료 표시 (0.002초) - 순위 정보 추가"""
+    """도시별 URL 완료 인덱스(SQLite)에 완료 표시 - 순위 정보 포함"""
     if not CONFIG.get("USE_HASH_SYSTEM", True):
         return False
         
-    url_hash = get_url_hash(url)
-    hash_dir = os.path.join("hash_index", city_name)
-    os.makedirs(hash_dir, exist_ok=True)
-    
-    hash_file = os.path.join(hash_dir, f"{url_hash}.done")
-    with open(hash_file, 'w', encoding='utf-8') as f:
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        f.write(f"URL: {url}\n")
-        f.write(f"Product: {product_number}\n")
-        if rank is not None:
-            f.write(f"Rank: {rank}\n")  # 🆕 순위 정보 추가
-        f.write(f"City: {city_name}\n")  # 🆕 도시 정보 추가
-        f.write(f"Completed: {timestamp}\n")
+    index = get_url_index(city_name, hash_length=CONFIG.get("HASH_LENGTH", 12))
+    return index.mark(url, product_number=product_number, rank=rank)
+
+def mark_urls_processed_fast(records, city_name):
+    """여러 URL을 한 번에 완료 표시 (records: URL 또는 dict 목록)"""
+    if not CONFIG.get("USE_HASH_SYSTEM", True):
+        return 0
     
-    return True
+    return get_url_index(city_name, hash_length=CONFIG.get("HASH_LENGTH", 12)).mark_many(records)
 
 def get_last_collected_rank(city_name):
     """마지막 수집된 순위 조회 (개수 기반 시스템용)"""
-    hash_dir = os.path.join("hash_index", city_name)
-    if not os.path.exists(hash_dir):
-        return 0
-    
-    max_rank = 0
     try:
-        for filename in os.listdir(hash_dir):
-            if filename.endswith('.done'):
-                filepath = os.path.join(hash_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        for line in f:
-                            if line.startswith('Rank: '):
-                                rank = int(line.split('Rank: ')[1].strip())
-                                max_rank = max(max_rank, rank)
-                except (ValueError, IndexError, FileNotFoundError):
-                    continue
+        rank_set = get_url_index(city_name, hash_length=CONFIG.get("HASH_LENGTH", 12)).get_rank_set()
+        return rank_set.max() if rank_set else 0
     except Exception as e:
         print(f"⚠️ 순위 조회 실패: {e}")
-    
-    return max_rank
+        return 0
 
 def get_next_collection_range(city_name, count=3):
     """다음 수집할 순위 범위 자동 계산 (개수 기반 시스템)"""
@@ -467,47 +461,15 @@ def get_next_collection_range(city_name, count=3):
     return start_rank, end_rank
 
 def find_missing_ranks(city_name, max_rank=50):
-    """누락된 순위 구간 찾기"""
-    hash_dir = os.path.join("hash_index", city_name)
-    if not os.path.exists(hash_dir):
-        return []
-    
-    collected_ranks = set()
+    """누락된 순위 구간 찾기 (수집 구간 집합의 빈 구간)"""
     try:
-        for filename in os.listdir(hash_dir):
-            if filename.endswith('.done'):
-                filepath = os.path.join(hash_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        for line in f:
-                            if line.startswith('Rank: '):
-                                rank = int(line.split('Rank: ')[1].strip())
-                                if 1 <= rank <= max_rank:
-                                    collected_ranks.add(rank)
-                except (ValueError, IndexError, FileNotFoundError):
-                    continue
+        rank_set = get_url_index(city_name, hash_length=CONFIG.get("HASH_LENGTH", 12)).get_rank_set()
     except Exception as e:
         print(f"⚠️ 누락 순위 조회 실패: {e}")
         return []
     
     # 연속된 누락 구간 찾기
-    missing_ranges = []
-    if not collected_ranks:
-        return [(1, max_rank)]
-    
-    sorted_ranks = sorted(collected_ranks)
-    current_start = 1
-    
-    for rank in sorted_ranks:
-        if rank > current_start:
-            missing_ranges.append((current_start, rank - 1))
-        current_start = max(current_start, rank + 1)
-    
-    # 마지막 구간 체크
-    if current_start <= max_rank:
-        missing_ranges.append((current_start, max_rank))
-    
-    return missing_ranges
+    return list(rank_set.iter_gaps(1, max_rank))
 
 def smart_next_collection_range(city_name, count=3, fill_gaps=True):
     """🆕 지능형 다음 수집 범위 계산 (랭킹 매니저 통합 - 범용)"""
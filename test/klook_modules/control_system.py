@@ -17,7 +17,8 @@ from .config import CONFIG, get_city_code, get_city_info, UNIFIED_CITY_INFO
 from .driver_manager import initialize_group6_system, go_to_main_page, find_and_fill_search, click_search_button, handle_popup
 from .url_collection import execute_comprehensive_url_collection
 from .tab_selector import execute_integrated_tab_selector_system
-from .crawler_engine import execute_klook_crawling_system, quick_crawl_test
+from .crawler_engine import execute_klook_crawling_system, execute_klook_queue_crawling, quick_crawl_test
+from .job_queue import get_crawl_job_queue
 from .category_system import execute_category_analysis_system
 from .data_handler import get_csv_stats, backup_csv_data
 from .system_utils import check_dependencies, get_system_info
@@ -41,6 +42,8 @@ class KlookMasterController:
             "errors": []
         }
         self.workflow_results = {}
+        # URL 작업 큐 (중단 후 재시작 시 남은 작업부터 이어서 진행)
+        self.job_queue = get_crawl_job_queue() if CONFIG.get("USE_JOB_QUEUE", False) else None
     
     def initialize_system(self, city_name="서울"):
         """시스템 초기화"""
@@ -79,8 +82,12 @@ class KlookMasterController:
             })
             return False
     
-    def execute_full_workflow(self, city_name, strategy="comprehensive", max_products=None):
-        """전체 워크플로우 실행"""
+    def execute_full_workflow(self, city_name, strategy="comprehensive", max_products=None, resume=True):
+        """전체 워크플로우 실행
+
+        작업 큐 사용 시 (USE_JOB_QUEUE): 남은 작업이 있으면 네비게이션/URL 수집을 건너뛰고 이어서 크롤링,
+        모두 끝난 도시(또는 resume=False)는 큐를 비우고 새로 수집
+        """
         print(f"🎯 '{city_name}' 전체 워크플로우 실행")
         print(f"📊 전략: {strategy}")
         print("=" * 80)
@@ -100,25 +107,44 @@ class KlookMasterController:
             
             workflow_result["stages"]["initialization"] = {"success": True}
             
-            # Stage 2: 페이지 네비게이션
-            print("\n🌐 Stage 2: KLOOK 페이지 네비게이션...")
-            nav_result = self._execute_navigation(city_name)
-            workflow_result["stages"]["navigation"] = nav_result
-            
-            if not nav_result["success"]:
-                print("⚠️ 네비게이션 실패, 계속 진행...")
-            
-            # Stage 3: URL 수집
-            print("\n🔍 Stage 3: URL 수집...")
-            url_result = self._execute_url_collection(city_name, strategy)
-            workflow_result["stages"]["url_collection"] = url_result
+            queue_state = self.job_queue.city_status(city_name) if self.job_queue else None
+            if queue_state == "complete" or (queue_state and not resume):
+                self.job_queue.clear_city(city_name)
+                queue_state = None
             
-            if not url_result.get("success", False) or not url_result.get("urls"):
-                raise Exception("URL 수집 실패 또는 수집된 URL 없음")
+            if queue_state == "open":
+                # 이전 실행의 남은 작업부터 이어서 진행 (파일 재스캔 없음)
+                print("\n♻️ 작업 큐에 남은 작업 발견 - 네비게이션/URL 수집 생략")
+                workflow_result["stages"]["navigation"] = {"success": True, "skipped": True}
+                url_result = {"success": True, "resumed": True, "urls": []}
+                workflow_result["stages"]["url_collection"] = url_result
+            else:
+                # Stage 2: 페이지 네비게이션
+                print("\n🌐 Stage 2: KLOOK 페이지 네비게이션...")
+                nav_result = self._execute_navigation(city_name)
+                workflow_result["stages"]["navigation"] = nav_result
+                
+                if not nav_result["success"]:
+                    print("⚠️ 네비게이션 실패, 계속 진행...")
+                
+                # Stage 3: URL 수집
+                print("\n🔍 Stage 3: URL 수집...")
+                url_result = self._execute_url_collection(city_name, strategy)
+                workflow_result["stages"]["url_collection"] = url_result
+                
+                if not url_result.get("success", False) or not url_result.get("urls"):
+                    raise Exception("URL 수집 실패 또는 수집된 URL 없음")
+                
+                if self.job_queue:
+                    urls = url_result["urls"][:max_products] if max_products else url_result["urls"]
+                    self.job_queue.enqueue_city(city_name, urls)
             
             # Stage 4: 크롤링 실행
             print("\n🚀 Stage 4: 상품 크롤링...")
-            crawl_result = self._execute_crawling(url_result["urls"], city_name, max_products)
+            if self.job_queue:
+                crawl_result = execute_klook_queue_crawling(self.driver, self.job_queue, city_name)
+            else:
+                crawl_result = self._execute_crawling(url_result["urls"], city_name, max_products)
             workflow_result["stages"]["crawling"] = crawl_result
             
             # Stage 5: 데이터 분석
@@ -507,8 +533,12 @@ def interactive_klook_crawler():
         print(f"❌ 대화형 실행 중 오류: {e}")
         return None
 
-def batch_city_crawler(city_list, strategy="standard", max_products=100):
-    """다중 도시 배치 크롤링"""
+def batch_city_crawler(city_list, strategy="standard", max_products=100, resume=True):
+    """다중 도시 배치 크롤링
+
+    작업 큐 사용 시: 완료된 도시는 건너뛰고 중단된 도시부터 이어서 진행
+    (목록의 모든 도시가 완료 상태이거나 resume=False 면 새 배치로 시작)
+    """
     print(f"🏙️ 배치 크롤링: {len(city_list)}개 도시")
     print(f"📊 전략: {strategy}")
     print("=" * 60)
@@ -516,8 +546,25 @@ def batch_city_crawler(city_list, strategy="standard", max_products=100):
     controller = KlookMasterController()
     batch_results = {}
     
+    completed_cities = set()
+    if controller.job_queue:
+        states = {city_name: controller.job_queue.city_status(city_name) for city_name in city_list}
+        if resume and not all(state == "complete" for state in states.values()):
+            completed_cities = {city_name for city_name, state in states.items() if state == "complete"}
+            if completed_cities:
+                print(f"♻️ 이전 배치 이어서 진행: 완료 {len(completed_cities)}개 도시 건너뜀")
+        else:
+            for city_name, state in states.items():
+                if state is not None:
+                    controller.job_queue.clear_city(city_name)
+    
     try:
         for i, city_name in enumerate(city_list, 1):
+            if city_name in completed_cities:
+                print(f"\n[{i}/{len(city_list)}] '{city_name}' 완료됨 - 건너뜀")
+                batch_results[city_name] = {"success": True, "skipped": True, "queue": controller.job_queue.counts(city_name)}
+                continue
+            
             print(f"\n[{i}/{len(city_list)}] '{city_name}' 처리 중...")
             
             try:
@@ -549,6 +596,31 @@ def batch_city_crawler(city_list, strategy="standard", max_products=100):
     finally:
         controller.cleanup_system()
 
+def run_klook_queue_worker(city_name=None, worker_id=None, max_jobs=None):
+    """추가 워커 프로세스: 작업 큐(JOB_QUEUE_FILE)에 등록된 작업을 가져와 크롤링
+
+    같은 호스트의 여러 프로세스 또는 같은 큐 파일을 공유하는 여러 호스트에서 동시 실행 가능
+    """
+    job_queue = get_crawl_job_queue()
+    driver = None
+    try:
+        driver, _ = initialize_group6_system()
+        if not driver:
+            print("❌ 웹드라이버 초기화 실패")
+            return {"success": False, "error": "driver_init_failed"}
+        
+        return execute_klook_queue_crawling(driver, job_queue, city_name, worker_id=worker_id, max_jobs=max_jobs)
+        
+    except Exception as e:
+        print(f"❌ 작업 큐 워커 실패: {e}")
+        return {"success": False, "error": str(e)}
+    finally:
+        if driver:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
 def test_system_functionality():
     """시스템 기능 테스트"""
     print("🧪 KLOOK 크롤링 시스템 기능 테스트")
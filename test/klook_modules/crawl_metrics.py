@@ -0,0 +1,346 @@
+"""
+⏱️ 크롤링 단계별 계측
+- 단계(driver.get, 스마트 대기, 필드 추출, 이미지, CSV 저장, 순위 기록 ...)별 소요 시간을
+  (도시, 단계) 히스토그램에 누적 → p50/p95/p99
+- URL 1개 처리 = 추적 레코드 1줄 (단계별 소요 시간 + 결과) → JSON Lines 메트릭 파일
+- 선택: 127.0.0.1:<포트>/metrics 로 Prometheus 텍스트 형식 노출
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 히스토그램 버킷 상한(초): 1ms 부터 1.25배씩 ~300초 (백분위 오차 약 ±12%)
+HISTOGRAM_BUCKETS = []
+_bound = 0.001
+while _bound < 300:
+    HISTOGRAM_BUCKETS.append(round(_bound, 6))
+    _bound *= 1.25
+HISTOGRAM_BUCKETS.append(float("inf"))
+
+PERCENTILES = (0.5, 0.95, 0.99)
+TOTAL_STAGE = "total"   # URL 1개 전체 처리 시간
+
+# =============================================================================
+# 히스토그램
+# =============================================================================
+
+class StageHistogram:
+    """고정 로그 버킷 히스토그램 (관측값을 저장하지 않으므로 메모리 일정)"""
+
+    def __init__(self):
+        self.counts = [0] * len(HISTOGRAM_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds):
+        self.counts[bisect_left(HISTOGRAM_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def percentile(self, q):
+        """버킷 안 선형 보간 백분위 (관측값 최소/최대로 제한)"""
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if not bucket_count:
+                continue
+            if cumulative + bucket_count >= target:
+                lower = HISTOGRAM_BUCKETS[i - 1] if i > 0 else 0.0
+                upper = HISTOGRAM_BUCKETS[i] if HISTOGRAM_BUCKETS[i] != float("inf") else self.max
+                value = lower + (upper - lower) * (target - cumulative) / bucket_count
+                return min(max(value, self.min), self.max)
+            cumulative += bucket_count
+        return self.max
+
+    def summary(self):
+        result = {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+        }
+        for q in PERCENTILES:
+            value = self.percentile(q)
+            result[f"p{int(q * 100)}"] = round(value, 6) if value is not None else None
+        return result
+
+# =============================================================================
+# URL 추적 레코드
+# =============================================================================
+
+class UrlTrace:
+    """URL 1개 처리 중 단계별 소요 시간 (같은 단계가 여러 번이면 합산)"""
+
+    def __init__(self, url, city, rank=None):
+        self.url = url
+        self.city = city
+        self.rank = rank
+        self.status = None
+        self.error = None
+        self.stages = {}
+        self.started_at = datetime.now().isoformat()
+        self._started = time.perf_counter()
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def finish(self, result):
+        """process_single_url 결과 dict → 상태 (success / skipped / error)"""
+        if not isinstance(result, dict):
+            self.status = "success" if result else "error"
+        elif result.get("skipped"):
+            self.status = "skipped"
+            self.error = result.get("reason")
+        elif result.get("success"):
+            self.status = "success"
+        else:
+            self.status = "error"
+            self.error = result.get("error")
+
+    def elapsed(self):
+        return time.perf_counter() - self._started
+
+# =============================================================================
+# 메트릭 수집기
+# =============================================================================
+
+class CrawlMetrics:
+    """플랫폼 1개의 단계별 히스토그램 + URL 추적 + 내보내기"""
+
+    def __init__(self, platform, path=None):
+        self.platform = platform
+        self.path = path
+        self.histograms = {}        # (도시, 단계) → StageHistogram
+        self.url_counts = {}        # (도시, 상태) → 개수
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._file = None
+        self._server = None
+
+    # -------------------------------------------------------------------------
+    # 기록
+    # -------------------------------------------------------------------------
+
+    def observe(self, stage, seconds, city=None):
+        """단계 소요 시간 1건 기록 (진행 중인 URL 추적에도 반영)"""
+        trace = getattr(self._local, "trace", None)
+        if city is None:
+            city = trace.city if trace is not None else ""
+        if trace is not None:
+            trace.add(stage, seconds)
+        with self._lock:
+            histogram = self.histograms.get((city, stage))
+            if histogram is None:
+                histogram = self.histograms[(city, stage)] = StageHistogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def stage(self, stage, city=None):
+        """with metrics.stage("driver_get"): ... - 예외가 나도 소요 시간은 기록"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, city)
+
+    @contextmanager
+    def trace_url(self, url, city, rank=None):
+        """URL 1개 처리 구간 - 끝나면 전체 시간 기록 + 추적 레코드 1줄 기록"""
+        trace = UrlTrace(url, city, rank)
+        previous = getattr(self._local, "trace", None)
+        self._local.trace = trace
+        try:
+            yield trace
+        except BaseException as e:
+            trace.status = "error"
+            trace.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._local.trace = previous
+            total = trace.elapsed()
+            self.observe(TOTAL_STAGE, total, city)
+            status = trace.status or "unknown"
+            with self._lock:
+                self.url_counts[(city, status)] = self.url_counts.get((city, status), 0) + 1
+            self._write({
+                "type": "url",
+                "platform": self.platform,
+                "city": city,
+                "url": url,
+                "rank": trace.rank,
+                "status": status,
+                "error": trace.error,
+                "started_at": trace.started_at,
+                "total": round(total, 6),
+                "stages": {name: round(seconds, 6) for name, seconds in trace.stages.items()},
+            })
+
+    def _write(self, record):
+        if not self.path:
+            return
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            try:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    self._file = open(self.path, 'a', encoding='utf-8')
+                self._file.write(line)
+                self._file.flush()
+            except Exception as e:
+                print(f"⚠️ 메트릭 기록 실패: {e}")
+
+    # -------------------------------------------------------------------------
+    # 요약
+    # -------------------------------------------------------------------------
+
+    def summary(self, city=None):
+        """{도시: {단계: {count, sum, mean, min, max, p50, p95, p99}}}"""
+        with self._lock:
+            items = sorted(self.histograms.items())
+            result = {}
+            for (stage_city, stage), histogram in items:
+                if city is not None and stage_city != city:
+                    continue
+                result.setdefault(stage_city, {})[stage] = histogram.summary()
+        return result
+
+    def write_summary(self, city=None):
+        """현재 요약을 메트릭 파일에 1줄 기록"""
+        summary = self.summary(city)
+        with self._lock:
+            url_counts = {f"{c}/{s}": n for (c, s), n in self.url_counts.items() if city is None or c == city}
+        self._write({
+            "type": "summary",
+            "platform": self.platform,
+            "created_at": datetime.now().isoformat(),
+            "urls": url_counts,
+            "stages": summary,
+        })
+        return summary
+
+    def print_summary(self, city=None):
+        """단계별 p50/p95/p99 표 (합계 시간 큰 순)"""
+        for stage_city, stages in self.summary(city).items():
+            print(f"\n⏱️ 단계별 소요 시간 ({self.platform} / {stage_city or '-'})")
+            print(f"   {'단계':<18} {'횟수':>6} {'합계(s)':>9} {'p50':>8} {'p95':>8} {'p99':>8}")
+            for stage, s in sorted(stages.items(), key=lambda item: -item[1]["sum"]):
+                print(f"   {stage:<18} {s['count']:>6} {s['sum']:>9.2f} {s['p50']:>8.3f} {s['p95']:>8.3f} {s['p99']:>8.3f}")
+
+    # -------------------------------------------------------------------------
+    # Prometheus
+    # -------------------------------------------------------------------------
+
+    def prometheus_text(self):
+        """Prometheus 텍스트 노출 형식"""
+        def labels(**values):
+            parts = []
+            for key, value in values.items():
+                value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+                parts.append(f'{key}="{value}"')
+            return "{" + ",".join(parts) + "}"
+
+        lines = [
+            "# HELP travel_crawl_stage_seconds 크롤링 단계별 소요 시간",
+            "# TYPE travel_crawl_stage_seconds histogram",
+        ]
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            url_counts = sorted(self.url_counts.items())
+            for (city, stage), histogram in histograms:
+                cumulative = 0
+                for bound, bucket_count in zip(HISTOGRAM_BUCKETS, histogram.counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"travel_crawl_stage_seconds_bucket"
+                                 f"{labels(platform=self.platform, city=city, stage=stage, le=le)} {cumulative}")
+                series = labels(platform=self.platform, city=city, stage=stage)
+                lines.append(f"travel_crawl_stage_seconds_sum{series} {histogram.sum}")
+                lines.append(f"travel_crawl_stage_seconds_count{series} {histogram.count}")
+
+        lines.append("# HELP travel_crawl_urls_total 처리한 URL 수 (결과별)")
+        lines.append("# TYPE travel_crawl_urls_total counter")
+        for (city, status), count in url_counts:
+            lines.append(f"travel_crawl_urls_total{labels(platform=self.platform, city=city, status=status)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port, host="127.0.0.1"):
+        """/metrics 엔드포인트 시작 (백그라운드 스레드, 이미 실행 중이면 그대로)"""
+        if self._server is not None:
+            return self._server.server_address[1]
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            print(f"⚠️ 메트릭 서버 시작 실패 ({host}:{port}): {e}")
+            return None
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"📈 Prometheus 메트릭: http://{host}:{self._server.server_address[1]}/metrics")
+        return self._server.server_address[1]
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+# =============================================================================
+# 프로세스 내 수집기 캐시
+# =============================================================================
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+def get_crawl_metrics(platform, path=None, prometheus_port=None):
+    """플랫폼별 수집기 반환 (처음 호출 시 path/포트로 생성)"""
+    with _metrics_lock:
+        metrics = _metrics.get(platform)
+        if metrics is None:
+            metrics = _metrics[platform] = CrawlMetrics(platform, path)
+            if prometheus_port is not None:
+                metrics.start_http_server(prometheus_port)
+        return metrics
+
+@atexit.register
+def _close_crawl_metrics():
+    with _metrics_lock:
+        collectors = list(_metrics.values())
+        _metrics.clear()
+    for metrics in collectors:
+        try:
+            metrics.close()
+        except Exception as e:
+            print(f"⚠️ 메트릭 종료 실패 ({metrics.platform}): {e}")
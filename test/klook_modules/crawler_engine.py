@@ -30,6 +30,8 @@ except ImportError:
 from .url_manager import is_url_already_processed, mark_url_as_processed, get_unprocessed_urls
 from .data_handler import get_image_src_klook, download_and_save_image_klook, save_to_csv_klook, create_product_data_structure
 from .system_utils import get_product_name, get_price, get_rating, clean_price, clean_rating
+from .crawl_metrics import get_crawl_metrics
+from .job_queue import default_worker_id
 
 # =============================================================================
 # 🚀 그룹 9-A: 핵심 크롤링 엔진
@@ -49,6 +51,12 @@ class KlookCrawlerEngine:
             "current_city": None
         }
         self.error_log = []
+        # 단계별 소요 시간 히스토그램 + URL 추적 (JSON Lines / Prometheus)
+        self.metrics = get_crawl_metrics(
+            "klook",
+            path=CONFIG.get("METRICS_FILE") if CONFIG.get("METRICS_ENABLED", True) else None,
+            prometheus_port=CONFIG.get("METRICS_PROMETHEUS_PORT"),
+        )
         
     def reset_stats(self, city_name):
         """통계 초기화"""
@@ -90,6 +98,13 @@ class KlookCrawlerEngine:
             return False
         
     def process_single_url(self, url, city_name, product_number):
+        """단일 URL 처리 (단계별 소요 시간을 URL 추적 레코드로 기록)"""
+        with self.metrics.trace_url(url, city_name, rank=product_number) as trace:
+            result = self._process_single_url(url, city_name, product_number)
+            trace.finish(result)
+        return result
+        
+    def _process_single_url(self, url, city_name, product_number):
         """단일 URL 처리 (핵심 크롤링 로직)"""
         if not SELENIUM_AVAILABLE:
             return {"success": False, "error": "Selenium not available"}
@@ -97,39 +112,46 @@ class KlookCrawlerEngine:
         print(f"🔄 상품 {product_number}: URL 처리 중...")
         print(f"   🔗 {url}")
         
+        stage = self.metrics.stage
         try:
             # 1. URL 중복 체크 (기존 시스템 + 랭킹 매니저)
-            if is_url_already_processed(url, city_name):
-                print(f"   ⏭️ 이미 처리된 URL - 스킵")
-                self.stats["skip_count"] += 1
-                return {"success": True, "skipped": True, "reason": "already_processed"}
-            
-            # 랭킹 매니저에서 중복 URL 크롤링 여부 확인
-            try:
-                from .ranking_manager import ranking_manager
-                if not ranking_manager.should_crawl_url(url, city_name):
-                    print(f"   ⏭️ 랭킹 매니저: 중복 URL 스킵 (다른 탭에서 이미 크롤링)")
+            with stage("dedup_check"):
+                if is_url_already_processed(url, city_name):
+                    print(f"   ⏭️ 이미 처리된 URL - 스킵")
                     self.stats["skip_count"] += 1
-                    return {"success": True, "skipped": True, "reason": "duplicate_in_ranking"}
-            except Exception as e:
-                print(f"   ⚠️ 랭킹 매니저 확인 실패: {e}")
+                    return {"success": True, "skipped": True, "reason": "already_processed"}
+                
+                # 랭킹 매니저에서 중복 URL 크롤링 여부 확인
+                try:
+                    from .ranking_manager import ranking_manager
+                    if not ranking_manager.should_crawl_url(url, city_name):
+                        print(f"   ⏭️ 랭킹 매니저: 중복 URL 스킵 (다른 탭에서 이미 크롤링)")
+                        self.stats["skip_count"] += 1
+                        return {"success": True, "skipped": True, "reason": "duplicate_in_ranking"}
+                except Exception as e:
+                    print(f"   ⚠️ 랭킹 매니저 확인 실패: {e}")
             
             # 2. 페이지 이동
-            self.driver.get(url)
+            with stage("driver_get"):
+                self.driver.get(url)
             
             # 3. 스마트 페이지 로딩 대기
-            self._smart_page_wait()
+            with stage("smart_wait"):
+                self._smart_page_wait()
             
             # 4. 페이지 유효성 검사
-            if not self._validate_page():
+            with stage("validate"):
+                page_valid = self._validate_page()
+            if not page_valid:
                 print(f"   ❌ 페이지 유효성 검사 실패")
                 self.stats["error_count"] += 1
                 return {"success": False, "error": "invalid_page"}
             
             # 4.5. 자동 스크롤 실행 (고급 패턴 적용)
-            self._apply_advanced_scroll()
+            with stage("scroll"):
+                self._apply_advanced_scroll()
             
-            # 5. 상품 정보 수집
+            # 5. 상품 정보 수집 (필드 추출 / 이미지 / 순위 조회는 내부에서 단계별 기록)
             product_data = self._extract_product_info(url, city_name, product_number)
             
             if not product_data:
@@ -138,20 +160,23 @@ class KlookCrawlerEngine:
                 return {"success": False, "error": "extraction_failed"}
             
             # 6. 데이터 저장
-            save_success = save_to_csv_klook(product_data, city_name)
+            with stage("csv_save"):
+                save_success = save_to_csv_klook(product_data, city_name)
             
             # 6.5. 자동 백업 (일정 주기마다)
-            self._check_auto_backup(city_name)
-            
-            # 7. URL 처리 완료 표시 (순위 정보 포함)
-            mark_url_as_processed(url, city_name, product_number, product_number)
+            with stage("backup"):
+                self._check_auto_backup(city_name)
             
-            # 랭킹 매니저에 크롤링 완료 표시
-            try:
-                from .ranking_manager import ranking_manager
-                ranking_manager.mark_url_crawled(url, city_name)
-            except Exception as e:
-                print(f"   ⚠️ 랭킹 매니저 완료 표시 실패: {e}")
+            with stage("rank_bookkeeping"):
+                # 7. URL 처리 완료 표시 (순위 정보 포함)
+                mark_url_as_processed(url, city_name, product_number, product_number)
+                
+                # 랭킹 매니저에 크롤링 완료 표시
+                try:
+                    from .ranking_manager import ranking_manager
+                    ranking_manager.mark_url_crawled(url, city_name)
+                except Exception as e:
+                    print(f"   ⚠️ 랭킹 매니저 완료 표시 실패: {e}")
             
             if save_success:
                 print(f"   ✅ 상품 {product_number} 처리 완료")
@@ -291,43 +316,46 @@ class KlookCrawlerEngine:
         try:
             print(f"  📊 상품 정보 수집 중...")
             
-            # 1. 기본 정보 수집
-            product_name = get_product_name(self.driver, "Product")
-            price = get_price(self.driver)
-            rating = get_rating(self.driver)
-            
-            # 2. 데이터 정제
-            clean_price_value = clean_price(price)
-            clean_rating_value = clean_rating(rating)
+            with self.metrics.stage("extract_basic"):
+                # 1. 기본 정보 수집
+                product_name = get_product_name(self.driver, "Product")
+                price = get_price(self.driver)
+                rating = get_rating(self.driver)
+                
+                # 2. 데이터 정제
+                clean_price_value = clean_price(price)
+                clean_rating_value = clean_rating(rating)
             
             # 3. 이미지 처리 (듀얼 이미지 시스템)
             image_filename = None
             dual_images = None
             if CONFIG.get("SAVE_IMAGES", False):
-                try:
-                    # 먼저 듀얼 이미지 시스템 시도
-                    from .data_handler import get_dual_image_urls_klook, download_dual_images_klook
+                with self.metrics.stage("images"):
+                    try:
+                        # 먼저 듀얼 이미지 시스템 시도
+                        from .data_handler import get_dual_image_urls_klook, download_dual_images_klook
                     
-                    image_urls = get_dual_image_urls_klook(self.driver, "Product")
-                    if image_urls and image_urls.get("main"):
-                        dual_images = download_dual_images_klook(
-                            image_urls, product_number, city_name
-                        )
-                        print(f"    ✅ 듀얼 이미지 처리: 메인={bool(dual_images.get('main'))}, 썸네일={bool(dual_images.get('thumb'))}")
-                    else:
-                        # 폴백: 기존 단일 이미지 시스템
-                        img_src = get_image_src_klook(self.driver, "Product") 
-                        image_filename = download_and_save_image_klook(
-                            img_src, product_number, city_name
-                        )
-                        print(f"    ✅ 단일 이미지 처리: {image_filename}")
-                except Exception as e:
-                    print(f"    ⚠️ 이미지 처리 실패: {e}")
-                    image_filename = None
-                    dual_images = None
+                        image_urls = get_dual_image_urls_klook(self.driver, "Product")
+                        if image_urls and image_urls.get("main"):
+                            dual_images = download_dual_images_klook(
+                                image_urls, product_number, city_name
+                            )
+                            print(f"    ✅ 듀얼 이미지 처리: 메인={bool(dual_images.get('main'))}, 썸네일={bool(dual_images.get('thumb'))}")
+                        else:
+                            # 폴백: 기존 단일 이미지 시스템
+                            img_src = get_image_src_klook(self.driver, "Product") 
+                            image_filename = download_and_save_image_klook(
+                                img_src, product_number, city_name
+                            )
+                            print(f"    ✅ 단일 이미지 처리: {image_filename}")
+                    except Exception as e:
+                        print(f"    ⚠️ 이미지 처리 실패: {e}")
+                        image_filename = None
+                        dual_images = None
             
             # 4. 추가 정보 수집 (선택적)
-            additional_data = self._extract_additional_info()
+            with self.metrics.stage("extract_additional"):
+                additional_data = self._extract_additional_info()
             
             # 원본 가격과 평점 정보 추가
             if price and price != clean_price_value:
@@ -342,22 +370,23 @@ class KlookCrawlerEngine:
             
             # 5. 랭킹 정보 수집
             tab_info = {}
-            try:
-                from .ranking_manager import ranking_manager
-                url_rankings = ranking_manager.get_url_rankings(url, city_name)
-                if url_rankings and url_rankings.get("tab_rankings"):
-                    # 가장 높은 랭킹(작은 숫자)을 가진 탭 정보 사용
-                    best_tab = min(url_rankings["tab_rankings"].items(), 
-                                 key=lambda x: x[1]["ranking"])
-                    tab_info = {
-                        "tab_name": best_tab[0],
-                        "actual_ranking": best_tab[1]["ranking"],
-                        "ranking": best_tab[1]["ranking"],
-                        "tab_order": 1,  # 기본값
-                        "is_duplicate": url_rankings.get("is_duplicate", False)
-                    }
-            except Exception as e:
-                print(f"    ⚠️ 랭킹 정보 수집 실패: {e}")
+            with self.metrics.stage("rank_lookup"):
+                try:
+                    from .ranking_manager import ranking_manager
+                    url_rankings = ranking_manager.get_url_rankings(url, city_name)
+                    if url_rankings and url_rankings.get("tab_rankings"):
+                        # 가장 높은 랭킹(작은 숫자)을 가진 탭 정보 사용
+                        best_tab = min(url_rankings["tab_rankings"].items(), 
+                                     key=lambda x: x[1]["ranking"])
+                        tab_info = {
+                            "tab_name": best_tab[0],
+                            "actual_ranking": best_tab[1]["ranking"],
+                            "ranking": best_tab[1]["ranking"],
+                            "tab_order": 1,  # 기본값
+                            "is_duplicate": url_rankings.get("is_duplicate", False)
+                        }
+                except Exception as e:
+                    print(f"    ⚠️ 랭킹 정보 수집 실패: {e}")
             
             # 6. 데이터 구조 생성 (기존 32개 컬럼 구조)
             product_data = create_product_data_structure(
@@ -535,7 +564,8 @@ class KlookCrawlerEngine:
             "success_rate": (self.stats["success_count"] / max(1, self.stats["total_processed"])) * 100,
             "elapsed_time": elapsed_seconds,
             "avg_time_per_url": elapsed_seconds / max(1, self.stats["total_processed"]),
-            "error_log_count": len(self.error_log)
+            "error_log_count": len(self.error_log),
+            "stage_timings": self.metrics.summary(self.stats["current_city"]).get(self.stats["current_city"], {})
         }
 
 # =============================================================================
@@ -726,6 +756,10 @@ def execute_klook_crawling_system(driver, urls, city_name, mode="advanced"):
     print(f"   ⏱️ 총 소요시간: {final_stats['elapsed_time']:.1f}초")
     print(f"   ⚡ 평균 처리시간: {final_stats['avg_time_per_url']:.1f}초/URL")
     
+    # 단계별 p50/p95/p99 (어느 단계가 느린지) + 메트릭 파일에 요약 기록
+    engine.metrics.print_summary(city_name)
+    engine.metrics.write_summary(city_name)
+    
     return {
         "success": True,
         "stats": final_stats,
@@ -733,6 +767,83 @@ def execute_klook_crawling_system(driver, urls, city_name, mode="advanced"):
         "city_name": city_name
     }
 
+def execute_klook_queue_crawling(driver, job_queue, city_name=None, worker_id=None, max_jobs=None):
+    """작업 큐 기반 크롤링 (lease → 처리 → ack/fail)
+
+    city_name 이 None 이면 모든 도시의 작업을 처리 (추가 워커 프로세스용)
+    같은 큐 파일을 공유하는 여러 워커가 동시에 실행되어도 작업이 겹치지 않음
+    """
+    worker_id = worker_id or default_worker_id()
+    label = city_name or "전체 도시"
+    print(f"🚀 KLOOK 작업 큐 크롤링 시작: {label} (워커 {worker_id})")
+    job_queue.print_status(city_name)
+    print("=" * 80)
+    
+    engine = KlookCrawlerEngine(driver)
+    engine.reset_stats(label)
+    guard = AdvancedCrawlerController(engine)
+    processed = 0
+    
+    # 비정상 종료된 이전 실행(같은 호스트)의 임대 작업부터 회수 → 중단 지점에서 바로 재개
+    job_queue.reclaim_dead_leases()
+    
+    while max_jobs is None or processed < max_jobs:
+        jobs = job_queue.lease(worker_id, city_name)
+        if not jobs:
+            # 재시도 대기 작업 또는 다른 워커가 처리 중인 작업만 남았으면 짧게 대기 후 다시 확인
+            wait_time = job_queue.next_available_in(city_name)
+            if wait_time is None:
+                break
+            wait_time = min(wait_time, CONFIG.get("JOB_IDLE_POLL", 15))
+            print(f"⏱️ 남은 작업 대기 (재시도 지연/다른 워커 처리 중) - {wait_time:.0f}초 후 다시 확인")
+            time.sleep(wait_time + 0.1)
+            job_queue.reclaim_dead_leases()
+            continue
+        job = jobs[0]
+        processed += 1
+        engine.stats["total_processed"] += 1
+        print(f"\n[작업 {job['id']}] {job['city']}/{job['tab']} 순위 {job['rank']} (시도 {job['attempts']}회차)")
+        
+        try:
+            result = engine.process_single_url(job["url"], job["city"], job["rank"])
+        except KeyboardInterrupt:
+            job_queue.release(job["id"], worker_id)
+            print("\n⚠️ 사용자가 중단했습니다 - 현재 작업은 큐에 반납")
+            break
+        except Exception as e:
+            print(f"❌ 예상치 못한 오류: {e}")
+            result = {"success": False, "error": str(e)}
+        
+        if result.get("success", False):
+            if not job_queue.ack(job["id"], worker_id):
+                print(f"   ⚠️ 임대 만료 후 완료됨 (다른 워커가 회수한 작업일 수 있음)")
+        else:
+            job_queue.fail(job["id"], result.get("error"), worker_id)
+            if guard._should_emergency_stop():
+                print("⚠️ 연속 실패로 인한 긴급 중단 (남은 작업은 큐에 유지)")
+                break
+        
+        # 10개마다 짧은 휴식
+        if processed % 10 == 0:
+            time.sleep(random.uniform(2, 5))
+    
+    final_stats = engine.get_stats_summary()
+    print(f"\n🎉 === KLOOK 작업 큐 크롤링 종료: {label} ===")
+    print(f"   🔗 이번 실행 처리: {final_stats['total_processed']}개")
+    print(f"   ✅ 성공: {final_stats['success_count']}개 / ❌ 실패: {final_stats['error_count']}개 / ⏭️ 스킵: {final_stats['skip_count']}개")
+    counts = job_queue.print_status(city_name)
+    
+    engine.metrics.print_summary(city_name)
+    engine.metrics.write_summary(city_name)
+    
+    return {
+        "success": True,
+        "stats": final_stats,
+        "mode": "queue",
+        "city_name": city_name,
+        "queue": counts
+    }
+
 def quick_crawl_test(driver, test_urls, city_name, max_test=3):
     """빠른 크롤링 테스트"""
     print(f"🧪 빠른 크롤링 테스트: {city_name} ({min(max_test, len(test_urls))}개 URL)")
@@ -0,0 +1,223 @@
+"""
+스트리밍 국가별 통합 CSV
+- 도시 CSV를 한 행씩 읽어 바로 통합 파일에 기록 (파일 전체를 메모리에 올리지 않음)
+- 통합 파일 옆 매니페스트(<통합 파일>.manifest.json)에 도시별 크기/mtime/행 수/읽은 위치 기록
+- 재실행 시 도시 CSV 끝에 추가된 행만 통합 파일 뒤에 이어 씀 (작업량 = 새 데이터 양)
+- 도시 CSV가 중간부터 바뀌었거나 빠졌으면 전체 재구성
+"""
+
+import os
+import csv
+import json
+import hashlib
+from datetime import datetime
+
+MANIFEST_SUFFIX = ".manifest.json"
+TAIL_CHECK_BYTES = 4096  # 이어 쓰기 판단용: 마지막으로 읽은 위치 직전 바이트 해시
+
+def _file_stat(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+def _tail_digest(path, offset):
+    """offset 직전 TAIL_CHECK_BYTES 바이트의 md5 (파일 앞부분이 그대로인지 확인)"""
+    start = max(0, offset - TAIL_CHECK_BYTES)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return hashlib.md5(f.read(offset - start)).hexdigest()
+
+def iter_csv_records(path, offset=0):
+    """offset(바이트)부터 CSV 레코드를 하나씩 (행, 레코드 끝 위치)로 반환
+
+    줄바꿈으로 끝나지 않은 마지막 줄(아직 쓰는 중)은 건너뜀
+    """
+    position = [offset]
+
+    def lines(f):
+        for raw in f:
+            if not raw.endswith(b'\n'):
+                return
+            encoding = 'utf-8-sig' if position[0] == 0 else 'utf-8'
+            position[0] += len(raw)
+            yield raw.decode(encoding)
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for row in csv.reader(lines(f)):
+            yield row, position[0]
+
+class CountryCsvConsolidator:
+    """도시 CSV들 → 국가 통합 CSV (매니페스트 기반 증분)"""
+
+    def __init__(self, output_path, manifest_path=None):
+        self.output_path = output_path
+        self.manifest_path = manifest_path or output_path + MANIFEST_SUFFIX
+        self.manifest = self._load_manifest()
+
+    # -------------------------------------------------------------------------
+    # 매니페스트
+    # -------------------------------------------------------------------------
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return None
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (IOError, ValueError) as e:
+            print(f"   ⚠️ 통합 매니페스트 로드 실패, 전체 재구성: {e}")
+            return None
+
+    def _save_manifest(self):
+        self.manifest["output_size"] = os.path.getsize(self.output_path)
+        self.manifest["updated_at"] = datetime.now().isoformat()
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    def plan(self, sources):
+        """("rebuild", 사유) 또는 ("append", [(도시, 경로, 읽기 시작 위치), ...])"""
+        manifest = self.manifest
+        if manifest is None:
+            return "rebuild", "매니페스트 없음"
+        if not os.path.exists(self.output_path):
+            return "rebuild", "통합 파일 없음"
+        if os.path.getsize(self.output_path) != manifest.get("output_size"):
+            return "rebuild", "통합 파일이 매니페스트와 다름"
+
+        entries = {entry["path"]: entry for entry in manifest.get("cities", [])}
+        source_paths = {path for _, path in sources}
+        removed = [entry["city"] for path, entry in entries.items() if path not in source_paths]
+        if removed:
+            return "rebuild", f"도시 제외됨: {', '.join(removed)}"
+
+        changes = []
+        for city, path in sources:
+            entry = entries.get(path)
+            if entry is None:
+                changes.append((city, path, 0))
+                continue
+
+            size, mtime_ns = _file_stat(path)
+            if size == entry["size"] and mtime_ns == entry["mtime_ns"]:
+                continue
+            if size < entry["offset"] or _tail_digest(path, entry["offset"]) != entry["tail"]:
+                return "rebuild", f"{city} CSV가 수정됨 (추가 외 변경)"
+            changes.append((city, path, entry["offset"]))
+
+        return "append", changes
+
+    # -------------------------------------------------------------------------
+    # 기록
+    # -------------------------------------------------------------------------
+
+    def _copy_city(self, city, path, offset, writer, next_number):
+        """도시 CSV의 offset 이후 행을 번호를 다시 매기며 기록 → (행 수, 끝 위치, 헤더)"""
+        rows = 0
+        end_offset = offset
+        header = None
+        for row, end_offset in iter_csv_records(path, offset):
+            if offset == 0 and header is None:
+                header = row  # 파일 첫 줄은 헤더
+                continue
+            if row:
+                row[0] = str(next_number + rows)  # 첫 번째 컬럼이 번호
+            writer.writerow(row)
+            rows += 1
+        return rows, end_offset, header
+
+    def _city_entry(self, city, path, rows, offset):
+        size, mtime_ns = _file_stat(path)
+        return {
+            "city": city,
+            "path": path,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "rows": rows,
+            "offset": offset,
+            "tail": _tail_digest(path, offset),
+        }
+
+    def rebuild(self, sources):
+        """전체 재구성 (임시 파일에 스트리밍 후 교체)"""
+        temp_path = self.output_path + ".tmp"
+        header = None
+        total_rows = 0
+        entries = []
+
+        os.makedirs(os.path.dirname(self.output_path) or ".", exist_ok=True)
+        with open(temp_path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            for city, path in sources:
+                try:
+                    # 헤더는 첫 번째 파일 것을 사용 (본문 전에 기록해야 하므로 먼저 읽음)
+                    if header is None:
+                        header = next(iter_csv_records(path), (None, 0))[0]
+                        if header:
+                            writer.writerow(header)
+                    rows, end_offset, _ = self._copy_city(city, path, 0, writer, total_rows + 1)
+                except Exception as e:
+                    print(f"      ❌ {city} CSV 읽기 실패: {e}")
+                    continue
+                print(f"      📄 {city}: {rows}개 상품")
+                total_rows += rows
+                entries.append(self._city_entry(city, path, rows, end_offset))
+
+        if total_rows == 0:
+            os.remove(temp_path)
+            return None
+
+        os.replace(temp_path, self.output_path)
+        self.manifest = {"header": header, "total_rows": total_rows, "cities": entries}
+        self._save_manifest()
+        return {"mode": "rebuild", "new_rows": total_rows, "total_rows": total_rows, "changed_cities": len(entries)}
+
+    def append(self, changes):
+        """변경된 도시의 추가 행만 통합 파일 끝에 기록"""
+        entries = {entry["path"]: entry for entry in self.manifest["cities"]}
+        total_rows = self.manifest["total_rows"]
+        new_rows = 0
+
+        with open(self.output_path, 'a', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            for city, path, offset in changes:
+                rows, end_offset, _ = self._copy_city(city, path, offset, writer, total_rows + new_rows + 1)
+                if rows:
+                    print(f"      📄 {city}: +{rows}개 상품")
+                new_rows += rows
+
+                previous_rows = entries[path]["rows"] if path in entries else 0
+                entry = self._city_entry(city, path, previous_rows + rows, end_offset)
+                if path in entries:
+                    entries[path].update(entry)
+                else:
+                    self.manifest["cities"].append(entry)
+                    entries[path] = entry
+
+        self.manifest["total_rows"] = total_rows + new_rows
+        self._save_manifest()
+        return {"mode": "append", "new_rows": new_rows, "total_rows": total_rows + new_rows,
+                "changed_cities": len(changes)}
+
+    def consolidate(self, sources, force=False):
+        """통합 실행 → 결과 dict (읽을 데이터가 없으면 None)
+
+        sources: [(도시, CSV 경로), ...] (통합 파일 내 도시 순서)
+        """
+        if force:
+            print(f"   🔄 전체 재구성 (강제)")
+            return self.rebuild(sources)
+
+        mode, detail = self.plan(sources)
+        if mode == "rebuild":
+            print(f"   🔄 전체 재구성: {detail}")
+            return self.rebuild(sources)
+
+        if not detail:
+            print(f"   ✅ 변경된 도시 없음 - 통합 파일 최신 상태")
+            return {"mode": "unchanged", "new_rows": 0, "total_rows": self.manifest["total_rows"],
+                    "changed_cities": 0}
+
+        print(f"   ➕ 변경된 도시 {len(detail)}개만 이어 쓰기")
+        return self.append(detail)
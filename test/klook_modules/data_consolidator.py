@@ -11,6 +11,118 @@ from datetime import datetime
 from collections import defaultdict
 from .config import get_city_code, get_city_info
 
+# =============================================================================
+# 🧮 마스터 뷰 조인 파이프라인
+# =============================================================================
+
+MASTER_BASE_COLUMNS = ['URL', 'URL_해시', 'first_found', 'is_duplicate', 'crawled', 'crawled_at']
+TAB_FIELDS = {'ranking': '순위', 'found_at': '발견시간'}  # 탭 랭킹 필드 → 컬럼 접미사
+
+# CSV 컬럼 → 마스터 뷰 컬럼
+CSV_COLUMN_MAP = {
+    '번호': 'CSV_번호',
+    '상품명': '상품명',
+    '가격_정제': '가격',
+    '탭내_랭킹': 'CSV_탭내랭킹',
+}
+
+def hash_urls(urls):
+    """URL 목록 → 누적 랭킹과 같은 md5 해시 (조인 키)"""
+    return [hashlib.md5(str(url).encode('utf-8')).hexdigest() for url in urls]
+
+def _ranking_signature(url_info):
+    """URL 1개의 랭킹 정보 요약 (증분 모드에서 변경 감지용)"""
+    return (
+        url_info.get('url'),
+        url_info.get('first_found'),
+        url_info.get('is_duplicate', False),
+        url_info.get('crawled', False),
+        url_info.get('crawled_at'),
+        tuple(sorted(
+            (tab_name, ranking_info['ranking'], ranking_info['found_at'])
+            for tab_name, ranking_info in url_info.get('tab_rankings', {}).items()
+        )),
+    )
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+        return (path, stat.st_mtime_ns, stat.st_size)
+    except (OSError, TypeError):
+        return None
+
+def normalize_rankings(url_rankings):
+    """누적 랭킹 JSON → URL별 기본 정보 DataFrame (탭별 순위는 컬럼으로 펼침)"""
+    base_records = []
+    tab_records = []
+    for url_hash, url_info in url_rankings.items():
+        base_records.append((
+            url_info['url'],
+            url_hash,
+            url_info.get('first_found'),
+            url_info.get('is_duplicate', False),
+            url_info.get('crawled', False),
+            url_info.get('crawled_at'),
+        ))
+        for tab_name, ranking_info in url_info.get('tab_rankings', {}).items():
+            tab_records.append((url_hash, tab_name, ranking_info['ranking'], ranking_info['found_at']))
+    
+    base = pd.DataFrame(base_records, columns=MASTER_BASE_COLUMNS)
+    if not tab_records:
+        return base
+    
+    # (URL, 탭) 행 → 탭별 컬럼 ('{탭}_순위', '{탭}_발견시간')
+    tabs = pd.DataFrame(tab_records, columns=['URL_해시', 'tab', 'ranking', 'found_at'])
+    wide = tabs.pivot(index='URL_해시', columns='tab', values=['ranking', 'found_at'])
+    wide.columns = [f'{tab_name}_{TAB_FIELDS[field]}' for field, tab_name in wide.columns]
+    tab_order = tabs['tab'].drop_duplicates().tolist()
+    wide = wide[[f'{tab_name}_{suffix}' for tab_name in tab_order for suffix in TAB_FIELDS.values()]]
+    
+    return base.merge(wide, left_on='URL_해시', right_index=True, how='left')
+
+def csv_join_frame(csv_data):
+    """CSV → URL 해시별 첫 행의 마스터 뷰 컬럼 (인덱스: URL_해시)"""
+    columns = list(CSV_COLUMN_MAP.values())
+    if csv_data is None or 'URL' not in csv_data.columns or csv_data.empty:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name='URL_해시'))
+    
+    first_rows = csv_data.drop_duplicates('URL', keep='first')
+    frame = first_rows.reindex(columns=list(CSV_COLUMN_MAP)).rename(columns=CSV_COLUMN_MAP)
+    frame.index = pd.Index(hash_urls(first_rows['URL']), name='URL_해시')
+    return frame
+
+def collected_log_frame(collected_log):
+    """수집 로그 {URL: 시각} → 인덱스 URL_해시, 컬럼 collection_timestamp"""
+    urls = list(collected_log)
+    return pd.DataFrame(
+        {'collection_timestamp': [collected_log[url] for url in urls]},
+        index=pd.Index(hash_urls(urls), name='URL_해시')
+    )
+
+def build_master_frame(ranking_frame, csv_frame, log_frame):
+    """랭킹 + CSV + 수집 로그를 URL 해시로 조인"""
+    master = ranking_frame.merge(csv_frame, left_on='URL_해시', right_index=True, how='left', indicator='_csv')
+    master['has_csv_data'] = master.pop('_csv') == 'both'
+    
+    master = master.merge(log_frame, left_on='URL_해시', right_index=True, how='left', indicator='_log')
+    master['was_collected'] = master.pop('_log') == 'both'
+    return master
+
+def _sort_master_view(master):
+    """첫 발견 시간순 (같은 시간이면 해시순 - 전체/증분 결과가 같도록)"""
+    return master.sort_values(['first_found', 'URL_해시'], kind='mergesort').reset_index(drop=True)
+
+def _changed_keys(old_frame, new_frame):
+    """인덱스 기준으로 추가/삭제/값 변경된 키"""
+    changed = set(old_frame.index.symmetric_difference(new_frame.index))
+    common = old_frame.index.intersection(new_frame.index)
+    if len(common):
+        old_values = old_frame.loc[common]
+        new_values = new_frame.loc[common, old_frame.columns]
+        differs = ~((old_values == new_values) | (old_values.isna() & new_values.isna())).all(axis=1)
+        changed.update(common[differs.to_numpy()])
+    return changed
+
 class DataConsolidator:
     """데이터 통합 관리자"""
     
@@ -21,9 +133,14 @@ class DataConsolidator:
             'url_collected': 'url_collected',
             'data': 'data'
         }
+        self.master_cache = {}  # 도시 코드 → 마지막 마스터 뷰와 입력 상태 (증분 모드용)
     
-    def create_master_data_view(self, city_name):
-        """🎯 핵심: 모든 데이터를 연결한 마스터 뷰 생성"""
+    def create_master_data_view(self, city_name, incremental=False):
+        """🎯 핵심: 모든 데이터를 연결한 마스터 뷰 생성
+
+        랭킹 JSON을 한 번 DataFrame으로 정규화한 뒤 CSV/수집 로그와 URL 해시로 조인
+        incremental=True: 마지막 생성 이후 바뀐 URL만 다시 계산 (같은 프로세스 안에서)
+        """
         try:
             city_code = get_city_code(city_name)
             
@@ -35,65 +152,16 @@ class DataConsolidator:
                 print(f"❌ 누적 랭킹 데이터 없음: {accumulated_file}")
                 return None
             
-            with open(accumulated_file, 'r', encoding='utf-8') as f:
-                ranking_data = json.load(f)
-            
-            # 2. CSV 데이터 로드 (있다면)
-            csv_data = self._load_csv_data(city_name)
+            # 저널에 쌓인 변경까지 반영된 누적 랭킹
+            from .ranking_manager import ranking_manager
+            ranking_data = ranking_manager.load_accumulated_rankings(city_name)
+            url_rankings = ranking_data['url_rankings']
             
-            # 3. url_collected 로그 로드
-            collected_log = self._load_collected_log(city_code)
-            
-            # 4. 마스터 뷰 생성
-            master_view = []
-            
-            for url_hash, url_info in ranking_data['url_rankings'].items():
-                url = url_info['url']
-                
-                # 기본 정보
-                row = {
-                    'URL': url,
-                    'URL_해시': url_hash,
-                    'first_found': url_info.get('first_found'),
-                    'is_duplicate': url_info.get('is_duplicate', False),
-                    'crawled': url_info.get('crawled', False),
-                    'crawled_at': url_info.get('crawled_at'),
-                }
-                
-                # 탭별 순위 정보
-                tab_rankings = url_info.get('tab_rankings', {})
-                for tab_name, ranking_info in tab_rankings.items():
-                    row[f'{tab_name}_순위'] = ranking_info['ranking']
-                    row[f'{tab_name}_발견시간'] = ranking_info['found_at']
-                
-                # CSV 데이터와 매칭
-                if csv_data is not None:
-                    csv_match = csv_data[csv_data['URL'] == url]
-                    if not csv_match.empty:
-                        row['CSV_번호'] = csv_match.iloc[0]['번호']
-                        row['상품명'] = csv_match.iloc[0]['상품명']
-                        row['가격'] = csv_match.iloc[0]['가격_정제']
-                        row['CSV_탭내랭킹'] = csv_match.iloc[0].get('탭내_랭킹')
-                        row['has_csv_data'] = True
-                    else:
-                        row['has_csv_data'] = False
-                else:
-                    row['has_csv_data'] = False
-                
-                # 수집 로그와 매칭
-                if url in collected_log:
-                    row['collection_timestamp'] = collected_log[url]
-                    row['was_collected'] = True
-                else:
-                    row['was_collected'] = False
-                
-                master_view.append(row)
-            
-            # DataFrame으로 변환
-            df = pd.DataFrame(master_view)
-            
-            # 정렬 (첫 발견 시간순)
-            df = df.sort_values('first_found')
+            cache = self.master_cache.get(city_code)
+            if incremental and cache is not None:
+                df = self._update_master_view(city_name, city_code, url_rankings, cache)
+            else:
+                df = self._build_master_view(city_name, city_code, url_rankings)
             
             print(f"✅ 마스터 뷰 생성 완료: {len(df)}개 URL")
             return df
@@ -102,28 +170,118 @@ class DataConsolidator:
             print(f"❌ 마스터 뷰 생성 실패: {e}")
             return None
     
-    def _load_csv_data(self, city_name):
+    def _build_master_view(self, city_name, city_code, url_rankings):
+        """전체 재구성"""
+        # 2. CSV 데이터 로드 (있다면)
+        csv_path = self._find_csv_path(city_name)
+        csv_frame = csv_join_frame(self._load_csv_data(city_name, csv_path))
+        
+        # 3. url_collected 로그 로드
+        collected_log, log_offset = self._read_collected_log(city_code)
+        log_frame = collected_log_frame(collected_log)
+        
+        # 4. 마스터 뷰 생성 (조인)
+        df = _sort_master_view(build_master_frame(normalize_rankings(url_rankings), csv_frame, log_frame))
+        
+        self.master_cache[city_code] = {
+            'view': df,
+            'rank_signatures': {url_hash: _ranking_signature(info) for url_hash, info in url_rankings.items()},
+            'csv_signature': _file_signature(csv_path),
+            'csv_frame': csv_frame,
+            'log_offset': log_offset,
+            'log_frame': log_frame,
+        }
+        return df
+    
+    def _update_master_view(self, city_name, city_code, url_rankings, cache):
+        """증분 갱신: 랭킹/CSV/수집 로그에서 바뀐 URL만 다시 조인"""
+        # 랭킹 변경 (추가/수정/삭제)
+        signatures = {url_hash: _ranking_signature(info) for url_hash, info in url_rankings.items()}
+        previous = cache['rank_signatures']
+        touched = {url_hash for url_hash, signature in signatures.items() if previous.get(url_hash) != signature}
+        removed = set(previous) - set(signatures)
+        
+        # CSV 변경 (파일이 바뀐 경우에만 다시 읽고 행 단위 비교)
+        csv_path = self._find_csv_path(city_name)
+        csv_signature = _file_signature(csv_path)
+        if csv_signature != cache['csv_signature']:
+            csv_frame = csv_join_frame(self._load_csv_data(city_name, csv_path))
+            touched |= _changed_keys(cache['csv_frame'], csv_frame)
+            cache['csv_frame'] = csv_frame
+            cache['csv_signature'] = csv_signature
+        
+        # 수집 로그 변경 (추가 전용 → 마지막 위치 이후만 읽기, 파일이 줄었으면 전체 다시 읽기)
+        log_file = self._get_collected_log_path(city_code)
+        log_size = os.path.getsize(log_file) if os.path.exists(log_file) else 0
+        if log_size < cache['log_offset']:
+            collected_log, cache['log_offset'] = self._read_collected_log(city_code)
+            log_frame = collected_log_frame(collected_log)
+            touched |= _changed_keys(cache['log_frame'], log_frame)
+            cache['log_frame'] = log_frame
+        elif log_size > cache['log_offset']:
+            new_entries, cache['log_offset'] = self._read_collected_log(city_code, cache['log_offset'])
+            new_frame = collected_log_frame(new_entries)
+            new_frame = new_frame[~new_frame.index.duplicated(keep='last')]
+            touched |= _changed_keys(cache['log_frame'].reindex(new_frame.index).dropna(how='all'), new_frame)
+            log_frame = cache['log_frame']
+            cache['log_frame'] = pd.concat([log_frame[~log_frame.index.isin(new_frame.index)], new_frame])
+        
+        touched &= set(signatures)
+        view = cache['view']
+        if touched or removed:
+            # 바뀐 URL만 정규화 → 조인 후 기존 뷰의 해당 행과 교체
+            touched_rankings = {url_hash: url_rankings[url_hash] for url_hash in touched}
+            csv_frame = cache['csv_frame']
+            log_frame = cache['log_frame']
+            new_rows = build_master_frame(
+                normalize_rankings(touched_rankings),
+                csv_frame[csv_frame.index.isin(touched)],
+                log_frame[log_frame.index.isin(touched)]
+            )
+            
+            kept = view[~view['URL_해시'].isin(touched | removed)]
+            view = pd.concat([kept, new_rows], ignore_index=True) if len(new_rows) else kept
+            
+            # 더 이상 쓰이지 않는 탭 컬럼 제거 (전체 재구성과 같은 컬럼 유지)
+            empty_tab_columns = [
+                col for col in view.columns
+                if col.endswith(tuple(f'_{suffix}' for suffix in TAB_FIELDS.values()))
+                and col not in MASTER_BASE_COLUMNS and view[col].isna().all()
+            ]
+            view = _sort_master_view(view.drop(columns=empty_tab_columns))
+        
+        cache['view'] = view
+        cache['rank_signatures'] = signatures
+        print(f"   🔄 증분 갱신: {len(touched)}개 URL 재계산, {len(removed)}개 제거")
+        return view
+    
+    def _find_csv_path(self, city_name):
+        """CSV 파일 경로 (여러 경로 시도, 없으면 None)"""
+        continent, country = get_city_info(city_name)
+        
+        if city_name in ["마카오", "홍콩", "싱가포르"]:
+            csv_paths = [
+                f"data/{continent}/{city_name}_klook_products_all.csv",
+                f"data/{continent}/klook_{city_name}_products.csv"
+            ]
+        else:
+            csv_paths = [
+                f"data/{continent}/{country}/{city_name}/{city_name}_klook_products_all.csv",
+                f"data/{continent}/{country}/{city_name}/klook_{city_name}_products.csv",
+                f"data/{continent}/{country}/{country}_klook_products_all.csv"
+            ]
+        
+        for csv_path in csv_paths:
+            if os.path.exists(csv_path):
+                return csv_path
+        return None
+    
+    def _load_csv_data(self, city_name, csv_path=None):
         """CSV 데이터 로드"""
         try:
-            continent, country = get_city_info(city_name)
-            
-            # 여러 경로 시도
-            csv_paths = []
-            if city_name in ["마카오", "홍콩", "싱가포르"]:
-                csv_paths = [
-                    f"data/{continent}/{city_name}_klook_products_all.csv",
-                    f"data/{continent}/klook_{city_name}_products.csv"
-                ]
-            else:
-                csv_paths = [
-                    f"data/{continent}/{country}/{city_name}/{city_name}_klook_products_all.csv",
-                    f"data/{continent}/{country}/{city_name}/klook_{city_name}_products.csv",
-                    f"data/{continent}/{country}/{country}_klook_products_all.csv"
-                ]
-            
-            for csv_path in csv_paths:
-                if os.path.exists(csv_path):
-                    return pd.read_csv(csv_path, encoding='utf-8-sig')
+            csv_path = csv_path or self._find_csv_path(city_name)
+            if csv_path:
+                return pd.read_csv(csv_path, encoding='utf-8-sig')
             
             print(f"⚠️ CSV 파일 없음: {city_name}")
             return None
@@ -132,27 +290,39 @@ class DataConsolidator:
             print(f"❌ CSV 로드 실패: {e}")
             return None
     
-    def _load_collected_log(self, city_code):
-        """수집 로그 로드"""
+    def _get_collected_log_path(self, city_code):
+        return f"{self.base_dirs['url_collected']}/{city_code}_url_log.txt"
+    
+    def _read_collected_log(self, city_code, offset=0):
+        """수집 로그를 offset부터 읽기 → ({URL: 시각}, 읽은 끝 위치)"""
         try:
-            log_file = f"{self.base_dirs['url_collected']}/{city_code}_url_log.txt"
+            log_file = self._get_collected_log_path(city_code)
             if not os.path.exists(log_file):
-                return {}
+                return {}, 0
             
             collected_log = {}
-            with open(log_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if '|' in line:
-                        parts = line.strip().split(' | ')
-                        if len(parts) == 2:
-                            timestamp, url = parts
-                            collected_log[url] = timestamp
+            with open(log_file, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+            
+            # 마지막 줄이 아직 쓰는 중이면 다음에 다시 읽기
+            complete = data[:data.rfind(b'\n') + 1]
+            for line in complete.decode('utf-8', errors='replace').splitlines():
+                if '|' in line:
+                    parts = line.strip().split(' | ')
+                    if len(parts) == 2:
+                        timestamp, url = parts
+                        collected_log[url] = timestamp
             
-            return collected_log
+            return collected_log, offset + len(complete)
             
         except Exception as e:
             print(f"❌ 수집 로그 로드 실패: {e}")
-            return {}
+            return {}, offset
+    
+    def _load_collected_log(self, city_code):
+        """수집 로그 로드"""
+        return self._read_collected_log(city_code)[0]
     
     def detect_data_inconsistencies(self, city_name):
         """🔍 데이터 불일치 감지"""
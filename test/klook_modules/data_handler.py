@@ -14,6 +14,7 @@ warnings.filterwarnings('ignore')
 
 # config 모듈에서 모든 설정과 라이브러리 상태 import
 from .config import CONFIG, get_city_info, get_city_code, PANDAS_AVAILABLE, PIL_AVAILABLE
+from .csv_consolidator import CountryCsvConsolidator
 
 # 조건부 import - config에서 확인된 상태에 따라
 if PANDAS_AVAILABLE:
@@ -29,6 +30,7 @@ except ImportError:
 
 if PIL_AVAILABLE:
     from PIL import Image
+    from .image_pipeline import resize_and_encode
 
 # =============================================================================
 # 📸 이미지 처리 시스템
@@ -207,47 +209,17 @@ def download_and_save_image_klook(img_src, product_number, city_name, max_size_k
         response = requests.get(img_src, headers=headers, timeout=10)
         response.raise_for_status()
         
-        # 임시 파일에 저장
-        temp_path = img_path + ".temp"
-        with open(temp_path, 'wb') as f:
-            f.write(response.content)
+        # 메모리에서 리사이즈(가로 400px) + 용량 목표 인코딩 후 1회 저장
+        encoded = resize_and_encode(response.content, "main", max_size_kb)
+        with open(img_path, 'wb') as f:
+            f.write(encoded)
         
-        # 이미지 리사이즈 및 최적화
-        with Image.open(temp_path) as img:
-            # RGB로 변환 (JPEG 호환성)
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-            
-            # 적절한 크기로 리사이즈 (가로 400px 기준)
-            width, height = img.size
-            if width > 400:
-                ratio = 400 / width
-                new_height = int(height * ratio)
-                img = img.resize((400, new_height), Image.Resampling.LANCZOS)
-            
-            # 품질 조정하여 저장 (300KB 이하 목표)
-            quality = 85
-            while quality > 30:
-                img.save(img_path, "JPEG", quality=quality, optimize=True)
-                
-                # 파일 크기 확인
-                if os.path.getsize(img_path) <= max_size_kb * 1024:
-                    break
-                quality -= 10
-        
-        # 임시 파일 삭제
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-        
-        file_size_kb = os.path.getsize(img_path) / 1024
+        file_size_kb = len(encoded) / 1024
         print(f"  ✅ 이미지 저장 완료: {img_filename} ({file_size_kb:.1f}KB)")
         return img_filename
         
     except Exception as e:
         print(f"  ❌ 이미지 저장 실패: {type(e).__name__}: {e}")
-        # 임시 파일 정리
-        if 'temp_path' in locals() and os.path.exists(temp_path):
-            os.remove(temp_path)
         return None
 
 def download_dual_images_klook(image_urls, product_number, city_name, max_size_kb=300):
@@ -328,52 +300,17 @@ def download_single_image_klook(img_src, product_number, city_name, image_type="
         response = requests.get(img_src, headers=headers, timeout=10)
         response.raise_for_status()
         
-        # 임시 파일에 저장
-        temp_path = img_path + ".temp"
-        with open(temp_path, 'wb') as f:
-            f.write(response.content)
+        # 메모리에서 타입별 리사이즈 + 용량 목표 인코딩 후 1회 저장
+        encoded = resize_and_encode(response.content, image_type, max_size_kb)
+        with open(img_path, 'wb') as f:
+            f.write(encoded)
         
-        # 이미지 리사이즈 및 최적화
-        with Image.open(temp_path) as img:
-            # RGB로 변환 (JPEG 호환성)
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-            
-            # 타입별 크기 조정
-            width, height = img.size
-            if image_type == "main":
-                target_width = 400  # 메인 이미지
-            else:
-                target_width = 200  # 썸네일 이미지
-            
-            if width > target_width:
-                ratio = target_width / width
-                new_height = int(height * ratio)
-                img = img.resize((target_width, new_height), Image.Resampling.LANCZOS)
-            
-            # 품질 조정하여 저장
-            quality = 85
-            while quality > 30:
-                img.save(img_path, "JPEG", quality=quality, optimize=True)
-                
-                # 파일 크기 확인
-                if os.path.getsize(img_path) <= max_size_kb * 1024:
-                    break
-                quality -= 10
-        
-        # 임시 파일 삭제
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-        
-        file_size_kb = os.path.getsize(img_path) / 1024
+        file_size_kb = len(encoded) / 1024
         print(f"    ✅ {image_type} 이미지 저장: {img_filename} ({file_size_kb:.1f}KB)")
         return img_filename
         
     except Exception as e:
         print(f"    ❌ {image_type} 이미지 저장 실패: {type(e).__name__}: {e}")
-        # 임시 파일 정리
-        if 'temp_path' in locals() and os.path.exists(temp_path):
-            os.remove(temp_path)
         return None
 
 # =============================================================================
@@ -696,7 +633,7 @@ def cleanup_temp_files():
 
 
 def create_country_consolidated_csv(country_name, force_recreate=False):
-    """✅ 국가별 통합 CSV 파일 생성"""
+    """✅ 국가별 통합 CSV 파일 생성 (변경된 도시만 증분 반영)"""
     print(f"\n🌏 '{country_name}' 국가별 통합 CSV 생성 중...")
     
     try:
@@ -739,86 +676,14 @@ def create_country_consolidated_csv(country_name, force_recreate=False):
             os.makedirs(country_dir, exist_ok=True)
             consolidated_path = os.path.join(country_dir, f"{country_name}_통합_klook_products.csv")
         
-        # 기존 파일 확인
-        if os.path.exists(consolidated_path) and not force_recreate:
-            print(f"   ✅ 통합 파일이 이미 존재합니다: {consolidated_path}")
-            return True
-        
-        # 모든 도시 CSV 병합 (pandas 없이 구현)
-        try:
-            import pandas as pd
-            # pandas가 있는 경우 기존 방식 사용
-            all_dataframes = []
-            total_products = 0
-            
-            for city, csv_file in country_cities:
-                try:
-                    df = pd.read_csv(csv_file, encoding='utf-8-sig')
-                    print(f"      📄 {city}: {len(df)}개 상품")
-                    all_dataframes.append(df)
-                    total_products += len(df)
-                except Exception as e:
-                    print(f"      ❌ {city} CSV 읽기 실패: {e}")
-            
-            if not all_dataframes:
-                print(f"   ❌ 읽을 수 있는 CSV 파일이 없습니다.")
-                return False
-            
-            # 데이터프레임 병합
-            consolidated_df = pd.concat(all_dataframes, ignore_index=True)
-            
-            # 번호 재정렬
-            consolidated_df['번호'] = range(1, len(consolidated_df) + 1)
-            
-            # 통합 CSV 저장
-            consolidated_df.to_csv(consolidated_path, index=False, encoding='utf-8-sig')
-            
-        except ImportError:
-            # pandas가 없는 경우 수동으로 CSV 병합
-            print(f"   📊 pandas 없이 CSV 병합 중...")
-            import csv
-            
-            all_rows = []
-            header = None
-            total_products = 0
-            
-            for city, csv_file in country_cities:
-                try:
-                    with open(csv_file, 'r', encoding='utf-8-sig') as f:
-                        reader = csv.reader(f)
-                        city_rows = list(reader)
-                        
-                        if city_rows:
-                            if header is None:
-                                header = city_rows[0]  # 첫 번째 파일의 헤더 사용
-                            
-                            # 데이터 행만 추가 (헤더 제외)
-                            data_rows = city_rows[1:] if len(city_rows) > 1 else []
-                            all_rows.extend(data_rows)
-                            print(f"      📄 {city}: {len(data_rows)}개 상품")
-                            total_products += len(data_rows)
-                        
-                except Exception as e:
-                    print(f"      ❌ {city} CSV 읽기 실패: {e}")
-            
-            if not all_rows:
-                print(f"   ❌ 읽을 수 있는 CSV 데이터가 없습니다.")
-                return False
-            
-            # 번호 재정렬
-            for i, row in enumerate(all_rows, 1):
-                if len(row) > 0:
-                    row[0] = str(i)  # 첫 번째 컬럼이 번호라고 가정
-            
-            # 통합 CSV 저장
-            with open(consolidated_path, 'w', newline='', encoding='utf-8-sig') as f:
-                writer = csv.writer(f)
-                if header:
-                    writer.writerow(header)
-                writer.writerows(all_rows)
+        # 스트리밍 통합: 매니페스트 기준으로 바뀐 도시의 추가 행만 이어 쓰기 (force_recreate면 전체 재구성)
+        result = CountryCsvConsolidator(consolidated_path).consolidate(country_cities, force=force_recreate)
+        if result is None:
+            print(f"   ❌ 읽을 수 있는 CSV 데이터가 없습니다.")
+            return False
         
         print(f"   ✅ 통합 CSV 생성 완료!")
-        print(f"      📊 총 상품: {total_products}개")
+        print(f"      📊 총 상품: {result['total_rows']}개 (이번 실행 추가: {result['new_rows']}개)")
         print(f"      📁 저장 위치: {consolidated_path}")
         
         return True
@@ -170,15 +170,12 @@ class PaginationCrawlingValidator:
             city_code = get_city_code(city_name)
             
             # 누적 랭킹 데이터 로드
-            accumulated_file = f"ranking_data/{city_code}_accumulated_rankings.json"
-            if not os.path.exists(accumulated_file):
+            from .ranking_manager import ranking_manager
+            ranking_data = ranking_manager.load_accumulated_rankings(city_name)
+            if ranking_data is None:
                 print("❌ 랭킹 데이터 파일이 없습니다")
                 return False
             
-            import json
-            with open(accumulated_file, 'r', encoding='utf-8') as f:
-                ranking_data = json.load(f)
-            
             # 전체 탭 순위 추출
             rankings = []
             for url_hash, url_info in ranking_data["url_rankings"].items():
@@ -234,13 +231,10 @@ class PaginationCrawlingValidator:
             
             # 랭킹 데이터에서 URL 목록
             ranking_urls = set()
-            accumulated_file = f"ranking_data/{city_code}_accumulated_rankings.json"
+            from .ranking_manager import ranking_manager
+            ranking_data = ranking_manager.load_accumulated_rankings(city_name)
             
-            if os.path.exists(accumulated_file):
-                import json
-                with open(accumulated_file, 'r', encoding='utf-8') as f:
-                    ranking_data = json.load(f)
-                
+            if ranking_data is not None:
                 for url_info in ranking_data["url_rankings"].values():
                     if url_info.get("crawled", False):
                         ranking_urls.add(url_info["url"])
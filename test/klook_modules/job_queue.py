@@ -0,0 +1,377 @@
+"""
+도시 간 크롤링 작업 큐 (SQLite 단일 파일)
+- URL 1개 = 작업 1개 (도시, 탭, 순위, 시도 횟수)
+- lease/ack: 워커가 작업을 임대(lease) → 성공 시 ack, 실패 시 fail(재시도/포기)
+- 임대 만료(워커 비정상 종료)된 작업은 다른 워커가 자동 회수
+  같은 호스트에서 종료된 프로세스의 임대는 만료를 기다리지 않고 재시작 시 바로 회수
+- 여러 프로세스/호스트가 같은 파일을 공유해 동시에 작업 수행
+- 재시작 시 파일 재스캔 없이 (상태, id) 인덱스로 다음 작업 즉시 조회
+"""
+
+import os
+import time
+import socket
+import sqlite3
+import threading
+from datetime import datetime
+
+from .config import CONFIG
+
+JOB_QUEUE_FILE = "crawl_jobs.sqlite3"
+
+# 작업 상태
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+def default_worker_id():
+    """호스트명:PID (같은 파일을 공유하는 워커 구분용)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _now_text():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def _pid_alive(pid):
+    """같은 호스트의 프로세스 생존 여부 (확인할 수 없으면 살아 있는 것으로 간주)"""
+    if pid <= 0:
+        return True
+    if os.name == "nt":
+        # Windows 의 os.kill(pid, 0) 은 프로세스를 종료시키므로 OpenProcess 로 확인
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return kernel32.GetLastError() == 5  # 접근 거부 = 존재함
+        try:
+            exit_code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+                return True
+            return exit_code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # 권한 없음 등 = 존재함
+    return True
+
+class CrawlJobQueue:
+    """SQLite 기반 URL 작업 큐"""
+
+    def __init__(self, path=JOB_QUEUE_FILE, lease_seconds=None, max_attempts=None, retry_delay=None, journal_mode=None):
+        self.path = path
+        self.lease_seconds = CONFIG.get("JOB_LEASE_SECONDS", 600) if lease_seconds is None else lease_seconds
+        self.max_attempts = CONFIG.get("JOB_MAX_ATTEMPTS", 3) if max_attempts is None else max_attempts
+        self.retry_delay = CONFIG.get("JOB_RETRY_DELAY", 30) if retry_delay is None else retry_delay
+        self.journal_mode = journal_mode or CONFIG.get("JOB_QUEUE_JOURNAL_MODE", "WAL")
+        self._lock = threading.RLock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # isolation_level=None: 트랜잭션은 BEGIN IMMEDIATE 로 직접 관리 (프로세스 간 쓰기 직렬화)
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._init_schema()
+
+    def _init_schema(self):
+        """테이블/인덱스 및 PRAGMA 설정 (네트워크 공유 파일이면 JOB_QUEUE_JOURNAL_MODE="DELETE")"""
+        with self._lock:
+            self.conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA busy_timeout=60000")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    city TEXT NOT NULL,
+                    tab TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    rank INTEGER,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    last_error TEXT,
+                    updated_at TEXT,
+                    UNIQUE (city, tab, url)
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_city_status ON jobs (city, status, id)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs (status, lease_expires)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS cities (
+                    city TEXT PRIMARY KEY,
+                    total INTEGER,
+                    enqueued_at TEXT
+                )
+            """)
+
+    def _transaction(self, work):
+        """BEGIN IMMEDIATE ~ COMMIT (실패 시 ROLLBACK)"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work()
+                self.conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    # -------------------------------------------------------------------------
+    # 등록
+    # -------------------------------------------------------------------------
+
+    def enqueue_city(self, city_name, urls, tab="전체", start_rank=1):
+        """도시의 수집 URL 전체를 작업으로 등록 (순위 = 목록 위치, 이미 있는 URL은 유지)
+
+        등록이 끝나야 도시가 '등록 완료'로 표시되므로, 수집 중 중단되면 재시작 시 다시 수집
+        """
+        rows = [(city_name, tab, url, start_rank + i, _now_text()) for i, url in enumerate(urls)]
+
+        def work():
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO jobs (city, tab, url, rank, updated_at) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            added = self.conn.total_changes - before
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cities (city, total, enqueued_at) VALUES (?, ?, ?)",
+                (city_name, len(rows), _now_text())
+            )
+            return added
+
+        added = self._transaction(work)
+        print(f"📥 작업 큐 등록: {city_name}/{tab} {added}개 (전체 {len(rows)}개)")
+        return added
+
+    def clear_city(self, city_name):
+        """도시 작업 전체 삭제 (새 실행 시작)"""
+        def work():
+            deleted = self.conn.execute("DELETE FROM jobs WHERE city = ?", (city_name,)).rowcount
+            self.conn.execute("DELETE FROM cities WHERE city = ?", (city_name,))
+            return deleted
+        return self._transaction(work)
+
+    # -------------------------------------------------------------------------
+    # 임대 / 완료
+    # -------------------------------------------------------------------------
+
+    def lease(self, worker_id=None, city_name=None, limit=1):
+        """다음 작업 임대 → [{"id", "city", "tab", "url", "rank", "attempts"}]
+
+        임대 만료 작업은 먼저 회수 (시도 횟수 초과면 failed)
+        """
+        worker_id = worker_id or default_worker_id()
+
+        def work():
+            now = time.time()
+            self.conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "lease_owner = NULL, lease_expires = NULL, last_error = 'lease_expired', updated_at = ? "
+                "WHERE status = 'leased' AND lease_expires < ?",
+                (self.max_attempts, _now_text(), now)
+            )
+            if city_name is None:
+                rows = self.conn.execute(
+                    "SELECT id, city, tab, url, rank, attempts FROM jobs "
+                    "WHERE status = 'pending' AND available_at <= ? ORDER BY id LIMIT ?",
+                    (now, limit)
+                ).fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT id, city, tab, url, rank, attempts FROM jobs "
+                    "WHERE city = ? AND status = 'pending' AND available_at <= ? ORDER BY id LIMIT ?",
+                    (city_name, now, limit)
+                ).fetchall()
+            self.conn.executemany(
+                "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires = ?, updated_at = ? WHERE id = ?",
+                [(worker_id, now + self.lease_seconds, _now_text(), row[0]) for row in rows]
+            )
+            return [
+                {"id": row[0], "city": row[1], "tab": row[2], "url": row[3], "rank": row[4], "attempts": row[5] + 1}
+                for row in rows
+            ]
+
+        return self._transaction(work)
+
+    def reclaim_dead_leases(self):
+        """이 호스트에서 종료된 프로세스(호스트명:PID)가 쥐고 있던 임대 즉시 회수 → 회수한 작업 수
+
+        비정상 종료 후 재시작한 워커가 임대 만료(JOB_LEASE_SECONDS)를 기다리지 않고 이어서 처리하도록
+        (다른 호스트의 임대는 생존 확인이 불가능하므로 기존처럼 만료 시 회수)
+        """
+        prefix = f"{socket.gethostname()}:"
+        with self._lock:
+            owners = [row[0] for row in self.conn.execute(
+                "SELECT DISTINCT lease_owner FROM jobs WHERE status = 'leased' AND lease_owner LIKE ?", (prefix + "%",)
+            )]
+        dead = []
+        for owner in owners:
+            pid = owner[len(prefix):]
+            if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+                dead.append(owner)
+        if not dead:
+            return 0
+
+        def work():
+            cursor = self.conn.executemany(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "lease_owner = NULL, lease_expires = NULL, last_error = 'owner_dead', updated_at = ? "
+                "WHERE status = 'leased' AND lease_owner = ?",
+                [(self.max_attempts, _now_text(), owner) for owner in dead]
+            )
+            return cursor.rowcount
+
+        reclaimed = self._transaction(work)
+        if reclaimed:
+            print(f"♻️ 종료된 워커 {len(dead)}개({', '.join(dead)})의 임대 작업 {reclaimed}개 회수")
+        return reclaimed
+
+    def ack(self, job_id, worker_id=None):
+        """작업 완료 (임대가 유효할 때만 - 회수된 작업이면 False)"""
+        worker_id = worker_id or default_worker_id()
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = 'done', lease_owner = NULL, lease_expires = NULL, last_error = NULL, "
+                "updated_at = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (_now_text(), job_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id, error=None, worker_id=None, retry=True):
+        """작업 실패 - 시도 횟수가 남았으면 retry_delay × 시도 횟수 뒤 재시도, 아니면 failed"""
+        worker_id = worker_id or default_worker_id()
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = CASE WHEN ? AND attempts < ? THEN 'pending' ELSE 'failed' END, "
+                "available_at = ? + attempts * ?, lease_owner = NULL, lease_expires = NULL, "
+                "last_error = ?, updated_at = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (1 if retry else 0, self.max_attempts, time.time(), self.retry_delay,
+                 None if error is None else str(error)[:500], _now_text(), job_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def release(self, job_id, worker_id=None):
+        """처리하지 않은 작업 반납 (사용자 중단 등 - 시도 횟수 차감)"""
+        worker_id = worker_id or default_worker_id()
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = 'pending', attempts = MAX(attempts - 1, 0), lease_owner = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (_now_text(), job_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def extend(self, job_id, worker_id=None, seconds=None):
+        """임대 연장 (오래 걸리는 작업)"""
+        worker_id = worker_id or default_worker_id()
+        seconds = self.lease_seconds if seconds is None else seconds
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (time.time() + seconds, job_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    # -------------------------------------------------------------------------
+    # 상태 조회
+    # -------------------------------------------------------------------------
+
+    def city_status(self, city_name):
+        """None (미등록) / "open" (남은 작업 있음) / "complete" (모두 done 또는 failed)"""
+        with self._lock:
+            if self.conn.execute("SELECT 1 FROM cities WHERE city = ?", (city_name,)).fetchone() is None:
+                return None
+            remaining = self.conn.execute(
+                "SELECT 1 FROM jobs WHERE city = ? AND status IN ('pending', 'leased') LIMIT 1", (city_name,)
+            ).fetchone()
+        return "open" if remaining else "complete"
+
+    def next_available_in(self, city_name=None):
+        """다음 작업이 열릴 수 있을 때까지 남은 초 (남은 pending/leased 작업이 없으면 None)
+
+        재시도 대기 중인 pending 의 available_at, 다른 워커가 임대 중인 작업의 lease_expires 중 가장 이른 시각
+        (임대 작업은 완료되면 사라지고, 워커가 죽으면 만료 시 회수됨)
+        """
+        sql = ("SELECT MIN(CASE WHEN status = 'pending' THEN available_at ELSE lease_expires END) "
+               "FROM jobs WHERE status IN ('pending', 'leased')")
+        with self._lock:
+            if city_name is None:
+                row = self.conn.execute(sql).fetchone()
+            else:
+                row = self.conn.execute(sql + " AND city = ?", (city_name,)).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def counts(self, city_name=None):
+        """{상태: 개수}"""
+        with self._lock:
+            if city_name is None:
+                rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT status, COUNT(*) FROM jobs WHERE city = ? GROUP BY status", (city_name,)
+                ).fetchall()
+        result = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        result.update(dict(rows))
+        return result
+
+    def failed_jobs(self, city_name=None):
+        """포기한 작업 목록 (url, rank, attempts, last_error)"""
+        with self._lock:
+            if city_name is None:
+                rows = self.conn.execute(
+                    "SELECT city, url, rank, attempts, last_error FROM jobs WHERE status = 'failed' ORDER BY id"
+                ).fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT city, url, rank, attempts, last_error FROM jobs WHERE city = ? AND status = 'failed' ORDER BY id",
+                    (city_name,)
+                ).fetchall()
+        return [{"city": r[0], "url": r[1], "rank": r[2], "attempts": r[3], "error": r[4]} for r in rows]
+
+    def retry_failed(self, city_name=None):
+        """failed 작업을 다시 pending 으로 (시도 횟수 초기화)"""
+        with self._lock:
+            if city_name is None:
+                cursor = self.conn.execute(
+                    "UPDATE jobs SET status = 'pending', attempts = 0, available_at = 0 WHERE status = 'failed'"
+                )
+            else:
+                cursor = self.conn.execute(
+                    "UPDATE jobs SET status = 'pending', attempts = 0, available_at = 0 WHERE city = ? AND status = 'failed'",
+                    (city_name,)
+                )
+        return cursor.rowcount
+
+    def print_status(self, city_name=None):
+        counts = self.counts(city_name)
+        label = city_name or "전체"
+        print(f"📋 작업 큐 [{label}] 대기 {counts[PENDING]} / 진행 {counts[LEASED]} / "
+              f"완료 {counts[DONE]} / 실패 {counts[FAILED]}")
+        return counts
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+# =============================================================================
+# 프로세스 내 큐 캐시
+# =============================================================================
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+def get_crawl_job_queue(path=None):
+    """경로별 CrawlJobQueue 반환 (기본 CONFIG JOB_QUEUE_FILE)"""
+    path = path or CONFIG.get("JOB_QUEUE_FILE", JOB_QUEUE_FILE)
+    with _queues_lock:
+        queue = _queues.get(path)
+        if queue is None:
+            queue = _queues[path] = CrawlJobQueue(path)
+        return queue
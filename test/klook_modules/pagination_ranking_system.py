@@ -278,6 +278,9 @@ class PaginationRankingSystem:
             city_code = get_city_code(city_name)
             accumulated_file = f"ranking_data/{city_code}_accumulated_rankings.json"
             
+            # 저널에 쌓인 변경을 파일에 먼저 반영한 뒤 직접 수정
+            ranking_manager.flush_city(city_name)
+            
             if os.path.exists(accumulated_file):
                 with open(accumulated_file, 'r', encoding='utf-8') as f:
                     accumulated = json.load(f)
@@ -367,19 +370,17 @@ class RankingDataMatcher:
         """특정 URL의 랭킹 정보 조회"""
         try:
             city_code = get_city_code(city_name)
-            accumulated_file = f"ranking_data/{city_code}_accumulated_rankings.json"
-            
-            if not os.path.exists(accumulated_file):
-                return None
             
             # 캐시 확인
             cache_key = f"{city_code}_{url}"
             if cache_key in self.ranking_cache:
                 return self.ranking_cache[cache_key]
             
-            # 파일에서 조회
-            with open(accumulated_file, 'r', encoding='utf-8') as f:
-                accumulated = json.load(f)
+            # 누적 랭킹에서 조회 (저널 반영된 상태)
+            from .ranking_manager import ranking_manager
+            accumulated = ranking_manager.load_accumulated_rankings(city_name)
+            if accumulated is None:
+                return None
             
             import hashlib
             url_hash = hashlib.md5(url.encode('utf-8')).hexdigest()
@@ -411,14 +412,12 @@ class RankingDataMatcher:
                 return None
             
             # 랭킹 정보 로드
-            accumulated_file = f"ranking_data/{city_code}_accumulated_rankings.json"
-            if not os.path.exists(accumulated_file):
-                print(f"❌ 랭킹 파일을 찾을 수 없음: {accumulated_file}")
+            from .ranking_manager import ranking_manager
+            ranking_data = ranking_manager.load_accumulated_rankings(city_name)
+            if ranking_data is None:
+                print(f"❌ 랭킹 파일을 찾을 수 없음: ranking_data/{city_code}_accumulated_rankings.json")
                 return None
             
-            with open(accumulated_file, 'r', encoding='utf-8') as f:
-                ranking_data = json.load(f)
-            
             # 매핑 테이블 생성
             mapping_table = []
             
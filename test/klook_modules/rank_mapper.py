@@ -18,15 +18,16 @@ class RankMapper:
         """URL 리스트에서 각 URL의 실제 순위를 찾아서 매핑"""
         try:
             city_code = get_city_code(city_name)
-            accumulated_file = f"{self.ranking_dir}/{city_code}_accumulated_rankings.json"
             
             # 캐시 키
             cache_key = f"{city_code}_{tab_name}"
             
             if cache_key not in self.cache:
-                # 누적 랭킹 데이터 로드
-                with open(accumulated_file, 'r', encoding='utf-8') as f:
-                    accumulated = json.load(f)
+                # 누적 랭킹 데이터 로드 (저널 반영된 상태)
+                from .ranking_manager import ranking_manager
+                accumulated = ranking_manager.load_accumulated_rankings(city_name)
+                if accumulated is None:
+                    raise FileNotFoundError(f"{self.ranking_dir}/{city_code}_accumulated_rankings.json")
                 
                 # URL 해시 → 실제 순위 매핑 생성
                 self.cache[cache_key] = {}
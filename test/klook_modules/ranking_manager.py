@@ -1,11 +1,12 @@
 """
 🚀 랭킹 매니저: 중복 URL 랭킹 누적 및 관리 시스템
 - 탭별 랭킹 정보 수집
-- 중복 URL 랭킹 누적 저장
+- 중복 URL 랭킹 누적 저장 (누적 JSON 스냅샷 + 추가 전용 저널)
 - 랭킹 데이터 조회 및 분석
 """
 
 import os
+import copy
 import json
 import hashlib
 from datetime import datetime
@@ -13,17 +14,83 @@ from collections import defaultdict
 
 # config 모듈에서 필요한 함수들 import
 from .config import get_city_code
+from .journal_store import get_journal_store, close_journal_store
+from .rank_index import RankIndex
 
 # =============================================================================
 # 🏆 랭킹 데이터 구조
 # =============================================================================
 
+def new_accumulated_rankings(city_name, city_code):
+    """빈 누적 랭킹 구조"""
+    return {
+        "city_name": city_name,
+        "city_code": city_code,
+        "last_updated": None,
+        "url_rankings": {},
+        "stats": {
+            "total_urls": 0,
+            "tabs_processed": [],
+            "duplicate_urls": 0
+        }
+    }
+
+def apply_accumulated_op(accumulated, op):
+    """저널 작업 1개를 누적 랭킹에 반영 (op 안의 시각만 사용)"""
+    if op["op"] == "tab":
+        tab_name = op["tab_name"]
+        
+        for url_hash, url, tab_ranking, found_at in op["rankings"]:
+            if url_hash not in accumulated["url_rankings"]:
+                # 새로운 URL
+                accumulated["url_rankings"][url_hash] = {
+                    "url": url,
+                    "url_hash": url_hash,
+                    "first_found": found_at,
+                    "tab_rankings": {},
+                    "is_duplicate": False
+                }
+            else:
+                # 중복 URL - 중복 표시
+                accumulated["url_rankings"][url_hash]["is_duplicate"] = True
+                accumulated["stats"]["duplicate_urls"] += 1
+            
+            # 탭별 랭킹 정보 추가
+            accumulated["url_rankings"][url_hash]["tab_rankings"][tab_name] = {
+                "ranking": tab_ranking,
+                "found_at": found_at
+            }
+        
+        # 통계 업데이트
+        accumulated["last_updated"] = op["updated_at"]
+        accumulated["stats"]["total_urls"] = len(accumulated["url_rankings"])
+        if tab_name not in accumulated["stats"]["tabs_processed"]:
+            accumulated["stats"]["tabs_processed"].append(tab_name)
+    
+    elif op["op"] == "crawled":
+        url_info = accumulated["url_rankings"].get(op["url_hash"])
+        if url_info is not None:
+            url_info["crawled"] = True
+            url_info["crawled_at"] = op["crawled_at"]
+
+def _index_crawled_url(index, url_hash, url_info, add=True):
+    """크롤링 완료된 URL의 탭별 순위를 인덱스에 추가/제거 (키: 탭 이름, None=전체 탭)"""
+    if not url_info or not url_info.get("crawled", False):
+        return
+    for tab, ranking_info in url_info.get("tab_rankings", {}).items():
+        for key in (tab, None):
+            if add:
+                index.add(key, ranking_info["ranking"], url_hash)
+            else:
+                index.remove(key, ranking_info["ranking"], url_hash)
+
 class RankingManager:
     """중복 URL 랭킹 누적 관리 시스템"""
     
     def __init__(self):
         self.ranking_dir = "ranking_data"
         self.ranking_cache = {}
+        self.rank_indexes = {}  # 도시 → (인덱스를 만든 누적 상태 객체, 크롤링 완료 순위 RankIndex)
         
     def save_tab_ranking(self, urls_with_ranking, city_name, tab_name, strategy):
         """탭에서 수집한 URL들과 랭킹 정보 저장"""
@@ -74,83 +141,101 @@ class RankingManager:
             print(f"    ❌ 랭킹 데이터 저장 실패: {e}")
             return False
     
+    def _get_accumulated_file(self, city_code):
+        return os.path.join(self.ranking_dir, f"{city_code}_accumulated_rankings.json")
+    
+    def _get_accumulated_store(self, city_name, city_code=None):
+        """도시별 누적 랭킹 저장소 (메모리 상태 + 저널)"""
+        city_code = city_code or get_city_code(city_name)
+        return get_journal_store(
+            self._get_accumulated_file(city_code),
+            apply_accumulated_op,
+            initial_state=lambda: new_accumulated_rankings(city_name, city_code)
+        )
+    
+    def _load_accumulated(self, city_name):
+        """누적 랭킹 상태 (파일이 없으면 None, 다른 코드가 파일을 고쳤으면 다시 읽음)"""
+        city_code = get_city_code(city_name)
+        if not os.path.exists(self._get_accumulated_file(city_code)):
+            return None
+        return self._get_accumulated_store(city_name, city_code).refresh_if_changed()
+    
+    def get_rank_index(self, city_name):
+        """크롤링 완료 순위 인덱스 (누적 상태를 다시 읽었을 때만 재구성, 없으면 None)"""
+        accumulated = self._load_accumulated(city_name)
+        if accumulated is None:
+            return None
+        
+        cached = self.rank_indexes.get(city_name)
+        if cached is None or cached[0] is not accumulated:
+            index = RankIndex()
+            for url_hash, url_info in accumulated["url_rankings"].items():
+                _index_crawled_url(index, url_hash, url_info)
+            cached = (accumulated, index)
+            self.rank_indexes[city_name] = cached
+        return cached[1]
+    
+    def _append_indexed(self, city_name, store, op, url_hashes):
+        """작업 추가 + 영향받는 URL만 인덱스에서 빼고 다시 넣기 (점진 갱신)"""
+        cached = self.rank_indexes.get(city_name)
+        index = cached[1] if cached is not None and cached[0] is store.state else None
+        url_rankings = store.state["url_rankings"]
+        
+        if index is not None:
+            for url_hash in url_hashes:
+                _index_crawled_url(index, url_hash, url_rankings.get(url_hash), add=False)
+        
+        success = store.append(op)
+        
+        if index is not None:
+            for url_hash in url_hashes:
+                _index_crawled_url(index, url_hash, url_rankings.get(url_hash))
+        return success
+    
     def _update_accumulated_rankings(self, ranking_data):
-        """중복 URL 랭킹 누적 업데이트"""
+        """중복 URL 랭킹 누적 업데이트 (탭 1개 = 저널 1줄)"""
         try:
-            city_code = ranking_data["city_code"]
-            accumulated_file = os.path.join(self.ranking_dir, f"{city_code}_accumulated_rankings.json")
-            
-            # 기존 누적 데이터 로드
-            if os.path.exists(accumulated_file):
-                with open(accumulated_file, 'r', encoding='utf-8') as f:
-                    accumulated = json.load(f)
-            else:
-                accumulated = {
-                    "city_name": ranking_data["city_name"],
-                    "city_code": city_code,
-                    "last_updated": None,
-                    "url_rankings": {},
-                    "stats": {
-                        "total_urls": 0,
-                        "tabs_processed": [],
-                        "duplicate_urls": 0
-                    }
-                }
-            
-            # 새 랭킹 데이터 누적
-            tab_name = ranking_data["tab_name"]
-            
-            for url_info in ranking_data["url_rankings"]:
-                url_hash = url_info["url_hash"]
-                url = url_info["url"]
-                
-                if url_hash not in accumulated["url_rankings"]:
-                    # 새로운 URL
-                    accumulated["url_rankings"][url_hash] = {
-                        "url": url,
-                        "url_hash": url_hash,
-                        "first_found": url_info["found_at"],
-                        "tab_rankings": {},
-                        "is_duplicate": False
-                    }
-                else:
-                    # 중복 URL - 중복 표시
-                    accumulated["url_rankings"][url_hash]["is_duplicate"] = True
-                    accumulated["stats"]["duplicate_urls"] += 1
-                
-                # 탭별 랭킹 정보 추가
-                accumulated["url_rankings"][url_hash]["tab_rankings"][tab_name] = {
-                    "ranking": url_info["tab_ranking"],
-                    "found_at": url_info["found_at"]
-                }
-            
-            # 통계 업데이트
-            accumulated["last_updated"] = datetime.now().isoformat()
-            accumulated["stats"]["total_urls"] = len(accumulated["url_rankings"])
-            if tab_name not in accumulated["stats"]["tabs_processed"]:
-                accumulated["stats"]["tabs_processed"].append(tab_name)
-            
-            # 누적 데이터 저장
-            with open(accumulated_file, 'w', encoding='utf-8') as f:
-                json.dump(accumulated, f, ensure_ascii=False, indent=2)
-            
+            store = self._get_accumulated_store(ranking_data["city_name"], ranking_data["city_code"])
+            store.refresh_if_changed()
+            rankings = [
+                [url_info["url_hash"], url_info["url"], url_info["tab_ranking"], url_info["found_at"]]
+                for url_info in ranking_data["url_rankings"]
+            ]
+            self._append_indexed(ranking_data["city_name"], store, {
+                "op": "tab",
+                "tab_name": ranking_data["tab_name"],
+                "rankings": rankings,
+                "updated_at": datetime.now().isoformat()
+            }, dict.fromkeys(ranking[0] for ranking in rankings))
+            
+            accumulated = store.state
             print(f"    📊 누적 랭킹 업데이트: 총 {accumulated['stats']['total_urls']}개 URL, 중복 {accumulated['stats']['duplicate_urls']}개")
             
         except Exception as e:
             print(f"    ❌ 누적 랭킹 업데이트 실패: {e}")
     
+    def load_accumulated_rankings(self, city_name):
+        """누적 랭킹 전체 (저널까지 반영된 사본, 없으면 None) - 파일을 직접 읽던 코드용"""
+        accumulated = self._load_accumulated(city_name)
+        return copy.deepcopy(accumulated) if accumulated is not None else None
+    
+    def flush_city(self, city_name):
+        """저널을 누적 랭킹 JSON 으로 압축 (파일을 직접 수정하기 전에 호출)"""
+        try:
+            if self._load_accumulated(city_name) is None:
+                return True
+            return self._get_accumulated_store(city_name).compact(wait=True)
+        except Exception as e:
+            print(f"❌ 누적 랭킹 압축 실패: {e}")
+            return False
+    
     def get_url_rankings(self, url, city_name):
         """특정 URL의 모든 탭 랭킹 정보 조회"""
         try:
-            city_code = get_city_code(city_name)
-            accumulated_file = os.path.join(self.ranking_dir, f"{city_code}_accumulated_rankings.json")
-            
-            if not os.path.exists(accumulated_file):
+            accumulated = self._load_accumulated(city_name)
+            if accumulated is None:
                 return None
             
-            with open(accumulated_file, 'r', encoding='utf-8') as f:
-                accumulated = json.load(f)
-            
             url_hash = hashlib.md5(url.encode('utf-8')).hexdigest()
             
             if url_hash in accumulated["url_rankings"]:
@@ -165,15 +250,10 @@ class RankingManager:
     def get_city_ranking_stats(self, city_name):
         """도시별 랭킹 통계 조회"""
         try:
-            city_code = get_city_code(city_name)
-            accumulated_file = os.path.join(self.ranking_dir, f"{city_code}_accumulated_rankings.json")
-            
-            if not os.path.exists(accumulated_file):
+            accumulated = self._load_accumulated(city_name)
+            if accumulated is None:
                 return None
             
-            with open(accumulated_file, 'r', encoding='utf-8') as f:
-                accumulated = json.load(f)
-            
             return accumulated["stats"]
             
         except Exception as e:
@@ -193,25 +273,18 @@ class RankingManager:
     def mark_url_crawled(self, url, city_name):
         """URL을 크롤링 완료로 표시"""
         try:
-            city_code = get_city_code(city_name)
-            accumulated_file = os.path.join(self.ranking_dir, f"{city_code}_accumulated_rankings.json")
-            
-            if not os.path.exists(accumulated_file):
+            accumulated = self._load_accumulated(city_name)
+            if accumulated is None:
                 return False
             
-            with open(accumulated_file, 'r', encoding='utf-8') as f:
-                accumulated = json.load(f)
-            
             url_hash = hashlib.md5(url.encode('utf-8')).hexdigest()
             
             if url_hash in accumulated["url_rankings"]:
-                accumulated["url_rankings"][url_hash]["crawled"] = True
-                accumulated["url_rankings"][url_hash]["crawled_at"] = datetime.now().isoformat()
-                
-                with open(accumulated_file, 'w', encoding='utf-8') as f:
-                    json.dump(accumulated, f, ensure_ascii=False, indent=2)
-                
-                return True
+                return self._append_indexed(city_name, self._get_accumulated_store(city_name), {
+                    "op": "crawled",
+                    "url_hash": url_hash,
+                    "crawled_at": datetime.now().isoformat()
+                }, [url_hash])
             
             return False
             
@@ -220,50 +293,35 @@ class RankingManager:
             return False
     
     def get_collected_ranks(self, city_name, tab_name=None):
-        """🆕 특정 도시에서 이미 수집된 순위들 조회 (범용)"""
+        """🆕 특정 도시에서 이미 수집된(크롤링 완료) 순위들 조회 (범용)"""
         try:
-            city_code = get_city_code(city_name)
-            accumulated_file = os.path.join(self.ranking_dir, f"{city_code}_accumulated_rankings.json")
-            
-            if not os.path.exists(accumulated_file):
+            index = self.get_rank_index(city_name)
+            if index is None:
                 return []
             
-            with open(accumulated_file, 'r', encoding='utf-8') as f:
-                accumulated = json.load(f)
-            
-            collected_ranks = set()
-            
-            # 모든 URL의 랭킹 정보에서 수집된 순위 추출
-            for url_hash, url_info in accumulated["url_rankings"].items():
-                if url_info.get("crawled", False):  # 실제로 크롤링 완료된 것만
-                    tab_rankings = url_info.get("tab_rankings", {})
-                    
-                    if tab_name:
-                        # 특정 탭의 순위만
-                        if tab_name in tab_rankings:
-                            collected_ranks.add(tab_rankings[tab_name]["ranking"])
-                    else:
-                        # 모든 탭의 순위
-                        for tab, ranking_info in tab_rankings.items():
-                            collected_ranks.add(ranking_info["ranking"])
-            
-            return sorted(list(collected_ranks))
+            # 특정 탭의 순위만 / None이면 모든 탭의 순위
+            return list(index.collected(tab_name or None))
             
         except Exception as e:
             print(f"❌ 수집된 순위 조회 실패: {e}")
             return []
     
+    def _get_collected_set(self, city_name, tab_name=None):
+        """수집 구간 집합 (RankIntervalSet, 데이터가 없으면 None)"""
+        index = self.get_rank_index(city_name)
+        if index is None:
+            return None
+        return index.collected(tab_name or None)
+    
     def get_next_available_rank(self, city_name, tab_name=None, start_from=1):
-        """🆕 다음 가용한 순위 찾기 (범용)"""
+        """🆕 다음 가용한 순위 찾기 (범용, O(log n))"""
         try:
-            collected_ranks = self.get_collected_ranks(city_name, tab_name)
+            collected = self._get_collected_set(city_name, tab_name)
+            if collected is None:
+                return start_from
             
             # start_from부터 시작해서 첫 번째 빈 순위 찾기
-            next_rank = start_from
-            while next_rank in collected_ranks:
-                next_rank += 1
-            
-            return next_rank
+            return collected.next_gap(start_from)
             
         except Exception as e:
             print(f"❌ 다음 가용 순위 찾기 실패: {e}")
@@ -272,33 +330,25 @@ class RankingManager:
     def get_next_available_range(self, city_name, count=3, tab_name=None, fill_gaps=True):
         """🆕 다음 수집 가능한 순위 범위 계산 (범용 - 핵심 기능)"""
         try:
-            collected_ranks = self.get_collected_ranks(city_name, tab_name)
+            collected = self._get_collected_set(city_name, tab_name)
             
-            if not collected_ranks:
+            if not collected:
                 # 아무것도 수집되지 않은 경우
                 return 1, count
             
-            available_ranks = []
+            max_collected = collected.max()
             
             if fill_gaps:
-                # 갭 채우기 모드: 1부터 시작해서 빈 순위들 찾기
-                max_collected = max(collected_ranks)
-                for rank in range(1, max_collected + count + 1):
-                    if rank not in collected_ranks:
-                        available_ranks.append(rank)
-                    if len(available_ranks) >= count:
-                        break
+                # 갭 채우기 모드: 1부터 시작해서 빈 순위들 찾기 (빈 구간만 건너뛰며 탐색)
+                available_ranks = collected.first_gaps(count, 1)
             else:
                 # 연속 모드: 마지막 수집 순위 다음부터
-                max_collected = max(collected_ranks)
-                for rank in range(max_collected + 1, max_collected + count + 1):
-                    available_ranks.append(rank)
+                available_ranks = list(range(max_collected + 1, max_collected + count + 1))
             
             if available_ranks:
                 return min(available_ranks), max(available_ranks)
             else:
                 # 모든 순위가 채워진 경우
-                max_collected = max(collected_ranks) if collected_ranks else 0
                 return max_collected + 1, max_collected + count
                 
         except Exception as e:
@@ -309,10 +359,11 @@ class RankingManager:
         """🆕 특정 도시의 랭킹 데이터 완전 초기화"""
         try:
             city_code = get_city_code(city_name)
-            accumulated_file = os.path.join(self.ranking_dir, f"{city_code}_accumulated_rankings.json")
+            accumulated_file = self._get_accumulated_file(city_code)
             
             if os.path.exists(accumulated_file):
-                os.remove(accumulated_file)
+                self._get_accumulated_store(city_name, city_code).remove_files()
+                close_journal_store(accumulated_file)
                 print(f"✅ '{city_name}' 랭킹 데이터 초기화 완료")
                 return True
             else:
@@ -722,29 +722,19 @@ def get_last_product_number(city_name):
 # =============================================================================
 
 def get_hash_stats(city_name):
-    """해시 시스템 통계 (0.01초)"""
+    """해시 시스템 통계 (URL 완료 인덱스 기반)"""
     try:
-        from .config import get_city_code
-        
-        hash_dir = os.path.join("hash_index", city_name)
-        if not os.path.exists(hash_dir):
-            return {"processed_count": 0, "latest_hash": None}
+        from .config import CONFIG
+        from .url_index import get_url_index
         
-        hash_files = [f for f in os.listdir(hash_dir) if f.endswith('.done')]
+        index = get_url_index(city_name, hash_length=CONFIG.get("HASH_LENGTH", 12))
         
-        stats = {
-            "processed_count": len(hash_files),
-            "latest_hash": None,
-            "hash_directory": hash_dir
+        return {
+            "processed_count": index.count(),
+            "latest_hash": index.latest_hash(),
+            "hash_directory": index.db_path
         }
         
-        if hash_files:
-            # 가장 최근 해시 파일 찾기
-            latest_file = max(hash_files, key=lambda f: os.path.getmtime(os.path.join(hash_dir, f)))
-            stats["latest_hash"] = latest_file.replace('.done', '')
-        
-        return stats
-        
     except Exception as e:
         print(f"❌ 해시 통계 조회 실패: {e}")
         return {"error": str(e)}
@@ -752,7 +742,7 @@ def get_hash_stats(city_name):
 def migrate_csv_to_hash(city_name):
     """기존 CSV 데이터를 해시 시스템으로 마이그레이션"""
     try:
-        from .config import get_completed_urls_from_csv, mark_url_processed_fast
+        from .config import get_completed_urls_from_csv, mark_urls_processed_fast
         
         print(f"🔄 '{city_name}' CSV → 해시 시스템 마이그레이션 시작...")
         
@@ -763,10 +753,10 @@ def migrate_csv_to_hash(city_name):
             print("  ℹ️ 마이그레이션할 CSV 데이터가 없습니다")
             return 0
         
-        migrated_count = 0
-        for url in completed_urls:
-            if mark_url_processed_fast(url, city_name, "csv_migration"):
-                migrated_count += 1
+        migrated_count = mark_urls_processed_fast(
+            [{"url": url, "product_number": "csv_migration"} for url in completed_urls],
+            city_name
+        )
         
         print(f"  ✅ 마이그레이션 완료: {migrated_count}개 URL")
         return migrated_count
@@ -0,0 +1,402 @@
+"""
+🧱 크롤링 상품 데이터 Parquet 데이터셋 (열 지향 내보내기 / 읽기)
+- data/<대륙>/<국가>/<도시>/{klook|kkday}_<도시>_products.csv → platform/대륙/국가/도시명 hive 파티션
+- 타입 컬럼: 가격(float, 숫자만), 평점(float, 0~5), 리뷰수(int), 순위(int), 수집일시(timestamp)
+  나머지 CSV 컬럼은 문자열 그대로, 원래 가격 문자열은 가격_원문 으로 보존
+- 증분: 소스 CSV별 읽은 위치를 _manifest.json 에 기록 → 추가된 행만 새 parquet 파일로 기록
+  (기존 파티션 파일은 다시 쓰지 않음, 소스 CSV가 중간부터 바뀐 경우만 그 소스의 파일 교체)
+- 읽기: 파티션 가지치기 + row group 통계 기반 필터 푸시다운 + 필요한 컬럼만 읽기
+
+기반: unified_travel_database.py 의 도시 CSV 탐색/평점 정규화 규칙
+"""
+
+import os
+import csv
+import json
+import hashlib
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Iterable, Iterator, Tuple
+
+from unified_travel_database import KlookToUnifiedConverter, find_city_csvs
+
+# 조건부 import - pyarrow 가 없으면 내보내기/읽기 불가
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+DATASET_ROOT = "data_parquet"
+MANIFEST_NAME = "_manifest.json"      # '_' 로 시작하는 파일은 데이터셋 탐색에서 제외됨
+ROW_GROUP_ROWS = 50000                # 배치(= row group) 크기
+TAIL_CHECK_BYTES = 4096               # 소스 CSV 앞부분 변경 감지용
+
+# 파티션 키 (디렉토리 순서)
+PARTITION_COLUMNS = ["platform", "대륙", "국가", "도시명"]
+
+# 타입 변환 컬럼: CSV 컬럼 → (파서 이름, arrow 타입 이름)
+TYPED_COLUMNS = {
+    "가격": ("price", "float64"),
+    "평점": ("rating", "float64"),
+    "리뷰수": ("int", "int64"),
+    "순위": ("int", "int64"),
+    "수집일시": ("timestamp", "timestamp"),
+}
+PRICE_TEXT_COLUMN = "가격_원문"
+
+# 플랫폼별 CSV 컬럼 이름 차이 (klook 페이지 크롤러: 가격_정제/평점_정제/수집_시간/탭내_랭킹/도시)
+COLUMN_ALIASES = {
+    "가격": ["가격", "가격_정제", "가격_원본"],
+    "평점": ["평점", "평점_정제", "평점_원본"],
+    "리뷰수": ["리뷰수"],
+    "순위": ["순위", "탭내_랭킹"],
+    "수집일시": ["수집일시", "수집_시간"],
+    "도시명": ["도시명", "도시"],
+}
+
+TIMESTAMP_FORMATS = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"]
+
+
+# =============================================================================
+# 값 파싱
+# =============================================================================
+
+def parse_price(value: Any) -> Optional[float]:
+    """'₩57,616' → 57616.0 (숫자가 없으면 None)"""
+    match = re.search(r'\d[\d,]*(?:\.\d+)?', str(value or ""))
+    if not match:
+        return None
+    try:
+        return float(match.group(0).replace(',', ''))
+    except ValueError:
+        return None
+
+def parse_int(value: Any) -> Optional[int]:
+    """'이용후기 993건', '1,234' → 정수 (숫자가 없으면 None)"""
+    match = re.search(r'\d[\d,]*', str(value or ""))
+    return int(match.group(0).replace(',', '')) if match else None
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    text = str(value or "").strip()
+    if not text:
+        return None
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(text[:19], fmt)
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return None
+
+_PARSERS = {
+    "price": parse_price,
+    "rating": KlookToUnifiedConverter.normalize_rating,
+    "int": parse_int,
+    "timestamp": parse_timestamp,
+}
+
+def _first_value(record: Dict[str, str], column: str) -> str:
+    """별칭 중 값이 있는 첫 컬럼 값"""
+    for name in COLUMN_ALIASES.get(column, [column]):
+        value = record.get(name)
+        if value:
+            return value
+    return ""
+
+def _arrow_type(type_name: str):
+    if type_name == "timestamp":
+        return pa.timestamp("s")
+    return getattr(pa, type_name)()
+
+def file_schema(header: List[str]):
+    """소스 CSV 헤더 → parquet 파일 스키마
+
+    타입 컬럼은 플랫폼과 관계없이 항상 같은 이름/타입으로 기록 (별칭 컬럼 값 사용),
+    나머지 헤더 컬럼은 문자열, 파티션 컬럼은 경로에만 기록
+    """
+    fields = []
+    for column, (_, type_name) in TYPED_COLUMNS.items():
+        fields.append(pa.field(column, _arrow_type(type_name)))
+        if column == "가격":
+            fields.append(pa.field(PRICE_TEXT_COLUMN, pa.string()))
+    for column in header:
+        if column and column not in PARTITION_COLUMNS and column not in TYPED_COLUMNS:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+def dataset_schema(columns: Iterable[str]):
+    """지금까지 본 모든 컬럼의 통합 스키마 (컬럼이 없는 파일은 null 로 읽힘) + 파티션 컬럼"""
+    fields = {field.name: field for field in file_schema(list(columns))}
+    partition_fields = [pa.field(column, pa.string()) for column in PARTITION_COLUMNS]
+    return pa.schema(list(fields.values()) + partition_fields)
+
+
+# =============================================================================
+# 소스 CSV 스트리밍 (바이트 위치 추적)
+# =============================================================================
+
+def _file_stat(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+def _tail_digest(path: str, offset: int) -> str:
+    start = max(0, offset - TAIL_CHECK_BYTES)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return hashlib.md5(f.read(offset - start)).hexdigest()
+
+def iter_csv_records(path: str, offset: int = 0) -> Iterator[Tuple[List[str], int]]:
+    """offset(바이트)부터 (행, 레코드 끝 위치) 생성 - 줄바꿈으로 끝나지 않은 마지막 줄은 건너뜀"""
+    position = [offset]
+
+    def lines(f):
+        for raw in f:
+            if not raw.endswith(b'\n'):
+                return
+            encoding = 'utf-8-sig' if position[0] == 0 else 'utf-8'
+            position[0] += len(raw)
+            yield raw.decode(encoding)
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for row in csv.reader(lines(f)):
+            yield row, position[0]
+
+def detect_platform(csv_path: str, record: Dict[str, str]) -> str:
+    """데이터소스 컬럼 / 파일명 / URL 로 플랫폼 판별 (unified_travel_database 규칙과 동일)"""
+    source = str(record.get('데이터소스', '')).lower()
+    file_name = os.path.basename(csv_path).lower()
+    if source == 'kkday' or file_name.startswith('kkday_') or 'kkday.com' in str(record.get('URL', '')):
+        return "kkday"
+    return "klook"
+
+def _partition_value(value: Any) -> str:
+    text = str(value or "").strip().replace("/", "_")
+    return text or "기타"
+
+
+# =============================================================================
+# 내보내기
+# =============================================================================
+
+class ParquetProductExporter:
+    """도시 CSV → 파티션 Parquet 데이터셋 (소스별 증분)"""
+
+    def __init__(self, root: str = DATASET_ROOT, row_group_rows: int = ROW_GROUP_ROWS):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow 가 설치되지 않았습니다 (pip install pyarrow)")
+        self.root = root
+        self.row_group_rows = row_group_rows
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self.run_id = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        self._file_seq = 0
+        os.makedirs(root, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    # -------------------------------------------------------------------------
+    # 매니페스트
+    # -------------------------------------------------------------------------
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (IOError, ValueError) as e:
+                print(f"⚠️ Parquet 매니페스트 로드 실패, 새로 시작: {e}")
+        return {"columns": [], "sources": {}}
+
+    def _save_manifest(self):
+        self.manifest["updated_at"] = datetime.now().isoformat()
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    def _remove_source_files(self, entry: Dict[str, Any]):
+        for relative_path in entry.get("files", []):
+            path = os.path.join(self.root, relative_path)
+            if os.path.exists(path):
+                os.remove(path)
+
+    # -------------------------------------------------------------------------
+    # 기록
+    # -------------------------------------------------------------------------
+
+    def _partition_dir(self, key: Tuple[str, ...]) -> str:
+        return os.path.join(*[f"{column}={value}" for column, value in zip(PARTITION_COLUMNS, key)])
+
+    def _to_columns(self, records: List[Dict[str, str]], schema) -> Dict[str, list]:
+        """레코드 목록 → 스키마 순서의 컬럼 리스트 (타입 컬럼은 파싱)"""
+        columns = {}
+        for field in schema:
+            name = field.name
+            if name == PRICE_TEXT_COLUMN:
+                columns[name] = [_first_value(record, "가격") or None for record in records]
+            elif name in TYPED_COLUMNS:
+                parser = _PARSERS[TYPED_COLUMNS[name][0]]
+                columns[name] = [parser(_first_value(record, name)) for record in records]
+            else:
+                columns[name] = [record.get(name) for record in records]
+        return columns
+
+    def _write_batch(self, csv_path: str, records: List[Dict[str, str]], schema, writers: Dict):
+        """배치를 파티션별로 나눠 파티션당 1개 파일(이번 실행)에 row group 으로 추가"""
+        groups = {}
+        for record in records:
+            key = (
+                detect_platform(csv_path, record),
+                _partition_value(record.get("대륙")),
+                _partition_value(record.get("국가")),
+                _partition_value(_first_value(record, "도시명")),
+            )
+            groups.setdefault(key, []).append(record)
+
+        for key, group in groups.items():
+            if key not in writers:
+                self._file_seq += 1
+                relative_path = os.path.join(self._partition_dir(key), f"part-{self.run_id}-{self._file_seq:04d}.parquet")
+                temp_path = os.path.join(self.root, os.path.dirname(relative_path),
+                                         "." + os.path.basename(relative_path) + ".tmp")
+                os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+                writers[key] = (pq.ParquetWriter(temp_path, schema, compression="zstd"), temp_path, relative_path)
+            writer = writers[key][0]
+            writer.write_table(pa.Table.from_pydict(self._to_columns(group, schema), schema=schema))
+
+    def export_csv(self, csv_path: str, force: bool = False) -> int:
+        """CSV 1개의 새 행을 데이터셋에 추가 → 추가한 행 수"""
+        sources = self.manifest["sources"]
+        entry = sources.get(csv_path)
+        size, mtime_ns = _file_stat(csv_path)
+
+        if entry is not None and not force:
+            if size == entry["size"] and mtime_ns == entry["mtime_ns"]:
+                return 0
+            if size < entry["offset"] or _tail_digest(csv_path, entry["offset"]) != entry["tail"]:
+                print(f"   🔄 {os.path.basename(csv_path)}: 추가 외 변경 → 이 소스의 파일만 다시 기록")
+                force = True
+
+        if entry is not None and force:
+            self._remove_source_files(entry)
+            entry = None
+
+        offset = entry["offset"] if entry else 0
+        header = entry["header"] if entry else None
+        schema = file_schema(header) if header else None
+        writers = {}
+        batch = []
+        rows = 0
+        end_offset = offset
+
+        try:
+            for row, end_offset in iter_csv_records(csv_path, offset):
+                if header is None:
+                    header = row
+                    schema = file_schema(header)
+                    continue
+                record = dict(zip(header, row))
+                if not record.get("URL"):
+                    continue
+                batch.append(record)
+                if len(batch) >= self.row_group_rows:
+                    self._write_batch(csv_path, batch, schema, writers)
+                    rows += len(batch)
+                    batch = []
+            if batch:
+                self._write_batch(csv_path, batch, schema, writers)
+                rows += len(batch)
+        except Exception:
+            for writer, temp_path, _ in writers.values():
+                writer.close()
+                os.remove(temp_path)
+            raise
+
+        # 임시 파일 → 최종 이름 (완성된 파일만 데이터셋에 보임)
+        new_files = []
+        for writer, temp_path, relative_path in writers.values():
+            writer.close()
+            os.replace(temp_path, os.path.join(self.root, relative_path))
+            new_files.append(relative_path)
+
+        if header:
+            known = self.manifest["columns"]
+            known.extend(column for column in header if column and column not in known)
+
+        sources[csv_path] = {
+            "header": header,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "offset": end_offset,
+            "tail": _tail_digest(csv_path, end_offset),
+            "rows": (entry["rows"] if entry else 0) + rows,
+            "files": (entry["files"] if entry else []) + new_files,
+        }
+        self._save_manifest()
+        return rows
+
+    def export(self, paths: Iterable[str], force: bool = False) -> Dict[str, Any]:
+        """도시 CSV(또는 data 디렉토리) 전체 내보내기 → 통계"""
+        stats = {"files": 0, "changed_files": 0, "rows": 0}
+        for csv_path in find_city_csvs(paths):
+            stats["files"] += 1
+            try:
+                rows = self.export_csv(csv_path, force=force)
+            except Exception as e:
+                print(f"❌ Parquet 내보내기 실패 ({csv_path}): {e}")
+                continue
+            if rows:
+                stats["changed_files"] += 1
+                stats["rows"] += rows
+                print(f"   📦 {os.path.basename(csv_path)}: +{rows}행")
+
+        print(f"✅ Parquet 내보내기 완료: {stats['files']}개 CSV 중 {stats['changed_files']}개 변경, "
+              f"{stats['rows']:,}행 추가 → {self.root}")
+        return stats
+
+
+# =============================================================================
+# 읽기
+# =============================================================================
+
+def open_product_dataset(root: str = DATASET_ROOT):
+    """hive 파티션 데이터셋 (스키마는 매니페스트의 통합 컬럼 기준)"""
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow 가 설치되지 않았습니다 (pip install pyarrow)")
+
+    manifest_path = os.path.join(root, MANIFEST_NAME)
+    columns = []
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            columns = json.load(f).get("columns", [])
+
+    partitioning = ds.partitioning(
+        pa.schema([pa.field(column, pa.string()) for column in PARTITION_COLUMNS]), flavor="hive"
+    )
+    return ds.dataset(root, format="parquet", partitioning=partitioning,
+                      schema=dataset_schema(columns) if columns else None)
+
+def read_products(root: str = DATASET_ROOT, columns: Optional[List[str]] = None,
+                  filters: Any = None, as_pandas: bool = True):
+    """
+    필요한 컬럼/행만 읽기
+
+    Args:
+        columns: 읽을 컬럼 (None 이면 전체)
+        filters: pyarrow 식 또는 [("platform", "=", "klook"), ("가격", "<", 50000)] 형식 (DNF 지원)
+                 파티션 컬럼 조건은 디렉토리 단위로, 나머지는 row group 통계로 건너뜀
+        as_pandas: True 면 DataFrame, False 면 pyarrow Table
+    """
+    dataset = open_product_dataset(root)
+    if filters is not None and not isinstance(filters, ds.Expression):
+        filters = pq.filters_to_expression(filters)
+    table = dataset.to_table(columns=columns, filter=filters)
+    return table.to_pandas() if as_pandas else table
+
+def export_city_csvs(paths: Iterable[str], root: str = DATASET_ROOT, force: bool = False) -> Dict[str, Any]:
+    """도시 CSV(또는 data 디렉토리)를 Parquet 데이터셋으로 내보내는 편의 함수"""
+    return ParquetProductExporter(root).export(paths, force=force)
@@ -0,0 +1,451 @@
+"""
+🔗 플랫폼 간 동일 상품 매칭 엔진
+- KLOOK / KKday / MyRealTrip 의 같은 액티비티를 하나의 매칭 그룹으로 연결
+- 블로킹: 도시 + 가격대(로그 구간, 인접 구간 포함) + 소요시간 구간
+- 후보 생성: title/theme_tags shingle MinHash LSH (전체 쌍 비교 O(n²) 회피)
+- 점수: 후보 쌍만 토큰 집합 Jaccard 로 정확히 계산
+- 증분 모드: 마지막 실행 이후 추가/내용 변경된 상품(products.change_seq)만 기존 상품과 비교
+
+기반: unified_travel_database.py products 테이블
+"""
+
+import json
+import math
+import re
+import zlib
+import hashlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+from unified_travel_database import UnifiedTravelDatabase
+
+# 조건부 import - numpy 가 있으면 MinHash 계산을 벡터화
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# 매칭 기본 설정
+MATCH_THRESHOLD = 0.5          # 최종 유사도 기준 (0~1)
+MINHASH_NUM_PERM = 48          # MinHash 해시 함수 수
+LSH_BANDS = 16                 # 밴드 수 (rows = NUM_PERM / BANDS = 3) → 유사도 0.5 쌍은 약 88%, 0.6 이상은 98% 후보 포함
+PRICE_BAND_RATIO = 1.5         # 가격대 구간 배율 (인접 구간까지 비교하므로 약 2.25배 차이까지 허용)
+TITLE_WEIGHT = 0.8             # title 유사도 가중치 (나머지는 theme_tags)
+
+_MERSENNE_PRIME = 4294967311   # 2^32 보다 큰 소수 (a*h+b 가 uint64 범위 안에 유지됨)
+_MAX_HASH = (1 << 32) - 1
+
+# 소요시간 구간 (시간 단위 상한) - 양쪽 모두 알려진 경우에만 비교
+DURATION_BUCKETS = [2, 4, 8, 24]
+
+# 제목 정규화 시 제거할 흔한 수식어
+TITLE_STOPWORDS = {"투어", "입장권", "티켓", "체험", "일일", "당일", "출발", "한국어", "가이드", "tour", "ticket"}
+
+
+# =============================================================================
+# 텍스트 정규화 / shingle
+# =============================================================================
+
+def normalize_title(title: str) -> str:
+    """괄호 기호·특수문자 제거, 소문자화, 공백 정리"""
+    title = str(title or "").lower()
+    title = re.sub(r"[\[\]\(\)\{\}<>【】「」『』|│/·,.!?:;~\-+&*#'\"]", " ", title)
+    return re.sub(r"\s+", " ", title).strip()
+
+def title_shingles(title: str, size: int = 3) -> set:
+    """제목 토큰 + 문자 n-gram 집합 (띄어쓰기/어순 차이에 강하도록)"""
+    normalized = normalize_title(title)
+    words = [word for word in normalized.split() if word not in TITLE_STOPWORDS]
+
+    shingles = set(words)
+    compact = "".join(words)
+    if len(compact) <= size:
+        if compact:
+            shingles.add(compact)
+    else:
+        shingles.update(compact[i:i + size] for i in range(len(compact) - size + 1))
+    return shingles
+
+def parse_theme_tags(theme_tags: Any) -> set:
+    """theme_tags JSON 문자열/리스트 → 집합"""
+    if not theme_tags:
+        return set()
+    if isinstance(theme_tags, str):
+        try:
+            theme_tags = json.loads(theme_tags)
+        except (ValueError, TypeError):
+            return set()
+    return {str(tag) for tag in theme_tags}
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def price_band(price: Any) -> int:
+    """가격 → 로그 구간 번호 (0 이하/미상은 0)"""
+    try:
+        price = float(price or 0)
+    except (TypeError, ValueError):
+        return 0
+    if price <= 0:
+        return 0
+    return 1 + int(math.log(price) / math.log(PRICE_BAND_RATIO))
+
+def duration_bucket(hours: Any) -> Optional[int]:
+    """소요시간 → 구간 번호 (미상이면 None)"""
+    if hours is None or hours == "":
+        return None
+    try:
+        hours = float(hours)
+    except (TypeError, ValueError):
+        return None
+    for index, limit in enumerate(DURATION_BUCKETS):
+        if hours <= limit:
+            return index
+    return len(DURATION_BUCKETS)
+
+
+# =============================================================================
+# MinHash
+# =============================================================================
+
+class MinHasher:
+    """고정 시드 MinHash 서명 생성기"""
+
+    def __init__(self, num_perm: int = MINHASH_NUM_PERM, seed: int = 42):
+        self.num_perm = num_perm
+        rng = _Lcg(seed)
+        self.a = [rng.next() % _MAX_HASH + 1 for _ in range(num_perm)]
+        self.b = [rng.next() % _MAX_HASH for _ in range(num_perm)]
+        if NUMPY_AVAILABLE:
+            self._a = np.array(self.a, dtype=np.uint64)[:, None]
+            self._b = np.array(self.b, dtype=np.uint64)[:, None]
+
+    def signature(self, shingles: Iterable[str]) -> Tuple[int, ...]:
+        hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+        if not hashes:
+            return tuple([_MAX_HASH] * self.num_perm)
+
+        if NUMPY_AVAILABLE:
+            values = (self._a * np.array(hashes, dtype=np.uint64)[None, :] + self._b) % np.uint64(_MERSENNE_PRIME)
+            return tuple(int(v) for v in values.min(axis=1))
+
+        return tuple(
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+            for a, b in zip(self.a, self.b)
+        )
+
+class _Lcg:
+    """플랫폼과 무관하게 같은 해시 계수를 만들기 위한 간단한 LCG"""
+
+    def __init__(self, seed: int):
+        self.state = seed
+
+    def next(self) -> int:
+        self.state = (self.state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+        return self.state >> 16
+
+
+# =============================================================================
+# 매칭 엔진
+# =============================================================================
+
+class ProductMatcher:
+    """products 테이블의 플랫폼 간 동일 상품 매칭 관리 클래스"""
+
+    def __init__(self, db: UnifiedTravelDatabase, threshold: float = MATCH_THRESHOLD,
+                 num_perm: int = MINHASH_NUM_PERM, bands: int = LSH_BANDS):
+        """
+        매칭 엔진 초기화
+
+        Args:
+            db: 통합 데이터베이스 인스턴스
+            threshold: 매칭으로 인정할 최소 유사도
+            num_perm / bands: MinHash 서명 길이와 LSH 밴드 수 (num_perm 은 bands 의 배수)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm 은 bands 의 배수여야 합니다")
+
+        self.db = db
+        self.conn = db.conn
+        self.threshold = threshold
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self._create_tables()
+
+    def _create_tables(self):
+        """매칭 결과 테이블 생성"""
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS product_matches (
+            provider_a TEXT NOT NULL,
+            product_id_a TEXT NOT NULL,
+            provider_b TEXT NOT NULL,
+            product_id_b TEXT NOT NULL,
+            destination_city TEXT,
+            score REAL NOT NULL,
+            matched_at TEXT NOT NULL,
+            PRIMARY KEY (provider_a, product_id_a, provider_b, product_id_b)
+        );
+
+        CREATE TABLE IF NOT EXISTS product_match_groups (
+            provider TEXT NOT NULL,
+            provider_product_id TEXT NOT NULL,
+            group_id TEXT NOT NULL,
+            destination_city TEXT,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (provider, provider_product_id)
+        );
+
+        CREATE TABLE IF NOT EXISTS match_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_match_city ON product_matches(destination_city);
+        CREATE INDEX IF NOT EXISTS idx_match_b ON product_matches(provider_b, product_id_b);
+        CREATE INDEX IF NOT EXISTS idx_match_group_id ON product_match_groups(group_id);
+        """)
+        self.conn.commit()
+
+    # -------------------------------------------------------------------------
+    # 후보 생성 / 점수 계산 (DB 와 무관한 순수 로직)
+    # -------------------------------------------------------------------------
+
+    def _prepare(self, product: Dict[str, Any]) -> Dict[str, Any]:
+        shingles = title_shingles(product.get("title", ""))
+        return {
+            "key": (product["provider"], str(product["provider_product_id"])),
+            "city": product.get("destination_city") or "",
+            "shingles": shingles,
+            "themes": parse_theme_tags(product.get("theme_tags")),
+            "price_band": price_band(product.get("price_value")),
+            "duration": duration_bucket(product.get("duration_hours")),
+            "bands": self._band_hashes(self.hasher.signature(shingles)),
+        }
+
+    def _band_hashes(self, signature: Tuple[int, ...]) -> List[int]:
+        rows = self.rows_per_band
+        return [hash(signature[i * rows:(i + 1) * rows]) for i in range(self.bands)]
+
+    def score(self, a: Dict[str, Any], b: Dict[str, Any]) -> float:
+        """준비된 두 상품의 유사도 (title Jaccard + theme_tags Jaccard 가중 합)"""
+        title_score = jaccard(a["shingles"], b["shingles"])
+        if a["themes"] and b["themes"]:
+            return TITLE_WEIGHT * title_score + (1 - TITLE_WEIGHT) * jaccard(a["themes"], b["themes"])
+        return title_score
+
+    def find_matches(self, new_products: List[Dict[str, Any]],
+                     existing_products: Optional[List[Dict[str, Any]]] = None) -> List[Tuple]:
+        """
+        새 상품과 (기존 + 새) 상품 사이의 매칭 쌍 계산 (단일 패스)
+
+        Returns:
+            [(key_a, key_b, city, score), ...]  key = (provider, provider_product_id)
+        """
+        # LSH 버킷: (도시, 가격대, 밴드번호, 밴드해시) → 준비된 상품 목록
+        buckets = defaultdict(list)
+
+        def insert(item):
+            for band_index, band_hash in enumerate(item["bands"]):
+                buckets[(item["city"], item["price_band"], band_index, band_hash)].append(item)
+
+        for product in existing_products or []:
+            insert(self._prepare(product))
+
+        matches = []
+        for product in new_products:
+            item = self._prepare(product)
+            seen = set()
+
+            # 같은 도시에서 인접 가격대까지 같은 밴드를 공유하는 후보만 비교
+            for band_offset in (-1, 0, 1):
+                for band_index, band_hash in enumerate(item["bands"]):
+                    for other in buckets.get((item["city"], item["price_band"] + band_offset, band_index, band_hash), ()):
+                        if other["key"] in seen or other["key"][0] == item["key"][0]:
+                            continue  # 같은 플랫폼끼리는 매칭하지 않음
+                        seen.add(other["key"])
+
+                        # 소요시간 구간 블로킹 (양쪽 모두 알려진 경우 1구간 차이까지 허용)
+                        if item["duration"] is not None and other["duration"] is not None \
+                                and abs(item["duration"] - other["duration"]) > 1:
+                            continue
+
+                        similarity = self.score(item, other)
+                        if similarity >= self.threshold:
+                            key_a, key_b = sorted([item["key"], other["key"]])
+                            matches.append((key_a, key_b, item["city"], round(similarity, 4)))
+
+            insert(item)
+
+        return matches
+
+    # -------------------------------------------------------------------------
+    # DB 실행
+    # -------------------------------------------------------------------------
+
+    def _get_state(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM match_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _load_products(self, where: str = "", params: Iterable[Any] = ()) -> List[Dict[str, Any]]:
+        sql = ("SELECT provider, provider_product_id, destination_city, title, theme_tags, "
+               "price_value, duration_hours, updated_at, change_seq FROM products")
+        if where:
+            sql += f" WHERE {where}"
+        return [dict(row) for row in self.conn.execute(sql, list(params))]
+
+    def run(self, incremental: bool = True, cities: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        매칭 실행
+
+        Args:
+            incremental: True 면 마지막 실행 이후 추가/내용 변경된 상품만 새로 비교 (products.change_seq 기준)
+            cities: 특정 도시만 처리 (None 이면 전체)
+
+        Returns:
+            {"new_products", "compared_against", "matches", "groups", "cities"}
+        """
+        watermark = self._get_state("last_change_seq") if incremental else None
+
+        city_filter, city_params = "", []
+        if cities:
+            city_filter = f"destination_city IN ({', '.join('?' for _ in cities)})"
+            city_params = list(cities)
+
+        if watermark:
+            where = " AND ".join(filter(None, ["change_seq > ?", city_filter]))
+            new_products = self._load_products(where, [int(watermark)] + city_params)
+        else:
+            new_products = self._load_products(city_filter, city_params)
+
+        stats = {"new_products": len(new_products), "compared_against": 0, "matches": 0, "groups": 0, "cities": 0}
+        if not new_products:
+            print("ℹ️ 새로 매칭할 상품이 없습니다")
+            return stats
+
+        new_keys = {(p["provider"], str(p["provider_product_id"])) for p in new_products}
+        affected_cities = sorted({p["destination_city"] or "" for p in new_products})
+
+        # 증분 모드: 같은 도시의 기존 상품을 인덱스에만 넣고 새 상품으로 조회
+        existing_products = []
+        if watermark:
+            where = f"destination_city IN ({', '.join('?' for _ in affected_cities)})"
+            existing_products = [
+                p for p in self._load_products(where, affected_cities)
+                if (p["provider"], str(p["provider_product_id"])) not in new_keys
+            ]
+        stats["compared_against"] = len(existing_products)
+
+        matches = self.find_matches(new_products, existing_products)
+        now = datetime.now().isoformat(timespec="seconds")
+        latest = max((p["change_seq"] or 0 for p in new_products), default=0)
+
+        with self.conn:
+            # 갱신된 상품의 이전 매칭은 제거 후 다시 기록
+            self.conn.executemany(
+                "DELETE FROM product_matches WHERE (provider_a = ? AND product_id_a = ?) OR (provider_b = ? AND product_id_b = ?)",
+                [(provider, pid, provider, pid) for provider, pid in new_keys]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO product_matches "
+                "(provider_a, product_id_a, provider_b, product_id_b, destination_city, score, matched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(a[0], a[1], b[0], b[1], city, score, now) for a, b, city, score in matches]
+            )
+            stats["groups"] = self._rebuild_groups(affected_cities, now)
+            if not cities:
+                # 도시 일부만 처리한 경우 워터마크를 올리면 나머지 도시 상품이 누락되므로 전체 실행에서만 갱신
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO match_state (key, value) VALUES ('last_change_seq', ?)",
+                    (str(max(latest, int(watermark or 0))),)
+                )
+
+        stats["matches"] = len(matches)
+        stats["cities"] = len(affected_cities)
+        print(f"✅ 상품 매칭 완료: 신규 {stats['new_products']}개 × 기존 {stats['compared_against']}개 → "
+              f"매칭 {stats['matches']}쌍, 그룹 {stats['groups']}개 ({stats['cities']}개 도시)")
+        return stats
+
+    def _rebuild_groups(self, cities: List[str], now: str) -> int:
+        """도시별 매칭 쌍을 연결 요소(union-find)로 묶어 그룹 테이블 갱신"""
+        if not cities:
+            return 0
+
+        placeholders = ", ".join("?" for _ in cities)
+        pairs = self.conn.execute(
+            f"SELECT provider_a, product_id_a, provider_b, product_id_b, destination_city "
+            f"FROM product_matches WHERE destination_city IN ({placeholders})", cities
+        ).fetchall()
+
+        parent = {}
+
+        def find(key):
+            parent.setdefault(key, key)
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        city_of = {}
+        for provider_a, id_a, provider_b, id_b, city in pairs:
+            key_a, key_b = (provider_a, id_a), (provider_b, id_b)
+            city_of[key_a] = city_of[key_b] = city
+            root_a, root_b = find(key_a), find(key_b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        members = defaultdict(list)
+        for key in parent:
+            members[find(key)].append(key)
+
+        rows = []
+        for root, group in members.items():
+            # 그룹 ID 는 대표(최소) 키의 해시 → 같은 구성원이면 재실행해도 동일
+            group_id = hashlib.sha1(f"{root[0]}:{root[1]}".encode()).hexdigest()[:16]
+            rows.extend((provider, pid, group_id, city_of[(provider, pid)], now) for provider, pid in group)
+
+        self.conn.execute(f"DELETE FROM product_match_groups WHERE destination_city IN ({placeholders})", cities)
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO product_match_groups "
+            "(provider, provider_product_id, group_id, destination_city, updated_at) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        return len(members)
+
+    # -------------------------------------------------------------------------
+    # 조회
+    # -------------------------------------------------------------------------
+
+    def get_match_group(self, provider: str, provider_product_id: str) -> List[Dict[str, Any]]:
+        """상품이 속한 매칭 그룹의 전체 상품 (가격 낮은 순)"""
+        return [dict(row) for row in self.conn.execute("""
+            SELECT p.provider, p.provider_product_id, p.title, p.price_value, p.price_currency,
+                   p.rating_value, p.landing_url, g.group_id
+            FROM product_match_groups g
+            JOIN products p ON p.provider = g.provider AND p.provider_product_id = g.provider_product_id
+            WHERE g.group_id = (
+                SELECT group_id FROM product_match_groups WHERE provider = ? AND provider_product_id = ?
+            )
+            ORDER BY p.price_value ASC
+        """, (provider, str(provider_product_id)))]
+
+
+def run_product_matching(db_path: str = "unified_travel_products.db", incremental: bool = True,
+                         cities: Optional[List[str]] = None) -> Dict[str, Any]:
+    """통합 DB 매칭 실행 편의 함수"""
+    db = UnifiedTravelDatabase(db_path)
+    try:
+        return ProductMatcher(db).run(incremental=incremental, cities=cities)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("🔗 플랫폼 간 상품 매칭 엔진")
+    print("   ✅ 도시/가격대/소요시간 블로킹")
+    print("   ✅ MinHash LSH 후보 생성 + Jaccard 점수")
+    print("   ✅ 증분 매칭 및 매칭 그룹 테이블")
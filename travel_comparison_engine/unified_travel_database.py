@@ -11,23 +11,101 @@
 import sqlite3
 import json
 import hashlib
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+import csv
+import glob
+import time
+import base64
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any, Iterable, Iterator
 import os
 import re
 
+# 대량 적재 기본 설정
+BULK_CHUNK_SIZE = 5000
+# 크롤러 CSV 의 수집일시는 시간대 없는 한국 시각 (datetime.now())
+CRAWL_TIMEZONE = timezone(timedelta(hours=9))
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",          # 읽기/쓰기 동시성
+    "PRAGMA synchronous=NORMAL",        # WAL에서 안전한 수준의 fsync
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",         # 64MB 페이지 캐시
+    "PRAGMA mmap_size=268435456",       # 256MB 메모리 매핑
+]
+
+# products 테이블 적재 컬럼 (created_at/updated_at 제외)
+PRODUCT_COLUMNS = [
+    "provider", "provider_product_id", "fetch_ts", "fx_rate",
+    "destination_city", "country", "theme_tags",
+    "title", "subtitle", "supplier_name", "duration_hours", "pickup", "language",
+    "included", "excluded", "meeting_point",
+    "price_value", "price_currency", "option_list", "price_basis",
+    "rating_value", "rating_count",
+    "cancel_policy", "availability_calendar", "rank_position",
+    "landing_url", "affiliate_url", "images",
+    "product_hash", "data_source_meta",
+]
+
+# 충돌 시 갱신하지 않는 컬럼 (키)
+_UPSERT_KEY_COLUMNS = ("provider", "provider_product_id")
+# 값이 달라져도 내용 변경으로 보지 않는 컬럼 (수집 시각/환율 스냅샷/변환 메타)
+_UPSERT_VOLATILE_COLUMNS = ("fetch_ts", "fx_rate", "data_source_meta")
+
+# 검색 결과 컬럼 / 정렬 옵션 (키셋 페이지네이션: 정렬 키 = 인덱스 (도시, 정렬 컬럼, 보조 컬럼, rowid) 순서
+# → 인덱스를 정방향/역방향 그대로 읽고 LIMIT 에서 멈춤, 임시 정렬 없음)
+SEARCH_RESULT_COLUMNS = [
+    "provider", "provider_product_id", "destination_city", "title",
+    "price_value", "price_currency", "rating_value", "rating_count",
+    "rank_position", "landing_url", "images", "theme_tags",
+]
+SEARCH_SORT_OPTIONS = {
+    # 평점 높은 순 (같으면 가격 낮은 순) - idx_city_rating_desc_price 정방향
+    "rating": [("rating_value", "DESC"), ("price_value", "ASC"), ("rowid", "ASC")],
+    # 가격 낮은 순 (같으면 평점 높은 순) - idx_city_price_rating_desc 정방향
+    "price": [("price_value", "ASC"), ("rating_value", "DESC"), ("rowid", "ASC")],
+    # 가격 높은 순 (같으면 평점 낮은 순) - idx_city_price_rating_desc 역방향
+    "price_desc": [("price_value", "DESC"), ("rating_value", "ASC"), ("rowid", "DESC")],
+    # 플랫폼 노출 순위 순 - idx_city_rank 정방향
+    "rank": [("rank_position", "ASC"), ("rowid", "ASC")],
+}
+SEARCH_MAX_LIMIT = 100
+
+# 가격/평점 이력 (값이 바뀔 때만 새 구간, 같으면 마지막 구간의 last_ts 만 연장)
+HISTORY_VALUE_COLUMNS = ["price_value", "price_currency", "rating_value", "rating_count", "rank_position"]
+HISTORY_RUN_COLUMNS = ["first_ts", "last_ts", "observations"] + HISTORY_VALUE_COLUMNS + ["price_min", "price_max", "resolution"]
+HISTORY_DOWNSAMPLE_DAYS = 90            # 이보다 오래된 구간은 다운샘플 대상
+HISTORY_DOWNSAMPLE_BUCKET = 86400       # 다운샘플 단위 (초, 기본 1일)
+
+# 내용이 실제로 바뀐 경우에만 updated_at / change_seq 갱신 (UPDATE SET 의 컬럼 참조는 변경 전 값)
+_CONTENT_CHANGED_SQL = "(" + " OR ".join(
+    f"{col} IS NOT excluded.{col}" for col in PRODUCT_COLUMNS
+    if col not in _UPSERT_KEY_COLUMNS and col not in _UPSERT_VOLATILE_COLUMNS
+) + ")"
+# 단조 증가 변경 순번 (idx_change_seq 로 MAX 조회는 인덱스 끝 1회 탐색)
+_NEXT_CHANGE_SEQ_SQL = "(SELECT COALESCE(MAX(change_seq), 0) + 1 FROM products)"
+
+UPSERT_PRODUCT_SQL = (
+    f"INSERT INTO products ({', '.join(PRODUCT_COLUMNS)}, change_seq) "
+    f"VALUES ({', '.join('?' for _ in PRODUCT_COLUMNS)}, {_NEXT_CHANGE_SEQ_SQL}) "
+    f"ON CONFLICT(provider, provider_product_id) DO UPDATE SET "
+    + ", ".join(f"{col}=excluded.{col}" for col in PRODUCT_COLUMNS if col not in _UPSERT_KEY_COLUMNS)
+    + f", updated_at=CASE WHEN {_CONTENT_CHANGED_SQL} THEN CURRENT_TIMESTAMP ELSE updated_at END"
+    + f", change_seq=CASE WHEN {_CONTENT_CHANGED_SQL} THEN {_NEXT_CHANGE_SEQ_SQL} ELSE change_seq END"
+)
+
 class UnifiedTravelDatabase:
     """통합 여행상품 데이터베이스 관리 클래스"""
     
-    def __init__(self, db_path: str = "unified_travel_products.db"):
+    def __init__(self, db_path: str = "unified_travel_products.db", track_history: bool = True):
         """
         통합 데이터베이스 초기화
         
         Args:
             db_path: SQLite 데이터베이스 파일 경로
+            track_history: upsert 시 가격/평점 이력(product_history)도 기록
         """
         self.db_path = db_path
         self.conn = None
+        self.track_history = track_history
         self._init_database()
     
     def _init_database(self):
@@ -36,6 +114,10 @@ class UnifiedTravelDatabase:
             self.conn = sqlite3.connect(self.db_path)
             self.conn.row_factory = sqlite3.Row  # dict-like access
             
+            # WAL 및 성능 PRAGMA 설정
+            for pragma in SQLITE_PRAGMAS:
+                self.conn.execute(pragma)
+            
             # 메인 products 테이블 생성 (문서 기반)
             self._create_products_table()
             
@@ -45,6 +127,12 @@ class UnifiedTravelDatabase:
             # 인덱스 생성
             self._create_indexes()
             
+            # 가격/평점 이력 테이블 생성
+            self._create_history_tables()
+            
+            # 키워드 검색용 FTS5 테이블 (미지원 빌드면 LIKE 검색으로 대체)
+            self.fts_available = self._create_fts_table()
+            
             print(f"✅ 통합 데이터베이스 초기화 완료: {self.db_path}")
             
         except Exception as e:
@@ -110,12 +198,19 @@ class UnifiedTravelDatabase:
             -- 생성/수정 시간 (자동)
             created_at TEXT DEFAULT CURRENT_TIMESTAMP,
             updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            change_seq INTEGER,           -- 추가/내용 변경 시 증가하는 순번 (증분 처리 워터마크)
             
             PRIMARY KEY (provider, provider_product_id)
         );
         """
         
         self.conn.execute(create_table_sql)
+        
+        # 이전 버전 DB: change_seq 컬럼 추가 후 rowid 순으로 채움
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(products)")}
+        if "change_seq" not in columns:
+            self.conn.execute("ALTER TABLE products ADD COLUMN change_seq INTEGER")
+            self.conn.execute("UPDATE products SET change_seq = rowid")
         self.conn.commit()
         print("✅ products 테이블 생성 완료")
     
@@ -152,7 +247,17 @@ class UnifiedTravelDatabase:
             "CREATE INDEX IF NOT EXISTS idx_price_currency ON products(price_currency, price_value);",
             "CREATE INDEX IF NOT EXISTS idx_rating ON products(rating_value, rating_count);",
             "CREATE INDEX IF NOT EXISTS idx_rank_position ON products(rank_position);",
-            "CREATE INDEX IF NOT EXISTS idx_product_hash ON products(product_hash);"
+            "CREATE INDEX IF NOT EXISTS idx_product_hash ON products(product_hash);",
+            "CREATE INDEX IF NOT EXISTS idx_change_seq ON products(change_seq);",
+            # 비교 화면 검색용 - 인덱스 컬럼 순서/방향이 SEARCH_SORT_OPTIONS 정렬 키와 같음 (끝의 rowid 가 타이브레이커)
+            # 가격/평점 필터도 인덱스 안에서 평가 (도시 + 가격 상한 + 평점순 검색이 임시 정렬 없이 인덱스만 순회)
+            "DROP INDEX IF EXISTS idx_city_rating;",
+            "DROP INDEX IF EXISTS idx_city_price;",
+            "DROP INDEX IF EXISTS idx_city_rating_price;",
+            "DROP INDEX IF EXISTS idx_city_price_rating;",
+            "CREATE INDEX IF NOT EXISTS idx_city_rating_desc_price ON products(destination_city, rating_value DESC, price_value);",
+            "CREATE INDEX IF NOT EXISTS idx_city_price_rating_desc ON products(destination_city, price_value, rating_value DESC);",
+            "CREATE INDEX IF NOT EXISTS idx_city_rank ON products(destination_city, rank_position);",
         ]
         
         for index_sql in indexes:
@@ -160,11 +265,489 @@ class UnifiedTravelDatabase:
         
         self.conn.commit()
         print("✅ 성능 인덱스 생성 완료")
+    
+    def _create_history_tables(self):
+        """가격/평점 이력 테이블 생성 (상품별 구간을 (product_id, first_ts) 순으로 클러스터링)"""
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS history_products (
+            id INTEGER PRIMARY KEY,
+            provider TEXT NOT NULL,
+            provider_product_id TEXT NOT NULL,
+            UNIQUE (provider, provider_product_id)
+        );
+        
+        CREATE TABLE IF NOT EXISTS product_history (
+            product_id INTEGER NOT NULL,
+            first_ts INTEGER NOT NULL,     -- 구간 시작 (epoch 초, UTC)
+            last_ts INTEGER NOT NULL,      -- 같은 값이 마지막으로 관측된 시각
+            observations INTEGER NOT NULL DEFAULT 1,
+            price_value REAL,
+            price_currency TEXT,
+            rating_value REAL,
+            rating_count INTEGER,
+            rank_position INTEGER,
+            price_min REAL,                -- 다운샘플 구간의 최저/최고가 (원본 구간은 NULL)
+            price_max REAL,
+            resolution INTEGER NOT NULL DEFAULT 0,  -- 0: 원본, 그 외: 다운샘플 단위(초)
+            PRIMARY KEY (product_id, first_ts)
+        ) WITHOUT ROWID;
+        """)
+        self.conn.commit()
+        print("✅ product_history 이력 테이블 생성 완료")
+    
+    def _create_fts_table(self) -> bool:
+        """title/subtitle/theme_tags FTS5 테이블 + 동기화 트리거 생성"""
+        try:
+            exists = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='products_fts'"
+            ).fetchone()
+            
+            self.conn.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                title, subtitle, theme_tags,
+                content='products', content_rowid='rowid',
+                tokenize='unicode61'
+            );
+            
+            CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+                INSERT INTO products_fts(rowid, title, subtitle, theme_tags)
+                VALUES (new.rowid, new.title, new.subtitle, new.theme_tags);
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, title, subtitle, theme_tags)
+                VALUES ('delete', old.rowid, old.title, old.subtitle, old.theme_tags);
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF title, subtitle, theme_tags ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, title, subtitle, theme_tags)
+                VALUES ('delete', old.rowid, old.title, old.subtitle, old.theme_tags);
+                INSERT INTO products_fts(rowid, title, subtitle, theme_tags)
+                VALUES (new.rowid, new.title, new.subtitle, new.theme_tags);
+            END;
+            """)
+            
+            # 기존 DB에 FTS를 처음 붙이는 경우 기존 행 색인
+            if not exists:
+                self.conn.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+            self.conn.commit()
+            print("✅ products_fts 검색 테이블 준비 완료")
+            return True
+            
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ FTS5 사용 불가 - LIKE 검색으로 대체: {e}")
+            return False
+    
+    # =========================================================================
+    # 조회 API (비교 화면용)
+    # =========================================================================
+    
+    @staticmethod
+    def _encode_cursor(values: List[Any]) -> str:
+        payload = json.dumps(values).encode()
+        return base64.urlsafe_b64encode(payload).decode()
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> List[Any]:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    
+    @staticmethod
+    def _keyset_after(sort_keys: List[tuple], values: List[Any]) -> tuple:
+        """정렬 키 순서에서 values 보다 뒤인 행 조건 → (SQL, 파라미터)
+        
+        SQLite 는 NULL 을 가장 작은 값으로 정렬 (ASC 면 맨 앞, DESC 면 맨 뒤) → 인덱스 순서와 같게 비교
+        """
+        (column, direction), value = sort_keys[0], values[0]
+        if direction == "ASC":
+            after_sql, after_params = (f"{column} IS NOT NULL", []) if value is None else (f"{column} > ?", [value])
+        else:
+            after_sql, after_params = ("0", []) if value is None else (f"({column} < ? OR {column} IS NULL)", [value])
+        if len(sort_keys) == 1:
+            return after_sql, after_params
+        
+        equal_sql, equal_params = (f"{column} IS NULL", []) if value is None else (f"{column} = ?", [value])
+        rest_sql, rest_params = UnifiedTravelDatabase._keyset_after(sort_keys[1:], values[1:])
+        return (f"({after_sql} OR ({equal_sql} AND {rest_sql}))",
+                after_params + equal_params + rest_params)
+    
+    def _search_phase(self, conditions: List[str], params: List[Any], sort_keys: List[tuple],
+                      after: Optional[List[Any]], limit: int, first_not_null: bool = False) -> list:
+        """정렬 키 순서로 after 다음부터 limit 행 조회 (키셋 1단계)
+        
+        first_not_null: 첫 정렬 컬럼에 IS NOT NULL 조건이 있음 (DESC 에서도 범위 탐색 가능)
+        """
+        conditions, params = list(conditions), list(params)
+        if after is not None:
+            column, direction = sort_keys[0]
+            if after[0] is not None and (direction == "ASC" or first_not_null):
+                # 첫 정렬 컬럼 범위 조건 → 인덱스 시작 위치 탐색 (나머지는 같은 값 안의 순서 비교)
+                # (DESC 는 뒤쪽에 NULL 이 오므로 NULL 이 없을 때만)
+                conditions.append(f"{column} {'>=' if direction == 'ASC' else '<='} ?")
+                params.append(after[0])
+            after_sql, after_params = self._keyset_after(sort_keys, after)
+            conditions.append(after_sql)
+            params.extend(after_params)
+        
+        sql = (
+            f"SELECT rowid AS _rowid, {', '.join(SEARCH_RESULT_COLUMNS)} FROM products "
+            f"WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {', '.join(f'{column} {direction}' for column, direction in sort_keys)} LIMIT ?"
+        )
+        return self.conn.execute(sql, params + [limit]).fetchall()
+    
+    def search_products(self, city: Optional[str] = None, max_price: Optional[float] = None,
+                        min_price: Optional[float] = None, min_rating: Optional[float] = None,
+                        providers: Optional[List[str]] = None, keyword: Optional[str] = None,
+                        sort: str = "rating", limit: int = 20,
+                        cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        필터/정렬 상품 검색 (키셋 페이지네이션)
+        
+        예) 도시 X, 가격 Y 이하, 평점 높은 순 상위 N개 (전체 플랫폼)
+            db.search_products(city="도쿄", max_price=50000, sort="rating", limit=20)
+        
+        정렬 컬럼 값이 없는(NULL) 상품도 제외하지 않고 맨 뒤에 붙임
+        (값 있는 상품을 인덱스 순서로 모두 읽은 뒤 NULL 상품을 같은 인덱스의 나머지 키 순서로 이어서 조회)
+        
+        Args:
+            sort: SEARCH_SORT_OPTIONS 키 ("rating", "price", "price_desc", "rank")
+            cursor: 이전 결과의 next_cursor (OFFSET 대신 마지막 행 기준으로 이어서 조회)
+            
+        Returns:
+            {"items": [dict, ...], "next_cursor": str 또는 None}
+        """
+        if sort not in SEARCH_SORT_OPTIONS:
+            raise ValueError(f"지원하지 않는 정렬: {sort} (가능: {', '.join(SEARCH_SORT_OPTIONS)})")
+        
+        sort_keys = SEARCH_SORT_OPTIONS[sort]
+        sort_column = sort_keys[0][0]
+        limit = max(1, min(int(limit), SEARCH_MAX_LIMIT))
+        
+        conditions: List[str] = []
+        params: List[Any] = []
+        
+        # 정렬 컬럼이 아닌 범위 필터는 단항 + 로 인덱스 탐색 후보에서 제외
+        # → 플래너가 필터 범위 인덱스 + 임시 정렬 대신 정렬 인덱스를 고르고, 필터는 같은 인덱스 항목에서 평가
+        def filter_column(column: str) -> str:
+            return column if column == sort_column else f"+{column}"
+        
+        if city:
+            conditions.append("destination_city = ?")
+            params.append(city)
+        if max_price is not None:
+            conditions.append(f"{filter_column('price_value')} <= ?")
+            params.append(max_price)
+        if min_price is not None:
+            conditions.append(f"{filter_column('price_value')} >= ?")
+            params.append(min_price)
+        if min_rating is not None:
+            conditions.append(f"{filter_column('rating_value')} >= ?")
+            params.append(min_rating)
+        if providers:
+            conditions.append(f"provider IN ({', '.join('?' for _ in providers)})")
+            params.extend(providers)
+        if keyword and keyword.strip():
+            if self.fts_available:
+                conditions.append("rowid IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?)")
+                params.append(self._fts_query(keyword))
+            else:
+                conditions.append("(title LIKE ? OR subtitle LIKE ? OR theme_tags LIKE ?)")
+                params.extend([f"%{keyword.strip()}%"] * 3)
+        
+        # 커서 = 마지막 행의 정렬 키 값 목록 (첫 값이 None 이면 NULL 단계 진행 중)
+        after = self._decode_cursor(cursor) if cursor else None
+        in_null_phase = after is not None and after[0] is None
+        
+        rows = []
+        if not in_null_phase:
+            rows = self._search_phase(conditions + [f"{sort_column} IS NOT NULL"], params,
+                                      sort_keys, after, limit + 1, first_not_null=True)  # 다음 페이지 확인용 1행 추가
+        if len(rows) <= limit:
+            rows += self._search_phase(conditions + [f"{sort_column} IS NULL"], params,
+                                       sort_keys[1:], after[1:] if in_null_phase else None, limit + 1 - len(rows))
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        items = []
+        for row in rows:
+            item = dict(row)
+            item.pop("_rowid")
+            items.append(item)
+        
+        next_cursor = None
+        if has_more and rows:
+            last = rows[-1]
+            next_cursor = self._encode_cursor([last["_rowid" if column == "rowid" else column] for column, _ in sort_keys])
+        
+        return {"items": items, "next_cursor": next_cursor}
+    
+    def get_product(self, provider: str, provider_product_id: str) -> Optional[Dict[str, Any]]:
+        """단일 상품 조회 (기본키)"""
+        row = self.conn.execute(
+            "SELECT * FROM products WHERE provider = ? AND provider_product_id = ?",
+            (provider, str(provider_product_id))
+        ).fetchone()
+        return dict(row) if row else None
+    
+    # =========================================================================
+    # 대량 적재 (upsert)
+    # =========================================================================
+    
+    def upsert_products(self, products: List[Dict[str, Any]]) -> int:
+        """
+        통합 스키마 상품 목록을 executemany 한 번으로 upsert
+        (provider, provider_product_id) 충돌 시 기존 행 갱신, created_at 유지
+        
+        트랜잭션은 호출자가 관리 (bulk_load_csvs 는 전체를 한 트랜잭션으로 묶음)
+        """
+        rows = [tuple(product.get(col) for col in PRODUCT_COLUMNS) for product in products]
+        if rows:
+            self.conn.executemany(UPSERT_PRODUCT_SQL, rows)
+            if self.track_history:
+                self.append_history(products)
+        return len(rows)
+    
+    def bulk_load_csvs(self, csv_paths: Iterable[str], chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        도시 CSV들을 청크 단위로 변환하여 한 트랜잭션으로 upsert
+        
+        Args:
+            csv_paths: CSV 파일 또는 디렉토리 경로 목록 (디렉토리는 도시 CSV 자동 탐색)
+            chunk_size: executemany 1회당 행 수
+            
+        Returns:
+            {"files", "rows", "skipped", "elapsed_sec", "rows_per_sec"}
+        """
+        stats = {"files": 0, "rows": 0, "skipped": 0, "elapsed_sec": 0.0, "rows_per_sec": 0.0}
+        started = time.perf_counter()
+        
+        try:
+            with self.conn:  # 전체 적재를 단일 트랜잭션으로 (실패 시 롤백)
+                for csv_path in find_city_csvs(csv_paths):
+                    stats["files"] += 1
+                    for chunk in iter_unified_chunks(csv_path, chunk_size, stats):
+                        stats["rows"] += self.upsert_products(chunk)
+        except Exception as e:
+            print(f"❌ 대량 적재 실패 (롤백됨): {e}")
+            raise
+        
+        elapsed = time.perf_counter() - started
+        stats["elapsed_sec"] = round(elapsed, 3)
+        stats["rows_per_sec"] = round(stats["rows"] / elapsed, 1) if elapsed > 0 else 0.0
+        
+        print(f"✅ 대량 적재 완료: {stats['files']}개 파일, {stats['rows']:,}행 "
+              f"(건너뜀 {stats['skipped']}) - {stats['elapsed_sec']}초, {stats['rows_per_sec']:,.0f} rows/sec")
+        return stats
+    
+    # =========================================================================
+    # 가격/평점 이력 (구간 길이 부호화)
+    # =========================================================================
+    
+    @staticmethod
+    def _to_epoch(fetch_ts: Any) -> int:
+        """ISO8601 (Z/오프셋 포함 가능, 없으면 UTC) 또는 숫자 → epoch 초"""
+        if isinstance(fetch_ts, (int, float)):
+            return int(fetch_ts)
+        if not fetch_ts:
+            return int(time.time())
+        parsed = datetime.fromisoformat(str(fetch_ts).replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp())
+    
+    def _history_product_ids(self, keys: Iterable[tuple], create: bool = True) -> Dict[tuple, int]:
+        """(provider, provider_product_id) → 이력 상품 id (create=False 면 없는 상품 제외)"""
+        keys = [(provider, str(product_id)) for provider, product_id in keys]
+        missing = list(dict.fromkeys(keys))
+        found: Dict[tuple, int] = {}
+        if missing and create:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO history_products (provider, provider_product_id) VALUES (?, ?)", missing
+            )
+        for start in range(0, len(missing), 400):
+            batch = missing[start:start + 400]
+            placeholders = " OR ".join("(provider = ? AND provider_product_id = ?)" for _ in batch)
+            params = [value for key in batch for value in key]
+            for row in self.conn.execute(
+                f"SELECT id, provider, provider_product_id FROM history_products WHERE {placeholders}", params
+            ):
+                found[(row[1], row[2])] = row[0]
+        return {key: found[key] for key in keys if key in found}
+    
+    def append_history(self, products: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        통합 스키마 상품 스냅샷을 이력에 추가
+        
+        관측 시각은 fetch_ts (CSV 수집일시 기준). 마지막 구간과 값(가격/통화/평점/리뷰수/순위)이 같으면
+        last_ts 만 연장 (구간 길이 부호화), 다르면 새 구간 추가. 같은 CSV 를 다시 적재해 이미 기록된
+        시각(구간 시작/끝)과 값이 그대로 들어오면 건너뜀. 트랜잭션은 호출자가 관리
+        
+        Returns:
+            {"extended": 연장된 구간 수, "inserted": 새 구간 수, "duplicates": 이미 기록된 관측 수}
+        """
+        stats = {"extended": 0, "inserted": 0, "duplicates": 0}
+        keys = [(p.get("provider"), p.get("provider_product_id")) for p in products]
+        ids = self._history_product_ids(key for key in keys if key[0] and key[1])
+        tails: Dict[int, Optional[tuple]] = {}
+        
+        for product, key in zip(products, keys):
+            product_id = ids.get((key[0], str(key[1])))
+            if product_id is None:
+                continue
+            ts = self._to_epoch(product.get("fetch_ts"))
+            values = tuple(product.get(col) for col in HISTORY_VALUE_COLUMNS)
+            
+            if product_id not in tails:
+                tails[product_id] = self.conn.execute(
+                    f"SELECT first_ts, last_ts, {', '.join(HISTORY_VALUE_COLUMNS)} FROM product_history "
+                    "WHERE product_id = ? ORDER BY first_ts DESC LIMIT 1", (product_id,)
+                ).fetchone()
+            tail = tails[product_id]
+            
+            if tail is not None and ts in (tail[0], tail[1]) and tuple(tail[2:]) == values:
+                # 이미 기록된 관측 (같은 CSV 재적재)
+                stats["duplicates"] += 1
+                continue
+            
+            if tail is not None and ts >= tail[0] and tuple(tail[2:]) == values:
+                # 값 변화 없음 → 마지막 구간 연장
+                self.conn.execute(
+                    "UPDATE product_history SET last_ts = MAX(last_ts, ?), observations = observations + 1 "
+                    "WHERE product_id = ? AND first_ts = ?", (ts, product_id, tail[0])
+                )
+                tails[product_id] = (tail[0], max(tail[1], ts)) + values
+                stats["extended"] += 1
+                continue
+            
+            # 값 변화 → 새 구간 (같은 시각이면 마지막 관측값으로 교체)
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO product_history (product_id, first_ts, last_ts, {', '.join(HISTORY_VALUE_COLUMNS)}) "
+                f"VALUES (?, ?, ?, {', '.join('?' for _ in HISTORY_VALUE_COLUMNS)})",
+                (product_id, ts, ts) + values
+            )
+            if tail is None or ts >= tail[0]:
+                tails[product_id] = (ts, ts) + values
+            stats["inserted"] += 1
+        
+        return stats
+    
+    def get_history(self, products: Iterable[tuple], start: Optional[Any] = None,
+                    end: Optional[Any] = None, days: Optional[float] = None) -> Dict[tuple, List[Dict[str, Any]]]:
+        """
+        여러 상품의 기간 내 이력 구간 조회
+        
+        예) 상품 500개의 최근 90일 가격
+            db.get_history([("Klook", "12345"), ...], days=90)
+        
+        Args:
+            products: (provider, provider_product_id) 목록
+            start/end: ISO8601 문자열 또는 epoch 초 (days 를 주면 start = 지금 - days)
+            
+        Returns:
+            {(provider, provider_product_id): [구간 dict (HISTORY_RUN_COLUMNS), ...]} (시간순)
+        """
+        end_ts = self._to_epoch(end) if end is not None else int(time.time())
+        if days is not None:
+            start_ts = end_ts - int(days * 86400)
+        else:
+            start_ts = self._to_epoch(start) if start is not None else 0
+        
+        ids = self._history_product_ids(products, create=False)
+        # 기간 시작 이전에 시작해 기간 안까지 이어지는 구간 1개 + 기간 안에서 시작한 구간들
+        sql = (
+            f"SELECT {', '.join(HISTORY_RUN_COLUMNS)} FROM product_history "
+            "WHERE product_id = ? AND first_ts <= ? AND first_ts >= COALESCE("
+            "(SELECT MAX(first_ts) FROM product_history WHERE product_id = ? AND first_ts <= ?), ?) "
+            "ORDER BY first_ts"
+        )
+        history = {}
+        for key, product_id in ids.items():
+            runs = []
+            for row in self.conn.execute(sql, (product_id, end_ts, product_id, start_ts, start_ts)):
+                if row["last_ts"] >= start_ts:
+                    runs.append(dict(row))
+            history[key] = runs
+        return history
+    
+    def downsample_history(self, older_than_days: float = HISTORY_DOWNSAMPLE_DAYS,
+                           bucket_seconds: int = HISTORY_DOWNSAMPLE_BUCKET) -> Dict[str, int]:
+        """
+        오래된 이력 구간을 bucket_seconds 단위로 합침 (구간 값 = 마지막 관측값, 최저/최고가 보존)
+        합친 뒤 값이 같은 연속 구간은 다시 하나로 병합
+        
+        Returns:
+            {"products", "runs_before", "runs_after"}
+        """
+        cutoff = int(time.time() - older_than_days * 86400)
+        stats = {"products": 0, "runs_before": 0, "runs_after": 0}
+        product_ids = [row[0] for row in self.conn.execute(
+            "SELECT DISTINCT product_id FROM product_history WHERE last_ts < ? AND resolution < ?",
+            (cutoff, bucket_seconds)
+        )]
+        
+        insert_sql = (
+            f"INSERT INTO product_history (product_id, {', '.join(HISTORY_RUN_COLUMNS)}) "
+            f"VALUES (?, {', '.join('?' for _ in HISTORY_RUN_COLUMNS)})"
+        )
+        with self.conn:
+            for product_id in product_ids:
+                runs = [dict(row) for row in self.conn.execute(
+                    f"SELECT {', '.join(HISTORY_RUN_COLUMNS)} FROM product_history "
+                    "WHERE product_id = ? AND last_ts < ? ORDER BY first_ts", (product_id, cutoff)
+                )]
+                if not runs:
+                    continue
+                
+                merged: List[Dict[str, Any]] = []
+                for run in runs:
+                    run["price_min"] = run["price_value"] if run["price_min"] is None else run["price_min"]
+                    run["price_max"] = run["price_value"] if run["price_max"] is None else run["price_max"]
+                    previous = merged[-1] if merged else None
+                    same_bucket = previous is not None and previous["first_ts"] // bucket_seconds == run["first_ts"] // bucket_seconds
+                    same_values = previous is not None and all(previous[col] == run[col] for col in HISTORY_VALUE_COLUMNS)
+                    if same_bucket or same_values:
+                        previous["last_ts"] = max(previous["last_ts"], run["last_ts"])
+                        previous["observations"] += run["observations"]
+                        for col in HISTORY_VALUE_COLUMNS:
+                            previous[col] = run[col]
+                        prices = [p for p in (previous["price_min"], run["price_min"]) if p is not None]
+                        previous["price_min"] = min(prices) if prices else None
+                        prices = [p for p in (previous["price_max"], run["price_max"]) if p is not None]
+                        previous["price_max"] = max(prices) if prices else None
+                    else:
+                        merged.append(dict(run))
+                    merged[-1]["resolution"] = max(merged[-1]["resolution"], bucket_seconds)
+                
+                self.conn.execute(
+                    "DELETE FROM product_history WHERE product_id = ? AND last_ts < ?", (product_id, cutoff)
+                )
+                self.conn.executemany(
+                    insert_sql, [(product_id,) + tuple(run[col] for col in HISTORY_RUN_COLUMNS) for run in merged]
+                )
+                stats["products"] += 1
+                stats["runs_before"] += len(runs)
+                stats["runs_after"] += len(merged)
+        
+        print(f"✅ 이력 다운샘플 완료: {stats['products']}개 상품, "
+              f"{stats['runs_before']:,} → {stats['runs_after']:,}개 구간 ({older_than_days}일 이전, {bucket_seconds}초 단위)")
+        return stats
+    
+    def close(self):
+        """연결 종료"""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
 
 
 class KlookToUnifiedConverter:
     """KLOOK 32컬럼 데이터를 통합 스키마로 변환하는 클래스"""
     
+    # 행마다 동일한 JSON 값은 한 번만 직렬화 (대량 적재 시 json.dumps 비용 절감)
+    _EMPTY_LIST_JSON = json.dumps([], ensure_ascii=False)
+    _DEFAULT_LANGUAGE_JSON = json.dumps(["ko"], ensure_ascii=False)
+    _DEFAULT_CANCEL_POLICY_JSON = json.dumps({"free_until_hours": None}, ensure_ascii=False)
+    
     @staticmethod
     def extract_product_id_from_url(url: str) -> str:
         """KLOOK URL에서 상품 ID 추출"""
@@ -192,7 +775,11 @@ class KlookToUnifiedConverter:
             return None
         
         try:
-            rating = float(str(rating_str).replace(',', ''))
+            # "4.7", "4.7/5" 모두 허용 (앞쪽 숫자 사용)
+            match = re.search(r'\d+(?:\.\d+)?', str(rating_str).replace(',', ''))
+            if not match:
+                return None
+            rating = float(match.group(0))
             
             # 이미 0~5 스케일인 경우
             if 0 <= rating <= 5:
@@ -277,7 +864,7 @@ class KlookToUnifiedConverter:
         core_fields = [
             str(klook_data.get('상품명', '')),
             str(klook_data.get('URL', '')),
-            str(klook_data.get('가격_정제', ''))
+            str(klook_data.get('가격_정제', klook_data.get('가격', '')))
         ]
         product_hash = hashlib.sha1(''.join(core_fields).encode()).hexdigest()
         
@@ -285,11 +872,11 @@ class KlookToUnifiedConverter:
             # ⭐ 필수 식별 정보
             "provider": "Klook",
             "provider_product_id": cls.extract_product_id_from_url(klook_data.get('URL', '')),
-            "fetch_ts": datetime.utcnow().isoformat() + "Z",
+            "fetch_ts": cls._parse_fetch_ts(klook_data.get('수집일시') or klook_data.get('수집_시간')),
             "fx_rate": None,  # TODO: 환율 API 연동
             
             # ⭐ 필수 목적지/분류
-            "destination_city": klook_data.get('도시명', ''),
+            "destination_city": klook_data.get('도시명') or klook_data.get('도시', ''),
             "country": klook_data.get('국가', ''),  # TODO: 영문명 변환
             "theme_tags": json.dumps(cls.extract_themes_from_title(klook_data.get('상품명', '')), ensure_ascii=False),
             
@@ -299,38 +886,38 @@ class KlookToUnifiedConverter:
             "supplier_name": klook_data.get('공급사', ''),
             "duration_hours": cls._parse_duration(klook_data.get('소요시간', '')),
             "pickup": 1 if klook_data.get('픽업포함') else 0,
-            "language": json.dumps(["ko"], ensure_ascii=False),  # TODO: 실제 언어 크롤링
+            "language": cls._DEFAULT_LANGUAGE_JSON,  # TODO: 실제 언어 크롤링
             
             # 포함/불포함 (TODO: 실제 크롤링)
-            "included": json.dumps([], ensure_ascii=False),
-            "excluded": json.dumps([], ensure_ascii=False),
+            "included": cls._EMPTY_LIST_JSON,
+            "excluded": cls._EMPTY_LIST_JSON,
             "meeting_point": klook_data.get('미팅포인트', ''),
             
             # ⭐ 필수 가격 정보
-            "price_value": cls._parse_price(klook_data.get('가격_정제', '')),
+            "price_value": cls._parse_price(klook_data.get('가격_정제') or klook_data.get('가격', '')),
             "price_currency": cls.convert_to_iso4217(klook_data.get('통화', 'KRW')),
-            "option_list": json.dumps([], ensure_ascii=False),  # TODO: 옵션 크롤링
+            "option_list": cls._EMPTY_LIST_JSON,  # TODO: 옵션 크롤링
             "price_basis": "adult",
             
             # 평점/리뷰
-            "rating_value": cls.normalize_rating(klook_data.get('평점_정제', '')),
+            "rating_value": cls.normalize_rating(klook_data.get('평점_정제') or klook_data.get('평점', '')),
             "rating_count": cls._parse_int(klook_data.get('리뷰수', 0)),
             
             # 취소/환불 정책 (TODO: 크롤링)
-            "cancel_policy": json.dumps({"free_until_hours": None}, ensure_ascii=False),
+            "cancel_policy": cls._DEFAULT_CANCEL_POLICY_JSON,
             
             # 가용성 (TODO: 크롤링)
-            "availability_calendar": json.dumps([], ensure_ascii=False),
+            "availability_calendar": cls._EMPTY_LIST_JSON,
             
             # 노출/순위
-            "rank_position": klook_data.get('탭내_랭킹', 999),
+            "rank_position": cls._parse_int(klook_data.get('탭내_랭킹') or klook_data.get('순위') or 999),
             
             # ⭐ 필수 링크/이미지
             "landing_url": klook_data.get('URL', ''),
             "affiliate_url": None,  # TODO: 제휴 링크 생성
             "images": json.dumps([
-                klook_data.get('메인이미지URL', ''),
-                klook_data.get('썸네일URL', '')
+                klook_data.get('메인이미지URL', klook_data.get('메인이미지', '')),
+                klook_data.get('썸네일URL', klook_data.get('썸네일이미지', ''))
             ], ensure_ascii=False),
             
             # 메타데이터
@@ -343,6 +930,20 @@ class KlookToUnifiedConverter:
             }, ensure_ascii=False)
         }
     
+    @staticmethod
+    def _parse_fetch_ts(collected_at: Any) -> str:
+        """수집일시 (시간대 없으면 KST) → ISO8601 UTC, 비었거나 해석할 수 없으면 현재 시각"""
+        text = str(collected_at or '').strip()
+        if text:
+            try:
+                parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+                if parsed.tzinfo is None:
+                    parsed = parsed.replace(tzinfo=CRAWL_TIMEZONE)
+                return parsed.astimezone(timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+            except ValueError:
+                pass
+        return datetime.utcnow().isoformat() + "Z"
+    
     @staticmethod
     def _parse_duration(duration_str: str) -> Optional[float]:
         """소요시간을 시간 단위로 변환"""
@@ -391,6 +992,90 @@ class KlookToUnifiedConverter:
             return 0
 
 
+class KKdayToUnifiedConverter(KlookToUnifiedConverter):
+    """KKday 표준 30컬럼 데이터를 통합 스키마로 변환하는 클래스"""
+    
+    @staticmethod
+    def extract_product_id_from_url(url: str) -> str:
+        """KKday URL에서 상품 ID 추출 (https://www.kkday.com/ko/product/10999-xxx)"""
+        match = re.search(r'/product/(\d+)', str(url))
+        if match:
+            return match.group(1)
+        return hashlib.md5(str(url).encode()).hexdigest()[:12]
+    
+    @classmethod
+    def convert_kkday_data(cls, kkday_data: Dict[str, Any]) -> Dict[str, Any]:
+        """KKday CSV 행 데이터를 통합 스키마로 변환 (KLOOK 변환 규칙 재사용)"""
+        unified = cls.convert_klook_data(kkday_data)
+        unified["provider"] = "KKday"
+        
+        product_id = str(kkday_data.get('상품번호', '')).strip()
+        if product_id.isdigit():
+            unified["provider_product_id"] = product_id
+        return unified
+
+
+def get_converter_for_row(row: Dict[str, Any], csv_path: str = ""):
+    """CSV 행의 데이터소스/파일명으로 변환 함수 선택"""
+    source = str(row.get('데이터소스', '')).lower()
+    file_name = os.path.basename(csv_path).lower()
+    
+    if source == 'kkday' or file_name.startswith('kkday_') or 'kkday.com' in str(row.get('URL', '')):
+        return KKdayToUnifiedConverter.convert_kkday_data
+    return KlookToUnifiedConverter.convert_klook_data
+
+
+def find_city_csvs(paths: Iterable[str]) -> List[str]:
+    """
+    적재 대상 도시 CSV 목록
+    - 파일 경로는 그대로 사용
+    - 디렉토리는 하위의 {klook|kkday}_{도시}_products.csv 만 수집 (국가 통합 CSV 제외)
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    
+    csv_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for csv_file in sorted(glob.glob(os.path.join(path, "**", "*_products.csv"), recursive=True)):
+                name = os.path.basename(csv_file)
+                if name.startswith(("klook_", "kkday_")):
+                    csv_files.append(csv_file)
+        elif os.path.isfile(path):
+            csv_files.append(path)
+    return csv_files
+
+
+def iter_unified_chunks(csv_path: str, chunk_size: int = BULK_CHUNK_SIZE,
+                        stats: Optional[Dict[str, Any]] = None) -> Iterator[List[Dict]]:
+    """CSV를 스트리밍으로 읽어 통합 스키마로 변환한 청크를 생성 (URL 없는 행은 건너뜀)"""
+    chunk = []
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            if not row.get('URL'):
+                if stats is not None:
+                    stats["skipped"] += 1
+                continue
+            
+            chunk.append(get_converter_for_row(row, csv_path)(row))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    
+    if chunk:
+        yield chunk
+
+
+def bulk_load_city_csvs(csv_paths: Iterable[str], db_path: str = "unified_travel_products.db",
+                        chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, Any]:
+    """도시 CSV(또는 data 디렉토리)를 통합 DB로 대량 적재하는 편의 함수"""
+    db = UnifiedTravelDatabase(db_path)
+    try:
+        return db.bulk_load_csvs(csv_paths, chunk_size=chunk_size)
+    finally:
+        db.close()
+
+
 def create_unified_database(db_path: str = "unified_travel_products.db") -> UnifiedTravelDatabase:
     """통합 데이터베이스 생성 편의 함수"""
     return UnifiedTravelDatabase(db_path)